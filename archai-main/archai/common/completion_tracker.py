@@ -0,0 +1,141 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from archai.common.store import ArchaiStore
+
+
+def _is_status_final(entity: Dict[str, Any]) -> bool:
+    return entity.get("status") in ["complete", "failed"]
+
+
+class CompletionTracker:
+    """Tracks the completion of jobs whose statuses are recorded in an `ArchaiStore`.
+
+    Each poll fetches the statuses of all pending jobs with a single bulk query, instead of
+    one query per job. The interval between polls is reset to `min_poll_interval` whenever a
+    job completes and multiplied by `backoff_factor` (up to `max_poll_interval`) otherwise,
+    so bursts of completions are picked up quickly while idle waits issue few requests.
+
+    """
+
+    def __init__(
+        self,
+        store: ArchaiStore,
+        names: Optional[Iterable[str]] = None,
+        is_complete: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        min_poll_interval: Optional[float] = 1.0,
+        max_poll_interval: Optional[float] = 60.0,
+        backoff_factor: Optional[float] = 2.0,
+    ) -> None:
+        """Initialize the tracker.
+
+        Args:
+            store: Store that holds the status entities of the jobs.
+            names: Names of the jobs to be tracked.
+            is_complete: Function that tells whether a job is finished given its entity.
+                Defaults to a `status` column equal to `complete` or `failed`.
+            min_poll_interval: Minimum interval between polls (in seconds).
+            max_poll_interval: Maximum interval between polls (in seconds).
+            backoff_factor: Factor that increases the interval after a poll without completions.
+
+        """
+
+        assert 0 < min_poll_interval <= max_poll_interval, "`min_poll_interval` must be in (0, `max_poll_interval`]."
+        assert backoff_factor >= 1.0, "`backoff_factor` must be greater or equal to 1."
+
+        self.store = store
+        self.is_complete = is_complete or _is_status_final
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.backoff_factor = backoff_factor
+
+        self.poll_interval = min_poll_interval
+        self.pending: List[str] = []
+        self.last_statuses: Dict[str, Dict[str, Any]] = {}
+        self.completed: Dict[str, Dict[str, Any]] = {}
+        self.add(names or [])
+
+    def add(self, names: Iterable[str]) -> None:
+        """Add jobs to be tracked.
+
+        Args:
+            names: Names of the jobs.
+
+        """
+
+        for name in names:
+            if name not in self.completed and name not in self.pending:
+                self.pending.append(name)
+
+    def remove(self, names: Iterable[str]) -> None:
+        """Stop tracking pending jobs.
+
+        Args:
+            names: Names of the jobs.
+
+        """
+
+        names = set(names)
+        self.pending = [name for name in self.pending if name not in names]
+
+    def poll(self) -> Dict[str, Dict[str, Any]]:
+        """Fetch the statuses of all pending jobs and update the poll interval.
+
+        Returns:
+            Entities of the jobs that completed since the previous poll.
+
+        """
+
+        if len(self.pending) == 0:
+            return {}
+
+        entities = self.store.get_existing_statuses(self.pending)
+        self.last_statuses = entities
+        done = {name: e for name, e in entities.items() if self.is_complete(e)}
+
+        self.pending = [name for name in self.pending if name not in done]
+        self.completed.update(done)
+
+        if len(done) > 0:
+            self.poll_interval = self.min_poll_interval
+        else:
+            self.poll_interval = min(self.poll_interval * self.backoff_factor, self.max_poll_interval)
+
+        return done
+
+    def wait(self) -> None:
+        """Sleep until the next poll is due."""
+
+        time.sleep(self.poll_interval)
+
+    def as_completed(self, timeout: Optional[float] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield the jobs as they complete.
+
+        Args:
+            timeout: Maximum time without any completion (in seconds) before giving up on
+                the pending jobs, which remain in `pending`. If `None`, waits indefinitely.
+
+        Yields:
+            Name and entity of each completed job.
+
+        """
+
+        last_progress = time.time()
+
+        while len(self.pending) > 0:
+            done = self.poll()
+            for name, entity in done.items():
+                yield name, entity
+
+            if len(self.pending) == 0:
+                break
+
+            if len(done) > 0:
+                last_progress = time.time()
+            elif timeout is not None and time.time() - last_progress >= timeout:
+                break
+
+            self.wait()
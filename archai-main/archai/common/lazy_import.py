@@ -0,0 +1,99 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import importlib
+import sys
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class LazyModule(ModuleType):
+    """Module proxy that imports the underlying module on first attribute access.
+
+    Heavy or optional dependencies that are only used by a few functions can be declared
+    at module level with `lazy_import`, so they are imported when (and if) these
+    functions run, instead of when the module that declares them is imported.
+
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initialize the module proxy.
+
+        Args:
+            name: Full name of the module, e.g., `matplotlib.pyplot`.
+
+        """
+
+        super().__init__(name)
+
+        self.__dict__["_module"] = None
+
+    def _load(self) -> ModuleType:
+        if self.__dict__["_module"] is None:
+            self.__dict__["_module"] = importlib.import_module(self.__name__)
+
+        return self.__dict__["_module"]
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        status = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({status})>"
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Import a module on first attribute access.
+
+    Args:
+        name: Full name of the module.
+
+    Returns:
+        The module itself if it has already been imported, or a `LazyModule` otherwise.
+
+    """
+
+    if name in sys.modules:
+        return sys.modules[name]
+
+    return LazyModule(name)
+
+
+def lazy_exports(
+    module_name: str, exports: Dict[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """Create the `__getattr__` and `__dir__` functions (PEP 562) of a lazily-exported package.
+
+    Exported names are imported from their modules on first access, so importing the
+    package does not import the dependencies of every class that it exports.
+
+    Examples:
+        >>> __getattr__, __dir__ = lazy_exports(__name__, {"MyClass": "my_package.my_module"})
+
+    Args:
+        module_name: Name of the package (`__name__`).
+        exports: Dictionary mapping exported names to the modules that define them.
+
+    Returns:
+        Tuple of (`__getattr__`, `__dir__`).
+
+    """
+
+    def __getattr__(name: str) -> Any:
+        if name not in exports:
+            raise AttributeError(f"module '{module_name}' has no attribute '{name}'")
+
+        value = getattr(importlib.import_module(exports[name]), name)
+
+        # Caches the value, so `__getattr__` is not called again
+        setattr(sys.modules[module_name], name, value)
+
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[module_name])) | set(exports))
+
+    return __getattr__, __dir__
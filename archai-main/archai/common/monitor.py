@@ -4,22 +4,25 @@ import time
 import argparse
 import json
 import os
-from typing import List, Dict
-from azure.ai.ml.identity import AzureMLOnBehalfOfCredential
-from azure.identity import DefaultAzureCredential
+from typing import List, Dict, TYPE_CHECKING
+from archai.common.completion_tracker import CompletionTracker
 from archai.common.store import ArchaiStore
-from azure.ai.ml import MLClient
+
+if TYPE_CHECKING:
+    from azure.ai.ml import MLClient
 
 
 class JobCompletionMonitor:
     """ This helper class uses the ArchaiStore to monitor the status of some long running
     training operations and the status of the Azure ML pipeline those jobs are running in
     and waits for them to finish (either successfully or with a failure)"""
-    def __init__(self, store : ArchaiStore, ml_client : MLClient, metric_keys: List[str], pipeline_id=None, timeout=3600, throw_on_failure_rate=0.1):
+    def __init__(self, store : ArchaiStore, ml_client : 'MLClient', metric_keys: List[str], pipeline_id=None, timeout=3600, throw_on_failure_rate=0.1,
+                 poll_interval=20, min_poll_interval=1):
         """
         Initialize a JobCompletionMonitor instance.
         :param store: an instance of ArchaiStore to monitor the status of some long running training operations
-        :param ml_client: an instance of MLClient to check the status of the Azure ML pipeline those jobs are running in
+        :param ml_client: an instance of MLClient to check the status of the Azure ML pipeline those jobs are running in,
+        or None to only monitor the ArchaiStore (for example when it is backed by a LocalStoreBackend).
         :param metric_keys: a list of column names to monitor and return from the Azure table.
         :param pipeline_id: (optional) the ID of the Azure ML pipeline to monitor, if not provided we can get this from the ArchaiStore.
         :param timeout: (optional) the timeout in seconds
@@ -27,6 +30,9 @@ class JobCompletionMonitor:
         Zero means throw exception on any failure.
         This is handy if you want to allow the search to continue even when a small percentage of jobs fails.
         Default is 0.1, or 10% or more of jobs failed will raise an exception.
+        :param poll_interval: (optional) the maximum interval in seconds between two checks of the job statuses.
+        :param min_poll_interval: (optional) the interval in seconds right after a job completes, which then backs off
+        up to poll_interval while no job completes.
         """
         self.store = store
         self.ml_client = ml_client
@@ -34,28 +40,31 @@ class JobCompletionMonitor:
         self.pipeline_id = pipeline_id
         self.metric_keys = metric_keys
         self.throw_on_failure_rate = throw_on_failure_rate
+        self.poll_interval = poll_interval
+        self.min_poll_interval = min(min_poll_interval, poll_interval)
 
-    def _check_entity_status(self, waiting, completed):
+    def _check_entity_status(self, tracker, completed):
         failed = 0
-        for i in range(len(waiting) - 1, -1, -1):
-            id = waiting[i]
-            e = self.store.get_status(id)
-            if self.pipeline_id is None and 'pipeline_id' in e:
-                self.pipeline_id = e['pipeline_id']
-            if e is not None and 'status' in e and (e['status'] == 'complete' or e['status'] == 'failed'):
-                del waiting[i]
-                completed[id] = e
-                if e['status'] == 'failed':
-                    error = e['error']
-                    print(f'Training job {id} failed with error: {error}')
-                    failed += 1
+        # the tracker fetches the statuses of all the waiting jobs in one bulk query.
+        done = tracker.poll()
+        if self.pipeline_id is None:
+            for e in tracker.last_statuses.values():
+                if 'pipeline_id' in e:
+                    self.pipeline_id = e['pipeline_id']
+                    break
+        for id, e in done.items():
+            completed[id] = e
+            if e['status'] == 'failed':
+                error = e['error']
+                print(f'Training job {id} failed with error: {error}')
+                failed += 1
+            else:
+                if len(self.metric_keys) > 0 and self.metric_keys[0] in e:
+                    key = self.metric_keys[0]
+                    metric = e[key]
+                    print(f'Training job {id} completed with {key} = {metric}')
                 else:
-                    if len(self.metric_keys) > 0 and self.metric_keys[0] in e:
-                        key = self.metric_keys[0]
-                        metric = e[key]
-                        print(f'Training job {id} completed with {key} = {metric}')
-                    else:
-                        print(f'Training job {id} completed')
+                    print(f'Training job {id} completed')
         return failed
 
     def _get_model_results(self, model_ids, completed):
@@ -75,23 +84,26 @@ class JobCompletionMonitor:
             'models': models
         }
 
-    def _cancel_waiting_list(self, waiting, pipeline_status):
+    def _cancel_waiting_list(self, tracker, pipeline_status):
         # cancel any remaining jobs in the waiting list by marking an error status on the entity
-        for i in range(len(waiting) - 1, -1, -1):
-            id = waiting[i]
-            del waiting[i]
-            e = self.store.get_status(id)
+        waiting = list(tracker.pending)
+        tracker.remove(waiting)
+        existing = self.store.get_existing_statuses(waiting)
+        entities = []
+        for id in waiting:
+            e = existing[id] if id in existing else self.store.get_status(id)
             if 'error' not in e:
                 e['error'] = f'Pipeline {pipeline_status}'
             if 'status' not in e or e['status'] != 'complete':
                 e['status'] = pipeline_status.lower()
-            self.store.merge_status_entity(e)
+            entities += [e]
+        self.store.merge_status_entities(entities)
 
     def _get_pipeline_status(self):
         # try and get the status of the Azure ML pipeline, it returns strings like
         # 'Completed', 'Failed', 'Running', 'Preparing', 'Canceled' and so on.
         try:
-            if self.pipeline_id is not None:
+            if self.pipeline_id is not None and self.ml_client is not None:
                 train_job = self.ml_client.jobs.get(self.pipeline_id)
                 if train_job is not None:
                     return train_job.status
@@ -106,13 +118,14 @@ class JobCompletionMonitor:
         :return: a list of dictionaries containing details about each model
         """
         completed = {}
-        waiting = list(model_ids)
+        tracker = CompletionTracker(self.store, model_ids, min_poll_interval=self.min_poll_interval,
+                                    max_poll_interval=self.poll_interval)
         start = time.time()
         failed = 0
 
-        while len(waiting) > 0:
-            failed += self._check_entity_status(waiting, completed)
-            if len(waiting) == 0:
+        while len(tracker.pending) > 0:
+            failed += self._check_entity_status(tracker, completed)
+            if len(tracker.pending) == 0:
                 break
 
             # check the overall pipeline status just in case training jobs failed to even start.
@@ -121,15 +134,16 @@ class JobCompletionMonitor:
                 if pipeline_status == 'Completed':
                     # ok, all jobs are done, which means if we still have waiting tasks then they failed to
                     # even start.
-                    self._cancel_waiting_list(waiting, 'failed to start')
+                    self._cancel_waiting_list(tracker, 'failed to start')
                 elif pipeline_status == 'Failed' or pipeline_status == 'Canceled':
-                    self._cancel_waiting_list(waiting, pipeline_status)
+                    self._cancel_waiting_list(tracker, pipeline_status)
 
-            if len(waiting) > 0:
+            if len(tracker.pending) > 0:
                 if time.time() > self.timeout + start:
                     break
-                print("AmlTrainingValAccuracy: Waiting 20 seconds for partial training to complete...")
-                time.sleep(20)
+                print(f"AmlTrainingValAccuracy: Waiting {tracker.poll_interval} seconds for partial training "
+                      "to complete...")
+                tracker.wait()
 
         # awesome - they all completed!
         if len(completed) == 0:
@@ -152,6 +166,10 @@ class JobCompletionMonitor:
 
 
 def main():
+    from azure.ai.ml import MLClient
+    from azure.ai.ml.identity import AzureMLOnBehalfOfCredential
+    from azure.identity import DefaultAzureCredential
+
     parser = argparse.ArgumentParser()
     parser.add_argument('--config', help='bin hexed config json info for MLClient')
     parser.add_argument('--timeout', type=int, help='pipeline timeout in seconds (default 1 hour)', default=3600)
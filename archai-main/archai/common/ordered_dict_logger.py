@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import itertools
+import json
 import logging
 import os
 import pathlib
@@ -33,10 +34,19 @@ class OrderedDictLogger:
     original parent instead of parent of current node. To implement this we use _paths 
     variable which stores subpath when each pushd call was made.
 
+    Since saving the YAML file dumps the whole history, its cost grows with the amount of
+    logged data. When `use_journal` is enabled, each save only appends the updates since
+    the previous save to a journal (JSON lines) file, and the YAML file is written by
+    `compact()` (which is called when the logger is closed).
+
     """
 
     def __init__(
-        self, source: Optional[str] = None, file_path: Optional[str] = None, delay: Optional[float] = 60.0
+        self,
+        source: Optional[str] = None,
+        file_path: Optional[str] = None,
+        delay: Optional[float] = 60.0,
+        use_journal: Optional[bool] = False,
     ) -> None:
         """Initialize the logger.
 
@@ -44,6 +54,8 @@ class OrderedDictLogger:
             source: Source of the logger.
             file_path: File path of the log file.
             delay: Delay between log saves.
+            use_journal: Whether saves should append the updates to a journal file
+                (`file_path` with a `.jsonl` suffix) instead of dumping the whole log.
 
         """
 
@@ -58,10 +70,16 @@ class OrderedDictLogger:
         self.paths = [[""]]
         self.stack = [OrderedDict()]
 
-        if self.file_path:
-            if os.path.exists(self.file_path):
-                backup_file_path = pathlib.Path(self.file_path)
-                backup_file_path.rename(backup_file_path.with_suffix(f".{str(int(time.time()))}.yaml"))
+        self.journal_file_path = None
+        self.journal_records = []
+        if self.file_path and use_journal:
+            self.journal_file_path = str(pathlib.Path(self.file_path).with_suffix(".jsonl"))
+
+        for file_path in [self.file_path, self.journal_file_path]:
+            if file_path and os.path.exists(file_path):
+                backup_file_path = pathlib.Path(file_path)
+                backup_suffix = f".{str(int(time.time()))}{backup_file_path.suffix}"
+                backup_file_path.rename(backup_file_path.with_suffix(backup_suffix))
 
     def __enter__(self) -> OrderedDictLogger:
         return self
@@ -120,22 +138,78 @@ class OrderedDictLogger:
         """Save the current log data to an output file.
 
         This method only saves to a file if a valid `file_path` has been provided
-        in the constructor.
+        in the constructor. If `use_journal` is enabled, only the updates since the
+        previous save are appended to the journal file.
 
         """
 
-        if self.file_path:
+        if self.journal_file_path:
+            if self.journal_records:
+                with open(self.journal_file_path, "a") as f:
+                    f.writelines(self._serialize_record(record) for record in self.journal_records)
+                self.journal_records = []
+        elif self.file_path:
             with open(self.file_path, "w") as f:
                 yaml.dump(self.root_node, f)
 
+    def compact(self, file_path: Optional[str] = None) -> None:
+        """Save the whole log data to a YAML file.
+
+        Args:
+            file_path: File path of the YAML file. If not provided, uses `file_path`
+                from the constructor.
+
+        """
+
+        self.save()
+
+        file_path = file_path or self.file_path
+        if file_path:
+            with open(file_path, "w") as f:
+                yaml.dump(self.root_node, f)
+
+    @staticmethod
+    def _load_journal(file_path: str) -> OrderedDict:
+        root_node = OrderedDict()
+
+        # Nodes are indexed by their path, so records do not need to traverse the tree
+        nodes = {(): root_node}
+
+        with open(file_path, "r") as f:
+            for line in f:
+                path, key, value = json.loads(line, object_pairs_hook=OrderedDict)
+                path = tuple(path)
+
+                node = nodes.get(path)
+                if node is None:
+                    node = root_node
+                    for i, p in enumerate(path):
+                        if p not in node:
+                            node[p] = OrderedDict()
+                        node = node[p]
+                        nodes[path[: i + 1]] = node
+
+                # Overriding a node invalidates its (and its children) indexes
+                key_path = path + (key,)
+                if key_path in nodes:
+                    nodes = {k: v for k, v in nodes.items() if k[: len(key_path)] != key_path}
+
+                node[key] = value
+
+        return root_node
+
     def load(self, file_path: str) -> None:
         """Load log data from an input file.
 
         Args:
-            file_path: File path to load data from.
+            file_path: File path to load data from (YAML or journal file).
 
         """
 
+        if pathlib.Path(file_path).suffix == ".jsonl":
+            self.stack = [self._load_journal(file_path)]
+            return
+
         with open(file_path, "r") as f:
             obj = yaml.load(f, Loader=yaml.Loader)
             self.stack = [obj]
@@ -143,11 +217,22 @@ class OrderedDictLogger:
     def close(self) -> None:
         """Close the logger."""
 
-        self.save()
+        if self.journal_file_path:
+            self.compact()
+        else:
+            self.save()
 
         for handler in self.logger.handlers:
             handler.flush()
 
+    @staticmethod
+    def _serialize_record(record: List[Any]) -> str:
+        def _to_serializable(obj: Any) -> Any:
+            # NumPy and PyTorch objects are converted to Python scalars and lists
+            return obj.tolist() if hasattr(obj, "tolist") else str(obj)
+
+        return json.dumps(record, default=_to_serializable, separators=(",", ":")) + "\n"
+
     def _update_key(
         self,
         key: Any,
@@ -159,7 +244,7 @@ class OrderedDictLogger:
         if not override_key and key in self.current_node:
             raise KeyError(f"`{key}` is already being used. Cannot use it again, unless popd() is called.")
 
-        current_node = node or self.current_node
+        current_node = node if node is not None else self.current_node
         current_path = path or []
 
         for p in current_path:
@@ -168,6 +253,10 @@ class OrderedDictLogger:
             current_node = current_node[p]
         current_node[str(key)] = value
 
+        if self.journal_file_path:
+            node_path = [] if node is not None else list(itertools.chain.from_iterable(self.paths[1:]))
+            self.journal_records.append([node_path + list(current_path), str(key), value])
+
     def _update(self, obj: Dict[str, Any], override_key: Optional[bool] = True) -> None:
         for k, v in obj.items():
             self._update_key(k, v, override_key=override_key)
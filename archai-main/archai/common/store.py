@@ -4,17 +4,11 @@ import argparse
 import os
 import glob
 import sys
-import logging
 import datetime
 import platform
-import time
-import numpy as np
 import re
-from torch import Tensor
-from azure.data.tables import TableServiceClient, UpdateMode, EntityProperty, EdmType
-from azure.storage.blob import BlobClient, ContainerClient
-from azure.core.exceptions import ResourceNotFoundError
 from shutil import rmtree
+from archai.common.store_backend import StoreBackend, AzureStoreBackend
 
 
 CONNECTION_NAME = 'MODEL_STORAGE_CONNECTION_STRING'
@@ -34,18 +28,25 @@ class ArchaiStore:
     files, and updates the status to 'complete' then unlocks that row. So this ArchaiStore can be used as the backing
     store for a simple distributed job scheduler.
 
+    The storage itself is provided by a StoreBackend, which defaults to Azure.  Pass a LocalStoreBackend instead to
+    keep the table in a local SQLite database and the blobs in a local directory, for example to run a whole search
+    pipeline offline.
+
     This also has a convenient command line interface provided below.
     """
-    def __init__(self, storage_account_name, storage_account_key, blob_container_name='models', table_name='status', partition_key='main'):
+    def __init__(self, storage_account_name=None, storage_account_key=None, blob_container_name='models',
+                 table_name='status', partition_key='main', backend: StoreBackend = None):
+        if backend is None:
+            if not storage_account_name or not storage_account_key:
+                raise Exception('Either the storage account name and key or a backend must be provided')
+            backend = AzureStoreBackend(storage_account_name, storage_account_key, blob_container_name, table_name)
+
         self.storage_account_key = storage_account_key
         self.storage_account_name = storage_account_name
-        self.storage_connection_string = f'DefaultEndpointsProtocol=https;AccountName={storage_account_name};AccountKey={storage_account_key};EndpointSuffix=core.windows.net'
         self.blob_container_name = blob_container_name
         self.status_table_name = table_name
         self.partition_key = partition_key
-        self.service = None
-        self.table_client = None
-        self.container_client = None
+        self.backend = backend
 
     @staticmethod
     def parse_connection_string(storage_connection_string):
@@ -81,99 +82,19 @@ class ArchaiStore:
         """ Return a unique name for the current machine which is used as the lock identity """
         return platform.node()
 
-    def _get_status_table_service(self):
-        logger = logging.getLogger('azure.core.pipeline.policies.http_logging_policy')
-        logger.setLevel(logging.ERROR)
-        return TableServiceClient.from_connection_string(conn_str=self.storage_connection_string, logger=logger, logging_enable=False)
-
-    def _get_table_client(self):
-        if not self.table_client:
-            for i in range(6):
-                try:
-                    if not self.service:
-                        self.service = self._get_status_table_service()
-                    self.table_client = self.service.create_table_if_not_exists(self.status_table_name)
-                    return self.table_client
-                except Exception as e:
-                    self.service = None
-                    if i == 5:
-                        raise e
-                    else:
-                        print(f"### error getting table client, sleeping 1 second and trying again: {e}")
-                        time.sleep(1)
-
-        return self.table_client
-
-    def _get_container_client(self, name):
-        if not self.container_client:
-            logger = logging.getLogger('azure.core.pipeline.policies.http_logging_policy')
-            logger.setLevel(logging.ERROR)
-            self.container_client = ContainerClient.from_connection_string(
-                self.storage_connection_string,
-                container_name=name,
-                logger=logger,
-                logging_enable=False)
-            if not self.container_client.exists():
-                self.container_client.create_container()
-        return self.container_client
-
-    def _get_blob_client(self, name):
-        container = self._get_container_client(self.blob_container_name)  # make sure container exists.
-        return BlobClient.from_connection_string(self.storage_connection_string, container_name=container.container_name, blob_name=name)
-
-    def _retry_table_operation(self, function, label, retries=5, expected=[]):
-        for i in range(retries + 1):
-            try:
-                self._get_table_client()
-                result = function()
-                return result
-            except Exception as e:
-                if "Bad Request" in str(e):
-                    raise e
-                for t in expected:
-                    if isinstance(e, t):
-                        return None
-                print(f"error {label}: {e}")
-                if i == 5:
-                    raise e
-                time.sleep(1)
-                print("trying again in 1 second")
-                self.table_client = None
-                self.service = None
-
-    def _query(self, query):
-        entities = []
-        for e in self.table_client.query_entities(query_filter=query):
-            entities += [e]
-        return entities
-
     def get_all_status_entities(self, status=None, not_equal=False):
         """ Get all status entities with optional status column filter.
         For example, pass "status=complete" to find all status rows that
         have the status "complete".  Pass not_equal of True if you want
         to check the status is not equal to the given value.
         """
-        query = f"PartitionKey eq '{self.partition_key}'"
-        if status:
-            if not_equal:
-                query += f" and status ne '{status}'"
-            else:
-                query += f" and status eq '{status}'"
-
-        results = self._retry_table_operation(lambda: self._query(query),
-                                              label='reading table')
-        unwrapped = []
-        for e in results:
-            unwrapped += [self._unwrap_numeric_types(e)]
-        return unwrapped
+        return self.backend.query_entities(self.partition_key, status, not_equal)
 
     def get_status(self, name):
         """ Get or create a new status entity with the given name.
         The returned entity is a python dictionary where the name can be retrieved
         using e['name'], you can then add keys to that dictionary and call update_status_entity. """
-        entity = self._retry_table_operation(lambda: self.table_client.get_entity(partition_key=self.partition_key, row_key=name),
-                                             label='reading entity',
-                                             expected=[ResourceNotFoundError])
+        entity = self.backend.get_entity(self.partition_key, name)
         if entity is None:
             entity = {
                 'PartitionKey': self.partition_key,
@@ -183,40 +104,20 @@ class ArchaiStore:
             }
             self.update_status_entity(entity)
 
-        return self._unwrap_numeric_types(entity)
-
-    def _wrap_numeric_types(self, entity):
-        e = {}
-        for k in entity.keys():
-            v = entity[k]
-            if isinstance(v, bool):
-                e[k] = v
-            elif isinstance(v, int):
-                e[k] = EntityProperty(v, EdmType.INT64)
-            elif isinstance(v, float):
-                e[k] = float(v)  # this is casting np.float to float.
-            else:
-                e[k] = v
-        return e
-
-    def _unwrap_numeric_types(self, entity):
-        e = {}
-        for k in entity.keys():
-            v = entity[k]
-            if isinstance(v, EntityProperty):
-                e[k] = v.value
-            else:
-                e[k] = v
-        return e
+        return entity
 
     def get_existing_status(self, name):
         """ Find the given entity by name, and return it, or return None if the name is not found."""
-        entity = self._retry_table_operation(lambda: self.table_client.get_entity(partition_key=self.partition_key, row_key=name),
-                                             label='reading entity',
-                                             expected=[ResourceNotFoundError])
-        if entity is not None:
-            return self._unwrap_numeric_types(entity)
-        return None
+        return self.backend.get_entity(self.partition_key, name)
+
+    def get_existing_statuses(self, names):
+        """ Find all the given entities by name in bulk, which takes far fewer round trips than calling
+        get_existing_status on each name.  Returns a dictionary from name to entity, where names that
+        are not found are omitted. """
+        names = list(dict.fromkeys(names))
+        if len(names) == 0:
+            return {}
+        return {e['RowKey']: e for e in self.backend.get_entities(self.partition_key, names)}
 
     def get_updated_status(self, e):
         """ Return an updated version of the entity by querying the table again, this way you
@@ -228,9 +129,12 @@ class ArchaiStore:
         The entity can store strings, bool, float, int, datetime, so anything like a python list
         is best serialized using json.dumps and stored as a string, the you can use json.loads to
         parse it later. """
-        entity = self._wrap_numeric_types(entity)
-        self._retry_table_operation(lambda: self.table_client.upsert_entity(entity=entity, mode=UpdateMode.REPLACE),
-                                    label='update entity')
+        self.backend.upsert_entities([entity])
+
+    def update_status_entities(self, entities):
+        """ Bulk version of update_status_entity, which replaces all the given entities at once. """
+        if len(entities) > 0:
+            self.backend.upsert_entities(list(entities))
 
     def merge_status_entity(self, entity):
         """ This method merges everything in the entity store with what you have here. So you can
@@ -240,9 +144,12 @@ class ArchaiStore:
         The entity can store strings, bool, float, int, datetime, so anything like a python list
         is best serialized using json.dumps and stored as a string, the you can use json.loads to
         parse it later."""
-        entity = self._wrap_numeric_types(entity)
-        self._retry_table_operation(lambda: self.table_client.update_entity(entity=entity, mode=UpdateMode.MERGE),
-                                    label='merge entity')
+        self.backend.upsert_entities([entity], merge=True)
+
+    def merge_status_entities(self, entities):
+        """ Bulk version of merge_status_entity, which merges all the given entities at once. """
+        if len(entities) > 0:
+            self.backend.upsert_entities(list(entities), merge=True)
 
     def update_status(self, name, status, priority=None):
         """ This is a simple wrapper that gets the entity by name, and updates the status field.
@@ -267,9 +174,7 @@ class ArchaiStore:
     def delete_status_entity(self, e):
         """ Delete the status entry with this name, note this does not delete any associated blobs.
         See delete_blobs for that.  """
-        self._retry_table_operation(lambda: self.table_client.delete_entity(e),
-                                    label='deleting status',
-                                    expected=[ResourceNotFoundError])
+        self.backend.delete_entity(e)
 
     def upload_blob(self, folder_name, file, blob_name=None):
         """ Upload the given file to the blob store, under the given folder name.
@@ -282,10 +187,12 @@ class ArchaiStore:
         else:
             blob = f"{folder_name}/{filename}"
 
-        blob_client = self._get_blob_client(blob)
+        self.backend.upload_blob(file, blob)
 
-        with open(file, "rb") as data:
-            blob_client.upload_blob(data, overwrite=True)
+    def upload_blobs(self, folder_name, files):
+        """ Upload the given files concurrently to the blob store, under the given folder name,
+        where each blob uses the base file name. """
+        self.backend.upload_blobs([(f, f"{folder_name}/{os.path.basename(f)}") for f in files])
 
     def lock(self, name, status):
         """ Lock the named entity to this computer identified by platform.node()
@@ -446,9 +353,8 @@ class ArchaiStore:
                 raise Exception(f'Path not found: {path}')
 
             for f in to_upload:
-                # upload the file
                 print(f'Uploading file: {f} to blob: {name}')
-                self.upload_blob(name, f)
+            self.upload_blobs(name, to_upload)
         except Exception as ex:
             print(f'### upload failed: {ex}')
 
@@ -473,9 +379,11 @@ class ArchaiStore:
         if len(models) == 0:
             print(f"No *.onnx models found in {path}")
 
-        for file in models:
-            name = os.path.splitext(os.path.basename(file))[0]
-            if override or not self.get_existing_status(name):
+        names = [os.path.splitext(os.path.basename(file))[0] for file in models]
+        existing = {} if override else self.get_existing_statuses(names)
+
+        for name, file in zip(names, models):
+            if name not in existing:
                 self.upload(name, file, reset, priority, **kwargs)
             else:
                 print(f"Skipping {name} as it already exists")
@@ -485,20 +393,16 @@ class ArchaiStore:
         and return a list of the local paths to all downloaded files.  If an optional specific_file is
         given then it tries to find and download that file only.  Returns a list of local files created.
         The specific_file can be a regular expression like '*.onnx'. """
-        container = self._get_container_client(self.blob_container_name)
-        if not container.exists():
-            return []
-
         if not os.path.isdir(folder):
             os.makedirs(folder)
         local_file = None
         prefix = f'{name}/'
-        downloaded = []
+        to_download = []
         if specific_file:
             specific_file_re = re.compile(specific_file)
 
-        for blob in container.list_blobs(name_starts_with=prefix):
-            file_name = blob.name[len(prefix):]
+        for blob in self.backend.list_blobs(prefix):
+            file_name = blob[len(prefix):]
             download = False
             if specific_file:
                 if not specific_file_re.match(file_name):
@@ -518,31 +422,24 @@ class ArchaiStore:
                 elif os.path.isdir(local_file):
                     rmtree(local_file)
                 os.makedirs(dir, exist_ok=True)
-                blob_client = container.get_blob_client(blob)
-                try:
-                    with open(local_file, 'wb') as f:
-                        data = blob_client.download_blob()
-                        f.write(data.readall())
-                    downloaded += [local_file]
-                except Exception as e:
-                    print(f"### Error downloading blob '{blob}' to local file: {e}")
+                to_download += [(blob, local_file)]
 
-        return downloaded
+        return self.backend.download_blobs(to_download)
 
     def delete_blobs(self, name, specific_file=None):
         """ Delete all the blobs associated with the given entity name. """
-        container = self._get_container_client(self.blob_container_name)
         prefix = f'{name}/'
-        for blob in container.list_blobs(name_starts_with=prefix):
-            file_name = blob.name[len(prefix):]
+        to_delete = []
+        for blob in self.backend.list_blobs(prefix):
+            file_name = blob[len(prefix):]
             if specific_file and file_name != specific_file:
                 continue
-            container.delete_blob(blob)
+            to_delete += [blob]
+        self.backend.delete_blobs(to_delete)
 
     def list_blobs(self, prefix=None):
         """ List all the blobs associated with the given prefix. """
-        container = self._get_container_client(self.blob_container_name)
-        return [blob.name for blob in container.list_blobs(name_starts_with=prefix)]
+        return self.backend.list_blobs(prefix)
 
     def print_entities(self, entities, columns=None):
         keys = []
@@ -558,8 +455,6 @@ class ArchaiStore:
             for k in keys:
                 if k in e:
                     x = e[k]
-                    if isinstance(x, EntityProperty) and x.edm_type is EdmType.INT64:
-                        x = x.value
                     v = str(x).replace(',', ' ').replace('\r\n', ' ').replace('\n', ' ').replace('\r', ' ')
                     print(f"{v}", end='')
                 print(', ', end='')
@@ -0,0 +1,634 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import datetime
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from overrides import EnforceOverrides, overrides
+
+# Maximum number of discrete comparisons allowed by Azure Table filters,
+# including the partition key comparison
+AZURE_MAX_FILTER_COMPARISONS = 15
+
+# Maximum number of operations allowed by Azure Table transactions
+AZURE_MAX_TRANSACTION_OPERATIONS = 100
+
+
+class StoreBackend(EnforceOverrides):
+    """Abstract class for the storage backends used by `ArchaiStore`.
+
+    A backend holds a table of status entities (dictionaries keyed by `PartitionKey` and
+    `RowKey`) and a container of blobs (files addressed by `/`-separated names). Entity
+    reads and writes are expressed in bulk, so backends can serve many entities per round
+    trip, while blob transfers are spread across `max_concurrency` threads.
+
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = 8) -> None:
+        """Initialize the backend.
+
+        Args:
+            max_concurrency: Maximum number of concurrent blob transfers and queries.
+
+        """
+
+        self.max_concurrency = max_concurrency
+
+    def _map_concurrently(self, function: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+        if len(items) <= 1 or self.max_concurrency <= 1:
+            return [function(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(items))) as executor:
+            return list(executor.map(function, items))
+
+    @abstractmethod
+    def get_entity(self, partition_key: str, row_key: str) -> Optional[Dict[str, Any]]:
+        """Get an entity.
+
+        Args:
+            partition_key: Partition key of the entity.
+            row_key: Row key of the entity.
+
+        Returns:
+            Entity or `None` if it does not exist.
+
+        """
+
+        pass
+
+    @abstractmethod
+    def get_entities(self, partition_key: str, row_keys: List[str]) -> List[Dict[str, Any]]:
+        """Get a set of entities in bulk.
+
+        Args:
+            partition_key: Partition key of the entities.
+            row_keys: Row keys of the entities.
+
+        Returns:
+            Entities that exist (in no particular order).
+
+        """
+
+        pass
+
+    @abstractmethod
+    def query_entities(
+        self, partition_key: str, status: Optional[str] = None, not_equal: Optional[bool] = False
+    ) -> List[Dict[str, Any]]:
+        """Get all entities of a partition, with an optional filter on the `status` column.
+
+        Args:
+            partition_key: Partition key of the entities.
+            status: Value of the `status` column to be matched.
+            not_equal: Whether the `status` column should be different from `status`.
+
+        Returns:
+            Matched entities.
+
+        """
+
+        pass
+
+    @abstractmethod
+    def upsert_entities(self, entities: List[Dict[str, Any]], merge: Optional[bool] = False) -> None:
+        """Insert or update a set of entities in bulk.
+
+        Args:
+            entities: Entities to be written.
+            merge: Whether the properties should be merged with the stored entities instead
+                of replacing them.
+
+        """
+
+        pass
+
+    @abstractmethod
+    def delete_entity(self, entity: Dict[str, Any]) -> None:
+        """Delete an entity (no-op if it does not exist).
+
+        Args:
+            entity: Entity to be deleted.
+
+        """
+
+        pass
+
+    @abstractmethod
+    def list_blobs(self, prefix: Optional[str] = None) -> List[str]:
+        """List the blob names.
+
+        Args:
+            prefix: Prefix of the blob names.
+
+        Returns:
+            Blob names.
+
+        """
+
+        pass
+
+    @abstractmethod
+    def upload_blob(self, file_path: str, blob_name: str) -> None:
+        """Upload a local file to a blob, overwriting it if it already exists.
+
+        Args:
+            file_path: Path to the local file.
+            blob_name: Name of the blob.
+
+        """
+
+        pass
+
+    @abstractmethod
+    def download_blob(self, blob_name: str, file_path: str) -> None:
+        """Download a blob to a local file.
+
+        Args:
+            blob_name: Name of the blob.
+            file_path: Path to the local file.
+
+        """
+
+        pass
+
+    @abstractmethod
+    def delete_blob(self, blob_name: str) -> None:
+        """Delete a blob.
+
+        Args:
+            blob_name: Name of the blob.
+
+        """
+
+        pass
+
+    def upload_blobs(self, files: List[Tuple[str, str]]) -> None:
+        """Upload a set of local files concurrently.
+
+        Args:
+            files: Pairs of local file path and blob name.
+
+        """
+
+        self._map_concurrently(lambda f: self.upload_blob(*f), files)
+
+    def download_blobs(self, blobs: List[Tuple[str, str]]) -> List[str]:
+        """Download a set of blobs concurrently.
+
+        Blobs that fail to download are reported and skipped.
+
+        Args:
+            blobs: Pairs of blob name and local file path.
+
+        Returns:
+            Paths to the downloaded files.
+
+        """
+
+        def _download_blob(blob: Tuple[str, str]) -> Optional[str]:
+            blob_name, file_path = blob
+            try:
+                self.download_blob(blob_name, file_path)
+                return file_path
+            except Exception as e:
+                print(f"### Error downloading blob '{blob_name}' to local file: {e}")
+                return None
+
+        return [f for f in self._map_concurrently(_download_blob, blobs) if f is not None]
+
+    def delete_blobs(self, blob_names: List[str]) -> None:
+        """Delete a set of blobs concurrently.
+
+        Args:
+            blob_names: Names of the blobs.
+
+        """
+
+        self._map_concurrently(self.delete_blob, blob_names)
+
+
+class AzureStoreBackend(StoreBackend):
+    """Azure Table and Blob Storage backend."""
+
+    def __init__(
+        self,
+        storage_account_name: str,
+        storage_account_key: str,
+        blob_container_name: Optional[str] = "models",
+        table_name: Optional[str] = "status",
+        max_concurrency: Optional[int] = 8,
+    ) -> None:
+        """Initialize the backend.
+
+        Args:
+            storage_account_name: Name of the storage account.
+            storage_account_key: Key of the storage account.
+            blob_container_name: Name of the blob container.
+            table_name: Name of the table.
+            max_concurrency: Maximum number of concurrent blob transfers and queries.
+
+        """
+
+        super().__init__(max_concurrency=max_concurrency)
+
+        self.storage_connection_string = (
+            f"DefaultEndpointsProtocol=https;AccountName={storage_account_name};"
+            f"AccountKey={storage_account_key};EndpointSuffix=core.windows.net"
+        )
+        self.blob_container_name = blob_container_name
+        self.status_table_name = table_name
+        self.service = None
+        self.table_client = None
+        self.container_client = None
+
+    def _get_status_table_service(self) -> Any:
+        from azure.data.tables import TableServiceClient
+
+        logger = logging.getLogger("azure.core.pipeline.policies.http_logging_policy")
+        logger.setLevel(logging.ERROR)
+        return TableServiceClient.from_connection_string(
+            conn_str=self.storage_connection_string, logger=logger, logging_enable=False
+        )
+
+    def _get_table_client(self) -> Any:
+        if not self.table_client:
+            for i in range(6):
+                try:
+                    if not self.service:
+                        self.service = self._get_status_table_service()
+                    self.table_client = self.service.create_table_if_not_exists(self.status_table_name)
+                    return self.table_client
+                except Exception as e:
+                    self.service = None
+                    if i == 5:
+                        raise e
+                    else:
+                        print(f"### error getting table client, sleeping 1 second and trying again: {e}")
+                        time.sleep(1)
+
+        return self.table_client
+
+    def _get_container_client(self) -> Any:
+        from azure.storage.blob import ContainerClient
+
+        if not self.container_client:
+            logger = logging.getLogger("azure.core.pipeline.policies.http_logging_policy")
+            logger.setLevel(logging.ERROR)
+            self.container_client = ContainerClient.from_connection_string(
+                self.storage_connection_string,
+                container_name=self.blob_container_name,
+                logger=logger,
+                logging_enable=False,
+            )
+            if not self.container_client.exists():
+                self.container_client.create_container()
+
+        return self.container_client
+
+    def _retry_table_operation(
+        self, function: Callable[[], Any], label: str, retries: Optional[int] = 5, expected: Optional[List[type]] = None
+    ) -> Any:
+        for i in range(retries + 1):
+            try:
+                self._get_table_client()
+                return function()
+            except Exception as e:
+                if "Bad Request" in str(e):
+                    raise e
+                for t in expected or []:
+                    if isinstance(e, t):
+                        return None
+                print(f"error {label}: {e}")
+                if i == retries:
+                    raise e
+                time.sleep(1)
+                print("trying again in 1 second")
+                self.table_client = None
+                self.service = None
+
+    def _query(self, query: str) -> List[Dict[str, Any]]:
+        return [self._unwrap_numeric_types(e) for e in self.table_client.query_entities(query_filter=query)]
+
+    def _wrap_numeric_types(self, entity: Dict[str, Any]) -> Dict[str, Any]:
+        from azure.data.tables import EdmType, EntityProperty
+
+        e = {}
+        for k, v in entity.items():
+            if isinstance(v, bool):
+                e[k] = v
+            elif isinstance(v, int):
+                e[k] = EntityProperty(v, EdmType.INT64)
+            elif isinstance(v, float):
+                e[k] = float(v)  # this is casting np.float to float.
+            else:
+                e[k] = v
+        return e
+
+    def _unwrap_numeric_types(self, entity: Dict[str, Any]) -> Dict[str, Any]:
+        from azure.data.tables import EntityProperty
+
+        return {k: v.value if isinstance(v, EntityProperty) else v for k, v in entity.items()}
+
+    @overrides
+    def get_entity(self, partition_key: str, row_key: str) -> Optional[Dict[str, Any]]:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        entity = self._retry_table_operation(
+            lambda: self.table_client.get_entity(partition_key=partition_key, row_key=row_key),
+            label="reading entity",
+            expected=[ResourceNotFoundError],
+        )
+        return self._unwrap_numeric_types(entity) if entity is not None else None
+
+    @overrides
+    def get_entities(self, partition_key: str, row_keys: List[str]) -> List[Dict[str, Any]]:
+        # Each query filters as many row keys as allowed, and queries are sent concurrently
+        chunk_size = AZURE_MAX_FILTER_COMPARISONS - 1
+        chunks = [row_keys[i : i + chunk_size] for i in range(0, len(row_keys), chunk_size)]
+
+        def _query_chunk(chunk: List[str]) -> List[Dict[str, Any]]:
+            row_filter = " or ".join(f"RowKey eq '{_escape_odata(k)}'" for k in chunk)
+            query = f"PartitionKey eq '{_escape_odata(partition_key)}' and ({row_filter})"
+            return self._retry_table_operation(lambda: self._query(query), label="reading entities")
+
+        return [e for entities in self._map_concurrently(_query_chunk, chunks) for e in entities]
+
+    @overrides
+    def query_entities(
+        self, partition_key: str, status: Optional[str] = None, not_equal: Optional[bool] = False
+    ) -> List[Dict[str, Any]]:
+        query = f"PartitionKey eq '{_escape_odata(partition_key)}'"
+        if status:
+            query += f" and status {'ne' if not_equal else 'eq'} '{_escape_odata(status)}'"
+
+        return self._retry_table_operation(lambda: self._query(query), label="reading table")
+
+    @overrides
+    def upsert_entities(self, entities: List[Dict[str, Any]], merge: Optional[bool] = False) -> None:
+        from azure.data.tables import UpdateMode
+
+        # Entities are upserted (and missing ones created) whether they are merged or replaced
+        mode = UpdateMode.MERGE if merge else UpdateMode.REPLACE
+        if len(entities) == 1:
+            entity = self._wrap_numeric_types(entities[0])
+            self._retry_table_operation(
+                lambda: self.table_client.upsert_entity(entity=entity, mode=mode),
+                label="merge entity" if merge else "update entity",
+            )
+            return
+
+        # Transactions are restricted to a single partition
+        partitions = {}
+        for entity in entities:
+            partitions.setdefault(entity["PartitionKey"], []).append(self._wrap_numeric_types(entity))
+
+        for partition_entities in partitions.values():
+            for i in range(0, len(partition_entities), AZURE_MAX_TRANSACTION_OPERATIONS):
+                operations = [
+                    ("upsert", e, {"mode": mode}) for e in partition_entities[i : i + AZURE_MAX_TRANSACTION_OPERATIONS]
+                ]
+                self._retry_table_operation(
+                    lambda: self.table_client.submit_transaction(operations), label="update entities"
+                )
+
+    @overrides
+    def delete_entity(self, entity: Dict[str, Any]) -> None:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        self._retry_table_operation(
+            lambda: self.table_client.delete_entity(entity), label="deleting status", expected=[ResourceNotFoundError]
+        )
+
+    @overrides
+    def list_blobs(self, prefix: Optional[str] = None) -> List[str]:
+        container = self._get_container_client()
+        return [blob.name for blob in container.list_blobs(name_starts_with=prefix)]
+
+    @overrides
+    def upload_blob(self, file_path: str, blob_name: str) -> None:
+        blob_client = self._get_container_client().get_blob_client(blob_name)
+        with open(file_path, "rb") as data:
+            blob_client.upload_blob(data, overwrite=True)
+
+    @overrides
+    def download_blob(self, blob_name: str, file_path: str) -> None:
+        blob_client = self._get_container_client().get_blob_client(blob_name)
+        with open(file_path, "wb") as f:
+            blob_client.download_blob().readinto(f)
+
+    @overrides
+    def delete_blob(self, blob_name: str) -> None:
+        self._get_container_client().delete_blob(blob_name)
+
+
+class LocalStoreBackend(StoreBackend):
+    """Local backend, with entities held by a SQLite database and blobs held by a directory.
+
+    The database and the blob directory can be shared by several processes of the same
+    machine, which allows the components that communicate through `ArchaiStore` (such as
+    `RemoteAzureBenchmarkEvaluator` and `JobCompletionMonitor`) to be run offline.
+
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        blob_container_name: Optional[str] = "models",
+        table_name: Optional[str] = "status",
+        max_concurrency: Optional[int] = 8,
+        timeout: Optional[float] = 30.0,
+    ) -> None:
+        """Initialize the backend.
+
+        Args:
+            root_dir: Directory that holds the database (`store.db`) and the blob containers.
+            blob_container_name: Name of the blob container (sub-directory of `root_dir`).
+            table_name: Name of the table.
+            max_concurrency: Maximum number of concurrent blob transfers.
+            timeout: Time (in seconds) to wait for a database lock held by another process.
+
+        """
+
+        super().__init__(max_concurrency=max_concurrency)
+
+        if not re.fullmatch(r"[A-Za-z][A-Za-z0-9_]*", table_name):
+            raise ValueError(f"`table_name` must be alphanumeric, but got '{table_name}'.")
+
+        self.root_dir = os.path.abspath(root_dir)
+        self.blob_dir = os.path.join(self.root_dir, blob_container_name)
+        self.db_path = os.path.join(self.root_dir, "store.db")
+        self.table_name = table_name
+        self.timeout = timeout
+
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        state["_lock"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(self.root_dir, exist_ok=True)
+
+            # Transactions are handled explicitly, since merges are read-modify-write operations
+            self._connection = sqlite3.connect(
+                self.db_path, timeout=self.timeout, isolation_level=None, check_same_thread=False
+            )
+            self._connection.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.table_name}" '
+                "(partition_key TEXT NOT NULL, row_key TEXT NOT NULL, status TEXT, entity TEXT NOT NULL, "
+                "PRIMARY KEY (partition_key, row_key))"
+            )
+
+        return self._connection
+
+    def _execute(self, query: str, parameters: Iterable[Any] = ()) -> List[Tuple[Any, ...]]:
+        with self._lock:
+            return self._get_connection().execute(query, tuple(parameters)).fetchall()
+
+    def _blob_path(self, blob_name: str) -> str:
+        path = os.path.realpath(os.path.join(self.blob_dir, blob_name))
+        if os.path.commonpath([path, os.path.realpath(self.blob_dir)]) != os.path.realpath(self.blob_dir):
+            raise ValueError(f"Blob '{blob_name}' is outside of the container.")
+
+        return path
+
+    @overrides
+    def get_entity(self, partition_key: str, row_key: str) -> Optional[Dict[str, Any]]:
+        rows = self._execute(
+            f'SELECT entity FROM "{self.table_name}" WHERE partition_key = ? AND row_key = ?', (partition_key, row_key)
+        )
+        return _decode_entity(rows[0][0]) if rows else None
+
+    @overrides
+    def get_entities(self, partition_key: str, row_keys: List[str]) -> List[Dict[str, Any]]:
+        # Chunks are kept below SQLite's default limit of host parameters
+        entities = []
+        for i in range(0, len(row_keys), 500):
+            chunk = row_keys[i : i + 500]
+            rows = self._execute(
+                f'SELECT entity FROM "{self.table_name}" '
+                f"WHERE partition_key = ? AND row_key IN ({', '.join('?' * len(chunk))})",
+                [partition_key] + chunk,
+            )
+            entities += [_decode_entity(r[0]) for r in rows]
+
+        return entities
+
+    @overrides
+    def query_entities(
+        self, partition_key: str, status: Optional[str] = None, not_equal: Optional[bool] = False
+    ) -> List[Dict[str, Any]]:
+        query = f'SELECT entity FROM "{self.table_name}" WHERE partition_key = ?'
+        parameters = [partition_key]
+        if status:
+            query += f" AND status {'!=' if not_equal else '='} ?"
+            parameters.append(status)
+
+        return [_decode_entity(r[0]) for r in self._execute(query + " ORDER BY row_key", parameters)]
+
+    @overrides
+    def upsert_entities(self, entities: List[Dict[str, Any]], merge: Optional[bool] = False) -> None:
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for entity in entities:
+                    keys = (entity["PartitionKey"], entity["RowKey"])
+                    if merge:
+                        row = connection.execute(
+                            f'SELECT entity FROM "{self.table_name}" WHERE partition_key = ? AND row_key = ?', keys
+                        ).fetchone()
+                        if row is not None:
+                            entity = {**_decode_entity(row[0]), **entity}
+
+                    connection.execute(
+                        f'INSERT OR REPLACE INTO "{self.table_name}" VALUES (?, ?, ?, ?)',
+                        keys + (entity.get("status"), _encode_entity(entity)),
+                    )
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    @overrides
+    def delete_entity(self, entity: Dict[str, Any]) -> None:
+        self._execute(
+            f'DELETE FROM "{self.table_name}" WHERE partition_key = ? AND row_key = ?',
+            (entity["PartitionKey"], entity["RowKey"]),
+        )
+
+    @overrides
+    def list_blobs(self, prefix: Optional[str] = None) -> List[str]:
+        blob_names = []
+        for root, _, files in os.walk(self.blob_dir):
+            for f in files:
+                blob_name = os.path.relpath(os.path.join(root, f), self.blob_dir).replace(os.sep, "/")
+                if not prefix or blob_name.startswith(prefix):
+                    blob_names.append(blob_name)
+
+        return sorted(blob_names)
+
+    @overrides
+    def upload_blob(self, file_path: str, blob_name: str) -> None:
+        blob_path = self._blob_path(blob_name)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+
+        # Readers never see a partially written blob
+        tmp_path = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(file_path, tmp_path)
+        os.replace(tmp_path, blob_path)
+
+    @overrides
+    def download_blob(self, blob_name: str, file_path: str) -> None:
+        shutil.copyfile(self._blob_path(blob_name), file_path)
+
+    @overrides
+    def delete_blob(self, blob_name: str) -> None:
+        os.remove(self._blob_path(blob_name))
+
+
+def _escape_odata(value: str) -> str:
+    return value.replace("'", "''")
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return {"__datetime__": value.isoformat()}
+    if hasattr(value, "item"):
+        # NumPy (and PyTorch) scalars
+        return value.item()
+
+    raise TypeError(f"Object of type {type(value).__name__} can not be stored in an entity.")
+
+
+def _decode_value(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "__datetime__" in obj:
+        return datetime.datetime.fromisoformat(obj["__datetime__"])
+
+    return obj
+
+
+def _encode_entity(entity: Dict[str, Any]) -> str:
+    return json.dumps(entity, default=_encode_value)
+
+
+def _decode_entity(data: str) -> Dict[str, Any]:
+    return json.loads(data, object_hook=_decode_value)
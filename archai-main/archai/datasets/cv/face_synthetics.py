@@ -1,13 +1,26 @@
+from functools import partial
 from pathlib import Path
-from typing import Callable, Optional, Tuple
+from typing import Callable, Dict, Optional, Tuple
 
 from overrides import overrides
+import numpy as np
 import torch
 import torchvision.transforms.functional as F
 from torchvision.io import read_image
 
 from archai.api.dataset_provider import DatasetProvider
 from archai.common.utils import download_and_extract_zip
+from archai.datasets.cv.shard_cache_utils import ShardDataset, is_valid_shards_dir, write_shards
+
+
+def _load_resized_sample(files: Tuple[str, str], img_size: Tuple[int, int],
+                         mask_size: Tuple[int, int]) -> Dict[str, np.ndarray]:
+    img_file, seg_file = files
+
+    image = F.resize(read_image(img_file), img_size[::-1])
+    mask = F.resize(read_image(seg_file), mask_size[::-1], interpolation=F.InterpolationMode.NEAREST)
+
+    return {'image': image.numpy(), 'mask': mask.numpy()}
 
 
 class FaceSyntheticsDataset(torch.utils.data.Dataset):
@@ -85,26 +98,118 @@ class FaceSyntheticsDataset(torch.utils.data.Dataset):
 
         return sample
 
+    def to_shards(self, shards_dir: str, shard_size: int = 10000,
+                  num_workers: int = 1) -> 'FaceSyntheticsShardDataset':
+        """Resizes images and masks once and stores them into memory-mapped shards,
+        which are re-used if they were already written with the same settings.
+
+        Args:
+            shards_dir (str): Directory of the shards.
+            shard_size (int, optional): Maximum number of samples per shard. Defaults to 10000.
+            num_workers (int, optional): Number of processes used to decode the images. Defaults to 1.
+
+        Returns:
+            FaceSyntheticsShardDataset: Dataset that reads from the shards.
+        """
+        mask_size = self.mask_size if self.mask_size else self.img_size
+        attributes = {
+            'subset': self.subset,
+            'num_samples': len(self.img_files),
+            'first_file': Path(self.img_files[0]).name,
+            'img_size': self.img_size,
+            'mask_size': mask_size
+        }
+
+        if not is_valid_shards_dir(str(shards_dir), attributes):
+            write_shards(
+                partial(_load_resized_sample, img_size=self.img_size, mask_size=mask_size),
+                list(zip(self.img_files, self.seg_files)), str(shards_dir),
+                shard_size=shard_size, num_workers=num_workers, attributes=attributes
+            )
+
+        return FaceSyntheticsShardDataset(shards_dir, augmentation=self.augmentation)
+
+
+class FaceSyntheticsShardDataset(ShardDataset):
+    def __init__(self, shards_dir: str, augmentation: Optional[Callable] = None):
+        """Face Synthetics Dataset read from pre-resized shards (see `FaceSyntheticsDataset.to_shards`).
+
+        Args:
+            shards_dir (str): Directory of the shards.
+            augmentation (Optional[Callable], optional): Augmentation function applied online to the
+                resized images and masks of the training subset. Defaults to None.
+        """
+        super().__init__(str(shards_dir))
+
+        self.augmentation = augmentation
+        self.subset = self.metadata['attributes']['subset']
+        self.img_size = tuple(self.metadata['attributes']['img_size'])
+        self.mask_size = tuple(self.metadata['attributes']['mask_size'])
+
+    def __getitem__(self, idx):
+        sample = super().__getitem__(idx)
+
+        # Shards are read-only, so arrays are copied before being used by torch
+        sample = {
+            'image': torch.from_numpy(np.array(sample['image'])),
+            'mask': torch.from_numpy(np.array(sample['mask'])).long()
+        }
+
+        if self.augmentation and self.subset == 'train':
+            sample = self.augmentation(**sample)
+
+        sample['image'] = sample['image']/255
+
+        # Augmentations might change the size of the sample
+        if tuple(sample['mask'].shape[-2:]) != self.mask_size[::-1]:
+            sample['mask'] = F.resize(
+                sample['mask'], self.mask_size[::-1],
+                interpolation=F.InterpolationMode.NEAREST
+            )
+        if tuple(sample['image'].shape[-2:]) != self.img_size[::-1]:
+            sample['image'] = F.resize(sample['image'], self.img_size[::-1])
+
+        return sample
+
 
 class FaceSyntheticsDatasetProvider(DatasetProvider):
-    def __init__(self, dataset_dir: str):
+    def __init__(self, dataset_dir: str, shards_dir: Optional[str] = None,
+                 shard_size: int = 10000, num_workers: int = 1):
+        """Face Synthetics Dataset Provider
+
+        Args:
+            dataset_dir (str): Dataset directory.
+            shards_dir (Optional[str], optional): If provided, samples are resized once and stored
+                into memory-mapped shards (one sub-directory per subset), which are used instead of
+                decoding the PNG files on every epoch. Defaults to None.
+            shard_size (int, optional): Maximum number of samples per shard. Defaults to 10000.
+            num_workers (int, optional): Number of processes used to write the shards. Defaults to 1.
+        """
         self.dataset_dir = Path(dataset_dir)
         assert self.dataset_dir.is_dir()
 
+        self.shards_dir = Path(shards_dir) if shards_dir else None
+        self.shard_size = shard_size
+        self.num_workers = num_workers
+
+    def _get_dataset(self, subset: str, **kwargs) -> torch.utils.data.Dataset:
+        dataset = FaceSyntheticsDataset(self.dataset_dir, subset=subset, **kwargs)
+
+        if self.shards_dir is None:
+            return dataset
+
+        return dataset.to_shards(
+            self.shards_dir / subset, shard_size=self.shard_size, num_workers=self.num_workers
+        )
+
     @overrides
     def get_train_dataset(self, **kwargs) -> torch.utils.data.Dataset:
-        return FaceSyntheticsDataset(
-            self.dataset_dir, subset='train', **kwargs
-        )
+        return self._get_dataset('train', **kwargs)
 
     @overrides
     def get_test_dataset(self, **kwargs) -> torch.utils.data.Dataset:
-        return FaceSyntheticsDataset(
-            self.dataset_dir, subset='test', **kwargs
-        )
+        return self._get_dataset('test', **kwargs)
 
     @overrides
     def get_val_dataset(self, **kwargs) -> torch.utils.data.Dataset:
-        return FaceSyntheticsDataset(
-            self.dataset_dir, subset='validation', **kwargs
-        )
+        return self._get_dataset('validation', **kwargs)
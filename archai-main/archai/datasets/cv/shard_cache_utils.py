@@ -0,0 +1,193 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import json
+import os
+from multiprocessing import Pool
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+from torch.utils.data import Dataset
+
+from archai.common.ordered_dict_logger import OrderedDictLogger
+
+logger = OrderedDictLogger(source=__name__)
+
+SHARD_METADATA_FILE = "metadata.json"
+
+
+def _shard_file_path(shards_dir: str, field: str, shard_idx: int) -> str:
+    return os.path.join(shards_dir, f"{field}_{shard_idx:05d}.npy")
+
+
+def is_valid_shards_dir(shards_dir: str, attributes: Optional[Dict[str, Any]] = None) -> bool:
+    """Check whether a directory holds complete shards.
+
+    Args:
+        shards_dir: Directory of the shards.
+        attributes: Attributes that the shards must have been written with, e.g.,
+            the preprocessing settings.
+
+    Returns:
+        Whether shards are complete and match `attributes`.
+
+    """
+
+    metadata_path = os.path.join(shards_dir, SHARD_METADATA_FILE)
+    if not os.path.exists(metadata_path):
+        return False
+
+    with open(metadata_path, "r") as f:
+        metadata = json.load(f)
+
+    return json.loads(json.dumps(attributes or {})) == metadata["attributes"]
+
+
+def write_shards(
+    load_fn: Callable[[Any], Dict[str, np.ndarray]],
+    items: Sequence[Any],
+    shards_dir: str,
+    shard_size: Optional[int] = 10000,
+    num_workers: Optional[int] = 1,
+    attributes: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Preprocess a set of items into fixed-size memory-mapped shards.
+
+    Each field returned by `load_fn` is stored in its own `.npy` file per shard, thus
+    every sample of a field must have the same shape and data type. The metadata file is
+    only written after all shards, so incomplete shards are never considered valid.
+
+    Args:
+        load_fn: Function that loads and preprocesses an item (e.g., a file path) into
+            a dictionary of arrays. It must be picklable if `num_workers > 1`.
+        items: Items to be preprocessed.
+        shards_dir: Directory where shards will be written.
+        shard_size: Maximum number of samples per shard.
+        num_workers: Number of processes used to preprocess the items.
+        attributes: Attributes that identify the preprocessing, e.g., image size.
+
+    """
+
+    assert len(items) > 0, "`items` must not be empty."
+    assert shard_size > 0, "`shard_size` must be greater than 0."
+
+    os.makedirs(shards_dir, exist_ok=True)
+
+    metadata_path = os.path.join(shards_dir, SHARD_METADATA_FILE)
+    if os.path.exists(metadata_path):
+        os.remove(metadata_path)
+
+    pool = Pool(num_workers) if num_workers > 1 else None
+    samples = pool.imap(load_fn, items, chunksize=64) if pool else map(load_fn, items)
+
+    fields, shards = None, {}
+    try:
+        for idx, sample in enumerate(samples):
+            shard_idx, sample_idx = divmod(idx, shard_size)
+
+            if fields is None:
+                fields = {
+                    field: {"shape": list(array.shape), "dtype": np.dtype(array.dtype).str}
+                    for field, array in sample.items()
+                }
+
+            if sample_idx == 0:
+                for array in shards.values():
+                    array.flush()
+
+                n_samples = min(shard_size, len(items) - shard_idx * shard_size)
+                shards = {
+                    field: np.lib.format.open_memmap(
+                        _shard_file_path(shards_dir, field, shard_idx),
+                        mode="w+",
+                        dtype=np.dtype(spec["dtype"]),
+                        shape=(n_samples, *spec["shape"]),
+                    )
+                    for field, spec in fields.items()
+                }
+
+                logger.info(f"Writing shard {shard_idx}: {n_samples} samples.")
+
+            for field, array in shards.items():
+                array[sample_idx] = sample[field]
+
+        for array in shards.values():
+            array.flush()
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    metadata = {
+        "num_samples": len(items),
+        "shard_size": shard_size,
+        "fields": fields,
+        "attributes": attributes or {},
+    }
+    with open(metadata_path, "w") as f:
+        json.dump(metadata, f, indent=4)
+
+
+class ShardDataset(Dataset):
+    """Dataset that reads samples from memory-mapped shards (see `write_shards`).
+
+    Samples are returned as read-only views of the shards, so nothing is decoded or
+    copied until `transform` is applied.
+
+    """
+
+    def __init__(self, shards_dir: str, transform: Optional[Callable] = None) -> None:
+        """Initialize the dataset.
+
+        Args:
+            shards_dir: Directory of the shards.
+            transform: Function applied to the dictionary of arrays of each sample.
+
+        """
+
+        metadata_path = os.path.join(shards_dir, SHARD_METADATA_FILE)
+        if not os.path.exists(metadata_path):
+            raise FileNotFoundError(f"Shards are missing or incomplete: {shards_dir}")
+
+        with open(metadata_path, "r") as f:
+            self.metadata = json.load(f)
+
+        self.shards_dir = shards_dir
+        self.transform = transform
+        self.num_samples = self.metadata["num_samples"]
+        self.shard_size = self.metadata["shard_size"]
+
+        self._shards = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Memory maps are re-opened by each worker instead of being pickled
+        state = self.__dict__.copy()
+        state["_shards"] = {}
+
+        return state
+
+    def _get_shard(self, shard_idx: int) -> Dict[str, np.ndarray]:
+        if shard_idx not in self._shards:
+            self._shards[shard_idx] = {
+                field: np.load(_shard_file_path(self.shards_dir, field, shard_idx), mmap_mode="r")
+                for field in self.metadata["fields"]
+            }
+
+        return self._shards[shard_idx]
+
+    def __len__(self) -> int:
+        return self.num_samples
+
+    def __getitem__(self, idx: int) -> Any:
+        if idx < 0:
+            idx += self.num_samples
+        if idx < 0 or idx >= self.num_samples:
+            raise IndexError(f"Index {idx} is out of range for {self.num_samples} samples.")
+
+        shard_idx, sample_idx = divmod(idx, self.shard_size)
+        sample = {field: array[sample_idx] for field, array in self._get_shard(shard_idx).items()}
+
+        if self.transform is not None:
+            return self.transform(sample)
+
+        return sample
@@ -5,11 +5,11 @@ from typing import Callable, List, Optional, Tuple
 
 import cv2
 from overrides import overrides
-from torch.utils.data import ConcatDataset
 
 from archai.api.dataset_provider import DatasetProvider
 from archai.common.ordered_dict_logger import OrderedDictLogger
 from archai.datasets.cv.tensorpack_lmdb_dataset_provider_utils import (
+    ConcatTensorpackLmdbDataset,
     TensorpackLmdbDataset,
 )
 
@@ -63,6 +63,7 @@ class TensorpackLmdbDatasetProvider(DatasetProvider):
         valid_resolutions: Optional[List[Tuple]] = None,
         augmentation_fn: Optional[Callable] = None,
         mask_interpolation_method: int = cv2.INTER_NEAREST,
+        num_decode_threads: Optional[int] = 4,
     ) -> TensorpackLmdbDataset:
         return TensorpackLmdbDataset(
             self.train_lmdb_file_path,
@@ -78,6 +79,7 @@ class TensorpackLmdbDatasetProvider(DatasetProvider):
             valid_resolutions=valid_resolutions,
             augmentation_fn=augmentation_fn,
             mask_interpolation_method=mask_interpolation_method,
+            num_decode_threads=num_decode_threads,
         )
 
     @overrides
@@ -94,6 +96,7 @@ class TensorpackLmdbDatasetProvider(DatasetProvider):
         valid_resolutions: Optional[List[Tuple]] = None,
         augmentation_fn: Optional[Callable] = None,
         mask_interpolation_method: int = cv2.INTER_NEAREST,
+        num_decode_threads: Optional[int] = 4,
     ) -> TensorpackLmdbDataset:
         try:
             return TensorpackLmdbDataset(
@@ -110,6 +113,7 @@ class TensorpackLmdbDatasetProvider(DatasetProvider):
                 valid_resolutions=valid_resolutions,
                 augmentation_fn=augmentation_fn,
                 mask_interpolation_method=mask_interpolation_method,
+                num_decode_threads=num_decode_threads,
             )
         except:
             logger.warn("Validation set not available. Returning training set ...")
@@ -125,6 +129,7 @@ class TensorpackLmdbDatasetProvider(DatasetProvider):
                 valid_resolutions=valid_resolutions,
                 augmentation_fn=augmentation_fn,
                 mask_interpolation_method=mask_interpolation_method,
+                num_decode_threads=num_decode_threads,
             )
 
     @overrides
@@ -141,6 +146,7 @@ class TensorpackLmdbDatasetProvider(DatasetProvider):
         valid_resolutions: Optional[List[Tuple]] = None,
         augmentation_fn: Optional[Callable] = None,
         mask_interpolation_method: int = cv2.INTER_NEAREST,
+        num_decode_threads: Optional[int] = 4,
     ) -> TensorpackLmdbDataset:
         try:
             return TensorpackLmdbDataset(
@@ -157,6 +163,7 @@ class TensorpackLmdbDatasetProvider(DatasetProvider):
                 valid_resolutions=valid_resolutions,
                 augmentation_fn=augmentation_fn,
                 mask_interpolation_method=mask_interpolation_method,
+                num_decode_threads=num_decode_threads,
             )
         except:
             logger.warn("Testing set not available. Returning validation set ...")
@@ -172,6 +179,7 @@ class TensorpackLmdbDatasetProvider(DatasetProvider):
                 valid_resolutions=valid_resolutions,
                 augmentation_fn=augmentation_fn,
                 mask_interpolation_method=mask_interpolation_method,
+                num_decode_threads=num_decode_threads,
             )
 
 
@@ -234,8 +242,9 @@ class MultiFileTensorpackLmdbDatasetProvider(DatasetProvider):
         valid_resolutions: Optional[List[Tuple]] = None,
         augmentation_fn: Optional[Callable] = None,
         mask_interpolation_method: int = cv2.INTER_NEAREST,
-    ) -> ConcatDataset:
-        return ConcatDataset(
+        num_decode_threads: Optional[int] = 4,
+    ) -> ConcatTensorpackLmdbDataset:
+        return ConcatTensorpackLmdbDataset(
             [
                 TensorpackLmdbDataset(
                     file_path,
@@ -251,6 +260,7 @@ class MultiFileTensorpackLmdbDatasetProvider(DatasetProvider):
                     valid_resolutions=valid_resolutions,
                     augmentation_fn=augmentation_fn,
                     mask_interpolation_method=mask_interpolation_method,
+                    num_decode_threads=num_decode_threads,
                 )
                 for file_path, img_key in zip(self.train_lmdb_file_path, self.img_key)
             ]
@@ -270,9 +280,10 @@ class MultiFileTensorpackLmdbDatasetProvider(DatasetProvider):
         valid_resolutions: Optional[List[Tuple]] = None,
         augmentation_fn: Optional[Callable] = None,
         mask_interpolation_method: int = cv2.INTER_NEAREST,
-    ) -> ConcatDataset:
+        num_decode_threads: Optional[int] = 4,
+    ) -> ConcatTensorpackLmdbDataset:
         try:
-            return ConcatDataset(
+            return ConcatTensorpackLmdbDataset(
                 [
                     TensorpackLmdbDataset(
                         file_path,
@@ -288,6 +299,7 @@ class MultiFileTensorpackLmdbDatasetProvider(DatasetProvider):
                         valid_resolutions=valid_resolutions,
                         augmentation_fn=augmentation_fn,
                         mask_interpolation_method=mask_interpolation_method,
+                        num_decode_threads=num_decode_threads,
                     )
                     for file_path, img_key in zip(self.val_lmdb_file_path, self.img_key)
                 ]
@@ -306,6 +318,7 @@ class MultiFileTensorpackLmdbDatasetProvider(DatasetProvider):
                 valid_resolutions=valid_resolutions,
                 augmentation_fn=augmentation_fn,
                 mask_interpolation_method=mask_interpolation_method,
+                num_decode_threads=num_decode_threads,
             )
 
     @overrides
@@ -322,9 +335,10 @@ class MultiFileTensorpackLmdbDatasetProvider(DatasetProvider):
         valid_resolutions: Optional[List[Tuple]] = None,
         augmentation_fn: Optional[Callable] = None,
         mask_interpolation_method: int = cv2.INTER_NEAREST,
-    ) -> ConcatDataset:
+        num_decode_threads: Optional[int] = 4,
+    ) -> ConcatTensorpackLmdbDataset:
         try:
-            return ConcatDataset(
+            return ConcatTensorpackLmdbDataset(
                 [
                     TensorpackLmdbDataset(
                         file_path,
@@ -340,6 +354,7 @@ class MultiFileTensorpackLmdbDatasetProvider(DatasetProvider):
                         valid_resolutions=valid_resolutions,
                         augmentation_fn=augmentation_fn,
                         mask_interpolation_method=mask_interpolation_method,
+                        num_decode_threads=num_decode_threads,
                     )
                     for file_path, img_key in zip(self.test_lmdb_file_path, self.img_key)
                 ]
@@ -358,4 +373,5 @@ class MultiFileTensorpackLmdbDatasetProvider(DatasetProvider):
                 valid_resolutions=valid_resolutions,
                 augmentation_fn=augmentation_fn,
                 mask_interpolation_method=mask_interpolation_method,
+                num_decode_threads=num_decode_threads,
             )
@@ -1,6 +1,9 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
+import bisect
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import cv2
@@ -8,15 +11,49 @@ import lmdb
 import msgpack
 import numpy as np
 import torch
-from torch.utils.data import Dataset
+from torch.utils.data import ConcatDataset, Dataset
 
 from archai.common.ordered_dict_logger import OrderedDictLogger
 
 logger = OrderedDictLogger(source=__name__)
 
+# LMDB environments shared by the datasets of a process, as an LMDB file
+# can only be opened once per process
+_LMDB_ENVIRONMENTS: Dict[str, Tuple[int, lmdb.Environment]] = {}
+
+
+def _get_lmdb_environment(lmdb_file_path: str) -> lmdb.Environment:
+    path = os.path.realpath(lmdb_file_path)
+    pid, db = _LMDB_ENVIRONMENTS.get(path, (None, None))
+
+    if pid != os.getpid():
+        # Environments inherited from a parent process must be closed before re-opening
+        if db is not None:
+            db.close()
+
+        db = lmdb.open(
+            path,
+            subdir=False,
+            readonly=True,
+            lock=False,
+            readahead=True,
+            map_size=1099511627776 * 2,
+            max_readers=100,
+        )
+        _LMDB_ENVIRONMENTS[path] = (os.getpid(), db)
+
+    return db
+
 
 class TensorpackLmdbDataset(Dataset):
-    """Tensorpack LMDB dataset."""
+    """Tensorpack LMDB dataset.
+
+    Each process (e.g., a `DataLoader` worker) keeps its own environment handle and read
+    transaction. Batches requested through `__getitems__` (used by `DataLoader` when
+    batching is enabled) are read in sorted key order within the read transaction and
+    decoded by a pool of `num_decode_threads` threads.
+
+    """
 
     def __init__(
         self,
@@ -33,6 +70,7 @@ class TensorpackLmdbDataset(Dataset):
         valid_resolutions: Optional[List[Tuple]] = None,
         augmentation_fn: Optional[Callable] = None,
         mask_interpolation_method: int = cv2.INTER_NEAREST,
+        num_decode_threads: Optional[int] = 4,
     ) -> None:
         """Initialize Tensorpack LMDB dataset.
 
@@ -50,23 +88,23 @@ class TensorpackLmdbDataset(Dataset):
             valid_resolutions: Valid resolutions.
             augmentation_fn: Augmentation function.
             mask_interpolation_method: Mask interpolation method.
+            num_decode_threads: Number of threads used to decode the samples of a batch.
+                If set to 1, samples are decoded sequentially.
 
         """
 
         self.lmdb_file_path = lmdb_file_path
-        self.db = lmdb.open(
-            lmdb_file_path,
-            subdir=False,
-            readonly=True,
-            lock=False,
-            readahead=True,
-            map_size=1099511627776 * 2,
-            max_readers=100,
-        )
         self.img_key = img_key
         self.mask_key = mask_key
-        self.txn = self.db.begin()
-        self.keys = [k for k, _ in self.txn.cursor() if k != b"__keys__"]
+        self.num_decode_threads = num_decode_threads
+
+        self._pid = None
+        self._db = None
+        self._txn = None
+        self._thread_pool = None
+
+        # Only keys are iterated, so values are not read when indexing the dataset
+        self.keys = [k for k in self.txn.cursor().iternext(keys=True, values=False) if k != b"__keys__"]
         self.img_size = img_size
         self.serializer = serializer
         self.img_format = img_format
@@ -87,24 +125,65 @@ class TensorpackLmdbDataset(Dataset):
         self.augmentation_fn = augmentation_fn
         self.mask_interpolation_method = mask_interpolation_method
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # Handles are re-opened by each worker instead of being pickled
+        state = self.__dict__.copy()
+        state.update({"_pid": None, "_db": None, "_txn": None, "_thread_pool": None})
+
+        return state
+
+    def _open_handles(self) -> None:
+        # LMDB handles and thread pools can not be shared with forked processes,
+        # so they are (re-)opened once per process and kept for its lifetime
+        if self._pid != os.getpid():
+            self._db = _get_lmdb_environment(str(self.lmdb_file_path))
+            self._txn = self._db.begin()
+            self._thread_pool = None
+            self._pid = os.getpid()
+
+    @property
+    def db(self) -> lmdb.Environment:
+        """LMDB environment of the current process."""
+
+        self._open_handles()
+        return self._db
+
+    @property
+    def txn(self) -> lmdb.Transaction:
+        """Read transaction of the current process."""
+
+        self._open_handles()
+        return self._txn
+
     def __len__(self) -> int:
         """Return length of the dataset."""
 
         return len(self.keys)
 
-    def _get_datapoint(self, idx: int) -> Dict[str, Any]:
+    def _read_values(self, indices: List[int]) -> List[bytes]:
+        # Keys are read in sorted order, which follows the B+ tree layout of the LMDB file
+        txn = self.txn
+        values = [None] * len(indices)
+
+        for i in sorted(range(len(indices)), key=lambda i: self.keys[indices[i]]):
+            values[i] = txn.get(self.keys[indices[i]])
+
+        return values
+
+    def _get_datapoint(self, idx: int, value: Optional[bytes] = None) -> Dict[str, Any]:
         """Get a data point from the dataset.
 
         Args:
             idx: Index of the data point.
+            value: Serialized data point. If `None`, it is read from the LMDB file.
 
         Returns:
             Data point.
 
         """
 
-        key = self.keys[idx]
-        value = self.txn.get(key)
+        if value is None:
+            value = self.txn.get(self.keys[idx])
 
         if self.serializer == "msgpack":
             sample = msgpack.loads(value)
@@ -132,8 +211,31 @@ class TensorpackLmdbDataset(Dataset):
 
         """
 
+        return self._load_sample(idx)
+
+    def __getitems__(self, indices: List[int]) -> List[Dict[str, Any]]:
+        """Get a batch of samples from the dataset.
+
+        Args:
+            indices: Indices of the samples.
+
+        Returns:
+            Samples, in the same order as `indices`.
+
+        """
+
+        values = self._read_values(indices)
+
+        if self.num_decode_threads > 1 and len(indices) > 1:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=self.num_decode_threads)
+            return list(self._thread_pool.map(self._load_sample, indices, values))
+
+        return [self._load_sample(idx, value) for idx, value in zip(indices, values)]
+
+    def _load_sample(self, idx: int, value: Optional[bytes] = None) -> Dict[str, Any]:
         try:
-            sample = self._get_datapoint(idx)
+            sample = self._get_datapoint(idx, value)
 
             if self.img_format == "numpy":
                 img = np.frombuffer(sample[self.img_key], dtype=np.uint8).reshape((-1, 1))
@@ -178,3 +280,40 @@ class TensorpackLmdbDataset(Dataset):
                 raise e
             else:
                 logger.error(f"Sample {idx} from dataset {self.lmdb_file_path} could not be loaded.")
+
+
+class ConcatTensorpackLmdbDataset(ConcatDataset):
+    """Concatenation of Tensorpack LMDB datasets.
+
+    Batches requested through `__getitems__` are split by dataset, so each LMDB file is
+    read with a single batched request.
+
+    """
+
+    def __getitems__(self, indices: List[int]) -> List[Dict[str, Any]]:
+        """Get a batch of samples from the datasets.
+
+        Args:
+            indices: Indices of the samples.
+
+        Returns:
+            Samples, in the same order as `indices`.
+
+        """
+
+        dataset_indices = {}
+        for i, idx in enumerate(indices):
+            if idx < 0:
+                idx += len(self)
+
+            dataset_idx = bisect.bisect_right(self.cumulative_sizes, idx)
+            sample_idx = idx - self.cumulative_sizes[dataset_idx - 1] if dataset_idx > 0 else idx
+            dataset_indices.setdefault(dataset_idx, []).append((i, sample_idx))
+
+        samples = [None] * len(indices)
+        for dataset_idx, batch in dataset_indices.items():
+            batch_samples = self.datasets[dataset_idx].__getitems__([sample_idx for _, sample_idx in batch])
+            for (i, _), sample in zip(batch, batch_samples):
+                samples[i] = sample
+
+        return samples
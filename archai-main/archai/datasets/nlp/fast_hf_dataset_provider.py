@@ -22,6 +22,7 @@ from archai.api.dataset_provider import DatasetProvider
 from archai.common.ordered_dict_logger import OrderedDictLogger
 from archai.datasets.nlp.fast_hf_dataset_provider_utils import (
     FastHfDataset,
+    PackedHfDataset,
     SHMArray,
     process_with_memory_map_files,
     process_with_shared_memory,
@@ -142,6 +143,18 @@ class FastHfDatasetProvider(DatasetProvider):
 
         return process_with_memory_map_files(dataset_dict, cache_dir, dtype, num_proc=num_workers)
 
+    @staticmethod
+    def _save_document_offsets(encoded_dataset_dict: DatasetDict, cache_dir: str) -> None:
+        for split, dataset in encoded_dataset_dict.items():
+            # Only available if the mapping function outputs the length of each document
+            if "document_lengths" not in dataset.column_names:
+                continue
+
+            document_lengths = dataset.with_format("numpy")["document_lengths"]
+            document_offsets = np.cumsum(np.concatenate([[0], *document_lengths]))[:-1]
+
+            np.save(cache_dir / f"{split}_document_offsets.npy", document_offsets.astype(np.int64))
+
     @staticmethod
     def _save_dataset(
         dataset_dict: Dict[str, Union[SHMArray, np.ndarray]],
@@ -248,6 +261,7 @@ class FastHfDatasetProvider(DatasetProvider):
         processed_dataset_dict = FastHfDatasetProvider._process_dataset_to_memory(
             encoded_dataset_dict, cache_dir, dtype, num_workers, use_shared_memory
         )
+        FastHfDatasetProvider._save_document_offsets(encoded_dataset_dict, cache_dir)
 
         cache_files = FastHfDatasetProvider._save_dataset(
             processed_dataset_dict, tokenizer, cache_dir, use_shared_memory
@@ -357,6 +371,7 @@ class FastHfDatasetProvider(DatasetProvider):
         processed_dataset_dict = FastHfDatasetProvider._process_dataset_to_memory(
             encoded_dataset_dict, cache_dir, dtype, num_workers, use_shared_memory
         )
+        FastHfDatasetProvider._save_document_offsets(encoded_dataset_dict, cache_dir)
 
         cache_files = FastHfDatasetProvider._save_dataset(
             processed_dataset_dict, tokenizer, cache_dir, use_shared_memory
@@ -415,23 +430,53 @@ class FastHfDatasetProvider(DatasetProvider):
 
         return FastHfDatasetProvider(cache_train_file, cache_validation_file, cache_test_file, tokenizer=tokenizer)
 
-    @overrides
-    def get_train_dataset(self, seq_len: Optional[int] = 1) -> FastHfDataset:
-        input_ids = np.load(self.train_file, mmap_mode=self.mmap_mode)
+    def _get_dataset(
+        self, file_path: str, seq_len: int, packed: bool, return_document_ids: bool
+    ) -> Union[FastHfDataset, PackedHfDataset]:
+        input_ids = np.load(file_path, mmap_mode=self.mmap_mode)
 
-        return FastHfDataset(input_ids, seq_len=seq_len)
+        if not packed:
+            assert not return_document_ids, "`return_document_ids` is only available with `packed`."
+            return FastHfDataset(input_ids, seq_len=seq_len)
+
+        document_offsets = None
+        if return_document_ids:
+            file_path = Path(file_path)
+            document_offsets = np.load(file_path.with_name(f"{file_path.stem}_document_offsets.npy"))
+
+        return PackedHfDataset(input_ids, seq_len=seq_len, document_offsets=document_offsets)
 
     @overrides
-    def get_val_dataset(self, seq_len: Optional[int] = 1) -> FastHfDataset:
-        input_ids = np.load(self.validation_file, mmap_mode=self.mmap_mode)
+    def get_train_dataset(
+        self, seq_len: Optional[int] = 1, packed: Optional[bool] = False, return_document_ids: Optional[bool] = False
+    ) -> Union[FastHfDataset, PackedHfDataset]:
+        """Get the training dataset.
+
+        Args:
+            seq_len: Sequence length.
+            packed: Whether to return a `PackedHfDataset`, which gathers batches of fixed-length
+                sequences at once and should be used with `PackedDataCollatorForLanguageModeling`.
+            return_document_ids: Whether packed samples should also return the document
+                identifier of each input.
 
-        return FastHfDataset(input_ids, seq_len=seq_len)
+        Returns:
+            Training dataset.
+
+        """
+
+        return self._get_dataset(self.train_file, seq_len, packed, return_document_ids)
 
     @overrides
-    def get_test_dataset(self, seq_len: Optional[int] = 1) -> FastHfDataset:
-        input_ids = np.load(self.test_file, mmap_mode=self.mmap_mode)
+    def get_val_dataset(
+        self, seq_len: Optional[int] = 1, packed: Optional[bool] = False, return_document_ids: Optional[bool] = False
+    ) -> Union[FastHfDataset, PackedHfDataset]:
+        return self._get_dataset(self.validation_file, seq_len, packed, return_document_ids)
 
-        return FastHfDataset(input_ids, seq_len=seq_len)
+    @overrides
+    def get_test_dataset(
+        self, seq_len: Optional[int] = 1, packed: Optional[bool] = False, return_document_ids: Optional[bool] = False
+    ) -> Union[FastHfDataset, PackedHfDataset]:
+        return self._get_dataset(self.test_file, seq_len, packed, return_document_ids)
 
 
 @dataclass
@@ -455,3 +500,69 @@ class FastDataCollatorForLanguageModeling(DataCollatorForLanguageModeling):
             batch["labels"] = torch.stack([example[1] for example in examples], dim=0)
 
         return batch
+
+
+def _stack_tensor_views(tensors: List[torch.Tensor]) -> torch.Tensor:
+    # Rows of the same tensor (as returned by `PackedHfDataset`) are stacked by
+    # creating a new view of their storage instead of copying them
+    first = tensors[0]
+    row_stride = tensors[1].storage_offset() - first.storage_offset() if len(tensors) > 1 else first.numel()
+
+    is_strided_view = row_stride >= first.numel() and all(
+        t.untyped_storage().data_ptr() == first.untyped_storage().data_ptr()
+        and t.shape == first.shape
+        and t.stride() == first.stride()
+        and t.storage_offset() == first.storage_offset() + i * row_stride
+        for i, t in enumerate(tensors)
+    )
+    if not is_strided_view:
+        return torch.stack(tensors, dim=0)
+
+    return first.as_strided((len(tensors), *first.shape), (row_stride, *first.stride()), first.storage_offset())
+
+
+@dataclass
+class PackedDataCollatorForLanguageModeling:
+    """Language modeling data collator compatible with PackedHfDataset.
+
+    Args:
+        use_shifted_labels: Whether to use the original labels (shifted) or the non-shifted labels.
+        use_document_position_ids: Whether to restart the `position_ids` at the beginning of
+            each document (requires `return_document_ids`).
+        use_document_attention_mask: Whether to return a causal `attention_mask` with shape
+            (batch_size, 1, seq_len, seq_len) that prevents inputs from attending to other
+            documents (requires `return_document_ids`). Note that the model must support
+            4D attention masks.
+
+    """
+
+    use_shifted_labels: bool = False
+    use_document_position_ids: bool = False
+    use_document_attention_mask: bool = False
+
+    def __call__(self, examples: List[Tuple[torch.Tensor, ...]]) -> Dict[str, torch.Tensor]:
+        input_ids = _stack_tensor_views([example[0] for example in examples])
+        labels = _stack_tensor_views([example[1] for example in examples]) if self.use_shifted_labels else input_ids
+        batch = {"input_ids": input_ids, "labels": labels}
+
+        if not (self.use_document_position_ids or self.use_document_attention_mask):
+            return batch
+
+        assert len(examples[0]) == 3, "Document identifiers are required, please set `return_document_ids`."
+        document_ids = _stack_tensor_views([example[2] for example in examples])
+        seq_len = document_ids.shape[-1]
+
+        if self.use_document_position_ids:
+            positions = torch.arange(seq_len).expand_as(document_ids)
+            is_document_start = torch.ones_like(document_ids, dtype=torch.bool)
+            is_document_start[:, 1:] = document_ids[:, 1:] != document_ids[:, :-1]
+
+            document_starts = torch.where(is_document_start, positions, torch.zeros_like(positions))
+            batch["position_ids"] = positions - document_starts.cummax(dim=-1).values
+
+        if self.use_document_attention_mask:
+            causal_mask = torch.ones(seq_len, seq_len, dtype=torch.bool).tril()
+            document_mask = document_ids[:, :, None] == document_ids[:, None, :]
+            batch["attention_mask"] = (document_mask & causal_mask)[:, None]
+
+        return batch
@@ -10,7 +10,7 @@ from __future__ import annotations
 import math
 import mmap
 import sys
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from types import TracebackType
 
 import numpy as np
@@ -64,6 +64,57 @@ class FastHfDataset(Dataset):
         return input_ids[:-1], labels
 
 
+class PackedHfDataset(FastHfDataset):
+    """Packed Hugging Face dataset.
+
+    Inputs are split into fixed-length blocks (the trailing tokens that do not fill a block
+    are dropped), which allows a batch of blocks to be gathered from the (memory-mapped)
+    inputs at once. Samples of the same batch are views of a single tensor, thus they can
+    be collated without copies by `PackedDataCollatorForLanguageModeling`.
+
+    """
+
+    def __init__(
+        self, input_ids: np.ndarray, seq_len: Optional[int] = 1, document_offsets: Optional[np.ndarray] = None
+    ) -> None:
+        """Initialize the dataset.
+
+        Args:
+            input_ids: Array with the inputs (encoded data).
+            seq_len: Sequence length.
+            document_offsets: Array with the index of the first input of each document. If
+                supplied, samples also return the document identifier of each input, which
+                is relative to the first document of the sample.
+
+        """
+
+        super().__init__(input_ids, seq_len=seq_len)
+
+        self.n_sequences = (len(input_ids) - 1) // seq_len
+        self.document_offsets = document_offsets
+
+    def __getitem__(self, idx: int) -> Tuple[torch.Tensor, ...]:
+        return self.__getitems__([idx])[0]
+
+    def __getitems__(self, indices: List[int]) -> List[Tuple[torch.Tensor, ...]]:
+        indices = np.asarray(indices, dtype=np.int64)
+        if np.any((indices < 0) | (indices >= self.n_sequences)):
+            raise IndexError(f"Indices {indices} are out of range for {self.n_sequences} sequences.")
+
+        # Gathers all blocks (plus the input shared by consecutive blocks) at once
+        positions = indices[:, None] * self.seq_len + np.arange(self.seq_len + 1)
+        inputs = torch.from_numpy(self.input_ids[positions].astype(np.int64))
+        input_ids, labels = inputs[:, :-1], inputs[:, 1:]
+
+        if self.document_offsets is None:
+            return list(zip(input_ids, labels))
+
+        document_ids = np.searchsorted(self.document_offsets, positions[:, :-1], side="right")
+        document_ids = torch.from_numpy(document_ids - document_ids[:, :1])
+
+        return list(zip(input_ids, labels, document_ids))
+
+
 class SHMArray(np.ndarray):
     """Numpy array compatible with SharedMemory from `multiprocessing.shared_memory`.
 
@@ -90,7 +90,8 @@ def tokenize_concatenated_dataset(
         dtype: Numpy data type of the tokenized examples.
 
     Returns:
-        Concatenated tokenized examples.
+        Concatenated tokenized examples, with the length of each tokenized example
+        (document) as `document_lengths`.
 
     """
 
@@ -103,8 +104,13 @@ def tokenize_concatenated_dataset(
         padding=False,
     )
     tokenized_examples = np.fromiter(chain(*examples["input_ids"]), dtype=dtype)
+    document_lengths = np.fromiter(map(len, examples["input_ids"]), dtype=np.int64)
 
-    return {"input_ids": [tokenized_examples], "length": [len(tokenized_examples)]}
+    return {
+        "input_ids": [tokenized_examples],
+        "length": [len(tokenized_examples)],
+        "document_lengths": [document_lengths],
+    }
 
 
 def tokenize_contiguous_dataset(
@@ -131,16 +137,15 @@ def tokenize_contiguous_dataset(
         examples, mapping_column_name=mapping_column_name, tokenizer=tokenizer, truncate=False, padding=False
     )
 
-    concatenated_examples = {k: list(chain(*examples[k])) for k in examples.keys()}
+    concatenated_examples = {k: np.fromiter(chain(*examples[k]), dtype=np.int64) for k in examples.keys()}
 
     total_length = len(concatenated_examples[list(examples.keys())[0]])
-    if total_length >= model_max_length:
-        total_length = (total_length // model_max_length) * model_max_length
+    if total_length < model_max_length:
+        return {k: [t] if total_length > 0 else [] for k, t in concatenated_examples.items()}
 
-    result = {
-        k: [t[i : i + model_max_length] for i in range(0, total_length, model_max_length)]
-        for k, t in concatenated_examples.items()
-    }
+    # Blocks are views of the concatenated examples instead of copies
+    total_length = (total_length // model_max_length) * model_max_length
+    result = {k: t[:total_length].reshape(-1, model_max_length) for k, t in concatenated_examples.items()}
 
     return result
 
@@ -1,16 +1,17 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
+from __future__ import annotations
+
 import copy
 import re
 from pathlib import Path
 from time import time
 from typing import Any, Dict, List, Optional, Tuple, Union
 
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 
+from archai.common.lazy_import import lazy_import
 from archai.discrete_search.api.archai_model import ArchaiModel
 from archai.discrete_search.api.search_objectives import SearchObjectives
 from archai.discrete_search.api.search_space import DiscreteSearchSpace
@@ -19,6 +20,10 @@ from archai.discrete_search.utils.multi_objective import (
     get_pareto_frontier,
 )
 
+# Only used to save and plot the results
+plt = lazy_import("matplotlib.pyplot")
+pd = lazy_import("pandas")
+
 
 class SearchResults:
     """Discrete search results.
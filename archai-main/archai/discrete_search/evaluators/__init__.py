@@ -1,19 +1,27 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
-from archai.discrete_search.evaluators.functional import EvaluationFunction
-from archai.discrete_search.evaluators.onnx_model import AvgOnnxLatency
-# from archai.discrete_search.evaluators.progressive_training import (
-#     ProgressiveTraining, RayProgressiveTraining
-# )
-# from archai.discrete_search.evaluators.pt_profiler import (
-#     TorchFlops, TorchLatency, TorchPeakCpuMemory, TorchPeakCudaMemory, TorchNumParameters
-# )
-# from archai.discrete_search.evaluators.ray import RayParallelEvaluator
+from archai.common.lazy_import import lazy_exports
+
+# Evaluators are imported on first access, so their dependencies (e.g., `onnxruntime`
+# and `ray`) are only imported by the evaluators that are actually used
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'EvaluationFunction': 'archai.discrete_search.evaluators.functional',
+    'AvgOnnxLatency': 'archai.discrete_search.evaluators.onnx_model',
+    'ProgressiveTraining': 'archai.discrete_search.evaluators.progressive_training',
+    'RayProgressiveTraining': 'archai.discrete_search.evaluators.progressive_training',
+    'TorchFlops': 'archai.discrete_search.evaluators.pt_profiler',
+    'TorchLatency': 'archai.discrete_search.evaluators.pt_profiler',
+    'TorchCompiledLatency': 'archai.discrete_search.evaluators.pt_profiler',
+    'TorchPeakCpuMemory': 'archai.discrete_search.evaluators.pt_profiler',
+    'TorchPeakCudaMemory': 'archai.discrete_search.evaluators.pt_profiler',
+    'TorchNumParameters': 'archai.discrete_search.evaluators.pt_profiler',
+    'RayParallelEvaluator': 'archai.discrete_search.evaluators.ray',
+})
 
 __all__ = [
     'EvaluationFunction', 'AvgOnnxLatency', 'ProgressiveTraining',
     'RayProgressiveTraining', 'TorchFlops', 'TorchLatency',
-    'TorchPeakCpuMemory', 'TorchPeakCudaMemory',
+    'TorchCompiledLatency', 'TorchPeakCpuMemory', 'TorchPeakCudaMemory',
     'TorchNumParameters', 'RayParallelEvaluator'
 ]
@@ -1,32 +1,26 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
-import copy
-import pathlib
-import shutil
 import timeit
-from typing import Any, Dict, List, Optional
+from typing import List, Optional
 
 import numpy as np
-import torch
 from onnxruntime import InferenceSession
 from overrides import overrides
 
 from archai.discrete_search.api.archai_model import ArchaiModel
-from archai.discrete_search.api.model_evaluator import ModelEvaluator
+from archai.discrete_search.evaluators.nlp.transformer_flex_onnx import (
+    TransformerFlexOnnxEvaluator,
+)
 from archai.discrete_search.search_spaces.nlp.transformer_flex.search_space import (
     TransformerFlexSearchSpace,
 )
+from archai.onnx.artifact_cache import OnnxArtifactCache
 from archai.onnx.config_utils.onnx_config_base import OnnxConfig
-from archai.onnx.export import export_to_onnx
-from archai.onnx.export_utils import prepare_model_for_onnx
 from archai.onnx.onnx_loader import load_from_onnx
-from archai.onnx.optimization import optimize_onnx
-
-TMP_FOLDER = pathlib.Path("tmp")
 
 
-class TransformerFlexOnnxLatency(ModelEvaluator):
+class TransformerFlexOnnxLatency(TransformerFlexOnnxEvaluator):
     """Measure the average latency of models from the Transformer-Flex search space."""
 
     def __init__(
@@ -44,6 +38,8 @@ class TransformerFlexOnnxLatency(ModelEvaluator):
         opset: Optional[int] = 11,
         optimize: Optional[bool] = True,
         only_ort: Optional[bool] = False,
+        precision: Optional[str] = "fp32",
+        artifact_cache: Optional[OnnxArtifactCache] = None,
     ) -> None:
         """Initialize the evaluator.
 
@@ -66,11 +62,23 @@ class TransformerFlexOnnxLatency(ModelEvaluator):
             opset: Set of operations to use with ONNX.
             optimize: Whether to optimize the ONNX model.
             only_ort: Whether to only apply ORT optimization.
+            precision: Precision of the benchmarked model (`fp32`, `fp16` or `int8`).
+            artifact_cache: Cache of exported (and optimized) ONNX models. If provided,
+                each architecture is exported only once and re-used across evaluations.
 
         """
 
-        assert search_space.arch_type in ["codegen", "gpt2", "gpt2-flex"]
-        self.search_space = search_space
+        super().__init__(
+            search_space,
+            use_past=use_past,
+            validate=validate,
+            share_weights=share_weights,
+            opset=opset,
+            optimize=optimize,
+            only_ort=only_ort,
+            precision=precision,
+            artifact_cache=artifact_cache,
+        )
 
         # Benchmark settings
         self.providers = providers
@@ -79,21 +87,6 @@ class TransformerFlexOnnxLatency(ModelEvaluator):
         self.past_seq_len = past_seq_len
         self.n_trials = n_trials
         self.use_median = use_median
-        self.use_past = use_past
-        self.validate = validate
-        self.share_weights = share_weights
-        self.opset = opset
-        self.optimize = optimize
-        self.only_ort = only_ort
-
-    def _load_and_prepare(self, config: Dict[str, Any]) -> torch.nn.Module:
-        config = copy.deepcopy(config)
-        if self.use_past:
-            config["use_cache"] = True
-
-        model = self.search_space._load_model_from_config(config)
-
-        return prepare_model_for_onnx(model, self.search_space.arch_type)
 
     def _benchmark_model(self, session: InferenceSession, model_config: OnnxConfig) -> float:
         inputs = model_config.generate_dummy_inputs(self.batch_size, self.seq_len, self.past_seq_len)
@@ -119,29 +112,7 @@ class TransformerFlexOnnxLatency(ModelEvaluator):
 
     @overrides
     def evaluate(self, arch: ArchaiModel, budget: Optional[float] = None) -> float:
-        model = self._load_and_prepare(arch.metadata["config"])
-
-        # There is a bug for Python < 3.10 when using TemporaryFile with Windows,
-        # thus, we opted to manually save and remove the temporary file
-        TMP_FOLDER.mkdir(parents=True, exist_ok=True)
-        onnx_path = TMP_FOLDER / "model.onnx"
-
-        onnx_config = export_to_onnx(
-            model,
-            onnx_path.as_posix(),
-            task="causal-lm",
-            use_past=self.use_past,
-            validate=self.validate,
-            share_weights=self.share_weights,
-            opset=self.opset,
-        )
-
-        if self.optimize:
-            onnx_path = optimize_onnx(onnx_path.as_posix(), onnx_config, opt_level=0, only_ort=self.only_ort)
-
-        session = load_from_onnx(onnx_path, providers=self.providers)
-        latency = self._benchmark_model(session, onnx_config)
-
-        shutil.rmtree(TMP_FOLDER)
+        onnx_model, onnx_config = self._get_onnx_model(arch)
+        session = load_from_onnx(onnx_model, providers=self.providers)
 
-        return latency
+        return self._benchmark_model(session, onnx_config)
@@ -0,0 +1,175 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import copy
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Optional, Tuple, Union
+
+import torch
+from onnx import ModelProto, load_model, save_model
+
+from archai.discrete_search.api.archai_model import ArchaiModel
+from archai.discrete_search.api.model_evaluator import ModelEvaluator
+from archai.discrete_search.search_spaces.nlp.transformer_flex.search_space import (
+    TransformerFlexSearchSpace,
+)
+from archai.onnx.artifact_cache import OnnxArtifactCache
+from archai.onnx.config_utils.onnx_config_base import OnnxConfig
+from archai.onnx.export import create_onnx_config, export_to_onnx_model
+from archai.onnx.export_utils import prepare_model_for_onnx
+from archai.onnx.optimization import optimize_onnx_model
+from archai.quantization.ptq import dynamic_quantization_onnx
+
+PRECISIONS = ["fp32", "fp16", "int8"]
+
+
+class TransformerFlexOnnxEvaluator(ModelEvaluator):
+    """Base class of evaluators that export models from the Transformer-Flex search space to ONNX."""
+
+    def __init__(
+        self,
+        search_space: TransformerFlexSearchSpace,
+        use_past: Optional[bool] = True,
+        validate: Optional[bool] = True,
+        share_weights: Optional[bool] = True,
+        opset: Optional[int] = 11,
+        optimize: Optional[bool] = True,
+        only_ort: Optional[bool] = False,
+        precision: Optional[str] = "fp32",
+        artifact_cache: Optional[OnnxArtifactCache] = None,
+    ) -> None:
+        """Initialize the evaluator.
+
+        Args:
+            search_space: The search space to use for loading the model.
+            use_past: Whether to include past key/values in the model.
+            validate: Whether to validate the exported model.
+            share_weights: Whether to share the embedding and softmax weights.
+            opset: Set of operations to use with ONNX.
+            optimize: Whether to optimize the ONNX model.
+            only_ort: Whether to only apply ORT optimization.
+            precision: Precision of the evaluated model (`fp32`, `fp16` or `int8`). `fp16`
+                converts the optimized model to float16 and requires `optimize=True` and
+                `only_ort=False`, while `int8` applies dynamic quantization.
+            artifact_cache: Cache of exported (and optimized) ONNX models. If provided,
+                each architecture is exported only once and re-used across evaluations.
+
+        """
+
+        assert search_space.arch_type in ["codegen", "gpt2", "gpt2-flex"]
+        assert precision in PRECISIONS, f"`precision` must be one of {PRECISIONS}."
+        if precision == "fp16":
+            assert optimize and not only_ort, "`precision=fp16` requires `optimize=True` and `only_ort=False`."
+
+        self.search_space = search_space
+
+        # Export settings
+        self.use_past = use_past
+        self.validate = validate
+        self.share_weights = share_weights
+        self.opset = opset
+        self.optimize = optimize
+        self.only_ort = only_ort
+        self.precision = precision
+        self.artifact_cache = artifact_cache
+
+    def _prepare_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        config = copy.deepcopy(config)
+        if self.use_past:
+            config["use_cache"] = True
+
+        return config
+
+    def _load_and_prepare(self, config: Dict[str, Any]) -> torch.nn.Module:
+        model = self.search_space._load_model_from_config(self._prepare_config(config))
+
+        return prepare_model_for_onnx(model, self.search_space.arch_type)
+
+    def _export(self, arch: ArchaiModel) -> Tuple[ModelProto, OnnxConfig]:
+        model = self._load_and_prepare(arch.metadata["config"])
+
+        return export_to_onnx_model(
+            model,
+            task="causal-lm",
+            use_past=self.use_past,
+            validate=self.validate,
+            share_weights=self.share_weights,
+            opset=self.opset,
+        )
+
+    def _optimize(self, onnx_model: ModelProto, onnx_config: OnnxConfig) -> ModelProto:
+        return optimize_onnx_model(
+            onnx_model, onnx_config, opt_level=0, only_ort=self.only_ort, float16=self.precision == "fp16"
+        )
+
+    def _quantize(self, onnx_path: str, tmp_dir: str) -> str:
+        # Quantized models are saved next to the input model, so it is copied to `tmp_dir`
+        tmp_path = os.path.join(tmp_dir, "model.onnx")
+        if os.path.abspath(onnx_path) != os.path.abspath(tmp_path):
+            shutil.copyfile(onnx_path, tmp_path)
+
+        return dynamic_quantization_onnx(tmp_path)
+
+    def _export_with_cache(self, arch: ArchaiModel) -> Tuple[str, OnnxConfig]:
+        key = OnnxArtifactCache.get_key(
+            arch.archid,
+            arch_type=self.search_space.arch_type,
+            task="causal-lm",
+            use_past=self.use_past,
+            share_weights=self.share_weights,
+            opset=self.opset,
+        )
+
+        # The ONNX configuration only depends on the model's configuration,
+        # so cached models do not need to be instantiated
+        config = self.search_space._load_config(self._prepare_config(arch.metadata["config"]))
+        onnx_config = create_onnx_config(config, task="causal-lm", use_past=self.use_past)
+
+        def _create_raw(tmp_dir: str) -> str:
+            onnx_path = os.path.join(tmp_dir, "model.onnx")
+            save_model(self._export(arch)[0], onnx_path)
+
+            return onnx_path
+
+        onnx_path = self.artifact_cache.get_or_create(key, "raw", _create_raw)
+        variant = "raw"
+
+        if self.optimize:
+
+            def _create_opt(tmp_dir: str) -> str:
+                opt_path = os.path.join(tmp_dir, "model.onnx")
+                save_model(self._optimize(load_model(onnx_path), onnx_config), opt_path)
+
+                return opt_path
+
+            variant = "opt-ort" if self.only_ort else "opt"
+            if self.precision == "fp16":
+                variant = "opt-fp16"
+            onnx_path = self.artifact_cache.get_or_create(key, variant, _create_opt)
+
+        if self.precision == "int8":
+
+            def _create_int8(tmp_dir: str) -> str:
+                return self._quantize(onnx_path, tmp_dir)
+
+            onnx_path = self.artifact_cache.get_or_create(key, f"{variant}-int8", _create_int8)
+
+        return onnx_path, onnx_config
+
+    def _get_onnx_model(self, arch: ArchaiModel) -> Tuple[Union[ModelProto, str], OnnxConfig]:
+        if self.artifact_cache is not None:
+            return self._export_with_cache(arch)
+
+        onnx_model, onnx_config = self._export(arch)
+        if self.optimize:
+            onnx_model = self._optimize(onnx_model, onnx_config)
+
+        if self.precision == "int8":
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                onnx_path = os.path.join(tmp_dir, "model.onnx")
+                save_model(onnx_model, onnx_path)
+                onnx_model = load_model(self._quantize(onnx_path, tmp_dir))
+
+        return onnx_model, onnx_config
@@ -1,16 +1,20 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
+import os
 from typing import Any, Dict, List, Optional, Tuple, Union
 
-import onnxruntime as rt
 import torch
 from overrides import overrides
 
+from archai.common.lazy_import import lazy_import
 from archai.common.timing import MeasureBlockTime
 from archai.discrete_search.api.archai_model import ArchaiModel
 from archai.discrete_search.api.model_evaluator import ModelEvaluator
 from archai.common.file_utils import TemporaryFiles
+from archai.onnx.artifact_cache import OnnxArtifactCache
+
+rt = lazy_import("onnxruntime")
 
 
 class AvgOnnxLatency(ModelEvaluator):
@@ -30,6 +34,7 @@ class AvgOnnxLatency(ModelEvaluator):
         export_kwargs: Optional[Dict[str, Any]] = None,
         device: Optional[str] = 'cpu',
         inf_session_kwargs: Optional[Dict[str, Any]] = None,
+        artifact_cache: Optional[OnnxArtifactCache] = None,
     ) -> None:
         """Initialize the evaluator.
 
@@ -41,6 +46,8 @@ class AvgOnnxLatency(ModelEvaluator):
             rand_range: Range of random values to use for the input.
             export_kwargs: Keyword arguments to pass to `torch.onnx.export`.
             inf_session_kwargs: Keyword arguments to pass to `onnxruntime.InferenceSession`.
+            artifact_cache: Cache of exported ONNX models. If provided, each architecture
+                is exported only once and re-used across evaluations.
 
         """
 
@@ -60,31 +67,52 @@ class AvgOnnxLatency(ModelEvaluator):
         self.export_kwargs = export_kwargs or dict()
         self.inf_session_kwargs = inf_session_kwargs or dict()
         self.device = device
+        self.artifact_cache = artifact_cache
+
+    def _export(self, arch: ArchaiModel, onnx_file: str) -> str:
+        arch.arch.to("cpu")
+
+        torch.onnx.export(
+            arch.arch,
+            self.sample_input,
+            onnx_file,
+            input_names=[f"input_{i}" for i in range(len(self.sample_input))],
+            **self.export_kwargs,
+        )
+
+        return onnx_file
+
+    def _benchmark(self, onnx_file: str) -> float:
+        onnx_device = "CUDAExecutionProvider" if self.device == 'gpu' else "CPUExecutionProvider"
+        onnx_session = rt.InferenceSession(onnx_file, providers=[onnx_device], **self.inf_session_kwargs)
+        sample_input = {f"input_{i}": inp.numpy() for i, inp in enumerate(self.sample_input)}
+        inf_times = []
+
+        for _ in range(self.num_trials):
+            with MeasureBlockTime("onnx_inference") as t:
+                onnx_session.run(None, input_feed=sample_input)
+            inf_times.append(t.elapsed)
+
+        return sum(inf_times) / self.num_trials
 
     @overrides
     def evaluate(self, arch: ArchaiModel, budget: Optional[float] = None) -> float:
-        arch.arch.to("cpu")
+        if self.artifact_cache is not None:
+            key = OnnxArtifactCache.get_key(
+                arch.archid,
+                input_shapes=[tuple(inp.shape) for inp in self.sample_input],
+                input_dtype=self.input_dtype,
+                export_kwargs=self.export_kwargs,
+            )
+            onnx_file = self.artifact_cache.get_or_create(
+                key, "raw", lambda tmp_dir: self._export(arch, os.path.join(tmp_dir, "model.onnx"))
+            )
+
+            return self._benchmark(onnx_file)
 
         # Exports model to ONNX
         with TemporaryFiles() as tmp_file:
-            onnx_file = tmp_file.get_temp_file()
-            torch.onnx.export(
-                arch.arch,
-                self.sample_input,
-                onnx_file,
-                input_names=[f"input_{i}" for i in range(len(self.sample_input))],
-                **self.export_kwargs,
-            )
+            onnx_file = self._export(arch, tmp_file.get_temp_file())
 
             # Benchmarks ONNX model
-            onnx_device = "CUDAExecutionProvider" if self.device == 'gpu' else "CPUExecutionProvider"
-            onnx_session = rt.InferenceSession(onnx_file, providers=[onnx_device], **self.inf_session_kwargs)
-            sample_input = {f"input_{i}": inp.numpy() for i, inp in enumerate(self.sample_input)}
-            inf_times = []
-
-            for _ in range(self.num_trials):
-                with MeasureBlockTime("onnx_inference") as t:
-                    onnx_session.run(None, input_feed=sample_input)
-                inf_times.append(t.elapsed)
-
-        return sum(inf_times) / self.num_trials
+            return self._benchmark(onnx_file)
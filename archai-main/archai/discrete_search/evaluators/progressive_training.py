@@ -3,10 +3,10 @@
 
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
-import ray
 from overrides import overrides
 
 from archai.api.dataset_provider import DatasetProvider
+from archai.common.lazy_import import lazy_import
 from archai.discrete_search.api.archai_model import ArchaiModel
 from archai.discrete_search.api.model_evaluator import (
     AsyncModelEvaluator,
@@ -15,6 +15,8 @@ from archai.discrete_search.api.model_evaluator import (
 from archai.discrete_search.api.search_space import DiscreteSearchSpace
 from archai.common.file_utils import TemporaryFiles
 
+ray = lazy_import("ray")
+
 
 def _ray_wrap_training_fn(training_fn) -> Callable:
     def _stateful_training_fn(
@@ -1,16 +1,30 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
-from typing import Dict, List, Optional, Union
+import hashlib
+import itertools
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Union
 
 import torch
 from overrides import overrides
 
 from archai.discrete_search.api.archai_model import ArchaiModel
 from archai.discrete_search.api.model_evaluator import ModelEvaluator
+from archai.discrete_search.evaluators.pt_profiler_utils.pt_latency import (
+    compile_model,
+    measure_latency,
+)
 from archai.discrete_search.evaluators.pt_profiler_utils.pt_profiler_eval import profile
 
 
+def _get_device(model: torch.nn.Module) -> torch.device:
+    tensor = next(itertools.chain(model.parameters(), model.buffers()), None)
+
+    return tensor.device if tensor is not None else torch.device("cpu")
+
+
 class TorchNumParameters(ModelEvaluator):
     """Total number of parameters."""
 
@@ -164,6 +178,148 @@ class TorchLatency(ModelEvaluator):
         )["latency"]
 
 
+class TorchCompiledLatency(ModelEvaluator):
+    """Average/median latency (in seconds) of an ahead-of-time compiled PyTorch arch.
+
+    Differently from `TorchLatency`, the arch is compiled (TorchScript trace and freeze, or
+    `torch.compile()`) and timed without any profiling hooks, which is closer to how it is
+    deployed. Compiled archs are cached by `archid`, and the per-arch latency statistics
+    (including confidence intervals) are available in `latency_stats`.
+
+    """
+
+    def __init__(
+        self,
+        forward_args: Optional[Union[torch.Tensor, List[torch.Tensor]]] = None,
+        forward_kwargs: Optional[Dict[str, torch.Tensor]] = None,
+        backend: Optional[str] = "torchscript",
+        min_warmups: Optional[int] = 1,
+        max_warmups: Optional[int] = 50,
+        num_samples: Optional[int] = 30,
+        iqr_factor: Optional[float] = 1.5,
+        confidence: Optional[float] = 0.95,
+        use_cuda: Optional[bool] = False,
+        use_median: Optional[bool] = False,
+        max_cache_size: Optional[int] = 16,
+        cache_dir: Optional[str] = None,
+    ) -> None:
+        """Initialize the evaluator.
+
+        Args:
+            forward_args: `arch.forward()` arguments used for compiling and timing.
+            forward_kwargs: `arch.forward()` keyword arguments used for compiling and timing.
+            backend: Compilation backend (`torchscript` or `inductor`).
+            min_warmups: Minimum number of warmup runs.
+            max_warmups: Maximum number of warmup runs, used if timings do not stabilize.
+            num_samples: Number of runs after warmup.
+            iqr_factor: Multiplier of the interquartile range used to trim outliers.
+            confidence: Confidence level of the latency interval.
+            use_cuda: Whether to use CUDA instead of CPU.
+            use_median: Whether to use median instead of mean to average latency.
+            max_cache_size: Maximum number of compiled archs kept in memory.
+            cache_dir: Directory used to persist TorchScript archs across runs.
+
+        """
+
+        forward_args = forward_args if forward_args is not None else []
+        forward_args = [forward_args] if isinstance(forward_args, torch.Tensor) else forward_args
+
+        self.forward_args = tuple(forward_args)
+        self.forward_kwargs = forward_kwargs or {}
+        self.backend = backend
+        self.min_warmups = min_warmups
+        self.max_warmups = max_warmups
+        self.num_samples = num_samples
+        self.iqr_factor = iqr_factor
+        self.confidence = confidence
+        self.use_cuda = use_cuda
+        self.use_median = use_median
+        self.max_cache_size = max_cache_size
+        self.cache_dir = cache_dir
+
+        self.compiled_cache = OrderedDict()
+        self.latency_stats = {}
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _get_inputs(self) -> tuple:
+        device = "cuda" if self.use_cuda else "cpu"
+
+        forward_args = tuple(arg.to(device) for arg in self.forward_args)
+        forward_kwargs = {key: value.to(device) for key, value in self.forward_kwargs.items()}
+
+        return forward_args, forward_kwargs
+
+    def _get_cache_path(self, arch: ArchaiModel, forward_args: tuple, forward_kwargs: Dict[str, torch.Tensor]) -> str:
+        # Compiled archs are specialized to the inputs they were traced with, so their
+        # shapes and data types are part of the key
+        inputs = [(tuple(arg.shape), str(arg.dtype)) for arg in forward_args]
+        inputs += [(key, tuple(value.shape), str(value.dtype)) for key, value in sorted(forward_kwargs.items())]
+        inputs_hash = hashlib.sha1(repr((inputs, self.backend)).encode("utf-8")).hexdigest()[:16]
+
+        device = "cuda" if self.use_cuda else "cpu"
+
+        return os.path.join(self.cache_dir, f"{arch.archid}_{device}_{inputs_hash}.pt")
+
+    def _get_compiled(
+        self, arch: ArchaiModel, forward_args: tuple, forward_kwargs: Dict[str, torch.Tensor]
+    ) -> Callable:
+        if arch.archid in self.compiled_cache:
+            self.compiled_cache.move_to_end(arch.archid)
+            return self.compiled_cache[arch.archid]
+
+        device = "cuda" if self.use_cuda else "cpu"
+        cache_path = None
+
+        if self.cache_dir is not None and self.backend == "torchscript":
+            cache_path = self._get_cache_path(arch, forward_args, forward_kwargs)
+
+        if cache_path is not None and os.path.exists(cache_path):
+            compiled = torch.jit.load(cache_path, map_location=device)
+        else:
+            arch_device = _get_device(arch.arch)
+            if self.use_cuda:
+                arch.arch.to("cuda")
+
+            try:
+                compiled = compile_model(arch.arch, forward_args, forward_kwargs, backend=self.backend)
+            finally:
+                # Traced archs keep their own (frozen) copy of the weights, so the
+                # original arch can be moved back to its device
+                arch.arch.to(arch_device)
+
+            if cache_path is not None:
+                torch.jit.save(compiled, cache_path)
+
+        self.compiled_cache[arch.archid] = compiled
+
+        if len(self.compiled_cache) > self.max_cache_size:
+            self.compiled_cache.popitem(last=False)
+
+        return compiled
+
+    @overrides
+    def evaluate(self, arch: ArchaiModel, budget: Optional[float] = None) -> float:
+        forward_args, forward_kwargs = self._get_inputs()
+        compiled = self._get_compiled(arch, forward_args, forward_kwargs)
+
+        latency_stats = measure_latency(
+            compiled,
+            forward_args,
+            forward_kwargs,
+            min_warmups=self.min_warmups,
+            max_warmups=self.max_warmups,
+            num_samples=self.num_samples,
+            iqr_factor=self.iqr_factor,
+            confidence=self.confidence,
+            use_cuda=self.use_cuda,
+        )
+        self.latency_stats[arch.archid] = latency_stats
+
+        return latency_stats["median"] if self.use_median else latency_stats["mean"]
+
+
 class TorchPeakCudaMemory(ModelEvaluator):
     """Measures CUDA peak memory (in bytes) of a PyTorch arch using a sample input."""
 
@@ -232,23 +388,25 @@ class TorchPeakCpuMemory(ModelEvaluator):
 
     @overrides
     def evaluate(self, arch: ArchaiModel, budget: Optional[float] = None)->float:
-        arch.arch.to("cpu")
         forward_args = tuple([arg.to("cpu") for arg in self.forward_args])
         forward_kwargs = {key: value.to("cpu") for key, value in self.forward_kwargs.items()}
 
+        device = _get_device(arch.arch)
         is_training = arch.arch.training
+        arch.arch.to("cpu")
         arch.arch.eval()
 
-        with torch.profiler.profile(
-            activities=[torch.profiler.ProfilerActivity.CPU], record_shapes=True, profile_memory=True
-        ) as prof:
-            with torch.profiler.record_function("model_inference"):
-                arch.arch(*forward_args, **forward_kwargs)
+        try:
+            with torch.profiler.profile(
+                activities=[torch.profiler.ProfilerActivity.CPU], record_shapes=True, profile_memory=True
+            ) as prof:
+                with torch.profiler.record_function("model_inference"):
+                    arch.arch(*forward_args, **forward_kwargs)
+        finally:
+            arch.arch.train(is_training)
+            arch.arch.to(device)
 
         event_list = prof.key_averages()
         peak_memory = max(event.cpu_memory_usage for event in event_list)
 
-        if is_training:
-            arch.arch.train()
-
         return peak_memory
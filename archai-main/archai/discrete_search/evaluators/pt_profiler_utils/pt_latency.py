@@ -0,0 +1,207 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+
+import copy
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from archai.common.lazy_import import lazy_import
+
+stats = lazy_import("scipy.stats")
+
+COMPILE_BACKENDS = ["torchscript", "inductor"]
+
+
+class _TupleOutputWrapper(torch.nn.Module):
+    # Tracing does not support dictionary-like outputs (e.g., `ModelOutput` from
+    # `transformers`), so they are converted to tuples
+
+    def __init__(self, model: torch.nn.Module) -> None:
+        super().__init__()
+
+        self.model = model
+
+    def forward(self, *args, **kwargs) -> Any:
+        outputs = self.model(*args, **kwargs)
+
+        if hasattr(outputs, "to_tuple"):
+            return outputs.to_tuple()
+
+        if isinstance(outputs, dict):
+            return tuple(outputs.values())
+
+        return outputs
+
+
+def compile_model(
+    model: torch.nn.Module,
+    forward_args: Optional[Tuple[Any, ...]] = None,
+    forward_kwargs: Optional[Dict[str, Any]] = None,
+    backend: Optional[str] = "torchscript",
+) -> Callable:
+    """Compile a PyTorch model ahead-of-time for inference.
+
+    The training mode of `model` is left unchanged.
+
+    Args:
+        model: PyTorch model.
+        forward_args: `model.forward()` arguments used for tracing.
+        forward_kwargs: `model.forward()` keyword arguments used for tracing.
+        backend: `torchscript` traces and freezes the model, while `inductor` uses
+            `torch.compile()`, which is compiled lazily on the first call.
+
+    Returns:
+        Compiled model.
+
+    """
+
+    assert backend in COMPILE_BACKENDS, f"`backend` must be one of {COMPILE_BACKENDS}."
+
+    forward_args = tuple(forward_args or ())
+    forward_kwargs = forward_kwargs or {}
+
+    if backend == "inductor":
+        # `torch.compile()` runs the model itself, so it is compiled from a copy in evaluation mode
+        return torch.compile(copy.deepcopy(model).eval(), backend="inductor")
+
+    is_training = model.training
+    wrapper = _TupleOutputWrapper(model).eval()
+
+    try:
+        with torch.no_grad():
+            if forward_kwargs:
+                traced = torch.jit.trace(
+                    wrapper, example_inputs=forward_args or None, example_kwarg_inputs=forward_kwargs, strict=False
+                )
+            else:
+                traced = torch.jit.trace(wrapper, forward_args, strict=False)
+    finally:
+        model.train(is_training)
+
+    return torch.jit.freeze(traced)
+
+
+def _detect_warmup(
+    run_fn: Callable, min_warmups: int, max_warmups: int, window: int, tolerance: float
+) -> int:
+    timings = []
+
+    for i in range(max_warmups):
+        timings.append(run_fn())
+
+        # Warmup ends when the median of the latest window is within `tolerance`
+        # of the median of the window immediately before it
+        if i + 1 >= max(min_warmups, 2 * window):
+            current = statistics.median(timings[-window:])
+            previous = statistics.median(timings[-2 * window : -window])
+
+            if abs(current - previous) <= tolerance * previous:
+                break
+
+    return len(timings)
+
+
+def trim_outliers(samples: List[float], iqr_factor: Optional[float] = 1.5) -> List[float]:
+    """Remove outliers using Tukey's fences.
+
+    Args:
+        samples: Measured samples.
+        iqr_factor: Multiplier of the interquartile range used to build the fences.
+
+    Returns:
+        Samples within `[q1 - iqr_factor * iqr, q3 + iqr_factor * iqr]`.
+
+    """
+
+    if len(samples) < 4:
+        return list(samples)
+
+    q1, q3 = np.percentile(samples, [25, 75])
+    iqr = q3 - q1
+    lower, upper = q1 - iqr_factor * iqr, q3 + iqr_factor * iqr
+
+    return [s for s in samples if lower <= s <= upper]
+
+
+def measure_latency(
+    model: Callable,
+    forward_args: Optional[Tuple[Any, ...]] = None,
+    forward_kwargs: Optional[Dict[str, Any]] = None,
+    min_warmups: Optional[int] = 1,
+    max_warmups: Optional[int] = 50,
+    warmup_window: Optional[int] = 5,
+    warmup_tolerance: Optional[float] = 0.05,
+    num_samples: Optional[int] = 30,
+    iqr_factor: Optional[float] = 1.5,
+    confidence: Optional[float] = 0.95,
+    use_cuda: Optional[bool] = False,
+) -> Dict[str, float]:
+    """Measure the latency of a (compiled) model without any profiling hooks.
+
+    Warmup runs until the moving median of the timings stabilizes (or `max_warmups`
+    is reached), then `num_samples` timings are collected, outliers are trimmed with
+    Tukey's fences and a Student's t confidence interval of the mean is computed.
+
+    Args:
+        model: Model (or any callable) to be timed.
+        forward_args: `model()` arguments.
+        forward_kwargs: `model()` keyword arguments.
+        min_warmups: Minimum number of warmup runs.
+        max_warmups: Maximum number of warmup runs.
+        warmup_window: Number of runs in each window compared during warmup detection.
+        warmup_tolerance: Relative difference between consecutive window medians
+            below which the model is considered warmed up.
+        num_samples: Number of timed runs after warmup.
+        iqr_factor: Multiplier of the interquartile range used to trim outliers.
+        confidence: Confidence level of the interval.
+        use_cuda: Whether CUDA should be synchronized around each run.
+
+    Returns:
+        Mean, median, standard deviation and confidence interval bounds (seconds) of the
+        trimmed samples, along with the number of warmup, kept and trimmed runs.
+
+    """
+
+    forward_args = tuple(forward_args or ())
+    forward_kwargs = forward_kwargs or {}
+
+    def _run() -> float:
+        if use_cuda:
+            torch.cuda.synchronize()
+
+        start = time.perf_counter()
+        model(*forward_args, **forward_kwargs)
+
+        if use_cuda:
+            torch.cuda.synchronize()
+
+        return time.perf_counter() - start
+
+    with torch.no_grad():
+        num_warmups = _detect_warmup(_run, min_warmups, max(min_warmups, max_warmups), warmup_window, warmup_tolerance)
+        samples = [_run() for _ in range(num_samples)]
+
+    kept = trim_outliers(samples, iqr_factor=iqr_factor)
+
+    mean = statistics.mean(kept)
+    std = statistics.stdev(kept) if len(kept) > 1 else 0.0
+
+    if len(kept) > 1 and std > 0.0:
+        ci_lower, ci_upper = stats.t.interval(confidence, len(kept) - 1, loc=mean, scale=std / len(kept) ** 0.5)
+    else:
+        ci_lower, ci_upper = mean, mean
+
+    return {
+        "mean": mean,
+        "median": statistics.median(kept),
+        "std": std,
+        "ci_lower": float(ci_lower),
+        "ci_upper": float(ci_upper),
+        "num_warmups": num_warmups,
+        "num_samples": len(kept),
+        "num_trimmed": len(samples) - len(kept),
+    }
@@ -3,15 +3,17 @@
 
 from typing import Callable, List, Optional, Union
 
-import ray
 from overrides import overrides
 
+from archai.common.lazy_import import lazy_import
 from archai.discrete_search.api.archai_model import ArchaiModel
 from archai.discrete_search.api.model_evaluator import (
     AsyncModelEvaluator,
     ModelEvaluator,
 )
 
+ray = lazy_import("ray")
+
 
 def _wrap_metric_calculate(class_method) -> Callable:
     def _calculate(arch: ArchaiModel, budget: Optional[float] = None) -> Callable:
@@ -5,13 +5,14 @@ import datetime
 import uuid
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 import torch
 from overrides import overrides
 
 from archai.discrete_search.api.archai_model import ArchaiModel
 from archai.discrete_search.api.model_evaluator import AsyncModelEvaluator
+from archai.common.completion_tracker import CompletionTracker
 from archai.common.store import ArchaiStore
 
 
@@ -32,6 +33,7 @@ class RemoteAzureBenchmarkEvaluator(AsyncModelEvaluator):
         overwrite: Optional[bool] = True,
         max_retries: Optional[int] = 5,
         retry_interval: Optional[int] = 120,
+        min_retry_interval: Optional[float] = 5,
         onnx_export_kwargs: Optional[Dict[str, Any]] = None,
         verbose: bool = False,
         benchmark_only: bool = True
@@ -46,8 +48,9 @@ class RemoteAzureBenchmarkEvaluator(AsyncModelEvaluator):
             metric_key: Column that should be used as result.
             partition_key: Partition key for the table used to record all entries.
             overwrite: Whether to overwrite existing models.
-            max_retries: Maximum number of retries in `fetch_all`.
-            retry_interval: Interval between each retry attempt.
+            max_retries: Maximum number of `retry_interval` periods without progress in `fetch_all`.
+            retry_interval: Maximum interval between each retry attempt.
+            min_retry_interval: Interval between retry attempts right after an architecture completes.
             reset: Whether to reset the metrics.
             onnx_export_kwargs: Dictionary containing key-value arguments for `torch.onnx.export`.
             verbose: Whether to print debug messages.
@@ -62,6 +65,7 @@ class RemoteAzureBenchmarkEvaluator(AsyncModelEvaluator):
         self.overwrite = overwrite
         self.max_retries = max_retries
         self.retry_interval = retry_interval
+        self.min_retry_interval = min_retry_interval
         self.onnx_export_kwargs = onnx_export_kwargs or dict()
         self.verbose = verbose
         self.results = {}
@@ -156,60 +160,73 @@ class RemoteAzureBenchmarkEvaluator(AsyncModelEvaluator):
         if self.verbose:
             print(f"Sent {archid} to Remote Benchmark")
 
-    @overrides
-    def fetch_all(self) -> List[Union[float, None]]:
-        results = [None] * len(self.archids)
-        completed = [False] * len(self.archids)
+    def _is_complete(self, entity: Dict[str, Any]) -> bool:
+        return "error" in entity or entity.get("status") == "complete"
+
+    def fetch_as_completed(self) -> Iterator[Tuple[int, Union[float, None]]]:
+        """Fetch the results of the sent architectures as soon as they complete.
+
+        Partial results can be consumed while the remaining architectures are still being
+        benchmarked. The statuses of all pending architectures are fetched with a single bulk
+        query per poll, and the poll interval backs off (from `min_retry_interval` up to
+        `retry_interval`) while no architecture completes.
+
+        Yields:
+            Index of the architecture (in the order it was sent) and its result (`None` if
+                the remote benchmark failed).
+
+        """
 
-        # retries defines how long we wait for progress, as soon as we see something complete we
-        # reset this counter because we are making progress.
-        retries = self.max_retries
+        # Resets state, so architectures sent from now on are fetched separately
+        archids, self.archids = self.archids, []
+
+        indices = {}
+        for i, archid in enumerate(archids):
+            indices.setdefault(archid, []).append(i)
+        if len(indices) == 0:
+            return
+
+        tracker = CompletionTracker(
+            self.store,
+            indices.keys(),
+            is_complete=self._is_complete,
+            min_poll_interval=min(self.min_retry_interval, self.retry_interval),
+            max_poll_interval=self.retry_interval,
+        )
+
+        # `max_retries` defines how long we wait for progress, as soon as something completes
+        # the tracker resets this timeout because we are making progress
         start = time.time()
-        count = 0
-        while retries > 0:
-            for i, archid in enumerate(self.archids):
-                if not completed[i]:
-                    entity = self.store.get_existing_status(archid)
-                    if entity is not None:
-                        if self.metric_key in entity and entity[self.metric_key]:
-                            results[i] = entity[self.metric_key]
-                        if "error" in entity:
-                            error = entity["error"]
-                            print(f"Skipping architecture {archid} because of remote error: {error}")
-                            completed[i] = True
-                            retries = self.max_retries
-                        elif entity["status"] == "complete":
-                            print(f"Architecture {archid} is complete with {self.metric_key}={ results[i]}")
-                            completed[i] = True
-                            retries = self.max_retries
-
-            if all(completed):
-                break
-
-            count = sum(1 for c in completed if c)
+        for archid, entity in tracker.as_completed(timeout=self.max_retries * self.retry_interval):
+            result = entity[self.metric_key] if entity.get(self.metric_key) else None
+            if "error" in entity:
+                print(f"Skipping architecture {archid} because of remote error: {entity['error']}")
+            else:
+                print(f"Architecture {archid} is complete with {self.metric_key}={result}")
 
             if self.verbose:
-                remaining = len(self.archids) - count
-                estimate = (time.time() - start) / (count + 1) * remaining
+                count = len(tracker.completed)
+                remaining = len(tracker.pending)
+                estimate = (time.time() - start) / count * remaining
 
                 status_dict = {
                     "complete": count,
-                    "total": len(results),
+                    "total": len(indices),
                     "time_remaining": str(datetime.timedelta(seconds=estimate))
                 }
 
-                print(
-                    f"Waiting for results. Current status: {status_dict}\n"
-                    f"Pending Archids: {[archid for archid, status in zip(self.archids, results) if status is None]}"
-                )
+                print(f"Current status: {status_dict}\nPending Archids: {tracker.pending}")
 
-            time.sleep(self.retry_interval)
-            retries += 1
+            for i in indices[archid]:
+                yield i, result
 
-        count = sum(1 for c in completed if c)
-        if count == 0:
+        if len(tracker.completed) == 0:
             raise Exception("Something is wrong, the uploaded models are not being processed. Please check your SNPE remote runner setup.")
 
-        # Resets state
-        self.archids = []
+    @overrides
+    def fetch_all(self) -> List[Union[float, None]]:
+        results = [None] * len(self.archids)
+        for i, result in self.fetch_as_completed():
+            results[i] = result
+
         return results
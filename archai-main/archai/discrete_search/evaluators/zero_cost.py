@@ -0,0 +1,429 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import copy
+from abc import abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from overrides import overrides
+
+from archai.api.dataset_provider import DatasetProvider
+from archai.common.lazy_import import lazy_import
+from archai.discrete_search.api.archai_model import ArchaiModel
+from archai.discrete_search.api.model_evaluator import ModelEvaluator
+
+stats = lazy_import("scipy.stats")
+
+
+class ZeroCostInputCache:
+    """Minibatch shared by zero-cost proxies.
+
+    The minibatch is drawn (or synthesized) once and moved to the target device, so
+    that scoring thousands of candidates does not touch the data pipeline again.
+
+    """
+
+    def __init__(
+        self,
+        inputs: torch.Tensor,
+        targets: Optional[torch.Tensor] = None,
+        device: Optional[str] = "cpu",
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            inputs: Batch of inputs, e.g., images with shape `(N, C, H, W)` or token
+                identifiers with shape `(N, L)`.
+            targets: Batch of targets. If `None` and `inputs` are token identifiers,
+                the proxies use next-token prediction targets.
+            device: Device where the batch is stored.
+
+        """
+
+        self.device = device
+        self.inputs = inputs.to(device)
+        self.targets = targets.to(device) if targets is not None else None
+
+    @classmethod
+    def from_dataset_provider(
+        cls,
+        dataset_provider: DatasetProvider,
+        batch_size: Optional[int] = 64,
+        seed: Optional[int] = 0,
+        device: Optional[str] = "cpu",
+    ) -> "ZeroCostInputCache":
+        """Draw a random minibatch from the training dataset of a provider.
+
+        Args:
+            dataset_provider: Dataset provider whose `get_train_dataset()` returns
+                `(input, target)` pairs.
+            batch_size: Number of samples in the minibatch.
+            seed: Random seed used to select the samples.
+            device: Device where the batch is stored.
+
+        Returns:
+            Input cache.
+
+        """
+
+        dataset = dataset_provider.get_train_dataset()
+
+        rng = np.random.default_rng(seed)
+        indices = rng.choice(len(dataset), size=min(batch_size, len(dataset)), replace=False)
+        samples = [dataset[int(i)] for i in indices]
+
+        inputs = torch.stack([torch.as_tensor(x) for x, _ in samples])
+        targets = torch.as_tensor(np.array([y for _, y in samples]))
+
+        return cls(inputs, targets, device=device)
+
+    @classmethod
+    def from_synthetic_text(
+        cls,
+        vocab_size: int,
+        seq_len: Optional[int] = 128,
+        batch_size: Optional[int] = 16,
+        seed: Optional[int] = 0,
+        device: Optional[str] = "cpu",
+    ) -> "ZeroCostInputCache":
+        """Synthesize a batch of token sequences whose second half repeats the first half.
+
+        Args:
+            vocab_size: Size of the vocabulary.
+            seq_len: Length of the sequences.
+            batch_size: Number of sequences.
+            seed: Random seed.
+            device: Device where the batch is stored.
+
+        Returns:
+            Input cache.
+
+        """
+
+        generator = torch.Generator().manual_seed(seed)
+        half = torch.randint(0, vocab_size, (batch_size, seq_len // 2), generator=generator)
+
+        return cls(torch.cat([half, half], dim=1), device=device)
+
+    @property
+    def is_text(self) -> bool:
+        """Whether inputs are token identifiers."""
+
+        return not torch.is_floating_point(self.inputs)
+
+
+def _get_logits(outputs: Any) -> torch.Tensor:
+    # Hugging Face models return `ModelOutput` objects, while some benchmark
+    # models (e.g., NATS-Bench) return `(features, logits)` tuples
+    if hasattr(outputs, "logits"):
+        return outputs.logits
+
+    if isinstance(outputs, (tuple, list)):
+        return outputs[-1]
+
+    return outputs
+
+
+def _compute_loss(logits: torch.Tensor, cache: ZeroCostInputCache) -> torch.Tensor:
+    if cache.targets is None:
+        # Next-token prediction loss
+        logits = logits[:, :-1].reshape(-1, logits.size(-1))
+        return F.cross_entropy(logits, cache.inputs[:, 1:].reshape(-1))
+
+    return F.cross_entropy(logits, cache.targets)
+
+
+def _backward(output: torch.Tensor) -> None:
+    # Outputs of parameter-free (or frozen) models do not require gradients
+    if output.requires_grad:
+        output.backward()
+
+
+def _sum_over_params(model: torch.nn.Module, fn: Callable[[torch.nn.Parameter], torch.Tensor]) -> float:
+    # Models without gradients do not have any connection to be scored
+    values = [fn(p) for p in model.parameters() if p.grad is not None]
+    if len(values) == 0:
+        return 0.0
+
+    return torch.stack(values).sum().item()
+
+
+class ZeroCostProxy(ModelEvaluator):
+    """Abstract class for training-free proxies scored from a single minibatch.
+
+    Subclasses implement `score()`, which receives a model and the shared input cache.
+    Proxies never change the weights of the evaluated model.
+
+    """
+
+    def __init__(
+        self,
+        input_cache: ZeroCostInputCache,
+        forward_fn: Optional[Callable[[torch.nn.Module, torch.Tensor], Any]] = None,
+    ) -> None:
+        """Initialize the evaluator.
+
+        Args:
+            input_cache: Minibatch shared among proxies.
+            forward_fn: Function that receives the model and inputs and returns
+                its outputs. If `None`, calls the model with the inputs.
+
+        """
+
+        self.input_cache = input_cache
+        self.forward_fn = forward_fn or (lambda model, inputs: model(inputs))
+
+    def forward_logits(self, model: torch.nn.Module, inputs: torch.Tensor) -> torch.Tensor:
+        """Run the forward pass and return the logits of `model`."""
+
+        return _get_logits(self.forward_fn(model, inputs))
+
+    @abstractmethod
+    def score(self, model: torch.nn.Module) -> float:
+        """Score a model.
+
+        Args:
+            model: Model to be scored, already placed on the cache device.
+
+        Returns:
+            Proxy score (higher is better).
+
+        """
+
+        pass
+
+    @overrides
+    def evaluate(self, arch: ArchaiModel, budget: Optional[float] = None) -> float:
+        model = arch.arch
+        param = next(model.parameters(), None)
+        device = param.device if param is not None else torch.device("cpu")
+        is_training = model.training
+
+        model.to(self.input_cache.device)
+
+        # Forward passes in training mode update buffers, e.g., batch normalization statistics
+        buffers = {name: buffer.clone() for name, buffer in model.named_buffers()}
+
+        try:
+            return float(self.score(model))
+        finally:
+            with torch.no_grad():
+                for name, buffer in model.named_buffers():
+                    buffer.copy_(buffers[name])
+
+            model.zero_grad(set_to_none=True)
+            model.train(is_training)
+            model.to(device)
+
+
+class GradNorm(ZeroCostProxy):
+    """Sum of the L2 norms of the gradients of the loss.
+
+    Reference:
+        "Zero-Cost Proxies for Lightweight NAS", Abdelfattah et al., 2021
+
+    """
+
+    @overrides
+    def score(self, model: torch.nn.Module) -> float:
+        model.train()
+        model.zero_grad(set_to_none=True)
+
+        loss = _compute_loss(self.forward_logits(model, self.input_cache.inputs), self.input_cache)
+        _backward(loss)
+
+        return _sum_over_params(model, lambda p: p.grad.norm())
+
+
+class Snip(ZeroCostProxy):
+    """Sum of the connection sensitivities `|g * w|` of the loss.
+
+    Reference:
+        "SNIP: Single-shot Network Pruning based on Connection Sensitivity", Lee et al., 2019
+
+    """
+
+    @overrides
+    def score(self, model: torch.nn.Module) -> float:
+        model.train()
+        model.zero_grad(set_to_none=True)
+
+        loss = _compute_loss(self.forward_logits(model, self.input_cache.inputs), self.input_cache)
+        _backward(loss)
+
+        with torch.no_grad():
+            return _sum_over_params(model, lambda p: (p.grad * p).abs().sum())
+
+
+class SynFlow(ZeroCostProxy):
+    """Synaptic flow of the network, computed on an all-ones input and absolute weights.
+
+    The score is data-independent: only the shape of the cached inputs is used.
+    Weights are temporarily replaced by their absolute values and restored afterwards.
+
+    Reference:
+        "Pruning Neural Networks without any Data by Iteratively Conserving Synaptic Flow",
+            Tanaka et al., 2020
+
+    """
+
+    @overrides
+    def score(self, model: torch.nn.Module) -> float:
+        # Batch normalization statistics would otherwise make the flow data-dependent
+        model.eval()
+        model.zero_grad(set_to_none=True)
+
+        with torch.no_grad():
+            signs = {name: torch.sign(p) for name, p in model.state_dict().items() if torch.is_floating_point(p)}
+            for name, p in model.state_dict().items():
+                if name in signs:
+                    p.abs_()
+
+        try:
+            inputs = self.input_cache.inputs
+            if torch.is_floating_point(inputs):
+                inputs = torch.ones_like(inputs[:1])
+            else:
+                inputs = inputs[:1]
+
+            _backward(torch.sum(self.forward_logits(model, inputs)))
+
+            with torch.no_grad():
+                return _sum_over_params(model, lambda p: (p.grad * p).sum())
+        finally:
+            with torch.no_grad():
+                for name, p in model.state_dict().items():
+                    if name in signs:
+                        p.mul_(signs[name])
+
+
+class JacobianCovariance(ZeroCostProxy):
+    """Correlation of the input-output Jacobians across the minibatch.
+
+    Architectures whose Jacobians are less correlated across inputs are able to
+    distinguish them better at initialization. Requires floating-point inputs.
+
+    Reference:
+        "Neural Architecture Search without Training", Mellor et al., 2021 (v1)
+
+    """
+
+    @overrides
+    def score(self, model: torch.nn.Module) -> float:
+        assert not self.input_cache.is_text, "`JacobianCovariance` requires floating-point inputs."
+
+        model.train()
+        model.zero_grad(set_to_none=True)
+
+        inputs = self.input_cache.inputs.clone().requires_grad_(True)
+        logits = self.forward_logits(model, inputs)
+        logits.backward(torch.ones_like(logits))
+
+        jacobians = inputs.grad.reshape(inputs.size(0), -1).detach().double()
+        corrs = np.corrcoef(jacobians.cpu().numpy())
+        corrs = np.nan_to_num(corrs, nan=1.0)
+
+        eigenvalues = np.linalg.eigvalsh(corrs)
+        k = 1e-5
+
+        return float(-np.sum(np.log(eigenvalues + k) + 1.0 / (eigenvalues + k)))
+
+
+class SyntheticPerplexity(ZeroCostProxy):
+    """Negative perplexity of a language model on synthetic copy sequences.
+
+    A copy of the model takes a few optimization steps on the cached sequences (whose
+    second half repeats the first half), and the perplexity of the repeated half is
+    reported. Architectures that quickly learn to copy from context score higher. The
+    evaluated model itself is never updated.
+
+    """
+
+    def __init__(
+        self,
+        input_cache: ZeroCostInputCache,
+        n_steps: Optional[int] = 5,
+        learning_rate: Optional[float] = 1e-3,
+        forward_fn: Optional[Callable[[torch.nn.Module, torch.Tensor], Any]] = None,
+    ) -> None:
+        """Initialize the evaluator.
+
+        Args:
+            input_cache: Cache of token sequences, e.g., from
+                `ZeroCostInputCache.from_synthetic_text()`.
+            n_steps: Number of optimization steps taken before measuring perplexity.
+            learning_rate: Learning rate of the optimization steps.
+            forward_fn: Function that receives the model and inputs and returns its outputs.
+
+        """
+
+        super().__init__(input_cache, forward_fn=forward_fn)
+
+        self.n_steps = n_steps
+        self.learning_rate = learning_rate
+
+    @overrides
+    def score(self, model: torch.nn.Module) -> float:
+        assert self.input_cache.is_text, "`SyntheticPerplexity` requires token identifiers as inputs."
+
+        inputs = self.input_cache.inputs
+        half = inputs.size(1) // 2
+
+        model = copy.deepcopy(model)
+        model.train()
+        optimizer = torch.optim.Adam(model.parameters(), lr=self.learning_rate)
+
+        for _ in range(self.n_steps):
+            optimizer.zero_grad(set_to_none=True)
+            _compute_loss(self.forward_logits(model, inputs), self.input_cache).backward()
+            optimizer.step()
+
+        model.eval()
+        with torch.no_grad():
+            logits = self.forward_logits(model, inputs)[:, half - 1 : -1]
+            loss = F.cross_entropy(logits.reshape(-1, logits.size(-1)), inputs[:, half:].reshape(-1))
+
+        return -torch.exp(loss).item()
+
+
+def evaluate_rank_correlation(
+    proxy: ModelEvaluator,
+    reference: ModelEvaluator,
+    models: List[ArchaiModel],
+    budget: Optional[float] = None,
+) -> Dict[str, Union[float, List[float]]]:
+    """Compute rank correlations between a proxy and a reference evaluator.
+
+    Args:
+        proxy: Evaluator being assessed, e.g., a `ZeroCostProxy`.
+        reference: Ground-truth evaluator, e.g., `NatsbenchMetric`.
+        models: Models used for the comparison.
+        budget: Budget passed to both evaluators.
+
+    Returns:
+        Spearman and Kendall rank correlations, along with the proxy and reference results.
+
+    """
+
+    proxy_results, reference_results = [], []
+
+    for model in models:
+        reference_result = reference.evaluate(model, budget)
+
+        # Models that do not belong to the reference (e.g., not found in a benchmark) are skipped
+        if reference_result is None:
+            continue
+
+        proxy_results.append(proxy.evaluate(model, budget))
+        reference_results.append(reference_result)
+
+    return {
+        "spearman": float(stats.spearmanr(proxy_results, reference_results)[0]),
+        "kendall": float(stats.kendalltau(proxy_results, reference_results)[0]),
+        "proxy_results": proxy_results,
+        "reference_results": reference_results,
+    }
+
@@ -8,12 +8,12 @@ from functools import reduce
 from random import Random
 from typing import Any, Dict, List, Optional, Tuple
 
-from archai.discrete_search.search_spaces.config.arch_config import (
-    ArchConfig,
-    build_arch_config,
+from archai.discrete_search.search_spaces.config.arch_config import ArchConfig
+from archai.discrete_search.search_spaces.config.compiled_param_tree import (
+    CompiledArchParamTree,
 )
 from archai.discrete_search.search_spaces.config.discrete_choice import DiscreteChoice
-from archai.discrete_search.search_spaces.config.utils import flatten_dict, replace_ptree_choices, order_dict_keys
+from archai.discrete_search.search_spaces.config.utils import flatten_dict, order_dict_keys
 
 
 class ArchParamTree:
@@ -29,16 +29,31 @@ class ArchParamTree:
 
         self.config_tree = deepcopy(config_tree)
         self.params, self.constants = self._init_tree(config_tree)
+        self._compiled = None
 
     @property
     def num_archs(self) -> int:
         """Return the number of architectures in the search space."""
 
-        param_dict = self.to_dict(flatten=True, deduplicate_params=True, remove_constants=True)
-        num_options = [float(len(p.choices)) for p in param_dict.values()]
+        num_options = [float(len(p.choices)) for p in self.compile().params]
 
         return reduce(lambda a, b: a*b, num_options, 1)
 
+    def compile(self) -> CompiledArchParamTree:
+        """Compile the tree into a flat representation, which is cached.
+
+        Returns:
+            Compiled tree, used to sample, mutate and encode batches of architectures.
+
+        """
+
+        if getattr(self, "_compiled", None) is None:
+            self._compiled = CompiledArchParamTree(
+                self.to_dict(), self.to_dict(flatten=True, deduplicate_params=True, remove_constants=True)
+            )
+
+        return self._compiled
+
     def _init_tree(self, config_tree: Dict[str, Any]) -> Tuple[OrderedDict, OrderedDict]:
         params, constants = OrderedDict(), OrderedDict()
 
@@ -123,9 +138,10 @@ class ArchParamTree:
         """
 
         rng = rng or Random()
-        choices_dict = replace_ptree_choices(self.to_dict(), lambda x: x.random_sample(rng))
+        compiled = self.compile()
 
-        return build_arch_config(choices_dict)
+        # Parameters are sampled in the same (depth-first) order as they are visited in the tree
+        return compiled.build_config([p.random_sample(rng) for p in compiled.params])
 
     def get_param_name_list(self) -> List[str]:
         """Get list of parameter names in the search space.
@@ -135,9 +151,7 @@ class ArchParamTree:
 
         """
 
-        param_dict = self.to_dict(flatten=True, deduplicate_params=True, remove_constants=True)
-
-        return list(param_dict.keys())
+        return list(self.compile().param_names)
 
     def encode_config(self, config: ArchConfig, track_unused_params: Optional[bool] = True) -> List[float]:
         """Encode an `ArchConfig` object into a fixed-length vector of features.
@@ -154,7 +168,8 @@ class ArchParamTree:
 
         """
 
-        deduped_features = self.to_dict(flatten=True, deduplicate_params=True, remove_constants=True)
+        compiled = self.compile()
+        deduped_features = OrderedDict(zip(compiled.param_names, compiled.params))
 
         flat_config = flatten_dict(config._config_dict)
         flat_used_params = flatten_dict(config.get_used_params())
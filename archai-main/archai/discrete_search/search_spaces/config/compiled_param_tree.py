@@ -0,0 +1,244 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import copy
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from archai.discrete_search.search_spaces.config.arch_config import (
+    ArchConfig,
+    build_arch_config,
+)
+from archai.discrete_search.search_spaces.config.discrete_choice import DiscreteChoice
+from archai.discrete_search.search_spaces.config.utils import (
+    flatten_dict,
+    replace_ptree_choices,
+)
+
+
+class CompiledArchParamTree:
+    """Flat representation of an `ArchParamTree`.
+
+    Each (deduplicated) architecture parameter is a column and each architecture is a row
+    of choice indices, so batches of architectures can be sampled, mutated, encoded and
+    hashed as NumPy arrays. Rows are decoded back to `ArchConfig` objects with `decode`,
+    which should only be called for the architectures that are actually materialized.
+
+    """
+
+    def __init__(self, template: OrderedDict, params: "OrderedDict[str, DiscreteChoice]") -> None:
+        """Initialize the class.
+
+        Args:
+            template: Nested dictionary of the tree, with constants and `DiscreteChoice` nodes.
+            params: Flattened and deduplicated dictionary of the architecture parameters.
+
+        """
+
+        self.template = template
+        self.param_names = list(params.keys())
+        self.params = list(params.values())
+        self.param_columns = {id(p): i for i, p in enumerate(self.params)}
+
+        self.num_choices = np.array([len(p.choices) for p in self.params], dtype=np.int64)
+        max_choices = int(self.num_choices.max()) if len(self.params) > 0 else 0
+
+        # Cumulative distributions (padded with 1.0) allow all columns to be sampled at once
+        self.cdf = np.ones((len(self.params), max_choices))
+        for i, p in enumerate(self.params):
+            probs = np.ones(len(p.choices)) if p.probabilities is None else np.asarray(p.probabilities, dtype=float)
+            self.cdf[i, : len(p.choices)] = np.cumsum(probs) / probs.sum()
+
+        # Numeric parameters take a single feature, while one-hot parameters take one
+        # feature per choice
+        self.feature_offsets = np.zeros(len(self.params) + 1, dtype=np.int64)
+        self.numeric_values = {}
+        for i, p in enumerate(self.params):
+            if p.encode_strategy == "one_hot":
+                self.feature_offsets[i + 1] = self.feature_offsets[i] + len(p.choices)
+            else:
+                self.feature_offsets[i + 1] = self.feature_offsets[i] + 1
+                self.numeric_values[i] = np.array([float(c) for c in p.choices])
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        # Identifiers of the unpickled (or copied) parameters are different
+        self.__dict__.update(state)
+        self.param_columns = {id(p): i for i, p in enumerate(self.params)}
+
+    @property
+    def num_params(self) -> int:
+        """Return the number of architecture parameters."""
+
+        return len(self.params)
+
+    @property
+    def num_features(self) -> int:
+        """Return the number of features produced by `encode`."""
+
+        return int(self.feature_offsets[-1])
+
+    def sample(self, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """Sample a batch of architectures.
+
+        Args:
+            n: Number of architectures.
+            rng: Random number generator. If `None`, `np.random.default_rng()` is used.
+
+        Returns:
+            Choice indices with shape `(n, num_params)`.
+
+        """
+
+        rng = rng or np.random.default_rng()
+
+        u = rng.random((n, self.num_params, 1))
+        indices = (u >= self.cdf[None]).sum(axis=-1)
+
+        # Guards against floating point round-off in the last bin
+        return np.minimum(indices, self.num_choices - 1)
+
+    def mutate(
+        self, indices: np.ndarray, mutation_prob: float, rng: Optional[np.random.Generator] = None
+    ) -> np.ndarray:
+        """Mutate a batch of architectures.
+
+        Each parameter is replaced with probability `mutation_prob` by a uniformly sampled
+        choice, which is the same rule used by `ConfigSearchSpace.mutate`.
+
+        Args:
+            indices: Choice indices with shape `(n, num_params)`.
+            mutation_prob: Probability of mutating a parameter.
+            rng: Random number generator. If `None`, `np.random.default_rng()` is used.
+
+        Returns:
+            Mutated choice indices.
+
+        """
+
+        rng = rng or np.random.default_rng()
+
+        mask = rng.random(indices.shape) < mutation_prob
+        new_indices = (rng.random(indices.shape) * self.num_choices).astype(np.int64)
+
+        return np.where(mask, new_indices, indices)
+
+    def encode(self, indices: np.ndarray, strategy: Optional[str] = None) -> np.ndarray:
+        """Encode a batch of architectures into features.
+
+        With the default strategy, features are the same as the ones produced by
+        `ArchParamTree.encode_config` with `track_unused_params=False`.
+
+        Args:
+            indices: Choice indices with shape `(n, num_params)`.
+            strategy: Encoding strategy ['one_hot', 'ordinal']. If `None`, each parameter uses
+                its own `encode_strategy`.
+
+        Returns:
+            Features with shape `(n, num_features)` (or `(n, num_params)` if `ordinal`).
+
+        """
+
+        indices = np.asarray(indices, dtype=np.int64)
+        if strategy == "ordinal":
+            return indices.astype(np.float64)
+
+        if strategy not in [None, "one_hot"]:
+            raise ValueError(f"Invalid encoding strategy: {strategy}. Valid strategies: ['one_hot', 'ordinal']")
+
+        if strategy == "one_hot":
+            offsets = np.concatenate([[0], np.cumsum(self.num_choices)])
+            features = np.zeros((len(indices), offsets[-1]))
+            features[np.arange(len(indices))[:, None], offsets[:-1] + indices] = 1.0
+            return features
+
+        features = np.zeros((len(indices), self.num_features))
+        rows = np.arange(len(indices))
+        for i in range(self.num_params):
+            if i in self.numeric_values:
+                features[:, self.feature_offsets[i]] = self.numeric_values[i][indices[:, i]]
+            else:
+                features[rows, self.feature_offsets[i] + indices[:, i]] = 1.0
+
+        return features
+
+    def hash(self, indices: np.ndarray) -> List[str]:
+        """Hash a batch of architectures.
+
+        Hashes match the architecture identifiers of `ConfigSearchSpace` created with
+        `track_unused_params=False` and `hash_archid=True`.
+
+        Args:
+            indices: Choice indices with shape `(n, num_params)`.
+
+        Returns:
+            Hashes of the architectures.
+
+        """
+
+        return [
+            hashlib.sha1(str(tuple(row)).encode("utf-8")).hexdigest() for row in self.encode(indices).tolist()
+        ]
+
+    def decode_values(self, row: np.ndarray) -> Dict[str, Any]:
+        """Decode the choice indices of a single architecture into parameter values.
+
+        Args:
+            row: Choice indices with shape `(num_params,)`.
+
+        Returns:
+            Flattened dictionary of the architecture parameters.
+
+        """
+
+        return OrderedDict((name, p.choices[int(i)]) for name, p, i in zip(self.param_names, self.params, row))
+
+    def decode(self, row: np.ndarray) -> ArchConfig:
+        """Decode the choice indices of a single architecture into an `ArchConfig`.
+
+        Args:
+            row: Choice indices with shape `(num_params,)`.
+
+        Returns:
+            Architecture config.
+
+        """
+
+        return self.build_config([p.choices[int(i)] for p, i in zip(self.params, row)])
+
+    def build_config(self, values: List[Any]) -> ArchConfig:
+        """Build an `ArchConfig` from the values of all parameters.
+
+        Args:
+            values: Values of the architecture parameters, in the order of `param_names`.
+
+        Returns:
+            Architecture config.
+
+        """
+
+        # Constants are copied, so mutable ones are not shared between configs, while
+        # parameters are kept since their columns are found by identity
+        template = copy.deepcopy(self.template, memo={id(p): p for p in self.params})
+        config_dict = replace_ptree_choices(template, lambda p: values[self.param_columns[id(p)]])
+
+        return build_arch_config(config_dict)
+
+    def to_indices(self, config: ArchConfig) -> np.ndarray:
+        """Find the choice indices of an existing `ArchConfig`.
+
+        Args:
+            config: Architecture config.
+
+        Returns:
+            Choice indices with shape `(num_params,)`.
+
+        """
+
+        flat_config = flatten_dict(config._config_dict)
+
+        return np.array(
+            [p.choices.index(flat_config[name]) for name, p in zip(self.param_names, self.params)], dtype=np.int64
+        )
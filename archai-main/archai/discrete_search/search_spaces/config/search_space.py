@@ -20,6 +20,7 @@ from archai.discrete_search.search_spaces.config.arch_config import (
     build_arch_config,
 )
 from archai.discrete_search.search_spaces.config.arch_param_tree import ArchParamTree
+from archai.discrete_search.utils.weight_inheritance import inherit_weights
 
 
 class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
@@ -34,6 +35,7 @@ class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
         hash_archid: bool = True,
         model_kwargs: Optional[Dict[str, Any]] = None,
         builder_kwargs: Optional[Dict[str, Any]] = None,
+        inherit_parent_weights: bool = False,
     ) -> None:
         """Config-based Discrete Search Space.
 
@@ -51,6 +53,8 @@ class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
             hash_archid (bool, optional): Weather to hash architecture identifiers. Defaults to True.
             model_kwargs: Additional arguments to pass to `model_cls` constructor.
             builder_kwargs: Arguments to pass to `arch_param_tree` if a builder function is passed.
+            inherit_parent_weights (bool, optional): Whether models generated by `mutate` and `crossover`
+                should be initialized with the weights of their (first) parent. Defaults to False.
         """
 
         self.model_cls = model_cls
@@ -61,11 +65,13 @@ class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
         self.model_kwargs = model_kwargs or {}
         self.builder_kwargs = builder_kwargs or {}
         self.hash_archid = hash_archid
+        self.inherit_parent_weights = inherit_parent_weights
 
         if callable(self.arch_param_tree):
             self.arch_param_tree = self.arch_param_tree(**self.builder_kwargs)
 
         self.rng = Random(seed)
+        self.np_rng = np.random.default_rng(seed)
 
     def get_archid(self, arch_config: ArchConfig) -> str:
         """Return the architecture identifier for the given architecture configuration.
@@ -114,7 +120,7 @@ class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
 
     @overrides
     def mutate(self, arch: ArchaiModel) -> ArchaiModel:
-        choices_dict = self.arch_param_tree.to_dict()
+        choices_dict = self.arch_param_tree.compile().template
 
         # Mutates parameter with probability `self.mutation_prob`
         mutated_dict = utils.replace_ptree_pair_choices(
@@ -128,6 +134,9 @@ class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
         mutated_config = build_arch_config(mutated_dict)
         mutated_model = self.model_cls(mutated_config, **self.model_kwargs)
 
+        if self.inherit_parent_weights:
+            inherit_weights(arch.arch, mutated_model)
+
         return ArchaiModel(
             arch=mutated_model, archid=self.get_archid(mutated_config), metadata={"config": mutated_config}
         )
@@ -139,7 +148,7 @@ class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
 
         # Starting with arch param tree dict, randomly replaces DiscreteChoice objects
         # with params from model_1 with probability 0.5
-        choices_dict = self.arch_param_tree.to_dict()
+        choices_dict = self.arch_param_tree.compile().template
         cross_dict = utils.replace_ptree_pair_choices(
             choices_dict,
             model_1.metadata["config"].to_dict(),
@@ -154,6 +163,9 @@ class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
         cross_config = build_arch_config(cross_dict)
         cross_model = self.model_cls(cross_config, **self.model_kwargs)
 
+        if self.inherit_parent_weights:
+            inherit_weights(model_1.arch, cross_model)
+
         return ArchaiModel(arch=cross_model, archid=self.get_archid(cross_config), metadata={"config": cross_config})
 
     @overrides
@@ -166,3 +178,78 @@ class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
         )
 
         return np.nan_to_num(encoded_config, nan=self.unused_param_value)
+
+    def random_sample_batch(self, n: int) -> np.ndarray:
+        """Randomly sample a batch of architectures without building them.
+
+        Architectures are represented by the choice indices of each parameter (see
+        `ArchParamTree.compile`), so tens of thousands of candidates can be generated, e.g.,
+        to be ranked by a predictor. Only the selected candidates should be materialized.
+
+        Args:
+            n: Number of architectures.
+
+        Returns:
+            Choice indices with shape `(n, num_params)`.
+
+        """
+
+        return self.arch_param_tree.compile().sample(n, self.np_rng)
+
+    def mutate_batch(self, indices: np.ndarray) -> np.ndarray:
+        """Mutate a batch of architectures represented by their choice indices.
+
+        Args:
+            indices: Choice indices with shape `(n, num_params)`.
+
+        Returns:
+            Mutated choice indices.
+
+        """
+
+        return self.arch_param_tree.compile().mutate(indices, self.mutation_prob, self.np_rng)
+
+    def encode_batch(self, indices: np.ndarray) -> np.ndarray:
+        """Encode a batch of architectures represented by their choice indices.
+
+        Since the architectures are not built, unused parameters can not be tracked and
+        features match `encode` with `track_unused_params=False`.
+
+        Args:
+            indices: Choice indices with shape `(n, num_params)`.
+
+        Returns:
+            Encoded architectures with shape `(n, num_features)`.
+
+        """
+
+        return self.arch_param_tree.compile().encode(indices)
+
+    def get_indices(self, arch: ArchaiModel) -> np.ndarray:
+        """Get the choice indices of an architecture, e.g., to mutate it with `mutate_batch`.
+
+        Args:
+            arch: Architecture created by this search space.
+
+        Returns:
+            Choice indices with shape `(num_params,)`.
+
+        """
+
+        return self.arch_param_tree.compile().to_indices(arch.metadata["config"])
+
+    def materialize(self, indices: np.ndarray) -> ArchaiModel:
+        """Build the model of a single architecture represented by its choice indices.
+
+        Args:
+            indices: Choice indices with shape `(num_params,)`.
+
+        Returns:
+            Architecture.
+
+        """
+
+        config = self.arch_param_tree.compile().decode(indices)
+        arch = self.model_cls(config, **self.model_kwargs)
+
+        return ArchaiModel(arch=arch, archid=self.get_archid(config), metadata={"config": config})
@@ -1 +1,11 @@
-from archai.discrete_search.search_spaces.cv.segmentation_dag.search_space import SegmentationDagSearchSpace
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+from archai.common.lazy_import import lazy_exports
+
+# Search spaces are imported on first access, since they depend on `torch`
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'SegmentationDagSearchSpace': 'archai.discrete_search.search_spaces.cv.segmentation_dag.search_space',
+})
+
+__all__ = ['SegmentationDagSearchSpace']
@@ -0,0 +1,197 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from archai.discrete_search.search_spaces.cv.segmentation_dag.model import (
+    SegmentationDagModel,
+)
+from archai.discrete_search.search_spaces.cv.segmentation_dag.ops import OPS
+
+# Keyword arguments of each operation in `OPS`
+_OP_KWARGS = {name: op.keywords for name, op in OPS.items()}
+
+
+def _conv_madds(
+    in_ch: int, out_ch: int, out_hw: Tuple[int, int], kernel_size: int, groups: Optional[int] = 1
+) -> int:
+    # Multiply-adds of a biased `nn.Conv2d`, following the convention of `tensorwatch.ModelStats`
+    kernel_mul = kernel_size * kernel_size * (in_ch // groups)
+    kernel_add = kernel_mul
+
+    return (kernel_mul + kernel_add) * out_hw[0] * out_hw[1] * out_ch
+
+
+def _conv_output_hw(in_hw: Tuple[int, int], kernel_size: int, stride: int, padding: int) -> Tuple[int, int]:
+    return tuple((d + 2 * padding - kernel_size) // stride + 1 for d in in_hw)
+
+
+def _op_madds(
+    op_name: str, in_ch: int, out_ch: int, in_hw: Tuple[int, int], stride: int
+) -> Tuple[int, Tuple[int, int]]:
+    # Multiply-adds and output resolution of an operation from `OPS`, where batch normalization
+    # takes 4 operations per element and ReLU takes 1 operation per element
+    kwargs = _OP_KWARGS[op_name]
+    kernel_size, padding = kwargs["kernel_size"], kwargs["padding"]
+    out_hw = _conv_output_hw(in_hw, kernel_size, stride, padding)
+    out_numel = out_hw[0] * out_hw[1]
+
+    if op_name.startswith("conv"):
+        madds = _conv_madds(in_ch, out_ch, out_hw, kernel_size) + 5 * out_ch * out_numel
+        return madds, out_hw
+
+    # Separable convolution block
+    hidden_ch = int(in_ch * kwargs.get("expand_ratio", 1.0))
+    madds = 0
+
+    if kwargs.get("expand_ratio", 1.0) != 1:
+        madds += _conv_madds(in_ch, hidden_ch, in_hw, 1) + 4 * hidden_ch * in_hw[0] * in_hw[1]
+
+    madds += _conv_madds(hidden_ch, hidden_ch, out_hw, kernel_size, groups=hidden_ch) + 5 * hidden_ch * out_numel
+    madds += _conv_madds(hidden_ch, out_ch, out_hw, 1) + 4 * out_ch * out_numel
+
+    return madds, out_hw
+
+
+def _broadcast_hw(hw_1: Tuple[int, int], hw_2: Tuple[int, int]) -> Tuple[int, int]:
+    if not all(d1 == d2 or d1 == 1 or d2 == 1 for d1, d2 in zip(hw_1, hw_2)):
+        raise ValueError(f"Inputs with resolutions {hw_1} and {hw_2} can not be added.")
+
+    return tuple(max(d1, d2) for d1, d2 in zip(hw_1, hw_2))
+
+
+def _propagate(
+    graph: List[Dict[str, Any]],
+    edges: List[Tuple[str, str]],
+    channels_per_scale: Dict[int, int],
+    post_upsample_layers: int,
+    stem_stride: int,
+    input_hw: Tuple[int, int],
+    output_hw: Tuple[int, int],
+    nb_classes: int,
+    check_resolution: bool,
+) -> int:
+    nodes = {n["name"]: n for n in graph}
+
+    stem_ch = channels_per_scale[nodes["input"]["scale"]]
+    stem_madds, stem_hw = _op_madds("conv3x3", 3, stem_ch, input_hw, stem_stride)
+    madds = stem_madds
+
+    # Resolution of each node, where `None` denotes a node that did not receive any input yet
+    node_hw = {name: None for name in nodes}
+    node_hw["input"] = stem_hw
+    base_hw = tuple(d // stem_stride for d in output_hw)
+
+    for in_node, out_node in edges:
+        in_hw = node_hw[in_node]
+        if in_hw is None:
+            raise ValueError(f"Node `{in_node}` is used before receiving any input.")
+
+        in_scale, out_scale = nodes[in_node]["scale"], nodes[out_node]["scale"]
+        if check_resolution and in_hw != tuple(int(d // in_scale) for d in base_hw):
+            raise ValueError("Input resolution does not match the node resolution.")
+
+        in_ch, out_ch = channels_per_scale[in_scale], channels_per_scale[out_scale]
+        if out_scale >= in_scale:
+            edge_madds, edge_hw = _op_madds(nodes[in_node]["op"], in_ch, out_ch, in_hw, int(out_scale // in_scale))
+        else:
+            edge_madds, edge_hw = _op_madds(nodes[in_node]["op"], in_ch, out_ch, in_hw, 1)
+            edge_hw = tuple(d * int(in_scale // out_scale) for d in edge_hw)
+
+        madds += edge_madds
+        node_hw[out_node] = edge_hw if node_hw[out_node] is None else _broadcast_hw(node_hw[out_node], edge_hw)
+
+    if node_hw["output"] is None:
+        raise ValueError("Node `output` did not receive any input.")
+
+    # Post-upsample layers and classifier run on the full resolution
+    ch = channels_per_scale[nodes["output"]["scale"]]
+    for _ in range(post_upsample_layers):
+        layer_madds, _ = _op_madds("conv3x3", ch, channels_per_scale[1], output_hw, 1)
+        madds += layer_madds
+        ch = channels_per_scale[1]
+
+    if ch != stem_ch:
+        raise ValueError(f"Classifier expects {stem_ch} channels, but received {ch} channels.")
+
+    return madds + _conv_madds(stem_ch, nb_classes, output_hw, 1)
+
+
+def analyze_graph(
+    graph: List[Dict[str, Any]],
+    channels_per_scale: Dict[str, Any],
+    post_upsample_layers: Optional[int] = 1,
+    stem_stride: Optional[int] = 2,
+    img_size: Optional[Tuple[int, int]] = (256, 256),
+    nb_classes: Optional[int] = 19,
+) -> int:
+    """Validate a `SegmentationDagModel` graph and compute its multiply-adds without building it.
+
+    The graph is checked for the same conditions as `SegmentationDagModel` (construction and
+    `validate_forward`): node references and topological order, supported operations and
+    scales, resolution of every node, shape compatibility of the added inputs, unused nodes
+    and channels received by the classifier. Multiply-adds are computed analytically and
+    match `tensorwatch.ModelStats(model, (1, 3, *img_size))`.
+
+    Args:
+        graph: List of nodes, following the format used by `SegmentationDagModel`.
+        channels_per_scale: Dictionary with `base_channels`, `delta_channels` and optionally
+            a `mult_delta` flag, following the format used by `SegmentationDagModel`.
+        post_upsample_layers: Number of post-upsample layers.
+        stem_stride: Stride of the first convolution.
+        img_size: Image size (width, height).
+        nb_classes: Number of classes for segmentation.
+
+    Returns:
+        Number of multiply-adds.
+
+    Raises:
+        ValueError: If the graph is not valid.
+
+    """
+
+    if img_size[0] % 32 != 0 or img_size[1] % 32 != 0:
+        raise ValueError("Image size must be a multiple of 32.")
+
+    nodes = {n["name"]: n for n in graph}
+    if "input" not in nodes or "output" not in nodes:
+        raise ValueError("Graph must have `input` and `output` nodes.")
+
+    channels_per_scale = SegmentationDagModel._get_channels_per_scale(channels_per_scale)
+
+    # Repeated edges share the same block, as `SegmentationDagModel.edge_dict` is keyed by edge
+    edges = [(in_node, n["name"]) for n in nodes.values() if n["name"] != "input" for in_node in n["inputs"]]
+    edges = list(dict.fromkeys(edges))
+
+    visited_nodes = {"input"}
+    for in_node, out_node in edges:
+        if in_node not in nodes:
+            raise ValueError(f"Node `{out_node}` has an unknown input `{in_node}`.")
+
+        visited_nodes.add(out_node)
+        if in_node not in visited_nodes:
+            raise ValueError("Graph nodes are not in topological order.")
+
+        if nodes[in_node]["op"] not in OPS:
+            raise ValueError(f"Node `{in_node}` has an unsupported operation `{nodes[in_node]['op']}`.")
+
+        in_scale, out_scale = nodes[in_node]["scale"], nodes[out_node]["scale"]
+        if out_scale % in_scale != 0 and in_scale % out_scale != 0:
+            raise ValueError(f"Scales {in_scale} and {out_scale} of edge `{in_node}-{out_node}` are not compatible.")
+
+    for node in nodes.values():
+        if node["scale"] not in channels_per_scale:
+            raise ValueError(f"Node `{node['name']}` has an unsupported scale {node['scale']}.")
+
+    unused_nodes = set(nodes.keys()) - {in_node for in_node, _ in edges} - {"output"}
+    if unused_nodes:
+        raise ValueError(f"Unused nodes were detected: {unused_nodes}.")
+
+    # `validate_forward` runs on images with (height, width) shape, while `tensorwatch.ModelStats`
+    # is fed with (width, height) shape, thus the resolutions are checked on the former and the
+    # multiply-adds are computed on the latter
+    w, h = img_size
+    args = (graph, edges, channels_per_scale, post_upsample_layers, stem_stride)
+    _propagate(*args, (h, w), (h, w), nb_classes, check_resolution=True)
+
+    return _propagate(*args, (w, h), (h, w), nb_classes, check_resolution=False)
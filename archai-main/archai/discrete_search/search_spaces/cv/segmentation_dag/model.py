@@ -65,6 +65,7 @@ class SegmentationDagModel(torch.nn.Module):
 
         # Checks if the edges are in topological order
         self._validate_edges(self.edge_dict)
+        self._build_execution_plan(self.edge_dict)
 
         # Stem block
         stem_ch = self.channels_per_scale[self.graph["input"]["scale"]]
@@ -165,15 +166,58 @@ class SegmentationDagModel(torch.nn.Module):
                 in_node in visited_nodes
             ), "SegmentationModel received a list of nodes that is not in topological order"
 
+    def _build_execution_plan(self, edge_dict: MutableMapping[Tuple[str, str], nn.Module]) -> None:
+        # Each node is assigned an integer slot and each edge (in the topological order of `edge_dict`)
+        # reads from its input slot and assigns or accumulates into its output slot. Slots are released
+        # after their last read, so intermediate tensors can be freed as soon as possible
+        node2slot = {node_name: i for i, node_name in enumerate(self.node_names)}
+        edges = [edge.split("-") for edge in edge_dict.keys()]
+
+        last_read = {in_node: i for i, (in_node, _) in enumerate(edges)}
+        written_nodes = set()
+
+        self._num_slots = len(self.node_names)
+        self._input_slot = node2slot["input"]
+        self._output_slot = node2slot["output"]
+        self._edge_in_slots: List[int] = []
+        self._edge_out_slots: List[int] = []
+        self._edge_accumulate: List[bool] = []
+        self._edge_release_slots: List[int] = []
+
+        for i, (in_node, out_node) in enumerate(edges):
+            self._edge_in_slots.append(node2slot[in_node])
+            self._edge_out_slots.append(node2slot[out_node])
+            self._edge_accumulate.append(out_node in written_nodes)
+            self._edge_release_slots.append(
+                node2slot[in_node] if last_read[in_node] == i and in_node != "output" else -1
+            )
+            written_nodes.add(out_node)
+
     def forward(self, x: torch.Tensor) -> torch.Tensor:
-        inputs = {node_name: 0 for node_name in self.node_names}
-        inputs["input"] = self.stem_block(x)
+        slots: List[Optional[torch.Tensor]] = [None for _ in range(self._num_slots)]
+        slots[self._input_slot] = self.stem_block(x)
 
-        for edge, module in self.edge_dict.items():
-            in_node, out_node = edge.split("-")
-            inputs[out_node] = inputs[out_node] + module(inputs[in_node])
+        i = 0
+        for module in self.edge_dict.values():
+            in_tensor = slots[self._edge_in_slots[i]]
+            assert in_tensor is not None, "Node is used before receiving any input."
 
-        output = self.post_upsample(self.up(inputs["output"]))
+            out_tensor = module(in_tensor)
+            if self._edge_accumulate[i]:
+                acc_tensor = slots[self._edge_out_slots[i]]
+                assert acc_tensor is not None
+                out_tensor = acc_tensor + out_tensor
+
+            slots[self._edge_out_slots[i]] = out_tensor
+            if self._edge_release_slots[i] >= 0:
+                slots[self._edge_release_slots[i]] = None
+
+            i += 1
+
+        output = slots[self._output_slot]
+        assert output is not None, "Node `output` did not receive any input."
+
+        output = self.post_upsample(self.up(output))
         return self.classifier(output)
 
     def validate_forward(self, x: torch.Tensor) -> torch.Tensor:
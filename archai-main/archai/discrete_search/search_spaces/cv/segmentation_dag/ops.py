@@ -113,7 +113,8 @@ class SeparableConvBlock(nn.Module):
         # Expansion and Depthwise Convolution
         out = x
 
-        if self.expand_ratio != 1:
+        # `hasattr` is resolved at compile time, which keeps the module scriptable
+        if hasattr(self, "_expand_conv"):
             out = self._bn0(self._expand_conv(out))  # No activation function here
         out = self._act(self._bn1(self._depthwise_conv(out)))
 
@@ -7,13 +7,16 @@ from random import Random
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
-import tensorwatch as tw
 import torch
 from overrides.overrides import overrides
 
+from archai.common.lazy_import import lazy_import
 from archai.common.ordered_dict_logger import OrderedDictLogger
 from archai.discrete_search.api.archai_model import ArchaiModel
 from archai.discrete_search.api.search_space import EvolutionarySearchSpace
+from archai.discrete_search.search_spaces.cv.segmentation_dag.graph_analysis import (
+    analyze_graph,
+)
 from archai.discrete_search.search_spaces.cv.segmentation_dag.model import (
     OPS,
     SegmentationDagModel,
@@ -21,6 +24,9 @@ from archai.discrete_search.search_spaces.cv.segmentation_dag.model import (
 
 logger = OrderedDictLogger(source=__name__)
 
+# Only used by the forward-based `is_valid_model`
+tw = lazy_import("tensorwatch")
+
 
 class SegmentationDagSearchSpace(EvolutionarySearchSpace):
     """Search space for segmentation DAGs."""
@@ -147,6 +153,35 @@ class SegmentationDagSearchSpace(EvolutionarySearchSpace):
 
         return is_valid, None if not is_valid else model_stats.MAdd
 
+    def is_valid_graph(
+        self, graph: List[Dict[str, Any]], channels_per_scale: Dict[str, Any], post_upsample_layers: Optional[int] = 1
+    ) -> Tuple[bool, int]:
+        """Check if a graph is valid and falls inside of the specified MAdds range.
+
+        Equivalent to `is_valid_model`, but the graph is analyzed statically instead of
+        building the model and running forward passes.
+
+        Args:
+            graph: DAG graph.
+            channels_per_scale: Number of channels per scale.
+            post_upsample_layers: Number of post upsample layers.
+
+        Returns:
+            Tuple of (is_valid, MAdds).
+
+        """
+
+        try:
+            madds = analyze_graph(
+                graph, channels_per_scale, post_upsample_layers, img_size=self.img_size, nb_classes=self.nb_classes
+            )
+        except ValueError:
+            return False, None
+
+        is_valid = madds >= self.min_mac and madds <= self.max_mac
+
+        return is_valid, None if not is_valid else madds
+
     def load_from_graph(
         self, graph: List[Dict[str, Any]], channels_per_scale: Dict[str, Any], post_upsample_layers: Optional[int] = 1
     ) -> ArchaiModel:
@@ -324,14 +359,13 @@ class SegmentationDagSearchSpace(EvolutionarySearchSpace):
                 graph.append(new_node)
                 node_list.append(new_node["name"])
 
-            # Builds model
-            model = SegmentationDagModel(
-                graph, ch_per_scale, post_upsample_layers, img_size=self.img_size, nb_classes=self.nb_classes
-            )
-
-            found_valid, macs = self.is_valid_model(model)
+            found_valid, macs = self.is_valid_graph(graph, ch_per_scale, post_upsample_layers)
 
+            # Builds model only if the graph is valid
             if found_valid:
+                model = SegmentationDagModel(
+                    graph, ch_per_scale, post_upsample_layers, img_size=self.img_size, nb_classes=self.nb_classes
+                )
                 arch = ArchaiModel(model, model.to_hash(), {"parent": None, "macs": macs})
 
         return arch
@@ -391,15 +425,15 @@ class SegmentationDagSearchSpace(EvolutionarySearchSpace):
                 # Adds `k` new inputs
                 node["inputs"] += [graph[idx]["name"] for idx in input_idxs if graph[idx]["name"] not in node["inputs"]]
 
+            if not self.is_valid_graph(graph, channels_per_scale, post_upsample_layers)[0]:
+                logger.info(f"Neighbor generation {base_model.arch.to_hash()} failed.")
+                continue
+
             # compile the model
             nbr_model = SegmentationDagModel(
                 graph, channels_per_scale, post_upsample_layers, img_size=self.img_size, nb_classes=self.nb_classes
             )
 
-            if not self.is_valid_model(nbr_model)[0]:
-                logger.info(f"Neighbor generation {base_model.arch.to_hash()} -> {nbr_model.to_hash()} failed.")
-                continue
-
             return ArchaiModel(nbr_model, nbr_model.to_hash(), metadata={"parent": parent_id})
 
     @overrides
@@ -485,31 +519,24 @@ class SegmentationDagSearchSpace(EvolutionarySearchSpace):
                     [left_m.arch.post_upsample_layers, right_m.arch.post_upsample_layers]
                 )
 
+                ch_map = {
+                    "base_channels": ch_map["base_channels"],
+                    "delta_channels": ch_map["delta_channels"],
+                    "mult_delta": ch_map["mult_delta"],
+                }
+
                 try:
-                    result_model = self.load_from_graph(
-                        result_g,
-                        {
-                            "base_channels": ch_map["base_channels"],
-                            "delta_channels": ch_map["delta_channels"],
-                            "mult_delta": ch_map["mult_delta"],
-                        },
-                        post_upsample_layers,
+                    analyze_graph(
+                        result_g, ch_map, post_upsample_layers, img_size=self.img_size, nb_classes=self.nb_classes
                     )
-
-                    out_shape = result_model.arch.validate_forward(
-                        torch.randn(1, 3, *result_model.arch.img_size[::-1])
-                    ).shape
-
-                    assert out_shape == torch.Size([1, self.nb_classes, *result_model.arch.img_size[::-1]])
-
-                except Exception as e:
+                except ValueError as e:
                     logger.info(
                         f"Crossover between {left_m.arch.to_hash()}, {right_m.arch.to_hash()} failed: "
                         f"(nb_tries = {nb_tries})."
                     )
                     logger.info(str(e))
-                    print(str(e))
                     continue
 
+                result_model = self.load_from_graph(result_g, ch_map, post_upsample_layers)
                 result_model.metadata["parents"] = left_m.archid + "," + right_m.archid
                 return result_model
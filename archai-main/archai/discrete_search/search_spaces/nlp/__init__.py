@@ -1,5 +1,12 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
-from archai.discrete_search.search_spaces.nlp.transformer_flex.search_space import TransformerFlexSearchSpace
-from archai.discrete_search.search_spaces.nlp.tfpp import TfppSearchSpace
+from archai.common.lazy_import import lazy_exports
+
+# Search spaces are imported on first access, since they depend on `transformers`
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'TransformerFlexSearchSpace': 'archai.discrete_search.search_spaces.nlp.transformer_flex.search_space',
+    'TfppSearchSpace': 'archai.discrete_search.search_spaces.nlp.tfpp',
+})
+
+__all__ = ['TransformerFlexSearchSpace', 'TfppSearchSpace']
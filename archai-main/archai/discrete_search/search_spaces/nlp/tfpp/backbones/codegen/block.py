@@ -71,8 +71,8 @@ class CodeGenBlock(nn.Module):
         residual = hidden_states
         hidden_states = self.norm(hidden_states.to(dtype=self.norm.weight.dtype))
         
-        attn_output, _ = self.attn(hidden_states, **mixer_kwargs)
+        attn_output, present = self.attn(hidden_states, **mixer_kwargs)
         attn_output = self.resid_dropout(attn_output)
         mlp_output = self.resid_dropout(self.mlp(hidden_states))
         
-        return residual + attn_output + mlp_output
+        return residual + attn_output + mlp_output, present
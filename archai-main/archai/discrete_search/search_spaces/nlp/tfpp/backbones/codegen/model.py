@@ -29,6 +29,7 @@ from transformers.models.codegen.configuration_codegen import CodeGenConfig
 from transformers.models.codegen.modeling_codegen import CodeGenPreTrainedModel
 
 from archai.discrete_search.search_spaces.config import ArchConfig
+from ...utils import map_past_key_values
 from .block import CodeGenBlock
 
 logger = logging.get_logger(__name__)
@@ -121,7 +122,7 @@ class CodeGenModel(CodeGenPreTrainedModel):
             past_length = 0
             past_key_values = tuple([None] * len(self.h))
         else:
-            past_length = past_key_values[0][0].size(-2)
+            past_length = past_key_values[0][0]
 
         if position_ids is None:
             position_ids = torch.arange(past_length, input_shape[-1] + past_length, dtype=torch.long, device=device)
@@ -207,9 +208,9 @@ class CodeGenModel(CodeGenPreTrainedModel):
                     attention_mask,
                     head_mask[i],
                     bin_attention_mask
-                )
+                )[0]
             else:
-                hidden_states = block(
+                hidden_states, present = block(
                     hidden_states,
                     layer_past=layer_past,
                     attention_mask=attention_mask,
@@ -220,7 +221,7 @@ class CodeGenModel(CodeGenPreTrainedModel):
                 )
 
             if use_cache is True:
-                raise NotImplementedError
+                presents = presents + (present,)
 
             if output_attentions:
                 raise NotImplementedError
@@ -262,10 +263,10 @@ class CodeGenForCausalLM(CodeGenPreTrainedModel):
     def set_output_embeddings(self, new_embeddings):
         self.lm_head = new_embeddings
 
-    def prepare_inputs_for_generation(self, input_ids, past=None, **kwargs):
+    def prepare_inputs_for_generation(self, input_ids, past_key_values=None, **kwargs):
         token_type_ids = kwargs.get("token_type_ids", None)
         # only last token for inputs_ids if past is defined in kwargs
-        if past:
+        if past_key_values:
             input_ids = input_ids[:, -1].unsqueeze(-1)
             if token_type_ids is not None:
                 token_type_ids = token_type_ids[:, -1].unsqueeze(-1)
@@ -277,13 +278,13 @@ class CodeGenForCausalLM(CodeGenPreTrainedModel):
             # create position_ids on the fly for batch generation
             position_ids = attention_mask.long().cumsum(-1) - 1
             position_ids.masked_fill_(attention_mask == 0, 1)
-            if past:
+            if past_key_values:
                 position_ids = position_ids[:, -1].unsqueeze(-1)
         else:
             position_ids = None
         return {
             "input_ids": input_ids,
-            "past_key_values": past,
+            "past_key_values": past_key_values,
             "use_cache": kwargs.get("use_cache"),
             "position_ids": position_ids,
             "attention_mask": attention_mask,
@@ -363,7 +364,4 @@ class CodeGenForCausalLM(CodeGenPreTrainedModel):
         [`~PretrainedModel.beam_sample`] is called. This is required to match `past_key_values` with the correct
         beam_idx at every generation step.
         """
-        return tuple(
-            tuple(past_state.index_select(0, beam_idx.to(past_state.device)) for past_state in layer_past)
-            for layer_past in past
-        )
+        return map_past_key_values(lambda past_state: past_state.index_select(0, beam_idx.to(past_state.device)), past)
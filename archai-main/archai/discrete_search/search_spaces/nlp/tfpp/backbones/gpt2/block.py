@@ -98,7 +98,7 @@ class GPT2Block(nn.Module):
                 rowscale=None, prenorm=True, residual_in_fp32=self.residual_in_fp32
             )
 
-        hidden_states, _ = self.attn(hidden_states, **kwargs)
+        hidden_states, present = self.attn(hidden_states, **kwargs)
 
         if not self.fused_dropout_add_ln:
             dropped = self.resid_dropout2(hidden_states)
@@ -114,4 +114,4 @@ class GPT2Block(nn.Module):
                 rowscale=None, prenorm=True, residual_in_fp32=self.residual_in_fp32
             )
 
-        return self.mlp(hidden_states), residual
+        return self.mlp(hidden_states), residual, present
@@ -28,7 +28,7 @@ from transformers.models.gpt2.configuration_gpt2 import GPT2Config
 from archai.discrete_search.search_spaces.config import ArchConfig
 
 from ...mixed_op import MixedAttentionBlock
-from ...utils import make_broadcast_map, make_asso_map
+from ...utils import make_broadcast_map, make_asso_map, map_past_key_values
 from .block import GPT2Block
 
 
@@ -214,7 +214,7 @@ class GPT2Model(GPT2PreTrainedModel):
             past_length = 0
             past_key_values = tuple([None] * len(self.h))
         else:
-            past_length = past_key_values[0][0].size(-2)
+            past_length = past_key_values[0][0]
         if position_ids is None:
             position_ids = torch.arange(past_length, input_shape[-1] + past_length, dtype=torch.long, device=device)
             position_ids = position_ids.unsqueeze(0).view(-1, input_shape[-1])
@@ -292,7 +292,7 @@ class GPT2Model(GPT2PreTrainedModel):
                 torch.cuda.set_device(hidden_states.device)
                 # Ensure layer_past is on same device as hidden_states (might not be correct)
                 if layer_past is not None:
-                    layer_past = tuple(past_state.to(hidden_states.device) for past_state in layer_past)
+                    layer_past = map_past_key_values(lambda past_state: past_state.to(hidden_states.device), layer_past)
                 # Ensure that attention_mask is always on the same device as hidden_states
                 if attention_mask is not None:
                     attention_mask = attention_mask.to(hidden_states.device)
@@ -330,7 +330,7 @@ class GPT2Model(GPT2PreTrainedModel):
                     bin_attention_mask=bin_attention_mask
                 )
             else:
-                hidden_states, residual = block(
+                hidden_states, residual, present = block(
                     hidden_states,
                     residual,
                     layer_past=layer_past,
@@ -346,8 +346,7 @@ class GPT2Model(GPT2PreTrainedModel):
                 )
             
             if use_cache is True:
-                raise NotImplementedError
-                presents = presents + (outputs[1],)
+                presents = presents + (present,)
 
             if output_attentions:
                 raise NotImplementedError
@@ -425,10 +424,10 @@ class GPT2LMHeadModel(GPT2PreTrainedModel):
     def set_output_embeddings(self, new_embeddings):
         self.lm_head = new_embeddings
 
-    def prepare_inputs_for_generation(self, input_ids, past=None, **kwargs):
+    def prepare_inputs_for_generation(self, input_ids, past_key_values=None, **kwargs):
         token_type_ids = kwargs.get("token_type_ids", None)
         # only last token for inputs_ids if past is defined in kwargs
-        if past:
+        if past_key_values:
             input_ids = input_ids[:, -1].unsqueeze(-1)
             if token_type_ids is not None:
                 token_type_ids = token_type_ids[:, -1].unsqueeze(-1)
@@ -440,13 +439,13 @@ class GPT2LMHeadModel(GPT2PreTrainedModel):
             # create position_ids on the fly for batch generation
             position_ids = attention_mask.long().cumsum(-1) - 1
             position_ids.masked_fill_(attention_mask == 0, 1)
-            if past:
+            if past_key_values:
                 position_ids = position_ids[:, -1].unsqueeze(-1)
         else:
             position_ids = None
         return {
             "input_ids": input_ids,
-            "past_key_values": past,
+            "past_key_values": past_key_values,
             "use_cache": kwargs.get("use_cache"),
             "position_ids": position_ids,
             "attention_mask": attention_mask,
@@ -531,8 +530,5 @@ class GPT2LMHeadModel(GPT2PreTrainedModel):
         [`~PreTrainedModel.beam_sample`] is called. This is required to match `past_key_values` with the correct
         beam_idx at every generation step.
         """
-        return tuple(
-            tuple(past_state.index_select(0, beam_idx.to(past_state.device)) for past_state in layer_past)
-            for layer_past in past
-        )
+        return map_past_key_values(lambda past_state: past_state.index_select(0, beam_idx.to(past_state.device)), past)
 
@@ -1,6 +1,6 @@
 import torch
 from torch import nn
-from typing import Optional
+from typing import Any, Optional, Tuple
 from transformers.models.gpt2.configuration_gpt2 import GPT2Config
 from archai.discrete_search.search_spaces.config import ArchConfig
 
@@ -58,9 +58,48 @@ class MixedAttentionBlock(nn.Module):
         else:
             self.out_proj = nn.Linear(self.hidden_size, self.hidden_size)
 
-    def forward(self, hidden_states, **kwargs):
-        # Concatenates outputs from each op in the embedding dim
-        output = [op(hidden_states, **kwargs)[0] for op in self.ops]
+    def _op_forward_with_cache(self, op: nn.Module, hidden_states: torch.Tensor,
+                               op_past: Optional[Any] = None, **kwargs) -> Tuple[torch.Tensor, Any]:
+        if getattr(op, 'supports_cache', False):
+            return op(hidden_states, layer_past=op_past, use_cache=True, **kwargs)[:2]
+
+        # Ops without incremental decoding keep their input history as state
+        # and recompute the whole sequence to output the new positions
+        seq_len = hidden_states.size(1)
+        if op_past is not None:
+            hidden_states = torch.cat([op_past, hidden_states], dim=1)
+
+        return op(hidden_states, **kwargs)[0][:, -seq_len:], hidden_states
+
+    def forward(self, hidden_states, layer_past: Optional[Tuple[int, Tuple[Any, ...]]] = None,
+                use_cache: bool = False, **kwargs):
+        if layer_past is None and not use_cache:
+            # Concatenates outputs from each op in the embedding dim
+            output = [op(hidden_states, **kwargs)[0] for op in self.ops]
+            output = torch.cat(output, dim=-1)
+            
+            return self.out_proj(output), None
+
+        # The cache holds the number of past positions and the state of each op
+        past_length, ops_past = layer_past if layer_past is not None else (0, (None,) * len(self.ops))
+        output, ops_present = zip(*[
+            self._op_forward_with_cache(op, hidden_states, op_past, **kwargs)
+            for op, op_past in zip(self.ops, ops_past)
+        ])
         output = torch.cat(output, dim=-1)
-        
-        return self.out_proj(output), None
+
+        present = (past_length + hidden_states.size(1), ops_present) if use_cache else None
+
+        return self.out_proj(output), present
+
+    def step(self, hidden_states, layer_past: Optional[Tuple[int, Tuple[Any, ...]]] = None, **kwargs):
+        """Decodes new positions given the cache of the previous ones.
+
+        Args:
+            hidden_states: New positions (batch_size, seq_len, hidden_size).
+            layer_past: Cache returned by the previous call to `forward` or `step`.
+
+        Returns:
+            Output of the new positions and the updated cache.
+        """
+        return self.forward(hidden_states, layer_past=layer_past, use_cache=True, **kwargs)
@@ -9,6 +9,8 @@ from archai.discrete_search.search_spaces.config import ArchConfig
 
 
 class CausalSelfAttention(nn.Module):
+    supports_cache = True
+
     def __init__(self, arch_config: ArchConfig, hf_config: CodeGenConfig, hidden_size: int,
                  total_heads: int, op_heads: int, **kwargs):
         assert hidden_size % total_heads == 0
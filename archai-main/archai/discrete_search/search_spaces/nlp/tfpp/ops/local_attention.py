@@ -20,9 +20,9 @@ class SinusoidalEmbeddings(nn.Module):
         inv_freq = 1. / (10000 ** (torch.arange(0, dim, 2).float() / dim))
         self.register_buffer('inv_freq', inv_freq)
 
-    def forward(self, x):
+    def forward(self, x, offset = 0):
         n = x.shape[-2]
-        t = torch.arange(n, device = x.device).type_as(self.inv_freq)
+        t = torch.arange(offset, offset + n, device = x.device).type_as(self.inv_freq)
         freqs = torch.einsum('i , j -> i j', t, self.inv_freq)
         return torch.cat((freqs, freqs), dim=-1)
 
@@ -144,11 +144,11 @@ class LocalAttention(nn.Module):
             sim = sim.masked_fill(causal_mask, mask_value)
             del causal_mask
 
-        # mask out padding value
-        if self.autopad and needed_pad:
-            pad_mask = bq_k == self.pad_value
-            sim = sim.masked_fill(pad_mask, mask_value)
-            del pad_mask
+        # mask out padding value (look-around of the first and last windows), which
+        # is also masked by cached decoding (`forward_with_past`)
+        pad_mask = bq_k == self.pad_value
+        sim = sim.masked_fill(pad_mask, mask_value)
+        del pad_mask
 
         if bin_attention_mask is not None:
             mask = bin_attention_mask.bool()
@@ -181,8 +181,61 @@ class LocalAttention(nn.Module):
         out, *_ = unpack(out, packed_shape, '* n d')
         return out
 
+    @property
+    def cache_size(self):
+        return self.window_size * self.look_backward
+
+    def rotate(self, t, offset = 0):
+        if self.rel_pos is None:
+            return t
+
+        (t, packed_shape) = pack([t], '* n d')
+        freqs = self.rel_pos(t, offset = offset)
+        t = (t * freqs.cos()) + (rotate_half(t) * freqs.sin())
+
+        t, *_ = unpack(t, packed_shape, '* n d')
+        return t
+
+    def forward_with_past(self, q, k, v, layer_past = None, bin_attention_mask: Optional[torch.FloatTensor] = None):
+        # Queries are appended to the (rotated) keys and values of `layer_past`, which holds
+        # at most `cache_size` positions, so only the causal window is attended to
+        assert self.causal and self.exact_windowsize, 'Cached attention requires causal and exact window sizes'
+        past_k, past_v, past_length = layer_past if layer_past is not None else (None, None, 0)
+
+        q, k = self.rotate(q, offset = past_length), self.rotate(k, offset = past_length)
+        if past_k is not None:
+            k = torch.cat([past_k, k], dim = -2)
+            v = torch.cat([past_v, v], dim = -2)
+
+        n_q, n_k, dim_head = q.shape[-2], k.shape[-2], q.shape[-1]
+        scale = dim_head ** -0.5
+
+        q_t = torch.arange(past_length, past_length + n_q, device = q.device)
+        k_t = torch.arange(past_length + n_q - n_k, past_length + n_q, device = q.device)
+        q_t, k_t = rearrange(q_t, 'i -> i 1'), rearrange(k_t, 'j -> 1 j')
+
+        sim = einsum('... i e, ... j e -> ... i j', q, k) * scale
+        mask_value = max_neg_value(sim)
+
+        causal_mask = (q_t < k_t) | (q_t > (k_t + self.cache_size))
+        sim = sim.masked_fill(causal_mask, mask_value)
+
+        if bin_attention_mask is not None:
+            mask = rearrange(bin_attention_mask[:, -n_k:].bool(), 'b j -> b 1 1 j')
+            sim = sim.masked_fill(~mask, mask_value)
+
+        attn = sim.softmax(dim = -1)
+        attn = self.dropout(attn)
+
+        out = einsum('... i j, ... j e -> ... i e', attn, v)
+        present = (k[..., -self.cache_size:, :], v[..., -self.cache_size:, :], past_length + n_q)
+
+        return out, present
+
 
 class LocalMHA(nn.Module):
+    supports_cache = True
+
     def __init__(
         self,
         arch_config: ArchConfig,
@@ -217,14 +270,26 @@ class LocalMHA(nn.Module):
             **kwargs
         )
 
-    def forward(self, hidden_states, bin_attention_mask: Optional[torch.LongTensor] = None, **kwargs):
+    def forward(self, hidden_states, bin_attention_mask: Optional[torch.LongTensor] = None,
+                layer_past = None, use_cache: bool = False, **kwargs):
         if self.norm is not None:
             hidden_states = self.norm(hidden_states)
 
         q, k, v = self.to_qkv(hidden_states).chunk(3, dim = -1)
         q, k, v = map(lambda t: rearrange(t, 'b n (h d) -> b h n d', h = self.op_heads), (q, k, v)) 
 
-        out = self.attn_fn(q, k, v, bin_attention_mask=bin_attention_mask)
+        present = None
+
+        if layer_past is not None:
+            out, present = self.attn_fn.forward_with_past(q, k, v, layer_past, bin_attention_mask=bin_attention_mask)
+        else:
+            out = self.attn_fn(q, k, v, bin_attention_mask=bin_attention_mask)
+
+            if use_cache:
+                n, cache_size = k.shape[-2], self.attn_fn.cache_size
+                k = self.attn_fn.rotate(k[..., -cache_size:, :], offset = max(n - cache_size, 0))
+                present = (k, v[..., -cache_size:, :], n)
+
         out = rearrange(out, 'b h n d -> b n (h d)')
         
-        return out, None
+        return out, present
@@ -55,6 +55,9 @@ class LSHAttention(nn.Module):
         if self.autopad and seq_len % self.bucket_size != 0:
             pad_size = (self.bucket_size - seq_len % self.bucket_size) % self.bucket_size
             
+            if bin_attention_mask is None:
+                bin_attention_mask = torch.ones(hidden_states.shape[:2], dtype=torch.long, device=hidden_states.device)
+
             # Pads hidden states and attention mask with zeros so attn is not computed for padded tokens
             p_hidden_states = torch.nn.functional.pad(hidden_states, (0, 0, pad_size, 0))
             p_bin_attention_mask = torch.nn.functional.pad(bin_attention_mask, (pad_size, 0))
@@ -196,8 +196,43 @@ class SelfAttention(nn.Module):
         
         return output
 
+    def forward_with_past(self, q, k, v, key_padding_mask=None):
+        """Implements the multihead softmax attention for queries that are appended
+        to previous (cached) keys and values.
+        Arguments
+        ---------
+            q: The tensor containing the query. (B, T, H, D)
+            k, v: The tensors containing the past and current keys and values. (B, S, H, D)
+            key_padding_mask: boolean mask to apply to the attention weights. True means to keep,
+                False means to mask out. (B, S)
+        """
+        batch_size, seqlen_q, seqlen_k = q.shape[0], q.shape[1], k.shape[1]
+
+        softmax_scale = self.softmax_scale or 1.0 / math.sqrt(q.shape[-1])
+        scores = torch.einsum('bthd,bshd->bhts', q, k * softmax_scale)
+
+        if key_padding_mask is not None:
+            padding_mask = torch.full((batch_size, seqlen_k), -10000.0, dtype=scores.dtype,
+                                      device=scores.device)
+            padding_mask.masked_fill_(key_padding_mask, 0.0)
+            scores = scores + rearrange(padding_mask, 'b s -> b 1 1 s')
+
+        if self.causal:
+            # Queries are the last `seqlen_q` positions of the sequence
+            causal_mask = torch.triu(torch.full((seqlen_q, seqlen_k), -10000.0, device=scores.device),
+                                     1 + seqlen_k - seqlen_q)
+            scores = scores + causal_mask.to(dtype=scores.dtype)
+
+        attention = torch.softmax(scores, dim=-1, dtype=v.dtype)
+        attention_drop = F.dropout(attention, self.dropout_p if self.training else 0.0)
+        output = torch.einsum('bhts,bshd->bthd', attention_drop, v)
+
+        return output
+
 
 class MHA(nn.Module):
+    supports_cache = True
+
     def __init__(self, hf_config: PretrainedConfig, 
                  hidden_size: int, total_heads: int, op_heads: int,
                  bias=True, dropout=0.0, softmax_scale=None, causal=True, layer_idx=None, 
@@ -247,6 +282,10 @@ class MHA(nn.Module):
             self.inner_attn = SelfAttention(causal=causal, softmax_scale=softmax_scale,
                                             attention_dropout=dropout)
 
+        # Incremental decoding (`layer_past`) does not require FlashAttention
+        self.cached_attn = SelfAttention(causal=causal, softmax_scale=softmax_scale,
+                                         attention_dropout=dropout)
+
     def _update_kv_cache(self, kv, inference_params):
         """kv: (batch_size, seqlen, 2, nheads, head_dim) or (batch_size, 1, 2, nheads, head_dim)
         """
@@ -254,8 +293,26 @@ class MHA(nn.Module):
         assert self.layer_idx is not None, 'Generation requires layer_idx in the constructor'
         return _update_kv_cache(kv, inference_params, self.layer_idx)
 
+    def _forward_with_past(self, qkv, layer_past=None, key_padding_mask=None):
+        """qkv: (batch_size, seqlen, 3, nheads, head_dim)
+        layer_past: tuple of past keys and values, each (batch_size, past_seqlen, nheads, head_dim)
+        """
+        past_seqlen = layer_past[0].shape[1] if layer_past is not None else 0
+
+        if self.rotary_emb_dim > 0:
+            qkv = self.rotary_emb(qkv, seqlen_offset=past_seqlen)
+
+        q, k, v = qkv.unbind(dim=2)
+        if layer_past is not None:
+            k = torch.cat([layer_past[0], k], dim=1)
+            v = torch.cat([layer_past[1], v], dim=1)
+
+        context = self.cached_attn.forward_with_past(q, k, v, key_padding_mask=key_padding_mask)
+
+        return context, (k, v)
+
     def forward(self, x, x_kv=None, key_padding_mask=None, cu_seqlens=None, max_seqlen=None,
-                mixer_subset=None, inference_params=None, **kwargs):
+                mixer_subset=None, inference_params=None, layer_past=None, use_cache=False, **kwargs):
         """
         Arguments:
             x: (batch, seqlen, hidden_dim) (where hidden_dim = num heads * head dim) if
@@ -273,6 +330,9 @@ class MHA(nn.Module):
                 about the CLS token in the last layer.
             inference_params: for generation. Adapted from Megatron-LM (and Apex)
             https://github.com/NVIDIA/apex/blob/3ff1a10f72ec07067c4e44759442329804ac5162/apex/transformer/testing/standalone_transformer_lm.py#L470
+            layer_past: tuple of past keys and values (batch, past_seqlen, op_heads, head_dim) used for
+                incremental decoding.
+            use_cache: whether the keys and values should be returned for incremental decoding.
         """
         if cu_seqlens is not None:
             assert max_seqlen is not None
@@ -298,8 +358,12 @@ class MHA(nn.Module):
 
         qkv = self.Wqkv(x)
         qkv = rearrange(qkv, '... (three h d) -> ... three h d', three=3, d=self.head_dim)
+        present = None
 
-        if inference_params is None:
+        if layer_past is not None:
+            assert inference_params is None and cu_seqlens is None
+            context, present = self._forward_with_past(qkv, layer_past, key_padding_mask=key_padding_mask)
+        elif inference_params is None:
             if self.rotary_emb_dim > 0:
                 qkv = self.rotary_emb(qkv)
 
@@ -307,6 +371,9 @@ class MHA(nn.Module):
                 context = self.inner_attn(qkv, **attn_kwargs)
             else:
                 context = torch.utils.checkpoint.checkpoint(self.inner_attn, qkv, **attn_kwargs)
+
+            if use_cache:
+                present = tuple(qkv[:, :, 1:].unbind(dim=2))
         else:
             if (not inference_params.fused_ft_kernel) or inference_params.sequence_len_offset == 0:
                 if self.rotary_emb_dim > 0:
@@ -330,4 +397,4 @@ class MHA(nn.Module):
         
         out = rearrange(context, '... h d -> ... (h d)')
         
-        return (out, None) if not self.return_residual else ((out, x), None)
+        return (out, present) if not self.return_residual else ((out, x), present)
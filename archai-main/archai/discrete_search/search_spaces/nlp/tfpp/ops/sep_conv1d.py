@@ -1,9 +1,15 @@
+from typing import Optional
+
+import torch
+import torch.nn.functional as F
 from torch import nn
 
 from archai.discrete_search.search_spaces.config import ArchConfig
 
 
 class SeparableConv1d(nn.Module):
+    supports_cache = True
+
     def __init__(self, arch_config: ArchConfig, hidden_size: int,
                  total_heads: int, op_heads: int, **kwargs):
         super().__init__()
@@ -22,11 +28,33 @@ class SeparableConv1d(nn.Module):
         
         self.act = nn.ReLU()
         
-    def forward(self, hidden_states, **kwargs):
+    def forward(self, hidden_states, layer_past: Optional[torch.Tensor] = None,
+                use_cache: bool = False, **kwargs):
         out = self.act(self.conv_map_in(hidden_states))
+
+        if layer_past is not None:
+            return self._step(out, layer_past)
+
+        present = self._get_present(out) if use_cache else None
         out = self.act(self.conv(out.transpose(-1,-2)).transpose(-1,-2))
         
         # Removes padding to get back the original sequence length
         out = out[:, :hidden_states.shape[1], :]
         
-        return out, None
+        return out, present
+
+    def _get_present(self, conv_inputs: torch.Tensor) -> torch.Tensor:
+        # The state holds the last `kernel_size - 1` inputs of the convolution,
+        # which replace its (left) zero padding in the next step
+        n_state = self.kernel_size - 1
+        conv_inputs = F.pad(conv_inputs, (0, 0, max(n_state - conv_inputs.shape[1], 0), 0))
+
+        return conv_inputs[:, conv_inputs.shape[1] - n_state:]
+
+    def _step(self, out: torch.Tensor, layer_past: torch.Tensor):
+        conv_inputs = torch.cat([layer_past, out], dim=1)
+        out = F.conv1d(
+            conv_inputs.transpose(-1,-2), self.conv.weight, self.conv.bias, groups=self.op_size
+        ).transpose(-1,-2)
+
+        return self.act(out), self._get_present(conv_inputs)
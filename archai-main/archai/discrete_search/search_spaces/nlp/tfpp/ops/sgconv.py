@@ -4,6 +4,7 @@
 
 import math
 from functools import partial
+from typing import Optional
 
 import torch
 import torch.nn as nn
@@ -417,19 +418,10 @@ class GConv(nn.Module):
         # Reshape to flatten channels
         return rearrange(y, '... c h l -> ... (c h) l')
 
-    def forward(self, u, return_kernel=False):
+    def _compute_kernel(self):
         """
-        u: (B H L) if self.transposed else (B L H)
-        state: (H N) never needed unless you know what you're doing
-
-        Returns: same shape as u
+        Returns: normalized kernel (C H K), where K is the length of the full (untruncated) kernel
         """
-        if not self.transposed:
-            u = u.transpose(-1, -2)
-        L = u.size(-1)
-        if self.use_fast_fftconv and L % 2 != 0:
-            u = F.pad(u, (0, 1))
-
         kernel_list = []
         interpolate_mode = 'nearest' if 'nearest' in self.mode else 'linear'
         multiplier = self.multiplier
@@ -471,13 +463,46 @@ class GConv(nn.Module):
                 print(f"Kernel norm: {self.kernel_norm.mean()}")
                 print(f"Kernel size: {k.size()}")
 
+        return k / self.kernel_norm  # * (L / self.l_max) ** 0.5
+
+    def _output(self, y):
+        """
+        y: (B C*H L)
+
+        Returns: (B H L) if self.transposed else (B L H)
+        """
+        if not self.linear:
+            y = self.dropout(self.activation(y))
+
+        if not self.transposed:
+            y = y.transpose(-1, -2)
+
+        if not self.linear:
+            y = self.norm(y)
+            y = self.output_linear(y)
+
+        return y
+
+    def forward(self, u, return_kernel=False):
+        """
+        u: (B H L) if self.transposed else (B L H)
+        state: (H N) never needed unless you know what you're doing
+
+        Returns: same shape as u
+        """
+        if not self.transposed:
+            u = u.transpose(-1, -2)
+        L = u.size(-1)
+        if self.use_fast_fftconv and L % 2 != 0:
+            u = F.pad(u, (0, 1))
+
+        k = self._compute_kernel()
+
         if k.size(-1) > L:
             k = k[..., :L]
         elif k.size(-1) < L:
             k = F.pad(k, (0, L - k.size(-1)))
 
-        k = k / self.kernel_norm  # * (L / self.l_max) ** 0.5
-
         # Convolution
         if self.bidirectional:
             k0, k1 = rearrange(k, '(s c) h l -> s c h l', s=2)
@@ -485,20 +510,61 @@ class GConv(nn.Module):
                 + F.pad(k1.flip(-1), (L, 0)) \
         
         y = self.fft_conv(u, k, L)
+        y = self._output(y)
 
-        if not self.linear:
-            y = self.dropout(self.activation(y))
+        if return_kernel:
+            return y, k
+        return y, None
+
+    def step(self, u, state):
+        """
+        Computes the outputs of new inputs given the previous ones, with a direct
+        (causal) convolution instead of the FFT-based one over the whole sequence.
+
+        u: (B H T) if self.transposed else (B T H)
+        state: previous inputs with the same layout as u, zero-padded to (kernel length - 1) positions
+
+        Returns: outputs with the same shape as u and the next state
+        """
+        assert self.channels == 1 and not self.bidirectional and not self.hyper, \
+            'Step only supports single-channel causal convolutions'
+
+        x = torch.cat([state, u], dim=-1 if self.transposed else -2)
+        next_state = self.get_state(u, state)
 
         if not self.transposed:
-            y = y.transpose(-1, -2)
+            u, x = u.transpose(-1, -2), x.transpose(-1, -2)
 
-        if not self.linear:
-            y = self.norm(y)
-            y = self.output_linear(y)
+        # Convolution only computes the last T positions, where `x` holds
+        # exactly (kernel length - 1 + T) inputs
+        k = rearrange(self._compute_kernel().flip(-1), '1 h l -> h 1 l')
+        y = F.conv1d(x, k.to(dtype=x.dtype), groups=self.h)
+        y = y + u * rearrange(self.D, '1 h -> 1 h 1')
 
-        if return_kernel:
-            return y, k
-        return y, None
+        return self._output(y), next_state
+
+    def get_state(self, u, state=None):
+        """
+        u: (B H L) if self.transposed else (B L H)
+        state: previous inputs with the same layout as u (zeros if not provided)
+
+        Returns: last (kernel length - 1) inputs, used as the state of the next step
+        """
+        dim = -1 if self.transposed else -2
+        if state is None:
+            state = u.new_zeros(
+                (u.size(0), self.h, self.kernel_length - 1) if self.transposed
+                else (u.size(0), self.kernel_length - 1, self.h)
+            )
+
+        x = torch.cat([state, u], dim=dim)
+        return x.narrow(dim, x.size(dim) - state.size(dim), state.size(dim))
+
+    @property
+    def kernel_length(self):
+        if 'sum' in self.mode:
+            return self.kernel_dim * 2**(self.num_scales - 1 + self.init_scale)
+        return sum(self.kernel_dim * 2**(max(0, i - 1) + self.init_scale) for i in range(self.num_scales))
 
     @property
     def d_state(self):
@@ -514,6 +580,8 @@ class GConv(nn.Module):
 
 
 class SGConv(nn.Module):
+    supports_cache = True
+
     def __init__(self, arch_config: ArchConfig, hidden_size: int,
                  total_heads: int, op_heads: int, 
                  hf_config: PretrainedConfig, **kwargs):
@@ -544,9 +612,18 @@ class SGConv(nn.Module):
 
         self.act = nn.GELU(approximate='none')
 
-    def forward(self, x: torch.Tensor, **kwargs):
-        output, _ = self.sgconv(self.in_proj(x))
-        return self.act(output), None
+    def forward(self, x: torch.Tensor, layer_past: Optional[torch.Tensor] = None,
+                use_cache: bool = False, **kwargs):
+        u = self.in_proj(x)
+        present = None
+
+        if layer_past is not None:
+            output, present = self.sgconv.step(u, layer_past)
+        else:
+            output, _ = self.sgconv(u)
+            present = self.sgconv.get_state(u) if use_cache else None
+
+        return self.act(output), present
 
 if __name__ == '__main__':
     B = 2  # batch size
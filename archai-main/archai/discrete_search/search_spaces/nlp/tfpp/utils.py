@@ -1,5 +1,5 @@
 
-from typing import Any, Dict, Union, List, Tuple
+from typing import Any, Callable, Dict, Union, List, Tuple
 from itertools import chain, product
 import os
 import json
@@ -84,6 +84,20 @@ def merge_heads(tensor, num_heads, attn_head_size):
     return tensor.view(new_shape)
 
 
+def map_past_key_values(fn: Callable[[torch.Tensor], torch.Tensor], past_key_values: Any) -> Any:
+    """
+    Applies `fn` to every tensor of a (nested) cache, since each op has its own state
+    structure. Non-tensor values (e.g., sequence lengths) are kept as-is
+    """
+    if isinstance(past_key_values, torch.Tensor):
+        return fn(past_key_values)
+
+    if isinstance(past_key_values, (tuple, list)):
+        return type(past_key_values)(map_past_key_values(fn, past) for past in past_key_values)
+
+    return past_key_values
+
+
 def make_asso_map(input_ids, mask):
     assert mask is not None
 
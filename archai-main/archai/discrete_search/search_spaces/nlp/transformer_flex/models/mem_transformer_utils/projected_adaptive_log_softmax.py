@@ -4,7 +4,7 @@
 # Copyright (c) 2018, NVIDIA CORPORATION.
 # Licensed under the Apache License, Version 2.0.
 
-from typing import Optional, Tuple, Union
+from typing import List, Optional, Tuple, Union
 
 import torch
 import torch.nn as nn
@@ -131,6 +131,99 @@ class ProjectedAdaptiveLogSoftmax(nn.Module):
 
         return self.out_projs[idx]
 
+    def _get_cluster_params(self) -> Tuple[List[torch.FloatTensor], List[torch.FloatTensor]]:
+        # Creates weights and biases to handle all available clusters
+        weights, biases = [], []
+
+        for i in range(len(self.cutoffs)):
+            if self.div_val == 1:
+                cutoff_start, cutoff_end = (
+                    self.cutoffs_ends[i],
+                    self.cutoffs_ends[i + 1],
+                )
+
+                weight_i = self.out_weights[0][cutoff_start:cutoff_end]
+                bias_i = self.out_biases[0][cutoff_start:cutoff_end]
+            else:
+                weight_i = self.out_weights[i]
+                bias_i = self.out_biases[i]
+
+            if i == 0:
+                weight_i = torch.cat([weight_i, self.cluster_weight], dim=0)
+                bias_i = torch.cat([bias_i, self.cluster_bias], dim=0)
+
+            weights.append(weight_i)
+            biases.append(bias_i)
+
+        return weights, biases
+
+    def _compute_clustered_output(
+        self, inputs: torch.FloatTensor, labels: Optional[torch.FloatTensor] = None
+    ) -> torch.FloatTensor:
+        weights, biases = self._get_cluster_params()
+
+        # Calculates the head logits and their probabilities
+        head_logits = self._compute_logits(inputs, weights[0], biases[0], self._get_shared_proj(0))
+        head_probs = F.log_softmax(head_logits, dim=1)
+
+        if labels is None:
+            output = inputs.new_empty((head_logits.size(0), self.vocab_size))
+            output[:, : self.cutoffs[0]] = head_probs[:, : self.cutoffs[0]]
+
+            for i in range(1, len(self.cutoffs)):
+                cutoff_start, cutoff_end = self.cutoffs_ends[i], self.cutoffs_ends[i + 1]
+
+                tail_logits_i = self._compute_logits(inputs, weights[i], biases[i], self._get_shared_proj(i))
+                tail_probs_i = F.log_softmax(tail_logits_i, dim=1)
+
+                output[:, cutoff_start:cutoff_end] = head_probs[:, self.cutoffs[0] + i - 1, None] + tail_probs_i
+
+            return output
+
+        # Assigns each token to its cluster, where the head uses the cluster index 0 and
+        # ignored labels (e.g., -100) use an extra cluster that is sorted last
+        ignored = labels < 0
+        boundaries = torch.tensor(self.cutoffs[:-1], dtype=labels.dtype, device=labels.device)
+        cluster_ids = torch.bucketize(labels, boundaries, right=True).masked_fill(ignored, len(self.cutoffs))
+
+        # Head log-probabilities of all tokens are gathered at once, either from
+        # the token itself (head) or from its cluster (tail), while ignored labels have no loss
+        head_labels = torch.where(cluster_ids == 0, labels, self.cutoffs[0] - 1 + cluster_ids).masked_fill(ignored, 0)
+        output = -head_probs.gather(1, head_labels[:, None]).squeeze(1).masked_fill(ignored, 0.0)
+
+        # Sorts the tokens by cluster (with a single synchronization to retrieve the cluster sizes),
+        # so each tail cluster is calculated over a contiguous slice of tokens
+        order = torch.argsort(cluster_ids, stable=True)
+        cluster_sizes = torch.bincount(cluster_ids, minlength=len(self.cutoffs) + 1).tolist()
+
+        tail_order = order[cluster_sizes[0] : labels.numel() - cluster_sizes[-1]]
+        if tail_order.numel() > 0:
+            tail_inputs = inputs.index_select(0, tail_order)
+            tail_labels = labels.index_select(0, tail_order)
+
+            tail_nll, offset = [], 0
+            for i in range(1, len(self.cutoffs)):
+                cluster_size = cluster_sizes[i]
+                if cluster_size == 0:
+                    continue
+
+                inputs_i = tail_inputs[offset : offset + cluster_size]
+                target_i = tail_labels[offset : offset + cluster_size] - self.cutoffs_ends[i]
+
+                tail_logits_i = self._compute_logits(inputs_i, weights[i], biases[i], self._get_shared_proj(i))
+                tail_probs_i = F.log_softmax(tail_logits_i, dim=1)
+
+                tail_nll.append(-tail_probs_i.gather(1, target_i[:, None]).squeeze(1))
+                offset += cluster_size
+
+            output = output.index_add(0, tail_order, torch.cat(tail_nll))
+
+        # Without `keep_order`, outputs are sorted by cluster
+        if not self.keep_order:
+            output = output.index_select(0, order)
+
+        return output
+
     def forward(self, inputs: torch.FloatTensor, labels: Optional[torch.FloatTensor] = None) -> torch.FloatTensor:
         if labels is not None:
             # Shift `n` tokens to predict `n+1`
@@ -158,95 +251,6 @@ class ProjectedAdaptiveLogSoftmax(nn.Module):
             else:
                 output = F.log_softmax(logits, dim=-1)
         else:
-            # Creates weights and biases to handle all available clusters
-            weights, biases = [], []
-
-            for i in range(len(self.cutoffs)):
-                if self.div_val == 1:
-                    cutoff_start, cutoff_end = (
-                        self.cutoffs_ends[i],
-                        self.cutoffs_ends[i + 1],
-                    )
-
-                    weight_i = self.out_weights[0][cutoff_start:cutoff_end]
-                    bias_i = self.out_biases[0][cutoff_start:cutoff_end]
-                else:
-                    weight_i = self.out_weights[i]
-                    bias_i = self.out_biases[i]
-
-                if i == 0:
-                    weight_i = torch.cat([weight_i, self.cluster_weight], dim=0)
-                    bias_i = torch.cat([bias_i, self.cluster_bias], dim=0)
-
-                weights.append(weight_i)
-                biases.append(bias_i)
-
-            # Defines the head weight, bias and projection
-            head_weight, head_bias, head_proj = (
-                weights[0],
-                biases[0],
-                self._get_shared_proj(0),
-            )
-
-            # Calculates the head logits and their probabilities
-            head_logits = self._compute_logits(inputs, head_weight, head_bias, head_proj)
-            head_probs = F.log_softmax(head_logits, dim=1)
-
-            if labels is not None:
-                output = torch.zeros_like(labels, dtype=inputs.dtype, device=inputs.device)
-            else:
-                output = inputs.new_empty((head_logits.size(0), self.vocab_size))
-
-            offset = 0
-            cutoff_values = [0] + self.cutoffs
-            for i in range(len(cutoff_values) - 1):
-                cutoff_start, cutoff_end = cutoff_values[i], cutoff_values[i + 1]
-
-                if labels is not None:
-                    # Gathers a mask of valid indexes
-                    mask_i = (labels >= cutoff_start) & (labels < cutoff_end)
-                    indexes_i = mask_i.nonzero().squeeze()
-
-                    if indexes_i.numel() == 0:
-                        continue
-
-                    target_i = labels.index_select(0, indexes_i) - cutoff_start
-                    head_probs_i = head_probs.index_select(0, indexes_i)
-                    inputs_i = inputs.index_select(0, indexes_i)
-                else:
-                    inputs_i = inputs
-
-                if i == 0:
-                    if labels is not None:
-                        probs_i = head_probs_i.gather(1, target_i[:, None]).squeeze(1)
-                    else:
-                        output[:, : self.cutoffs[0]] = head_probs[:, : self.cutoffs[0]]
-                else:
-                    weight_i, bias_i, proj_i = (
-                        weights[i],
-                        biases[i],
-                        self._get_shared_proj(i),
-                    )
-
-                    tail_logits_i = self._compute_logits(inputs_i, weight_i, bias_i, proj_i)
-                    tail_probs_i = F.log_softmax(tail_logits_i, dim=1)
-
-                    cluster_probs_i = self.cutoffs[0] + i - 1
-
-                    if labels is not None:
-                        tail_probs_i = tail_probs_i.gather(1, target_i[:, None]).squeeze(1)
-                        probs_i = head_probs_i[:, cluster_probs_i] + tail_probs_i
-                    else:
-                        probs_i = head_probs[:, cluster_probs_i, None] + tail_probs_i
-
-                        output[:, cutoff_start:cutoff_end] = probs_i
-
-                if labels is not None:
-                    if self.keep_order:
-                        output.index_copy_(0, indexes_i, -probs_i)
-                    else:
-                        output[offset : offset + probs_i.size(0)].copy_(-probs_i)
-
-                    offset += probs_i.size(0)
+            output = self._compute_clustered_output(inputs, labels)
 
         return output
@@ -9,6 +9,7 @@ from typing import Any, Dict, List, Optional
 
 import torch
 from overrides import overrides
+from transformers import PretrainedConfig
 from transformers.modeling_utils import no_init_weights
 from transformers.models.auto.configuration_auto import AutoConfig
 from transformers.models.auto.modeling_auto import AutoModelForCausalLM
@@ -30,6 +31,10 @@ from archai.discrete_search.search_spaces.nlp.transformer_flex.models.modeling_g
 from archai.discrete_search.search_spaces.nlp.transformer_flex.models.modeling_mem_transformer import (
     MemTransformerLMHeadModel,
 )
+from archai.discrete_search.utils.weight_inheritance import (
+    ARCH_FUSED_PARAMS,
+    inherit_weights,
+)
 
 # Register internal models to be compatible with auto classes
 AutoConfig.register("gpt2-flex", GPT2FlexConfig)
@@ -103,6 +108,7 @@ class TransformerFlexSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
         att_dropout_rate: Optional[float] = 0.0,
         disable_weights_init: Optional[bool] = False,
         random_seed: Optional[int] = 1,
+        inherit_parent_weights: Optional[bool] = False,
     ) -> None:
         """Initialize search space.
 
@@ -121,6 +127,8 @@ class TransformerFlexSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
             att_dropout_rate: Dropout rate for attention.
             disable_weights_init: Whether to disable weights initialization.
             random_seed: Random seed for reproducibility.
+            inherit_parent_weights: Whether models generated by mutation and crossover should be
+                initialized with the weights of their (first) parent.
 
         """
 
@@ -146,12 +154,16 @@ class TransformerFlexSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
         self.max_sequence_length = max_sequence_length
         self.att_dropout_rate = att_dropout_rate
         self.disable_weights_init = disable_weights_init
+        self.inherit_parent_weights = inherit_parent_weights
 
-    def _load_model_from_config(self, model_config: Dict[str, Any]) -> torch.nn.Module:
+    def _load_config(self, model_config: Dict[str, Any]) -> PretrainedConfig:
         param_map = self._DEFAULT_MODELS[self.arch_type]
         mapped_config = {param_map.get(p_name, p_name): p_value for p_name, p_value in model_config.items()}
 
-        config = AutoConfig.for_model(self.arch_type, **mapped_config)
+        return AutoConfig.for_model(self.arch_type, **mapped_config)
+
+    def _load_model_from_config(self, model_config: Dict[str, Any]) -> torch.nn.Module:
+        config = self._load_config(model_config)
 
         if self.disable_weights_init:
             with no_init_weights():
@@ -254,9 +266,11 @@ class TransformerFlexSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
                     for c in config[param]
                 ]
 
-        return ArchaiModel(
-            arch=self._load_model_from_config(config), archid=self.get_archid(config), metadata={"config": config}
-        )
+        model = self._load_model_from_config(config)
+        if self.inherit_parent_weights:
+            inherit_weights(arch.arch, model, fused_params=ARCH_FUSED_PARAMS.get(self.arch_type))
+
+        return ArchaiModel(arch=model, archid=self.get_archid(config), metadata={"config": config})
 
     @overrides
     def crossover(self, arch_list: List[ArchaiModel]) -> ArchaiModel:
@@ -274,7 +288,11 @@ class TransformerFlexSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
                 for layer in range(self.max_layers):
                     c0[param][layer] = self.rng.choice([c0[param][layer], c1[param][layer]])
 
-        return ArchaiModel(arch=self._load_model_from_config(c0), archid=self.get_archid(c0), metadata={"config": c0})
+        model = self._load_model_from_config(c0)
+        if self.inherit_parent_weights:
+            inherit_weights(arch_list[0].arch, model, fused_params=ARCH_FUSED_PARAMS.get(self.arch_type))
+
+        return ArchaiModel(arch=model, archid=self.get_archid(c0), metadata={"config": c0})
 
     @overrides
     def encode(self, model: ArchaiModel) -> List[float]:
@@ -0,0 +1,139 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+from typing import Dict, Optional, Tuple
+
+import torch
+
+# Fused tensors (matched by name suffix), mapped to their fusion dimension and number of
+# blocks, e.g., query, key and value projections computed by a single layer
+FUSED_PARAMS = {
+    "c_attn.weight": (-1, 3),
+    "c_attn.bias": (0, 3),
+    "qkv.weight": (0, 3),
+    "qkv.bias": (0, 3),
+    "to_qkv.weight": (0, 3),
+    "to_qkv.bias": (0, 3),
+    "qkv_proj.weight": (0, 3),
+    "qkv_proj.bias": (0, 3),
+}
+
+# Fused tensors of architectures whose blocks are not laid out as contiguous query, key and
+# value projections, e.g., CodeGen computes `mp_num=4` groups of [query, value, key] blocks
+ARCH_FUSED_PARAMS = {
+    "codegen": {**FUSED_PARAMS, "qkv_proj.weight": (0, 12), "qkv_proj.bias": (0, 12)},
+}
+
+
+def _get_depths(names: list) -> Dict[str, int]:
+    # Maps every prefix followed by a numeric component (e.g., `transformer.h`)
+    # to the number of repeated blocks found under it
+    depths = {}
+
+    for name in names:
+        parts = name.split(".")
+
+        for i, part in enumerate(parts):
+            if part.isdigit():
+                prefix = ".".join(parts[:i])
+                depths[prefix] = max(depths.get(prefix, 0), int(part) + 1)
+
+    return depths
+
+
+def _map_name(name: str, depths: Dict[str, int], depth_mapping: str) -> str:
+    parts = name.split(".")
+
+    for i, part in enumerate(parts):
+        if part.isdigit():
+            n_blocks = depths.get(".".join(parts[:i]), None)
+
+            if n_blocks is not None and int(part) >= n_blocks:
+                if depth_mapping == "last":
+                    parts[i] = str(n_blocks - 1)
+                else:
+                    parts[i] = str(int(part) % n_blocks)
+
+    return ".".join(parts)
+
+
+def _get_fusion(name: str, fused_params: Dict[str, Tuple[int, int]]) -> Optional[Tuple[int, int]]:
+    for suffix, fusion in fused_params.items():
+        if name == suffix or name.endswith("." + suffix):
+            return fusion
+
+    return None
+
+
+def _copy_overlap(src: torch.Tensor, dst: torch.Tensor, fusion: Optional[Tuple[int, int]] = None) -> bool:
+    if src.dim() != dst.dim():
+        return False
+
+    if fusion is not None:
+        # Each block of a fused tensor is sliced separately, otherwise the leading slice
+        # of the child blocks would be copied from the wrong parent blocks
+        dim, n_blocks = fusion
+        if src.shape[dim] % n_blocks != 0 or dst.shape[dim] % n_blocks != 0:
+            return False
+
+        for src_block, dst_block in zip(src.chunk(n_blocks, dim=dim), dst.chunk(n_blocks, dim=dim)):
+            _copy_overlap(src_block, dst_block)
+
+        return True
+
+    overlap = tuple(slice(0, min(s, d)) for s, d in zip(src.shape, dst.shape))
+    dst[overlap].copy_(src[overlap])
+
+    return True
+
+
+def inherit_weights(
+    parent: torch.nn.Module,
+    child: torch.nn.Module,
+    depth_mapping: Optional[str] = "last",
+    fused_params: Optional[Dict[str, Tuple[int, int]]] = None,
+) -> Dict[str, str]:
+    """Initialize the weights of a child architecture from its parent.
+
+    Tensors are matched by name. When their shapes differ (e.g., a mutated hidden
+    dimension), the overlapping slice is copied and the remaining entries keep their
+    initial values, which slices wider tensors and pads narrower ones. When the child
+    is deeper than the parent, the tensors of the extra blocks (numeric components of
+    the parameter name) are copied from a parent block chosen by `depth_mapping`.
+    Fused tensors (e.g., query, key and value projections) are split into their blocks,
+    and the overlapping slice is copied block by block.
+
+    Args:
+        parent: Parent model, usually already (partially) trained.
+        child: Child model, which is updated in-place.
+        depth_mapping: Block used for the extra blocks of deeper children. `last`
+            copies the last parent block, while `cycle` repeats the parent blocks.
+        fused_params: Dictionary mapping name suffixes of fused tensors to their fusion
+            dimension and number of blocks. If not provided, `FUSED_PARAMS` is used, while
+            architectures with other layouts should use their `ARCH_FUSED_PARAMS`.
+
+    Returns:
+        Dictionary mapping the inherited child tensor names to their parent tensor names.
+
+    """
+
+    assert depth_mapping in ["last", "cycle"], "`depth_mapping` must be `last` or `cycle`."
+    fused_params = FUSED_PARAMS if fused_params is None else fused_params
+
+    parent_state = parent.state_dict()
+    parent_depths = _get_depths(list(parent_state.keys()))
+
+    inherited = {}
+
+    with torch.no_grad():
+        for name, tensor in child.state_dict().items():
+            src_name = name if name in parent_state else _map_name(name, parent_depths, depth_mapping)
+            src = parent_state.get(src_name, None)
+
+            if src is None or src.dtype != tensor.dtype:
+                continue
+
+            if _copy_overlap(src.to(tensor.device), tensor, fusion=_get_fusion(name, fused_params)):
+                inherited[name] = src_name
+
+    return inherited
@@ -0,0 +1,175 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Callable, List, Optional
+
+from archai.common.file_utils import get_full_path
+from archai.common.ordered_dict_logger import OrderedDictLogger
+
+logger = OrderedDictLogger(source=__name__)
+
+
+class OnnxArtifactCache:
+    """Content-addressed cache of exported ONNX artifacts.
+
+    Each entry is identified by a key (architecture identifier plus export settings) and
+    holds one file per variant, e.g., `raw` (exported), `opt` (optimized), `fp16` and `int8`.
+    When the cache exceeds its maximum size, the least recently used entries are evicted.
+
+    """
+
+    def __init__(
+        self, cache_dir: Optional[str] = "~/.cache/archai/onnx", max_size_mb: Optional[float] = 1024.0
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory where the artifacts are stored.
+            max_size_mb: Maximum size of the cache (in MB). If `None`, entries are never evicted.
+
+        """
+
+        self.cache_dir = get_full_path(cache_dir, create_folder=True)
+        self.max_size_mb = max_size_mb
+
+    @staticmethod
+    def get_key(archid: str, **settings) -> str:
+        """Get the key of an architecture exported with a set of settings.
+
+        Args:
+            archid: Architecture identifier.
+            settings: Export settings that change the artifact (e.g., opset or input shapes).
+
+        Returns:
+            Cache key.
+
+        """
+
+        content = json.dumps({"archid": archid, "settings": settings}, sort_keys=True, default=str)
+
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def _variant_path(self, key: str, variant: str) -> str:
+        return os.path.join(self._entry_dir(key), f"{variant}.onnx")
+
+    def get(self, key: str, variant: Optional[str] = "raw") -> Optional[str]:
+        """Get the path of a cached artifact.
+
+        Args:
+            key: Cache key.
+            variant: Artifact variant.
+
+        Returns:
+            Path to the artifact, or `None` if it is not cached.
+
+        """
+
+        path = self._variant_path(key, variant)
+        if not os.path.exists(path):
+            return None
+
+        # Entries are evicted based on their last access
+        os.utime(self._entry_dir(key))
+
+        return path
+
+    def put(self, key: str, variant: str, file_path: str) -> str:
+        """Move an artifact into the cache.
+
+        Args:
+            key: Cache key.
+            variant: Artifact variant.
+            file_path: Path to the artifact, which is moved into the cache.
+
+        Returns:
+            Path to the cached artifact.
+
+        """
+
+        os.makedirs(self._entry_dir(key), exist_ok=True)
+
+        path = self._variant_path(key, variant)
+        shutil.move(file_path, path)
+        os.utime(self._entry_dir(key))
+
+        self.evict(keep=[key])
+
+        return path
+
+    def get_or_create(self, key: str, variant: str, create_fn: Callable[[str], str]) -> str:
+        """Get the path of a cached artifact, creating it if needed.
+
+        Args:
+            key: Cache key.
+            variant: Artifact variant.
+            create_fn: Function that receives a scratch directory, creates the artifact
+                and returns its path.
+
+        Returns:
+            Path to the cached artifact.
+
+        """
+
+        path = self.get(key, variant)
+        if path is not None:
+            logger.debug(f"Using cached artifact: {path}")
+            return path
+
+        with tempfile.TemporaryDirectory(dir=self.cache_dir, prefix=".tmp-") as tmp_dir:
+            return self.put(key, variant, create_fn(tmp_dir))
+
+    def size_mb(self) -> float:
+        """Total size of the cached artifacts (in MB)."""
+
+        return sum(self._entry_size(key) for key in self._keys()) / (1024**2)
+
+    def _keys(self) -> List[str]:
+        return [
+            key
+            for key in os.listdir(self.cache_dir)
+            if not key.startswith(".") and os.path.isdir(self._entry_dir(key))
+        ]
+
+    def _entry_size(self, key: str) -> int:
+        entry_dir = self._entry_dir(key)
+        return sum(os.path.getsize(os.path.join(entry_dir, f)) for f in os.listdir(entry_dir))
+
+    def evict(self, keep: Optional[List[str]] = None) -> None:
+        """Remove the least recently used entries until the cache fits its maximum size.
+
+        Args:
+            keep: Keys that should not be evicted.
+
+        """
+
+        if self.max_size_mb is None:
+            return
+
+        keep = keep or []
+        entries = sorted(self._keys(), key=lambda key: os.path.getmtime(self._entry_dir(key)))
+        sizes = {key: self._entry_size(key) for key in entries}
+        total_size = sum(sizes.values())
+
+        for key in entries:
+            if total_size <= self.max_size_mb * (1024**2):
+                break
+            if key in keep:
+                continue
+
+            logger.debug(f"Evicting cached artifacts: {key}")
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            total_size -= sizes[key]
+
+    def clear(self) -> None:
+        """Remove all cached artifacts."""
+
+        for key in self._keys():
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
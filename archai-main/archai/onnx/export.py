@@ -1,11 +1,15 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
+import io
 from itertools import chain
-from typing import Optional
+from typing import Optional, Tuple, Union
 
 import numpy as np
+import onnx
 import torch
+from onnx import ModelProto
+from transformers import PretrainedConfig
 
 from archai.common.ordered_dict_logger import OrderedDictLogger
 from archai.onnx.config_utils.codegen_onnx_config import CodeGenOnnxConfig
@@ -19,10 +23,32 @@ logger = OrderedDictLogger(source=__name__)
 AVAILABLE_ONNX_CONFIGS = {"codegen": CodeGenOnnxConfig, "gpt2": GPT2OnnxConfig, "gpt2-flex": GPT2FlexOnnxConfig}
 
 
+def create_onnx_config(
+    config: PretrainedConfig, task: Optional[str] = "causal-lm", use_past: Optional[bool] = True
+) -> OnnxConfig:
+    """Create the ONNX configuration of a model.
+
+    Args:
+        config: Configuration of the model.
+        task: Task identifier to use proper inputs/outputs.
+        use_past: Whether to include past key/values in the model.
+
+    Returns:
+        ONNX configuration of the model.
+
+    """
+
+    model_type = config.model_type
+    available_configs = list(AVAILABLE_ONNX_CONFIGS.keys())
+    assert model_type in available_configs, f"`model_type`: {model_type} is not supported for ONNX export."
+
+    return AVAILABLE_ONNX_CONFIGS[model_type](config, task=task, use_past=use_past)
+
+
 def validate_onnx_outputs(
     onnx_config: OnnxConfig,
     reference_model: torch.nn.Module,
-    onnx_model_path: str,
+    onnx_model: Union[str, bytes, ModelProto],
     atol: float,
 ) -> None:
     """Validate the outputs of an ONNX model against a reference PyTorch model.
@@ -30,7 +56,7 @@ def validate_onnx_outputs(
     Args:
         onnx_config: Configuration for ONNX model.
         reference_model: PyTorch model to use as reference.
-        onnx_model_path: Path to the ONNX model.
+        onnx_model: Path to the ONNX model, serialized ONNX model or in-memory ONNX model.
         atol: Tolerance value for comparing the model outputs.
 
     Raises:
@@ -41,7 +67,7 @@ def validate_onnx_outputs(
 
     logger.info("Validating model ...")
 
-    session = load_from_onnx(onnx_model_path)
+    session = load_from_onnx(onnx_model)
 
     ref_inputs = onnx_config.generate_dummy_inputs()
     ref_outputs = reference_model(**ref_inputs)
@@ -109,21 +135,22 @@ def validate_onnx_outputs(
             logger.debug(f"Matched difference: {diff:.4e} < {atol}")
 
 
-def export_to_onnx(
+def export_to_onnx_model(
     model: torch.nn.Module,
-    output_model_path: str,
     task: Optional[str] = "causal-lm",
     use_past: Optional[bool] = True,
     validate: Optional[bool] = True,
     share_weights: Optional[bool] = True,
     opset: Optional[int] = 11,
     atol: Optional[float] = 1e-4,
-) -> OnnxConfig:
-    """Export a pre-trained PyTorch model to ONNX format.
+) -> Tuple[ModelProto, OnnxConfig]:
+    """Export a pre-trained PyTorch model to an in-memory ONNX model.
+
+    The export, validation and weight sharing are performed without writing any files,
+    which allows concurrent exports within the same process.
 
     Args:
         model: Instance of the PyTorch model to be exported.
-        output_model_path: Path to save the exported ONNX model.
         task: Task identifier to use proper inputs/outputs.
         use_past: Whether to include past key/values in the model.
         validate: Whether to validate the exported model.
@@ -132,31 +159,25 @@ def export_to_onnx(
         atol: Tolerance between input and exported model.
 
     Returns:
-        ONNX configuration of the model that was exported.
+        Exported ONNX model and its ONNX configuration.
 
     """
 
-    logger.info(f"Exporting model: {output_model_path}")
+    logger.info("Exporting model: <in-memory>")
 
     model_type = model.config.model_type
-    available_configs = list(AVAILABLE_ONNX_CONFIGS.keys())
-    assert model_type in available_configs, f"`model_type`: {model_type} is not supported for ONNX export."
-
-    onnx_config = AVAILABLE_ONNX_CONFIGS[model_type](
-        model.config,
-        task=task,
-        use_past=use_past,
-    )
+    onnx_config = create_onnx_config(model.config, task=task, use_past=use_past)
 
     model = prepare_model_for_onnx(model, model_type)
     dynamic_axes = {
         name: axes for name, axes in chain(onnx_config.get_inputs().items(), onnx_config.get_outputs().items())
     }
 
+    buffer = io.BytesIO()
     torch.onnx.export(
         model,
         (onnx_config.generate_dummy_inputs(),),
-        f=output_model_path,
+        f=buffer,
         export_params=True,
         input_names=list(onnx_config.get_inputs().keys()),
         output_names=list(onnx_config.get_outputs().keys()),
@@ -166,9 +187,53 @@ def export_to_onnx(
     )
 
     if validate:
-        validate_onnx_outputs(onnx_config, model, output_model_path, atol)
+        validate_onnx_outputs(onnx_config, model, buffer.getvalue(), atol)
 
+    onnx_model = onnx.load_from_string(buffer.getvalue())
     if share_weights:
-        weight_sharing(output_model_path, model_type)
+        weight_sharing(onnx_model, model_type)
+
+    return onnx_model, onnx_config
+
+
+def export_to_onnx(
+    model: torch.nn.Module,
+    output_model_path: str,
+    task: Optional[str] = "causal-lm",
+    use_past: Optional[bool] = True,
+    validate: Optional[bool] = True,
+    share_weights: Optional[bool] = True,
+    opset: Optional[int] = 11,
+    atol: Optional[float] = 1e-4,
+) -> OnnxConfig:
+    """Export a pre-trained PyTorch model to ONNX format.
+
+    Args:
+        model: Instance of the PyTorch model to be exported.
+        output_model_path: Path to save the exported ONNX model.
+        task: Task identifier to use proper inputs/outputs.
+        use_past: Whether to include past key/values in the model.
+        validate: Whether to validate the exported model.
+        share_weights: Whether to share the embedding and softmax weights.
+        opset: Set of operations to use with ONNX.
+        atol: Tolerance between input and exported model.
+
+    Returns:
+        ONNX configuration of the model that was exported.
+
+    """
+
+    logger.info(f"Exporting model: {output_model_path}")
+
+    onnx_model, onnx_config = export_to_onnx_model(
+        model,
+        task=task,
+        use_past=use_past,
+        validate=validate,
+        share_weights=share_weights,
+        opset=opset,
+        atol=atol,
+    )
+    onnx.save(onnx_model, output_model_path)
 
     return onnx_config
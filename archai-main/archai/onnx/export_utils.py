@@ -2,9 +2,10 @@
 # Licensed under the MIT license.
 
 import types
+from typing import Union
 
 import torch
-from onnx import helper, load_model, numpy_helper, save
+from onnx import ModelProto, helper, load_model, numpy_helper, save
 from onnxruntime.transformers import quantize_helper
 
 from archai.onnx.onnx_forward import gpt2_onnx_forward
@@ -37,13 +38,17 @@ def prepare_model_for_onnx(model: torch.nn.Module, model_type: str) -> torch.nn.
     return model
 
 
-def weight_sharing(onnx_model_path: str, model_type: str) -> None:
+def weight_sharing(onnx_model: Union[str, ModelProto], model_type: str) -> ModelProto:
     """Share weights between embedding and softmax layers in an ONNX model.
 
     Args:
-        onnx_model_path: Path to the ONNX model that will have weights shared.
+        onnx_model: Path to the ONNX model that will have weights shared (which is
+            overwritten), or an in-memory ONNX model (which is modified in-place).
         model_type: Type of model to share the weights.
 
+    Returns:
+        ONNX model with shared weights.
+
     """
 
     # Finds nodes in the graph based on their input name
@@ -54,8 +59,8 @@ def weight_sharing(onnx_model_path: str, model_type: str) -> None:
     def _find_weights_by_shape(weights, shape):
         return [name for name in weights.keys() if numpy_helper.to_array(weights[name]).shape == shape]
 
-    # Loads the ONNX model
-    model = load_model(onnx_model_path)
+    # Loads the ONNX model (if not already in-memory)
+    model = onnx_model if isinstance(onnx_model, ModelProto) else load_model(onnx_model)
 
     # Gathers weights and nodes from the loaded model
     weights = {w.name: w for w in model.graph.initializer}
@@ -98,5 +103,8 @@ def weight_sharing(onnx_model_path: str, model_type: str) -> None:
         emb_gather = _find_nodes_by_input(nodes, emb_gather_output)[0]
         nodes[emb_gather].input[0] = transpose_node_output
 
-    # Saves the ONNX model
-    save(model, onnx_model_path)
+    # Saves the ONNX model (if loaded from file)
+    if not isinstance(onnx_model, ModelProto):
+        save(model, onnx_model)
+
+    return model
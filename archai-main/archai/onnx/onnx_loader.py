@@ -2,8 +2,9 @@
 # Licensed under the MIT license.
 
 from os import environ
-from typing import List, Optional
+from typing import List, Optional, Union
 
+from onnx import ModelProto
 from onnxruntime import GraphOptimizationLevel, InferenceSession, SessionOptions
 
 from archai.common.ordered_dict_logger import OrderedDictLogger
@@ -11,14 +12,16 @@ from archai.common.ordered_dict_logger import OrderedDictLogger
 logger = OrderedDictLogger(source=__name__)
 
 
-def load_from_onnx(onnx_model_path: str, providers: Optional[List[str]] = None) -> InferenceSession:
-    """Load an ONNX-based model from file.
+def load_from_onnx(
+    onnx_model: Union[str, bytes, ModelProto], providers: Optional[List[str]] = None
+) -> InferenceSession:
+    """Load an ONNX-based model from file or memory.
 
-    This function loads an ONNX-based model from the specified file path and
-    returns an ONNX inference session. Performance optimization constants are set as well.
+    This function loads an ONNX-based model from the specified file path (or serialized/in-memory
+    model) and returns an ONNX inference session. Performance optimization constants are set as well.
 
     Args:
-        onnx_model_path: Path to the ONNX model file.
+        onnx_model: Path to the ONNX model file, serialized ONNX model or in-memory ONNX model.
         providers: List of providers to use for inference.
 
     Returns:
@@ -26,7 +29,10 @@ def load_from_onnx(onnx_model_path: str, providers: Optional[List[str]] = None)
 
     """
 
-    logger.info(f"Loading model: {onnx_model_path}")
+    logger.info(f"Loading model: {'<in-memory>' if isinstance(onnx_model, (bytes, ModelProto)) else onnx_model}")
+
+    if isinstance(onnx_model, ModelProto):
+        onnx_model = onnx_model.SerializeToString()
 
     # Constants available in ONNXRuntime that enables performance optimization
     OMP_NUM_THREADS = 1
@@ -39,7 +45,7 @@ def load_from_onnx(onnx_model_path: str, providers: Optional[List[str]] = None)
 
     providers = providers or ["CPUExecutionProvider"]
 
-    session = InferenceSession(onnx_model_path, sess_options=options, providers=providers)
+    session = InferenceSession(onnx_model, sess_options=options, providers=providers)
     session.disable_fallback()
 
     return session
@@ -1,9 +1,11 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
-from typing import Optional
+import os
+import tempfile
+from typing import List, Optional
 
-from onnx import load_model
+from onnx import ModelProto, helper, load_model, save_model
 from onnxruntime.transformers.onnx_model_gpt2 import Gpt2OnnxModel
 from onnxruntime.transformers.optimizer import optimize_by_onnxruntime
 
@@ -17,20 +19,41 @@ logger = OrderedDictLogger(source=__name__)
 AVAILABLE_ONNX_MODELS = {"gpt2": Gpt2OnnxModel, "gpt2-flex": Gpt2OnnxModel}
 
 
-def optimize_onnx(
-    onnx_model_path: str,
+def _optimize_by_onnxruntime(
+    onnx_model: ModelProto, use_gpu: bool, opt_level: int, disabled_optimizers: List[str]
+) -> ModelProto:
+    # ORT only serializes optimized graphs to files, thus a private temporary
+    # folder is used so concurrent optimizations do not collide
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        onnx_model_path = os.path.join(tmp_dir, "model.onnx")
+        ort_model_path = os.path.join(tmp_dir, "model-opt.onnx")
+
+        save_model(onnx_model, onnx_model_path)
+        optimize_by_onnxruntime(
+            onnx_model_path,
+            use_gpu=use_gpu,
+            optimized_model_path=ort_model_path,
+            opt_level=opt_level,
+            disabled_optimizers=disabled_optimizers,
+        )
+
+        return load_model(ort_model_path)
+
+
+def optimize_onnx_model(
+    onnx_model: ModelProto,
     onnx_config: OnnxConfig,
     use_gpu: Optional[bool] = False,
     opt_level: Optional[int] = 1,
     only_ort: Optional[bool] = False,
     float16: Optional[bool] = False,
     input_int32: Optional[bool] = False,
-) -> str:
-    """Optimize an ONNX model using a combination of standard ORT-based optimization
+) -> ModelProto:
+    """Optimize an in-memory ONNX model using a combination of standard ORT-based optimization
     and additional transformer-based optimization.
 
     Args:
-        onnx_model_path: Path to the ONNX model to be optimized.
+        onnx_model: ONNX model to be optimized, which might be modified in-place.
         onnx_config: ONNX configuration of model to be optimized.
         use_gpu: Whether to use GPU during optimization.
         opt_level: Level of optimization.
@@ -39,14 +62,14 @@ def optimize_onnx(
         input_int32: Whether to use inputs with int32.
 
     Returns:
-        Path to the optimized ONNX model.
+        Optimized ONNX model.
 
     """
 
-    logger.info(f"Optimizing model: {onnx_model_path}")
+    logger.info("Optimizing model: <in-memory>")
 
     assert opt_level in [0, 1, 2, 99]
-    ort_model_path = onnx_model_path
+    ort_model = onnx_model
 
     # Applies standard ORT-based optimization
     if opt_level > 0:
@@ -64,14 +87,7 @@ def optimize_onnx(
                 ]
 
         # Performs the standard ORT optimization
-        ort_model_path = create_file_name_identifier(onnx_model_path, "-opt")
-        optimize_by_onnxruntime(
-            onnx_model_path,
-            use_gpu=use_gpu,
-            optimized_model_path=ort_model_path,
-            opt_level=opt_level,
-            disabled_optimizers=disabled_optimizers,
-        )
+        ort_model = _optimize_by_onnxruntime(ort_model, use_gpu, opt_level, disabled_optimizers)
 
     if not only_ort:
         model_type = onnx_config.config.model_type
@@ -80,9 +96,6 @@ def optimize_onnx(
 
         # Applies additional transformer-based optimization
         if onnx_config.is_ort_graph_optimizable:
-            ort_model = load_model(ort_model_path)
-            ort_model_path = create_file_name_identifier(onnx_model_path, "-opt")
-
             onnx_opt_model = AVAILABLE_ONNX_MODELS[model_type]
             options = FusionOptions(model_type)
 
@@ -91,12 +104,68 @@ def optimize_onnx(
             optimizer.topological_sort()
 
             if float16:
-                ort_model_path = create_file_name_identifier(ort_model_path, "-fp16")
                 optimizer.convert_float_to_float16(keep_io_types=True)
 
             if input_int32:
                 optimizer.change_graph_inputs_to_int32()
 
-            optimizer.save_model_to_file(ort_model_path)
+            ort_model = optimizer.model
+
+            # Fused operators belong to the `com.microsoft` domain, which needs to be imported
+            if any(node.domain == "com.microsoft" for node in ort_model.graph.node) and not any(
+                opset.domain == "com.microsoft" for opset in ort_model.opset_import
+            ):
+                ort_model.opset_import.append(helper.make_opsetid("com.microsoft", 1))
+
+    return ort_model
+
+
+def optimize_onnx(
+    onnx_model_path: str,
+    onnx_config: OnnxConfig,
+    use_gpu: Optional[bool] = False,
+    opt_level: Optional[int] = 1,
+    only_ort: Optional[bool] = False,
+    float16: Optional[bool] = False,
+    input_int32: Optional[bool] = False,
+) -> str:
+    """Optimize an ONNX model using a combination of standard ORT-based optimization
+    and additional transformer-based optimization.
+
+    Args:
+        onnx_model_path: Path to the ONNX model to be optimized.
+        onnx_config: ONNX configuration of model to be optimized.
+        use_gpu: Whether to use GPU during optimization.
+        opt_level: Level of optimization.
+        only_ort: Whether to only apply ORT optimization.
+        float16: Whether to use graph with float16.
+        input_int32: Whether to use inputs with int32.
+
+    Returns:
+        Path to the optimized ONNX model.
+
+    """
+
+    logger.info(f"Optimizing model: {onnx_model_path}")
+
+    ort_model = optimize_onnx_model(
+        load_model(onnx_model_path),
+        onnx_config,
+        use_gpu=use_gpu,
+        opt_level=opt_level,
+        only_ort=only_ort,
+        float16=float16,
+        input_int32=input_int32,
+    )
+
+    # Models that have not been optimized are not saved again
+    use_transformer_optimization = not only_ort and onnx_config.is_ort_graph_optimizable
+    if opt_level == 0 and not use_transformer_optimization:
+        return onnx_model_path
+
+    ort_model_path = create_file_name_identifier(onnx_model_path, "-opt")
+    if use_transformer_optimization and float16:
+        ort_model_path = create_file_name_identifier(ort_model_path, "-fp16")
+    save_model(ort_model, ort_model_path)
 
     return ort_model_path
@@ -2,20 +2,37 @@
 # Licensed under the MIT license.
 
 import copy
-from typing import Optional, Tuple
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import torch
+from torch.nn import functional as F
 
 from archai.quantization.qat import prepare_with_qat
 
 
+def _causal_lm_loss(logits: torch.Tensor, labels: torch.LongTensor) -> torch.Tensor:
+    # Same loss as the causal language modeling heads from `transformers`
+    shift_logits = logits[..., :-1, :].contiguous()
+    shift_labels = labels[..., 1:].contiguous()
+
+    return F.cross_entropy(shift_logits.view(-1, shift_logits.size(-1)), shift_labels.view(-1))
+
+
 class MixedQAT(torch.nn.Module):
     """Mixed QAT (Quantization-Aware Training) model, which can be fine-tuned
     using a linear combination of regular and QAT losses.
 
     """
 
-    def __init__(self, model: torch.nn.Module, qat_weight: Optional[float] = 0.2) -> None:
+    def __init__(
+        self,
+        model: torch.nn.Module,
+        qat_weight: Optional[float] = 0.2,
+        shared_trunk: Optional[bool] = False,
+        qat_interval: Optional[int] = 1,
+        loss_fn: Optional[Callable[[torch.Tensor, torch.LongTensor], torch.Tensor]] = None,
+        batch_dim: Optional[int] = 0,
+    ) -> None:
         """Initialize the class by creating standard and QAT-based attributes
         of the incoming model.
 
@@ -23,6 +40,21 @@ class MixedQAT(torch.nn.Module):
             model: Instance of the model that will be fine-tuned with Mixed QAT.
             qat_weight: Amount of QAT-based loss that should be used in the linear combination.
                 This value should be between 0 and 1.
+            shared_trunk: Whether the regular and QAT-based branches should be computed in a
+                single forward pass over a concatenated batch, where the QAT-ready modules
+                forward the first half with float weights and the second half with fake
+                quantization. Otherwise, the regular and QAT-based models are called separately.
+                Both branches are still computed over the whole batch, thus it does not reduce
+                the computation nor the activations, which is done by `qat_interval` instead.
+            qat_interval: Number of training forward passes between each computation of the
+                QAT-based branch. The remaining passes only use the regular loss.
+            loss_fn: Function computing the loss of a branch from its logits and labels when
+                `shared_trunk` is used, since the loss computed by the model would average both
+                branches. It should match the loss of the model. If not provided, the causal
+                language modeling loss of `transformers` models is used.
+            batch_dim: Batch dimension of the inputs and outputs of the model, used to concatenate
+                and split the branches when `shared_trunk` is used.
+
         """
 
         super().__init__()
@@ -30,8 +62,15 @@ class MixedQAT(torch.nn.Module):
         if qat_weight < 0.0 or qat_weight > 1.0:
             raise ValueError(f"qat_weight: {qat_weight} should be between 0 and 1.")
 
+        if qat_interval < 1:
+            raise ValueError(f"qat_interval: {qat_interval} should be greater than 0.")
+
         self.qat_weight = qat_weight
         self.regular_weight = 1.0 - qat_weight
+        self.shared_trunk = shared_trunk
+        self.qat_interval = qat_interval
+        self.loss_fn = loss_fn or _causal_lm_loss
+        self.batch_dim = batch_dim
 
         self.model = model
         self.qat_model = copy.deepcopy(model)
@@ -49,15 +88,71 @@ class MixedQAT(torch.nn.Module):
         for param, qat_param in zip(self.model.parameters(), self.qat_model.parameters()):
             assert qat_param is param, "MixedQAT parameters are not fully shared."
 
+        self._n_training_steps = 0
+
+    def _set_mixed_batch_size(self, batch_size: Optional[int]) -> None:
+        for module in self.qat_model.modules():
+            if hasattr(module, "mixed_batch_size"):
+                module.mixed_batch_size = batch_size
+                module.mixed_batch_dim = self.batch_dim
+
+    def _shared_trunk_forward(
+        self, input_ids: torch.LongTensor, labels: torch.LongTensor, *args, **kwargs
+    ) -> Tuple[torch.Tensor, ...]:
+        batch_size = input_ids.size(self.batch_dim)
+
+        def _duplicate(x: Any) -> Any:
+            if isinstance(x, torch.Tensor) and x.dim() > self.batch_dim and x.size(self.batch_dim) == batch_size:
+                return torch.cat([x, x], dim=self.batch_dim)
+            return x
+
+        def _split(x: Any) -> Tuple[Any, Any]:
+            if isinstance(x, torch.Tensor) and x.dim() > self.batch_dim and x.size(self.batch_dim) == 2 * batch_size:
+                return x.chunk(2, dim=self.batch_dim)
+            if isinstance(x, (list, tuple)):
+                splits = [_split(item) for item in x]
+                return type(x)(s[0] for s in splits), type(x)(s[1] for s in splits)
+            return x, x
+
+        args = [_duplicate(arg) for arg in args]
+        kwargs: Dict[str, Any] = {key: _duplicate(value) for key, value in kwargs.items()}
+
+        self._set_mixed_batch_size(batch_size)
+        try:
+            # Labels are not forwarded, as the loss of each branch is computed separately
+            outputs = self.qat_model(input_ids=_duplicate(input_ids), *args, **kwargs)
+        finally:
+            self._set_mixed_batch_size(None)
+
+        outputs, qat_outputs = _split(tuple(outputs.values()) if isinstance(outputs, dict) else tuple(outputs))
+        loss = (
+            self.loss_fn(outputs[0], labels) * self.regular_weight
+            + self.loss_fn(qat_outputs[0], labels) * self.qat_weight
+        )
+
+        # Follows the outputs of the regular branch, as the separate forward passes do
+        return (loss,) + outputs
+
     def forward(
         self, input_ids: torch.LongTensor, labels: torch.LongTensor, *args, **kwargs
     ) -> Tuple[torch.Tensor, ...]:
+        # If evaluating, only the QAT-based model is needed
+        if not self.training:
+            return self.qat_model(input_ids=input_ids, labels=labels, *args, **kwargs)
+
+        use_qat = self._n_training_steps % self.qat_interval == 0
+        self._n_training_steps += 1
+
+        if not use_qat:
+            return self.model(input_ids=input_ids, labels=labels, *args, **kwargs)
+
+        if self.shared_trunk:
+            return self._shared_trunk_forward(input_ids, labels, *args, **kwargs)
+
         outputs = self.model(input_ids=input_ids, labels=labels, *args, **kwargs)
         qat_outputs = self.qat_model(input_ids=input_ids, labels=labels, *args, **kwargs)
 
         # If training, returns the linear combination of losses
-        if self.training:
-            loss = outputs.loss * self.regular_weight + qat_outputs.loss * self.qat_weight
-            return (loss,) + outputs[1:]
+        loss = outputs.loss * self.regular_weight + qat_outputs.loss * self.qat_weight
 
-        return qat_outputs
+        return (loss,) + outputs[1:]
@@ -3,7 +3,7 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 
 import torch
 from torch.nn import functional as F
@@ -11,6 +11,54 @@ from torch.nn import functional as F
 from archai.quantization.quantizers import FakeDynamicQuant
 
 
+def mixed_batch_forward(
+    x: torch.Tensor,
+    float_forward: Callable[[torch.Tensor], torch.Tensor],
+    qat_forward: Callable[[torch.Tensor], torch.Tensor],
+    batch_size: int,
+    batch_dim: Optional[int] = 0,
+) -> torch.Tensor:
+    """Forward the first half of a batch with the float path and the second half with the QAT path.
+
+    This allows regular and QAT-based branches that share parameters (e.g., `MixedQAT`) to be
+    computed in a single forward pass over a concatenated batch.
+
+    Args:
+        x: Input tensor, where the first and second halves of the batch (`batch_dim`) belong
+            to the float and QAT branches, respectively. Inputs broadcasted over the batch
+            (`batch_dim` equal to 1, e.g., position identifiers) are shared by both.
+        float_forward: Float-based forward function.
+        qat_forward: QAT-based forward function.
+        batch_size: Batch size of each branch.
+        batch_dim: Batch dimension of `x`.
+
+    Returns:
+        Concatenation of the float and QAT outputs.
+
+    Raises:
+        ValueError: If the batch dimension of `x` is neither 1 nor twice `batch_size`.
+
+    """
+
+    if x.size(batch_dim) == 1:
+        y_float, y_qat = float_forward(x), qat_forward(x)
+
+        expanded_shape = list(y_float.shape)
+        expanded_shape[batch_dim] = batch_size
+
+        return torch.cat([y_float.expand(expanded_shape), y_qat.expand(expanded_shape)], dim=batch_dim)
+
+    if x.size(batch_dim) != 2 * batch_size:
+        raise ValueError(
+            f"Mixed batch should have size 1 or {2 * batch_size} in dimension {batch_dim}, "
+            + f"but got shape {tuple(x.shape)}."
+        )
+
+    x_float, x_qat = x.split(batch_size, dim=batch_dim)
+
+    return torch.cat([float_forward(x_float), qat_forward(x_qat)], dim=batch_dim)
+
+
 class FakeQuantEmbedding(torch.nn.Embedding):
     """Translate a torch-based Embedding layer into a QAT-ready Embedding layer."""
 
@@ -22,11 +70,14 @@ class FakeQuantEmbedding(torch.nn.Embedding):
 
         super().__init__(*args, **kwargs)
 
+        self.mixed_batch_size = None
+        self.mixed_batch_dim = 0
         self.weight_fake_quant = FakeDynamicQuant(
             dtype=torch.qint8,
             reduce_range=False,
             bits=bits,
             onnx_compatible=onnx_compatible,
+            cache_outputs=True,
         )
 
     @property
@@ -35,9 +86,20 @@ class FakeQuantEmbedding(torch.nn.Embedding):
 
         return self.weight_fake_quant(self.weight)
 
-    def forward(self, x: torch.Tensor) -> torch.Tensor:
+    def _float_forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.weight[x]
+
+    def _qat_forward(self, x: torch.Tensor) -> torch.Tensor:
         return self.fake_quant_weight[x]
 
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        if self.mixed_batch_size:
+            return mixed_batch_forward(
+                x, self._float_forward, self._qat_forward, self.mixed_batch_size, batch_dim=self.mixed_batch_dim
+            )
+
+        return self._qat_forward(x)
+
     @classmethod
     def from_float(
         cls: FakeQuantEmbedding,
@@ -119,6 +181,8 @@ class FakeDynamicQuantLinear(torch.nn.Linear):
         super().__init__(*args, **kwargs)
 
         self.dynamic_weight = dynamic_weight
+        self.mixed_batch_size = None
+        self.mixed_batch_dim = 0
 
         if dynamic_weight:
             self.weight_fake_quant = FakeDynamicQuant(
@@ -126,6 +190,7 @@ class FakeDynamicQuantLinear(torch.nn.Linear):
                 reduce_range=False,
                 bits=bits,
                 onnx_compatible=onnx_compatible,
+                cache_outputs=True,
             )
 
         self.input_pre_process = FakeDynamicQuant(
@@ -140,11 +205,22 @@ class FakeDynamicQuantLinear(torch.nn.Linear):
 
         return self.weight_fake_quant(self.weight)
 
-    def forward(self, x: torch.Tensor) -> torch.Tensor:
+    def _float_forward(self, x: torch.Tensor) -> torch.Tensor:
+        return F.linear(x, self.weight, self.bias)
+
+    def _qat_forward(self, x: torch.Tensor) -> torch.Tensor:
         x = self.input_pre_process(x)
 
         return F.linear(x, self.fake_quant_weight, self.bias)
 
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        if self.mixed_batch_size:
+            return mixed_batch_forward(
+                x, self._float_forward, self._qat_forward, self.mixed_batch_size, batch_dim=self.mixed_batch_dim
+            )
+
+        return self._qat_forward(x)
+
     @classmethod
     def from_float(
         cls: FakeDynamicQuantLinear,
@@ -247,6 +323,8 @@ class FakeDynamicQuantConv1d(torch.nn.Conv1d):
         super().__init__(*args, **kwargs)
 
         self.dynamic_weight = dynamic_weight
+        self.mixed_batch_size = None
+        self.mixed_batch_dim = 0
 
         if dynamic_weight:
             self.weight_fake_quant = FakeDynamicQuant(
@@ -254,6 +332,7 @@ class FakeDynamicQuantConv1d(torch.nn.Conv1d):
                 reduce_range=False,
                 bits=bits,
                 onnx_compatible=onnx_compatible,
+                cache_outputs=True,
             )
 
         self.input_pre_process = FakeDynamicQuant(
@@ -268,11 +347,22 @@ class FakeDynamicQuantConv1d(torch.nn.Conv1d):
 
         return self.weight_fake_quant(self.weight)
 
-    def forward(self, x: torch.Tensor) -> torch.Tensor:
+    def _float_forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self._conv_forward(x, self.weight, self.bias)
+
+    def _qat_forward(self, x: torch.Tensor) -> torch.Tensor:
         x = self.input_pre_process(x)
 
         return self._conv_forward(x, self.fake_quant_weight, self.bias)
 
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        if self.mixed_batch_size:
+            return mixed_batch_forward(
+                x, self._float_forward, self._qat_forward, self.mixed_batch_size, batch_dim=self.mixed_batch_dim
+            )
+
+        return self._qat_forward(x)
+
     @classmethod
     def from_float(
         cls: FakeDynamicQuantConv1d,
@@ -8,6 +8,7 @@ from typing import Any, Dict, Optional
 import torch
 import transformers
 
+from archai.quantization.modules import mixed_batch_forward
 from archai.quantization.quantizers import FakeDynamicQuant
 
 
@@ -40,12 +41,16 @@ class FakeDynamicQuantHFConv1D(transformers.modeling_utils.Conv1D):
         super().__init__(*args, **kwargs)
 
         self.dynamic_weight = dynamic_weight
+        self.mixed_batch_size = None
+        self.mixed_batch_dim = 0
+
         if dynamic_weight:
             self.weight_fake_quant = FakeDynamicQuant(
                 dtype=torch.qint8,
                 reduce_range=False,
                 bits=bits,
                 onnx_compatible=onnx_compatible,
+                cache_outputs=True,
             )
 
         self.input_pre_process = FakeDynamicQuant(
@@ -60,7 +65,10 @@ class FakeDynamicQuantHFConv1D(transformers.modeling_utils.Conv1D):
 
         return self.weight_fake_quant(self.weight)
 
-    def forward(self, x: torch.Tensor) -> torch.Tensor:
+    def _float_forward(self, x: torch.Tensor) -> torch.Tensor:
+        return super().forward(x)
+
+    def _qat_forward(self, x: torch.Tensor) -> torch.Tensor:
         x = self.input_pre_process(x)
         size_out = x.size()[:-1] + (self.nf,)
 
@@ -69,6 +77,14 @@ class FakeDynamicQuantHFConv1D(transformers.modeling_utils.Conv1D):
 
         return x
 
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        if self.mixed_batch_size:
+            return mixed_batch_forward(
+                x, self._float_forward, self._qat_forward, self.mixed_batch_size, batch_dim=self.mixed_batch_dim
+            )
+
+        return self._qat_forward(x)
+
     @classmethod
     def from_float(
         cls: FakeDynamicQuantHFConv1D,
@@ -1,18 +1,46 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
-from typing import List, Optional
-
+import hashlib
+import os
+import pickle
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 import onnx
 import torch
 from onnx import onnx_pb as onnx_proto
 from onnx.onnx_ml_pb2 import NodeProto
+from onnxruntime import GraphOptimizationLevel, InferenceSession, SessionOptions
+from onnxruntime.quantization.calibrate import (
+    CalibrationDataReader,
+    CalibrationMethod,
+    create_calibrator,
+)
 from onnxruntime.quantization.onnx_quantizer import ONNXQuantizer
 from onnxruntime.quantization.operators.base_operator import QuantOperatorBase
-from onnxruntime.quantization.quant_utils import attribute_to_kwarg, ms_domain
+from onnxruntime.quantization.qdq_quantizer import QDQQuantizer
+from onnxruntime.quantization.quant_utils import (
+    QuantFormat,
+    QuantizationMode,
+    QuantType,
+    attribute_to_kwarg,
+    load_model,
+    ms_domain,
+)
 from onnxruntime.quantization.quantize import quantize_dynamic
-from onnxruntime.quantization.registry import IntegerOpsRegistry
-
+from onnxruntime.quantization.registry import (
+    IntegerOpsRegistry,
+    QDQRegistry,
+    QLinearOpsRegistry,
+)
+from torch.utils.data import DataLoader, Subset
+
+from archai.api.dataset_provider import DatasetProvider
 from archai.common.file_utils import create_file_name_identifier
 from archai.common.ordered_dict_logger import OrderedDictLogger
 from archai.quantization.quantization_utils import rgetattr, rsetattr
@@ -132,7 +160,8 @@ def dynamic_quantization_torch(
     """Perform dynamic quantization on a PyTorch model.
 
     This function performs dynamic quantization on the input PyTorch model, including
-    any specified embedding layers.
+    any specified embedding layers. The number of threads used for inference is not
+    changed, e.g., `torch.set_num_threads(1)` should be called by the caller if needed.
 
     Args:
         model: PyTorch model to be quantized.
@@ -142,10 +171,6 @@ def dynamic_quantization_torch(
 
     logger.info("Quantizing model ...")
 
-    # Sets the number of threads
-    # Quantized model only uses maximum of 1 thread
-    torch.set_num_threads(1)
-
     # Performs an initial dynamic quantization
     model_qnt = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, inplace=False)
 
@@ -162,3 +187,336 @@ def dynamic_quantization_torch(
     model_qnt = torch.quantization.convert(model_qnt, inplace=False)
 
     return model_qnt
+
+
+CALIBRATION_METHODS = {
+    "minmax": CalibrationMethod.MinMax,
+    "entropy": CalibrationMethod.Entropy,
+    "percentile": CalibrationMethod.Percentile,
+}
+
+
+class DatasetProviderDataReader(CalibrationDataReader):
+    """Calibration data reader that feeds batches from a `DatasetProvider` to an ONNX model."""
+
+    def __init__(
+        self,
+        dataset_provider: DatasetProvider,
+        input_names: List[str],
+        split: Optional[str] = "train",
+        num_samples: Optional[int] = 128,
+        batch_size: Optional[int] = 1,
+    ) -> None:
+        """Initialize the data reader.
+
+        Dataset items can either be tuples, where the first element is the input and the
+        second is the label (e.g., image datasets), or dictionaries keyed by the input
+        names (e.g., tokenized text datasets).
+
+        Args:
+            dataset_provider: Dataset provider.
+            input_names: Names of the ONNX model inputs.
+            split: Dataset split (`train`, `val` or `test`).
+            num_samples: Number of samples used for calibration.
+            batch_size: Batch size.
+
+        """
+
+        assert split in ["train", "val", "test"], "`split` must be `train`, `val` or `test`."
+
+        self.dataset_provider = dataset_provider
+        self.input_names = input_names
+        self.split = split
+        self.num_samples = num_samples
+        self.batch_size = batch_size
+
+        self._iterator = None
+        self._cache_key = None
+
+    @property
+    def cache_key(self) -> str:
+        """Identifier of the calibration data, used to cache calibration results.
+
+        Besides the reader arguments, the key holds a fingerprint of the dataset provider
+        class and of the first calibration batch, so different datasets (or tokenizers)
+        with the same split and size do not share cached results.
+
+        """
+
+        if self._cache_key is None:
+            provider_cls = type(self.dataset_provider)
+
+            sha256 = hashlib.sha256()
+            sha256.update(f"{provider_cls.__module__}.{provider_cls.__qualname__}".encode())
+
+            inputs, labels = next(self.iter_batches(), ({}, None))
+            for name in sorted(inputs):
+                sha256.update(name.encode())
+                sha256.update(str(inputs[name].dtype).encode())
+                sha256.update(str(inputs[name].shape).encode())
+                sha256.update(np.ascontiguousarray(inputs[name]).tobytes())
+            if labels is not None:
+                sha256.update(np.ascontiguousarray(labels).tobytes())
+
+            fingerprint = sha256.hexdigest()[:16]
+            self._cache_key = f"{provider_cls.__name__}-{fingerprint}-{self.split}-{self.num_samples}-{self.batch_size}"
+
+        return self._cache_key
+
+    def iter_batches(self) -> Iterator[Tuple[Dict[str, np.ndarray], Optional[np.ndarray]]]:
+        """Iterate over the calibration batches.
+
+        Yields:
+            Inputs and labels (if available) of each batch.
+
+        """
+
+        dataset = getattr(self.dataset_provider, f"get_{self.split}_dataset")()
+        dataset = Subset(dataset, range(min(self.num_samples, len(dataset))))
+
+        for batch in DataLoader(dataset, batch_size=self.batch_size, shuffle=False):
+            if isinstance(batch, dict):
+                inputs = {name: np.asarray(batch[name]) for name in self.input_names if name in batch}
+                labels = np.asarray(batch["labels"]) if "labels" in batch else None
+            else:
+                inputs = {self.input_names[0]: np.asarray(batch[0])}
+                labels = np.asarray(batch[1]) if len(batch) > 1 else None
+
+            yield inputs, labels
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        if self._iterator is None:
+            self._iterator = self.iter_batches()
+
+        inputs, _ = next(self._iterator, (None, None))
+
+        return inputs
+
+    def rewind(self) -> None:
+        """Restart the reader from its first batch."""
+
+        self._iterator = None
+
+
+def _calculate_file_hash(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+
+def calibrate_onnx(
+    onnx_model_path: str,
+    data_reader: CalibrationDataReader,
+    calibrate_method: Optional[str] = "minmax",
+    op_types_to_quantize: Optional[List[str]] = None,
+    cache_dir: Optional[str] = None,
+) -> Dict[str, Tuple[float, float]]:
+    """Calibrate the activation ranges of an ONNX model.
+
+    The collected statistics (min/max ranges or activation histograms) are cached on disk
+    per model hash, calibration method and calibration data, so subsequent calls with the
+    same model skip the calibration inference.
+
+    Args:
+        onnx_model_path: Path to the ONNX model to be calibrated.
+        data_reader: Calibration data reader. If it has a `cache_key` attribute, it is used
+            to identify the calibration data in the cache.
+        calibrate_method: Calibration method (`minmax`, `entropy` or `percentile`).
+        op_types_to_quantize: Operator types to be calibrated.
+        cache_dir: Directory used to cache the calibration statistics.
+
+    Returns:
+        Activation ranges, mapping tensor names to their (min, max) values.
+
+    """
+
+    assert calibrate_method in CALIBRATION_METHODS, f"`calibrate_method` must be one of {list(CALIBRATION_METHODS)}."
+
+    cache_path = None
+    if cache_dir is not None and hasattr(data_reader, "cache_key"):
+        model_hash = _calculate_file_hash(onnx_model_path)
+        key = hashlib.sha256(f"{model_hash}-{calibrate_method}-{data_reader.cache_key}".encode()).hexdigest()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_path = os.path.join(cache_dir, f"calibration-{key[:32]}.pkl")
+
+    if cache_path is not None and os.path.exists(cache_path):
+        logger.info(f"Loading calibration statistics: {cache_path}")
+
+        with open(cache_path, "rb") as f:
+            calibration_stats = pickle.load(f)
+
+    else:
+        logger.info(f"Calibrating model: {onnx_model_path}")
+
+        model = load_model(Path(onnx_model_path), False)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            calibrator = create_calibrator(
+                model,
+                op_types_to_quantize,
+                augmented_model_path=os.path.join(tmp_dir, "augmented_model.onnx"),
+                calibrate_method=CALIBRATION_METHODS[calibrate_method],
+            )
+            calibrator.collect_data(data_reader)
+
+            # Histogram-based calibrators keep their statistics in the collector, which
+            # allows ranges to be re-computed without running the calibration again
+            if calibrate_method == "minmax":
+                calibration_stats = {"tensors_range": calibrator.compute_range()}
+            else:
+                calibration_stats = {"collector": calibrator.collector}
+
+            del calibrator
+
+        if cache_path is not None:
+            with open(cache_path, "wb") as f:
+                pickle.dump(calibration_stats, f)
+
+    if "collector" in calibration_stats:
+        return calibration_stats["collector"].compute_collection_result()
+
+    return calibration_stats["tensors_range"]
+
+
+def static_quantization_onnx(
+    onnx_model_path: str,
+    data_reader: CalibrationDataReader,
+    calibrate_method: Optional[str] = "minmax",
+    per_channel: Optional[bool] = True,
+    reduce_range: Optional[bool] = False,
+    quant_format: Optional[str] = "qdq",
+    op_types_to_quantize: Optional[List[str]] = None,
+    cache_dir: Optional[str] = None,
+) -> str:
+    """Perform static quantization on an ONNX model.
+
+    The quantized model is saved to a new file with "-static-int8" appended
+    to the original file name.
+
+    Args:
+        onnx_model_path: Path to the ONNX model to be quantized.
+        data_reader: Calibration data reader, e.g., `DatasetProviderDataReader`.
+        calibrate_method: Calibration method (`minmax`, `entropy` or `percentile`).
+        per_channel: Whether weights should be quantized per channel.
+        reduce_range: Whether weights should be quantized with 7 bits.
+        quant_format: Format of the quantized model (`qdq` for QuantizeLinear/DequantizeLinear
+            pairs or `qoperator` for quantized operators).
+        op_types_to_quantize: Operator types to be quantized. If not supplied, all operators
+            supported by onnxruntime are quantized.
+        cache_dir: Directory used to cache the calibration statistics.
+
+    Returns:
+        Path to the static quantized ONNX model.
+
+    """
+
+    assert quant_format in ["qdq", "qoperator"], "`quant_format` must be `qdq` or `qoperator`."
+
+    logger.info(f"Quantizing model: {onnx_model_path}")
+
+    op_types_to_quantize = op_types_to_quantize or list(set(QLinearOpsRegistry.keys()) | set(QDQRegistry.keys()))
+    tensors_range = calibrate_onnx(
+        onnx_model_path,
+        data_reader,
+        calibrate_method=calibrate_method,
+        op_types_to_quantize=op_types_to_quantize,
+        cache_dir=cache_dir,
+    )
+
+    quantizer_cls = QDQQuantizer if quant_format == "qdq" else ONNXQuantizer
+    quantizer = quantizer_cls(
+        model=load_model(Path(onnx_model_path), False),
+        per_channel=per_channel,
+        reduce_range=reduce_range,
+        mode=QuantizationMode.QLinearOps,
+        static=True,
+        weight_qType=QuantType.QInt8,
+        activation_qType=QuantType.QInt8,
+        tensors_range=tensors_range,
+        nodes_to_quantize=[],
+        nodes_to_exclude=[],
+        op_types_to_quantize=op_types_to_quantize,
+        extra_options={},
+    )
+    quantizer.quantize_model()
+
+    qnt_model_path = create_file_name_identifier(onnx_model_path, "-static-int8")
+    quantizer.model.save_model_to_file(qnt_model_path)
+
+    return qnt_model_path
+
+
+def _create_session(onnx_model_path: str, num_threads: Optional[int] = None) -> InferenceSession:
+    # Threads are set per session, which does not change the process-wide thread count
+    options = SessionOptions()
+    options.graph_optimization_level = GraphOptimizationLevel.ORT_ENABLE_ALL
+    if num_threads is not None:
+        options.intra_op_num_threads = num_threads
+
+    return InferenceSession(onnx_model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+def _count_correct(outputs: np.ndarray, inputs: Dict[str, np.ndarray], labels: Optional[np.ndarray]) -> Tuple[int, int]:
+    predictions = outputs.argmax(-1)
+
+    # Language models without explicit labels are evaluated with next-token accuracy
+    if labels is None:
+        if "input_ids" not in inputs or predictions.ndim < 2:
+            return 0, 0
+
+        predictions, labels = predictions[:, :-1], inputs["input_ids"][:, 1:]
+
+    return int((predictions == labels).sum()), int(labels.size)
+
+
+def evaluate_static_quantization(
+    onnx_model_path: str,
+    qnt_model_path: str,
+    data_reader: DatasetProviderDataReader,
+    num_threads: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Compare the latency and accuracy of a float ONNX model and its quantized version.
+
+    Args:
+        onnx_model_path: Path to the float ONNX model.
+        qnt_model_path: Path to the quantized ONNX model.
+        data_reader: Data reader used for the evaluation.
+        num_threads: Number of intra-operator threads of the inference sessions.
+
+    Returns:
+        Median latency (seconds) and accuracy of both models, along with their deltas.
+
+    """
+
+    sessions = {
+        "float": _create_session(onnx_model_path, num_threads),
+        "qnt": _create_session(qnt_model_path, num_threads),
+    }
+    latencies = {name: [] for name in sessions}
+    correct = {name: 0 for name in sessions}
+    total = 0
+
+    for inputs, labels in data_reader.iter_batches():
+        for name, session in sessions.items():
+            start_time = time.perf_counter()
+            outputs = session.run(None, inputs)[0]
+            latencies[name].append(time.perf_counter() - start_time)
+
+            n_correct, n_total = _count_correct(outputs, inputs, labels)
+            correct[name] += n_correct
+
+        total += n_total
+
+    results = {}
+    for name in sessions:
+        results[f"latency_{name}"] = statistics.median(latencies[name])
+        results[f"accuracy_{name}"] = correct[name] / total if total > 0 else None
+
+    results["latency_delta"] = results["latency_qnt"] - results["latency_float"]
+    results["accuracy_delta"] = results["accuracy_qnt"] - results["accuracy_float"] if total > 0 else None
+
+    return results
@@ -1,13 +1,27 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
-from typing import Optional
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import torch
 from torch._C import dtype
-from torch.quantization import MinMaxObserver
 
-from archai.quantization.observers import OnnxDynamicObserver
+
+class _CachedFakeQuantize(torch.autograd.Function):
+    """Straight-through estimator over a cached fake-quantized tensor."""
+
+    @staticmethod
+    def forward(ctx: Any, x: torch.Tensor, x_fake_quant: torch.Tensor, mask: torch.Tensor) -> torch.Tensor:
+        ctx.save_for_backward(mask)
+
+        return x_fake_quant.view_as(x_fake_quant)
+
+    @staticmethod
+    def backward(ctx: Any, grad_output: torch.Tensor) -> Tuple[Optional[torch.Tensor], ...]:
+        (mask,) = ctx.saved_tensors
+
+        return grad_output * mask, None, None
 
 
 class FakeDynamicQuant(torch.nn.Module):
@@ -18,6 +32,10 @@ class FakeDynamicQuant(torch.nn.Module):
     model during training. The operator can be customized to use different quantization types
     (quint8 or qint8) and bit widths, and it can be made compatible with ONNX.
 
+    The min/max reduction and the quantization parameters are computed with tensor operations
+    (a single `aminmax` reduction followed by a single fake quantization kernel), so no observer
+    is instantiated and no host-device synchronization happens on each call.
+
     Note: This module is only meant to be used during training, and should not be present
     in the final, deployed model.
 
@@ -29,6 +47,7 @@ class FakeDynamicQuant(torch.nn.Module):
         dtype: Optional[dtype] = torch.quint8,
         bits: Optional[int] = 8,
         onnx_compatible: Optional[bool] = False,
+        cache_outputs: Optional[bool] = False,
     ) -> None:
         """Initialize a customizable fake dynamic quantization operator.
 
@@ -39,6 +58,9 @@ class FakeDynamicQuant(torch.nn.Module):
                 `torch.qint8`.
             bits: Number of bits used in the quantization. Supported values are 8 and 16.
             onnx_compatible: Whether the quantization should be compatible with ONNX.
+            cache_outputs: Whether to cache the fake-quantized output, which is re-used until
+                the input is replaced or modified in-place (e.g., by an optimizer step). This
+                should only be used for inputs that are not updated every call, such as weights.
 
         """
 
@@ -48,6 +70,9 @@ class FakeDynamicQuant(torch.nn.Module):
         self.reduce_range = reduce_range if bits == 8 else False
         self.dtype = dtype
         self.onnx_compatible = onnx_compatible
+        self.cache_outputs = cache_outputs
+
+        self._cache = None
 
         assert dtype in (torch.quint8, torch.qint8)
 
@@ -63,53 +88,114 @@ class FakeDynamicQuant(torch.nn.Module):
             else:
                 self.qmin, self.qmax = -(2 ** (bits - 1)), 2 ** (bits - 1) - 1
 
-    def forward(self, x: torch.Tensor) -> torch.Tensor:
-        if x.dtype == torch.float32:
-            if self.bits == 8:
-                if self.dtype == torch.quint8:
-                    qscheme = torch.per_tensor_affine
+        # Range used to calculate the 8-bit quantization parameters, which follows
+        # `MinMaxObserver` (or `OnnxDynamicObserver` if `onnx_compatible`)
+        if dtype == torch.quint8:
+            self.observer_qmin, self.observer_qmax = (0, 127) if self.reduce_range else (0, 255)
+        else:
+            self.observer_qmin, self.observer_qmax = (-64, 63) if self.reduce_range else (-128, 127)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_cache"] = None
+
+        return state
+
+    def _calculate_qparams(self, min_val: torch.Tensor, max_val: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        eps = torch.finfo(torch.float32).eps
+
+        if self.bits == 8:
+            if self.onnx_compatible:
+                if self.dtype == torch.qint8:
+                    scale = torch.max(max_val.clamp(min=0), -min_val.clamp(max=0)) / 127
+                    scale = scale.clamp(min=eps)
+                    zero_pointer = torch.zeros_like(scale)
                 else:
-                    qscheme = torch.per_tensor_symmetric
+                    scale = ((max_val - min_val) / 255.0).clamp(min=eps)
+                    zero_pointer = (-torch.round(min_val / scale)).clamp(min=0, max=255)
+
+            else:
+                min_val_neg, max_val_pos = min_val.clamp(max=0), max_val.clamp(min=0)
+                qrange = float(self.observer_qmax - self.observer_qmin)
 
-                if self.onnx_compatible:
-                    observer = OnnxDynamicObserver(dtype=self.dtype)
+                if self.dtype == torch.qint8:
+                    scale = (torch.max(-min_val_neg, max_val_pos) / (qrange / 2)).clamp(min=eps)
+                    zero_pointer = torch.zeros_like(scale)
                 else:
-                    observer = MinMaxObserver(
-                        dtype=self.dtype,
-                        qscheme=qscheme,
-                        reduce_range=self.reduce_range,
-                    )
+                    scale = ((max_val_pos - min_val_neg) / qrange).clamp(min=eps)
+                    zero_pointer = self.observer_qmin - torch.round(min_val_neg / scale)
+                    zero_pointer = zero_pointer.clamp(min=self.observer_qmin, max=self.observer_qmax)
 
-                observer(x)
-                scale, zero_pointer = observer.calculate_qparams()
+        else:
+            scale = ((max_val - min_val) / float(self.qmax - self.qmin)).clamp(min=eps)
 
-            else:
-                min_val, max_val = x.min(), x.max()
-                initial_scale = (max_val - min_val) / float(self.qmax - self.qmin)
+            min_zero_pointer = self.qmin - min_val / scale
+            max_zero_pointer = self.qmax - max_val / scale
+            min_zero_pointer_error = abs(self.qmin) - (min_val / scale).abs()
+            max_zero_pointer_error = abs(self.qmax) - (max_val / scale).abs()
 
-                min_zero_pointer = self.qmin - min_val / initial_scale
-                max_zero_pointer = self.qmax - max_val / initial_scale
-                min_zero_pointer_error = abs(self.qmin) - abs(min_val / initial_scale)
-                max_zero_pointer_error = abs(self.qmax) - abs(max_val / initial_scale)
+            zero_pointer = torch.where(
+                min_zero_pointer_error < max_zero_pointer_error, min_zero_pointer, max_zero_pointer
+            ).round()
 
-                if min_zero_pointer_error < max_zero_pointer_error:
-                    initial_zero_pointer = min_zero_pointer
-                else:
-                    initial_zero_pointer = max_zero_pointer
-                initial_zero_pointer = initial_zero_pointer.round()
+        # Prevents `zero_pointer` from being outside the range of the quantized dtype
+        zero_pointer = zero_pointer.clamp(min=self.qmin, max=self.qmax)
+
+        return scale.float().view(1), zero_pointer.to(torch.int32).view(1)
+
+    def _apply(self, fn: Callable) -> torch.nn.Module:
+        # Inputs are usually converted along with the module, e.g., `.to()` or `.half()`
+        self._cache = None
+
+        return super()._apply(fn)
+
+    def _load_from_state_dict(self, *args, **kwargs) -> None:
+        self._cache = None
+
+        super()._load_from_state_dict(*args, **kwargs)
+
+    def _get_cache_key(self, x: torch.Tensor) -> Tuple[Any, ...]:
+        # Replacing the data of a tensor (e.g., `weight.data = new`) keeps its version,
+        # so its storage, device and data type are also part of the key
+        return (x._version, x.data_ptr(), x.device, x.dtype)
+
+    def _cache_is_valid(self, x: torch.Tensor) -> bool:
+        if self._cache is None:
+            return False
+
+        x_ref, key = self._cache[:2]
+
+        return x_ref() is x and key == self._get_cache_key(x)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        if x.dtype != torch.float32:
+            return x
+
+        if self.cache_outputs:
+            if not self._cache_is_valid(x):
+                with torch.no_grad():
+                    min_val, max_val = torch.aminmax(x.detach())
+                    self._scale, self._zero_pointer = self._calculate_qparams(min_val, max_val)
+
+                    x_fake_quant, mask = torch._fake_quantize_per_tensor_affine_cachemask_tensor_qparams(
+                        x.detach(),
+                        self._scale,
+                        self._zero_pointer,
+                        torch.ones(1, dtype=torch.long, device=x.device),
+                        self.qmin,
+                        self.qmax,
+                    )
+
+                self._cache = (weakref.ref(x), self._get_cache_key(x), x_fake_quant, mask)
 
-                scale, zero_pointer = initial_scale, initial_zero_pointer
+            x_fake_quant, mask = self._cache[2:]
 
-            # Prevents `zero_pointer` from being outside the range of the quantized dtype
-            if zero_pointer > self.qmax:
-                zero_pointer = torch.tensor(self.qmax)
-            elif zero_pointer < self.qmin:
-                zero_pointer = torch.tensor(self.qmin)
+            if torch.is_grad_enabled() and x.requires_grad:
+                return _CachedFakeQuantize.apply(x, x_fake_quant, mask)
 
-            x = torch.fake_quantize_per_tensor_affine(
-                x, float(scale.item()), int(zero_pointer.item()), self.qmin, self.qmax
-            )
+            return x_fake_quant
 
-            self._scale, self._zero_pointer = scale, zero_pointer
+        min_val, max_val = torch.aminmax(x.detach())
+        self._scale, self._zero_pointer = self._calculate_qparams(min_val, max_val)
 
-        return x
+        return torch.fake_quantize_per_tensor_affine(x, self._scale, self._zero_pointer, self.qmin, self.qmax)
@@ -10,6 +10,11 @@ from archai.common.config import Config
 from archai.common.ordered_dict_logger import get_global_logger
 from archai.supergraph.datasets.distributed_stratified_sampler import DistributedStratifiedSampler
 from archai.supergraph.datasets.augmentation import add_named_augs
+from archai.supergraph.datasets.in_memory_loader import (
+    BatchTransform,
+    InMemoryDataLoader,
+    TensorImageDataset,
+)
 from archai.supergraph.datasets.dataset_provider import (
     DatasetProvider,
     get_provider_type,
@@ -47,6 +52,8 @@ def get_data(conf_loader:Config)->DataLoaders:
     test_batch = conf_loader['test_batch']
     test_workers = conf_loader['test_workers']
     conf_apex  = conf_loader['apex']
+    in_memory = conf_loader.get('in_memory', False)
+    in_memory_on_device = conf_loader.get('in_memory_on_device', False)
     # endregion
 
     ds_provider = create_dataset_provider(conf_dataset)
@@ -58,7 +65,8 @@ def get_data(conf_loader:Config)->DataLoaders:
         load_test=load_test, test_batch_size=test_batch,
         aug=aug, cutout=cutout, val_ratio=val_ratio, val_fold=val_fold,
         img_size=img_size, train_workers=train_workers,
-        test_workers=test_workers, max_batches=max_batches, apex=apex)
+        test_workers=test_workers, max_batches=max_batches, apex=apex,
+        in_memory=in_memory, in_memory_on_device=in_memory_on_device)
 
     assert train_dl is not None
 
@@ -81,7 +89,8 @@ def get_dataloaders(ds_provider:DatasetProvider,
     load_test:bool, test_batch_size:int,
     aug, cutout:int, val_ratio:float, apex:apex_utils.ApexUtils,
     val_fold=0, img_size:Optional[int]=None, train_workers:Optional[int]=None,
-    test_workers:Optional[int]=None, target_lb=-1, max_batches:int=-1) \
+    test_workers:Optional[int]=None, target_lb=-1, max_batches:int=-1,
+    in_memory:bool=False, in_memory_on_device:bool=False) \
         -> Tuple[Optional[DataLoader], Optional[DataLoader], Optional[DataLoader]]:
 
     # if debugging in vscode, workers > 0 gets termination
@@ -105,6 +114,23 @@ def get_dataloaders(ds_provider:DatasetProvider,
     trainset, testset = _get_datasets(ds_provider,
         load_train, load_test, transform_train, transform_test)
 
+    # in-memory mode decodes datasets once into uint8 tensors and applies
+    # transforms on batches, which removes per-sample decoding and workers
+    batch_transforms = None
+    if in_memory:
+        try:
+            batch_transforms = (BatchTransform.from_compose(transform_train),
+                                BatchTransform.from_compose(transform_test))
+        except ValueError as e:
+            logger.warn({'in_memory': False, 'in_memory_fallback': str(e)})
+    if batch_transforms is not None:
+        trainset = TensorImageDataset.from_dataset(trainset) if trainset else None
+        testset = TensorImageDataset.from_dataset(testset) if testset else None
+        if in_memory_on_device:
+            trainset = trainset.to(apex.device) if trainset else None
+            testset = testset.to(apex.device) if testset else None
+        logger.info({'in_memory': True, 'in_memory_on_device': in_memory_on_device})
+
     # TODO: below will never get executed, set_preaug does not exist in PyTorch
     # if total_aug is not None and augs is not None:
     #     trainset.set_preaug(augs, total_aug)
@@ -131,18 +157,30 @@ def get_dataloaders(ds_provider:DatasetProvider,
                         })
 
         # shuffle is performed by sampler at each epoch
-        trainloader = DataLoader(trainset,
-            batch_size=train_batch_size, shuffle=False,
-            num_workers=train_workers,
-            pin_memory=True,
-            sampler=train_sampler, drop_last=False) # TODO: original paper has this True
-
-        if val_ratio > 0.0:
-            validloader = DataLoader(trainset,
+        if batch_transforms is not None:
+            trainloader = InMemoryDataLoader(trainset,
+                batch_size=train_batch_size, sampler=train_sampler,
+                transform=batch_transforms[0], device=apex.device,
+                drop_last=False)
+        else:
+            trainloader = DataLoader(trainset,
                 batch_size=train_batch_size, shuffle=False,
-                num_workers=val_workers,
+                num_workers=train_workers,
                 pin_memory=True,
-                sampler=valid_sampler, drop_last=False)
+                sampler=train_sampler, drop_last=False) # TODO: original paper has this True
+
+        if val_ratio > 0.0:
+            if batch_transforms is not None:
+                validloader = InMemoryDataLoader(trainset,
+                    batch_size=train_batch_size, sampler=valid_sampler,
+                    transform=batch_transforms[0], device=apex.device,
+                    drop_last=False)
+            else:
+                validloader = DataLoader(trainset,
+                    batch_size=train_batch_size, shuffle=False,
+                    num_workers=val_workers,
+                    pin_memory=True,
+                    sampler=valid_sampler, drop_last=False)
         # else validloader is left as None
     if testset:
         max_test_fold = min(len(testset), max_batches*test_batch_size) if max_batches else None  # pyright: ignore[reportGeneralTypeIssues]
@@ -157,12 +195,18 @@ def get_dataloaders(ds_provider:DatasetProvider,
                     'test_sampler_len': len(test_sampler)})
         assert test_val_sampler is None
 
-        testloader = DataLoader(testset,
-            batch_size=test_batch_size, shuffle=False,
-            num_workers=test_workers,
-            pin_memory=True,
-            sampler=test_sampler, drop_last=False
-    )
+        if batch_transforms is not None:
+            testloader = InMemoryDataLoader(testset,
+                batch_size=test_batch_size, sampler=test_sampler,
+                transform=batch_transforms[1], device=apex.device,
+                drop_last=False)
+        else:
+            testloader = DataLoader(testset,
+                batch_size=test_batch_size, shuffle=False,
+                num_workers=test_workers,
+                pin_memory=True,
+                sampler=test_sampler, drop_last=False
+        )
 
     assert val_ratio > 0.0 or validloader is None
 
@@ -0,0 +1,445 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import math
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch.utils.data import ConcatDataset, Dataset, Sampler, Subset
+from torchvision.transforms import transforms
+
+from archai.datasets.cv.transforms.custom_cutout import CustomCutout
+
+
+class TensorImageDataset(Dataset):
+    """Dataset that keeps every image of a small-image dataset in a single tensor.
+
+    Images are stored as a contiguous `uint8` tensor with shape `(N, C, H, W)` and labels
+    as an `int64` tensor, so that batches can be gathered with a single `index_select`
+    instead of decoding PIL images sample by sample.
+
+    """
+
+    def __init__(self, data: torch.Tensor, labels: torch.Tensor) -> None:
+        """Initialize the dataset.
+
+        Args:
+            data: Images with shape `(N, C, H, W)` and `uint8` data type.
+            labels: Labels with shape `(N,)`.
+
+        """
+
+        assert data.dim() == 4, "`data` should have shape (N, C, H, W)."
+        assert data.dtype == torch.uint8, "`data` should have `uint8` data type."
+        assert len(data) == len(labels), "`data` and `labels` should have the same length."
+
+        self.data = data.contiguous()
+        self.labels = labels.long().contiguous()
+
+        # `DistributedStratifiedSampler` indexes `targets` element by element
+        self.targets = self.labels.tolist()
+
+    @classmethod
+    def from_dataset(cls, dataset: Dataset) -> "TensorImageDataset":
+        """Decode a torchvision-like dataset once into a `TensorImageDataset`.
+
+        Args:
+            dataset: Dataset such as `CIFAR10`, `SVHN` or `MNIST`, optionally wrapped
+                in `ConcatDataset` or `Subset`.
+
+        Returns:
+            Decoded dataset.
+
+        """
+
+        data, labels = _decode_dataset(dataset)
+        return cls(data, labels)
+
+    def to(self, device: torch.device) -> "TensorImageDataset":
+        """Move the images and labels to `device`.
+
+        Args:
+            device: Target device.
+
+        Returns:
+            The dataset itself.
+
+        """
+
+        self.data = self.data.to(device)
+        self.labels = self.labels.to(device)
+
+        return self
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, idx: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        return self.data[idx], self.labels[idx]
+
+
+def _to_nchw(data: torch.Tensor) -> torch.Tensor:
+    if data.dim() == 3:
+        # Grayscale images, e.g., MNIST: (N, H, W)
+        return data.unsqueeze(1)
+
+    if data.shape[-1] in (1, 3) and data.shape[1] not in (1, 3):
+        # Channels-last images, e.g., CIFAR: (N, H, W, C)
+        return data.permute(0, 3, 1, 2)
+
+    return data
+
+
+def _decode_dataset(dataset: Dataset) -> Tuple[torch.Tensor, torch.Tensor]:
+    if isinstance(dataset, TensorImageDataset):
+        return dataset.data, dataset.labels
+
+    if isinstance(dataset, ConcatDataset):
+        decoded = [_decode_dataset(d) for d in dataset.datasets]
+        return torch.cat([d for d, _ in decoded]), torch.cat([l for _, l in decoded])
+
+    if isinstance(dataset, Subset):
+        data, labels = _decode_dataset(dataset.dataset)
+        indices = torch.as_tensor(dataset.indices, dtype=torch.long)
+        return data.index_select(0, indices), labels.index_select(0, indices)
+
+    data = getattr(dataset, "data", None)
+    labels = getattr(dataset, "targets", None)
+    if labels is None:
+        labels = getattr(dataset, "labels", None)
+
+    if data is not None and labels is not None:
+        data = torch.as_tensor(np.asarray(data), dtype=torch.uint8)
+        return _to_nchw(data).contiguous(), torch.as_tensor(np.asarray(labels), dtype=torch.long)
+
+    # Fallback for datasets that do not expose their raw arrays: decode every sample once
+    transform = getattr(dataset, "transform", None)
+    if transform is not None:
+        dataset.transform = None
+
+    try:
+        images, targets = [], []
+        for img, target in dataset:
+            img = np.asarray(img, dtype=np.uint8)
+            images.append(img if img.ndim == 3 else img[..., None])
+            targets.append(int(target))
+    finally:
+        if transform is not None:
+            dataset.transform = transform
+
+    data = torch.from_numpy(np.stack(images)).permute(0, 3, 1, 2)
+    return data.contiguous(), torch.as_tensor(targets, dtype=torch.long)
+
+
+class BatchTransform:
+    """Batched, device-side equivalent of a torchvision `Compose` of image transforms.
+
+    Only the transforms used by the small-image dataset providers are supported, i.e.,
+    `RandomCrop`, `RandomHorizontalFlip`, `RandomVerticalFlip`, `RandomAffine`,
+    `ToTensor`, `Normalize` and `CustomCutout`. Each random transform draws independent
+    parameters for every image of the batch.
+
+    """
+
+    def __init__(self, ops: List[Callable[[torch.Tensor], torch.Tensor]]) -> None:
+        """Initialize the transform.
+
+        Args:
+            ops: Batched operations applied in order to a floating-point batch in `[0, 1]`.
+
+        """
+
+        self.ops = ops
+
+    @classmethod
+    def from_compose(cls, transform: Optional[transforms.Compose]) -> "BatchTransform":
+        """Build a batched transform from a torchvision transform.
+
+        Args:
+            transform: torchvision transform, usually the output of `get_transforms()`.
+
+        Returns:
+            Batched transform.
+
+        Raises:
+            ValueError: If `transform` contains an operation without a batched equivalent.
+
+        """
+
+        if transform is None:
+            return cls([])
+
+        ts = transform.transforms if isinstance(transform, transforms.Compose) else [transform]
+        ops = []
+
+        for t in ts:
+            if isinstance(t, transforms.ToTensor):
+                # Batches are converted to [0, 1] before any operation is applied
+                continue
+            elif isinstance(t, transforms.Normalize):
+                ops.append(_Normalize(t.mean, t.std))
+            elif isinstance(t, transforms.RandomCrop):
+                if t.padding_mode != "constant" or t.pad_if_needed:
+                    raise ValueError(f"Unsupported `RandomCrop` arguments: {t}")
+                ops.append(_RandomCrop(t.size, t.padding, t.fill))
+            elif isinstance(t, transforms.RandomHorizontalFlip):
+                ops.append(_RandomFlip(t.p, dim=3))
+            elif isinstance(t, transforms.RandomVerticalFlip):
+                ops.append(_RandomFlip(t.p, dim=2))
+            elif isinstance(t, transforms.RandomAffine):
+                ops.append(_RandomAffine(t.degrees, t.translate, t.scale, t.shear))
+            elif isinstance(t, CustomCutout):
+                ops.append(_Cutout(t.length))
+            else:
+                raise ValueError(f"Transform `{type(t).__name__}` does not have a batched equivalent.")
+
+        return cls(ops)
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        x = x.float().div_(255.0)
+        for op in self.ops:
+            x = op(x)
+
+        return x
+
+
+class _Normalize:
+    def __init__(self, mean: List[float], std: List[float]) -> None:
+        self.mean = torch.as_tensor(mean, dtype=torch.float32).view(1, -1, 1, 1)
+        self.std = torch.as_tensor(std, dtype=torch.float32).view(1, -1, 1, 1)
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        if self.mean.device != x.device:
+            self.mean, self.std = self.mean.to(x.device), self.std.to(x.device)
+
+        return x.sub_(self.mean).div_(self.std)
+
+
+class _RandomCrop:
+    def __init__(self, size: Tuple[int, int], padding: Optional[Union[int, Sequence[int]]], fill: float) -> None:
+        self.size = (size, size) if isinstance(size, int) else tuple(size)
+        self.padding = padding or 0
+        self.fill = fill
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        n, c = x.shape[0], x.shape[1]
+        th, tw = self.size
+
+        if self.padding:
+            padding = self.padding
+            if isinstance(padding, int):
+                padding = (padding, padding, padding, padding)
+            elif len(padding) == 2:
+                padding = (padding[0], padding[0], padding[1], padding[1])
+            else:
+                # torchvision pads with (left, top, right, bottom), while `F.pad` expects
+                # (left, right, top, bottom)
+                padding = (padding[0], padding[2], padding[1], padding[3])
+            x = F.pad(x, tuple(padding), value=float(self.fill) / 255.0)
+
+        h, w = x.shape[2], x.shape[3]
+        oy = torch.randint(0, h - th + 1, (n,), device=x.device)
+        ox = torch.randint(0, w - tw + 1, (n,), device=x.device)
+
+        rows = (oy[:, None] + torch.arange(th, device=x.device)[None, :])[:, None, :, None]
+        cols = (ox[:, None] + torch.arange(tw, device=x.device)[None, :])[:, None, None, :]
+        batch = torch.arange(n, device=x.device)[:, None, None, None]
+        channels = torch.arange(c, device=x.device)[None, :, None, None]
+
+        return x[batch, channels, rows, cols]
+
+
+class _RandomFlip:
+    def __init__(self, p: float, dim: int) -> None:
+        self.p = p
+        self.dim = dim
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        mask = torch.rand(x.shape[0], device=x.device) < self.p
+        return torch.where(mask[:, None, None, None], x.flip(self.dim), x)
+
+
+class _RandomAffine:
+    def __init__(
+        self,
+        degrees: Tuple[float, float],
+        translate: Optional[Tuple[float, float]],
+        scale: Optional[Tuple[float, float]],
+        shear: Optional[Tuple[float, ...]],
+    ) -> None:
+        self.degrees = degrees
+        self.translate = translate
+        self.scale = scale
+        self.shear = shear
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        n, _, h, w = x.shape
+
+        def uniform(low: float, high: float) -> torch.Tensor:
+            return torch.empty(n, device=x.device).uniform_(low, high)
+
+        zeros = torch.zeros(n, device=x.device)
+        angle = torch.deg2rad(uniform(*self.degrees))
+        scale = uniform(*self.scale) if self.scale is not None else torch.ones(n, device=x.device)
+        shear_x = torch.deg2rad(uniform(*self.shear[:2])) if self.shear is not None else zeros
+        shear_y = torch.deg2rad(uniform(*self.shear[2:4])) if self.shear is not None and len(self.shear) == 4 else zeros
+
+        # Translations are drawn in pixels (as torchvision does) and expressed in
+        # normalized coordinates, where the image spans [-1, 1]
+        tx, ty = zeros, zeros
+        if self.translate is not None:
+            max_dx, max_dy = self.translate[0] * w, self.translate[1] * h
+            tx = torch.round(uniform(-max_dx, max_dx)) * 2.0 / w
+            ty = torch.round(uniform(-max_dy, max_dy)) * 2.0 / h
+
+        cos, sin = torch.cos(angle), torch.sin(angle)
+        rotation = torch.stack([torch.stack([cos, -sin], -1), torch.stack([sin, cos], -1)], -2)
+        shear = torch.stack(
+            [
+                torch.stack([torch.ones_like(angle), torch.tan(shear_x)], -1),
+                torch.stack([torch.tan(shear_y), torch.ones_like(angle)], -1),
+            ],
+            -2,
+        )
+        forward = scale[:, None, None] * (rotation @ shear)
+
+        # `affine_grid` maps output coordinates to input coordinates, hence the inverse
+        inverse = torch.linalg.inv(forward)
+        translation = -(inverse @ torch.stack([tx, ty], -1)[:, :, None])
+        theta = torch.cat([inverse, translation], dim=2)
+
+        grid = F.affine_grid(theta, list(x.shape), align_corners=False)
+        return F.grid_sample(x, grid, mode="nearest", padding_mode="zeros", align_corners=False)
+
+
+class _Cutout:
+    def __init__(self, length: int) -> None:
+        self.length = length
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        n, _, h, w = x.shape
+
+        y = torch.randint(0, h, (n, 1), device=x.device)
+        x_ = torch.randint(0, w, (n, 1), device=x.device)
+
+        rows = torch.arange(h, device=x.device)[None, :]
+        cols = torch.arange(w, device=x.device)[None, :]
+        in_rows = (rows >= (y - self.length // 2).clamp(0, h)) & (rows < (y + self.length // 2).clamp(0, h))
+        in_cols = (cols >= (x_ - self.length // 2).clamp(0, w)) & (cols < (x_ + self.length // 2).clamp(0, w))
+
+        mask = in_rows[:, :, None] & in_cols[:, None, :]
+        return x.masked_fill_(mask[:, None, :, :], 0.0)
+
+
+class InMemoryDataLoader:
+    """Data loader that yields transformed batches from a `TensorImageDataset`.
+
+    Indices come from `sampler`, so shuffling, sharding across replicas and train/validation
+    splits behave exactly as with `DataLoader`. Batches are gathered with `index_select`,
+    copied to `device` through pinned staging buffers on a side stream (overlapping the copy
+    of the next batch with the consumption of the current one) and transformed on `device`.
+    When the dataset itself lives on `device`, no host-to-device copy happens at all.
+
+    """
+
+    def __init__(
+        self,
+        dataset: TensorImageDataset,
+        batch_size: int,
+        sampler: Optional[Sampler] = None,
+        transform: Optional[BatchTransform] = None,
+        device: Optional[torch.device] = None,
+        drop_last: Optional[bool] = False,
+    ) -> None:
+        """Initialize the data loader.
+
+        Args:
+            dataset: Decoded dataset.
+            batch_size: Number of samples per batch.
+            sampler: Sampler that provides the indices. If `None`, the dataset is
+                traversed sequentially.
+            transform: Batched transform applied to every batch.
+            device: Device where batches are produced.
+            drop_last: Whether the last incomplete batch should be dropped.
+
+        """
+
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.sampler = sampler
+        self.transform = transform or BatchTransform([])
+        self.device = torch.device(device) if device is not None else torch.device("cpu")
+        self.drop_last = drop_last
+
+        self._use_stream = self.device.type == "cuda" and self.dataset.data.device.type == "cpu"
+        self._stream = torch.cuda.Stream(device=self.device) if self._use_stream else None
+        self._buffers = None
+
+    def __len__(self) -> int:
+        n_samples = len(self.sampler) if self.sampler is not None else len(self.dataset)
+        if self.drop_last:
+            return n_samples // self.batch_size
+
+        return int(math.ceil(n_samples / self.batch_size))
+
+    def _get_indices(self) -> torch.Tensor:
+        if self.sampler is None:
+            return torch.arange(len(self.dataset))
+
+        return torch.as_tensor(np.fromiter(iter(self.sampler), dtype=np.int64))
+
+    def _fetch(self, idx: torch.Tensor, slot: int) -> Tuple[torch.Tensor, torch.Tensor, Optional[torch.cuda.Event]]:
+        data, labels = self.dataset.data, self.dataset.labels
+
+        if not self._use_stream:
+            idx = idx.to(data.device)
+            x, y = data.index_select(0, idx), labels.index_select(0, idx)
+            return x.to(self.device), y.to(self.device), None
+
+        if self._buffers is None:
+            shape = (self.batch_size,) + tuple(data.shape[1:])
+            self._buffers = [
+                {"x": torch.empty(shape, dtype=data.dtype).pin_memory(), "event": None} for _ in range(2)
+            ]
+
+        buffer = self._buffers[slot]
+        if buffer["event"] is not None:
+            # Staging buffer can only be overwritten once its previous copy is done
+            buffer["event"].synchronize()
+
+        x = buffer["x"][: len(idx)]
+        torch.index_select(data, 0, idx, out=x)
+        y = labels.index_select(0, idx).pin_memory()
+
+        with torch.cuda.stream(self._stream):
+            x = x.to(self.device, non_blocking=True)
+            y = y.to(self.device, non_blocking=True)
+            event = torch.cuda.Event()
+            event.record(self._stream)
+        buffer["event"] = event
+
+        return x, y, event
+
+    def __iter__(self) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        batches = list(self._get_indices().split(self.batch_size))
+        if self.drop_last and batches and len(batches[-1]) < self.batch_size:
+            batches = batches[:-1]
+        if not batches:
+            return
+
+        next_batch = self._fetch(batches[0], 0)
+        for i in range(len(batches)):
+            x, y, event = next_batch
+
+            # Prefetches the following batch before handing the current one over
+            if i + 1 < len(batches):
+                next_batch = self._fetch(batches[i + 1], (i + 1) % 2)
+
+            if event is not None:
+                torch.cuda.current_stream(self.device).wait_event(event)
+                x.record_stream(torch.cuda.current_stream(self.device))
+                y.record_stream(torch.cuda.current_stream(self.device))
+
+            yield self.transform(x), y
@@ -7,11 +7,14 @@ Note: All classes in this file needs to be deepcopy compatible because
 """
 
 import copy
+import hashlib
 import os
 import pathlib
+import pickle
 from enum import Enum
-from typing import List, Mapping, Optional, Union
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
 
+import numpy as np
 import torch
 import yaml
 
@@ -29,6 +32,10 @@ TensorShape=List[Union[int, float]]
 TensorShapes=List[TensorShape]
 TensorShapesList=List[TensorShapes]
 
+# header of the compact binary format written by ModelDesc.save(binary=True)
+_BINARY_MAGIC = b'ARCHAIMD'
+_BINARY_VERSION = 1
+
 class ConvMacroParams:
     """Holds parameters that may be altered by macro architecture"""
 
@@ -55,12 +62,46 @@ class OpDesc:
         self.children = children
         self.children_ins = children_ins
 
+    @property
+    def trainables(self)->Optional[Mapping]:
+        # trainables loaded from binary descs are only read from disk on first access
+        if isinstance(self._trainables, LazyTrainables):
+            self._trainables = self._trainables.resolve()
+        return self._trainables
+
+    @trainables.setter
+    def trainables(self, trainables:Optional[Mapping])->None:
+        self._trainables = trainables
+
+    def __getstate__(self)->dict:
+        # keeps the 'trainables' key so yaml and pickled descs stay compatible
+        state = self.__dict__.copy()
+        state['trainables'] = state.pop('_trainables')
+        return state
+
+    def __setstate__(self, state:dict)->None:
+        state = dict(state)
+        state['_trainables'] = state.pop('trainables', None)
+        self.__dict__.update(state)
+
     def clone(self, clone_trainables=True)->'OpDesc':
-        cloned = copy.deepcopy(self)
+        # trainables are never modified in place so clones share them
+        memo = _shared_memo(op_descs=self.all_op_descs(),
+                            share_trainables=clone_trainables)
+        cloned = copy.deepcopy(self, memo)
         if not clone_trainables:
             cloned.clear_trainables()
         return cloned
 
+    def all_op_descs(self)->List['OpDesc']:
+        """Returns this op and all of its children in pre-order"""
+        op_descs = [self]
+        if self.children is not None:
+            for child in self.children:
+                if child is not None:
+                    op_descs.extend(child.all_op_descs())
+        return op_descs
+
     def clear_trainables(self)->None:
         self.trainables = None
         if self.children is not None:
@@ -169,10 +210,21 @@ class CellDesc:
         self.reset_nodes(nodes, node_shapes, post_op, out_shape)
 
     def clone(self, id:int)->'CellDesc':
-        c = copy.deepcopy(self) # note that trainables_from is also cloned
+        memo = _shared_memo(op_descs=self.all_op_descs())
+        c = copy.deepcopy(self, memo) # note that trainables_from is also cloned
         c.id = id
         return c
 
+    def all_op_descs(self)->List[OpDesc]:
+        op_descs = []
+        for stem in self.stems:
+            op_descs.extend(stem.all_op_descs())
+        for node in self._nodes:
+            for edge in node.edges:
+                op_descs.extend(edge.op_desc.all_op_descs())
+        op_descs.extend(self.post_op.all_op_descs())
+        return op_descs
+
     def clear_trainables(self)->None:
         for stem in self.stems:
             stem.clear_trainables()
@@ -265,7 +317,36 @@ class ModelDesc:
         return sum(1 for c in self._cell_descs if c.cell_type==cell_type)
 
     def clone(self)->'ModelDesc':
-        return copy.deepcopy(self)
+        # trainables are shared with the clone instead of copied, while configs
+        # are copied as callers may modify them
+        memo = _shared_memo(op_descs=self.all_op_descs())
+        return copy.deepcopy(self, memo)
+
+    def all_op_descs(self)->List[OpDesc]:
+        """Returns all op descs of the model in a deterministic order"""
+        op_descs = []
+        for stem in self.model_stems:
+            op_descs.extend(stem.all_op_descs())
+        op_descs.extend(self.pool_op.all_op_descs())
+        for cell_desc in self._cell_descs:
+            op_descs.extend(cell_desc.all_op_descs())
+        op_descs.extend(self.logits_op.all_op_descs())
+        return op_descs
+
+    def content_hash(self)->str:
+        """Hash of the architecture (ops, params, connectivity and shapes).
+
+        Trainables and the configs the desc was built from are excluded, so
+        clones and descs rebuilt from different configs hash the same."""
+        return _encode(self)[1]
+
+    def to_bytes(self)->bytes:
+        """Encodes the desc, without trainables, in the compact binary format"""
+        return _encode(self)[0]
+
+    @staticmethod
+    def from_bytes(data:bytes)->'ModelDesc':
+        return _decode(data)
 
     def has_aux_tower(self)->bool:
         return any(self.aux_tower_descs)
@@ -294,10 +375,21 @@ class ModelDesc:
         self.pool_op.load_state_dict(state_dict['pool_op'])
         self.logits_op.load_state_dict(state_dict['logits_op'])
 
-    def save(self, filename:str, save_trainables=False)->Optional[str]:
+    def save(self, filename:str, save_trainables=False, binary=False)->Optional[str]:
         if filename:
             filename = utils.full_path(filename)
 
+            if binary:
+                if save_trainables:
+                    # flat list indexed by op so each op can be loaded on its own
+                    pt_filepath = ModelDesc._pt_filepath(filename)
+                    torch.save({'op_trainables': [op_desc.trainables for op_desc \
+                                                  in self.all_op_descs()]},
+                               pt_filepath)
+                with open(filename, 'wb') as f:
+                    f.write(self.to_bytes())
+                return filename
+
             if save_trainables:
                 state_dict = self.state_dict()
                 pt_filepath = ModelDesc._pt_filepath(filename)
@@ -324,6 +416,21 @@ class ModelDesc:
                 "Please copy this file to '{}'".format(filename))
 
         logger.info({'final_desc_filename': filename})
+        with open(filename, 'rb') as f:
+            is_binary = f.read(len(_BINARY_MAGIC)) == _BINARY_MAGIC
+
+        if is_binary:
+            with open(filename, 'rb') as f:
+                model_desc = ModelDesc.from_bytes(f.read())
+            if load_trainables:
+                pt_filepath = ModelDesc._pt_filepath(filename)
+                if os.path.exists(pt_filepath):
+                    # trainables are attached lazily and read on first access
+                    trainables_file = _TrainablesFile(pt_filepath)
+                    for i, op_desc in enumerate(model_desc.all_op_descs()):
+                        op_desc.trainables = LazyTrainables(trainables_file, i)
+            return model_desc
+
         with open(filename, 'r') as f:
             model_desc = yaml.load(f, Loader=yaml.Loader)
 
@@ -336,3 +443,215 @@ class ModelDesc:
             # else no need to restore weights
 
         return model_desc
+
+
+
+class _TrainablesFile:
+    """Trainables saved along with a binary desc, read from disk once on first use"""
+
+    def __init__(self, filepath:str) -> None:
+        self.filepath = filepath
+        self._op_trainables:Optional[List[Optional[Mapping]]] = None
+
+    def get(self, index:int)->Optional[Mapping]:
+        if self._op_trainables is None:
+            self._op_trainables = torch.load(self.filepath,
+                map_location=torch.device('cpu'))['op_trainables']
+        return self._op_trainables[index]
+
+    def __getstate__(self)->dict:
+        # loaded tensors are not carried around when pickling descs
+        return {'filepath': self.filepath, '_op_trainables': None}
+
+
+class LazyTrainables:
+    """Placeholder for the trainables of an op that are loaded on first access"""
+
+    def __init__(self, trainables_file:_TrainablesFile, index:int) -> None:
+        self.trainables_file = trainables_file
+        self.index = index
+
+    def resolve(self)->Optional[Mapping]:
+        return self.trainables_file.get(self.index)
+
+    def __deepcopy__(self, memo)->'LazyTrainables':
+        # placeholder is immutable so clones can share it
+        return self
+
+
+def _shared_memo(op_descs:List[OpDesc], share_trainables=True)->Dict[int, Any]:
+    """deepcopy memo that makes clones share trainables instead of copying them"""
+    memo:Dict[int, Any] = {}
+    for op_desc in op_descs:
+        t = op_desc._trainables
+        if t is not None:
+            memo[id(t)] = t if share_trainables else None
+    return memo
+
+
+class _ObjectTable:
+    """Deduplicated table of pickled objects referenced by index from flat arrays"""
+
+    def __init__(self) -> None:
+        self.items:List[bytes] = []
+        self._index:Dict[bytes, int] = {}
+
+    def add(self, obj:Any)->int:
+        b = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        i = self._index.get(b, None)
+        if i is None:
+            i = self._index[b] = len(self.items)
+            self.items.append(b)
+        return i
+
+
+def _encode(model_desc:ModelDesc)->Tuple[bytes, str]:
+    """Encodes the desc as flat int32 arrays of op/edge/node/cell records.
+
+    Returns the encoded bytes and the content hash of the architecture part."""
+
+    names:Dict[str, int] = {}
+    objects, configs = _ObjectTable(), _ObjectTable()
+    # op: name, in_len, params, children start, children len, children_ins start, children_ins len
+    ops:List[Tuple[int, ...]] = []
+    child_ids:List[int] = []
+    ints:List[int] = [] # input ids, children_ins and op index lists
+
+    def add_op(op_desc:OpDesc)->int:
+        op_index = len(ops)
+        ops.append(()) # reserve slot so ops are numbered in pre-order
+        children = op_desc.children
+        child_indices = [add_op(c) if c is not None else -1 for c in children] \
+                        if children is not None else []
+        children_start = len(child_ids)
+        child_ids.extend(child_indices)
+        ins_start, ins_len = add_ints(op_desc.children_ins)
+        ops[op_index] = (names.setdefault(op_desc.name, len(names)), op_desc.in_len,
+                         objects.add(op_desc.params), children_start,
+                         len(child_indices) if children is not None else -1,
+                         ins_start, ins_len)
+        return op_index
+
+    def add_ints(values:Optional[List[int]])->Tuple[int, int]:
+        if values is None:
+            return -1, -1
+        start = len(ints)
+        ints.extend(values)
+        return start, len(values)
+
+    def add_ops(op_descs:List[OpDesc])->Tuple[int, int]:
+        return add_ints([add_op(op_desc) for op_desc in op_descs])
+
+    model_stems = add_ops(model_desc.model_stems)
+    pool_op = add_op(model_desc.pool_op)
+
+    # edge: op, input_ids start, input_ids len
+    edges:List[Tuple[int, ...]] = []
+    # node: edges start, edges len, conv_params
+    nodes:List[Tuple[int, ...]] = []
+    # cell: id, cell type, conf_cell, stems start, stems len, stem_shapes,
+    #       nodes start, nodes len, node_shapes, post_op, out_shape, trainables_from
+    cells:List[Tuple[int, ...]] = []
+    cell_types = list(CellType)
+
+    for cell_desc in model_desc.cell_descs():
+        stems_start, stems_len = add_ops(cell_desc.stems)
+        nodes_start = len(nodes)
+        for node in cell_desc.nodes():
+            edges_start = len(edges)
+            for edge in node.edges:
+                edges.append((add_op(edge.op_desc), *add_ints(edge.input_ids)))
+            nodes.append((edges_start, len(node.edges), objects.add(node.conv_params)))
+        cells.append((cell_desc.id, cell_types.index(cell_desc.cell_type),
+                      configs.add(cell_desc.conf_cell), stems_start, stems_len,
+                      objects.add(cell_desc.stem_shapes), nodes_start,
+                      len(cell_desc.nodes()), objects.add(cell_desc.node_shapes),
+                      add_op(cell_desc.post_op), objects.add(cell_desc.out_shape),
+                      cell_desc.trainables_from))
+
+    logits_op = add_op(model_desc.logits_op)
+
+    def to_array(rows:List[Tuple[int, ...]], n_cols:int)->np.ndarray:
+        return np.array(rows, dtype=np.int32).reshape(-1, n_cols)
+
+    arch = {
+        'names': list(names.keys()),
+        'objects': objects.items,
+        'ops': to_array(ops, 7),
+        'child_ids': np.array(child_ids, dtype=np.int32),
+        'ints': np.array(ints, dtype=np.int32),
+        'edges': to_array(edges, 3),
+        'nodes': to_array(nodes, 3),
+        'cells': to_array(cells, 12),
+        'model': np.array([*model_stems, pool_op, logits_op,
+                           objects.add(model_desc.aux_tower_descs)], dtype=np.int32),
+    }
+    arch_bytes = pickle.dumps(arch, protocol=pickle.HIGHEST_PROTOCOL)
+    content_hash = hashlib.sha256(arch_bytes).hexdigest()
+
+    body = pickle.dumps({'arch': arch_bytes,
+                         'configs': configs.items,
+                         'conf_model_desc': configs.add(model_desc.conf_model_desc)},
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+    return _BINARY_MAGIC + bytes([_BINARY_VERSION]) + body, content_hash
+
+
+def _decode(data:bytes)->ModelDesc:
+    if not data.startswith(_BINARY_MAGIC):
+        raise ValueError('Data is not a binary model desc.')
+    version = data[len(_BINARY_MAGIC)]
+    if version != _BINARY_VERSION:
+        raise ValueError(f'Unsupported binary model desc version: {version}')
+
+    body = pickle.loads(data[len(_BINARY_MAGIC)+1:])
+    arch = pickle.loads(body['arch'])
+    # configs are shared, other objects are unpickled afresh for every use
+    # because builders modify params of individual ops
+    objects = [lambda b=b: pickle.loads(b) for b in arch['objects']]
+    configs = [pickle.loads(b) for b in body['configs']]
+    names, ints = arch['names'], arch['ints'].tolist()
+    op_rows, child_ids = arch['ops'].tolist(), arch['child_ids'].tolist()
+
+    def get_ints(start:int, length:int)->Optional[List[int]]:
+        return ints[start:start+length] if length >= 0 else None
+
+    def get_op(i:int)->OpDesc:
+        name_id, in_len, params_id, children_start, children_len, \
+            ins_start, ins_len = op_rows[i]
+        children = [get_op(c) if c >= 0 else None \
+                    for c in child_ids[children_start:children_start+children_len]] \
+                   if children_len >= 0 else None
+        return OpDesc(names[name_id], objects[params_id](), in_len=in_len,
+                      trainables=None, children=children,
+                      children_ins=get_ints(ins_start, ins_len))
+
+    def get_ops(start:int, length:int)->List[OpDesc]:
+        return [get_op(i) for i in get_ints(start, length) or []]
+
+    edge_rows, node_rows = arch['edges'].tolist(), arch['nodes'].tolist()
+    cell_types = list(CellType)
+    cell_descs = []
+    for id, cell_type, conf_cell, stems_start, stems_len, stem_shapes, \
+            nodes_start, nodes_len, node_shapes, post_op, out_shape, \
+            trainables_from in arch['cells'].tolist():
+        nodes = []
+        for edges_start, edges_len, conv_params in node_rows[nodes_start:nodes_start+nodes_len]:
+            edges = [EdgeDesc(get_op(op), get_ints(ins_start, ins_len)) \
+                     for op, ins_start, ins_len in edge_rows[edges_start:edges_start+edges_len]]
+            nodes.append(NodeDesc(edges, objects[conv_params]()))
+        cell_descs.append(CellDesc(id=id, cell_type=cell_types[cell_type],
+                                   conf_cell=configs[conf_cell],
+                                   stems=get_ops(stems_start, stems_len),
+                                   stem_shapes=objects[stem_shapes](),
+                                   nodes=nodes,
+                                   node_shapes=objects[node_shapes](),
+                                   post_op=get_op(post_op),
+                                   out_shape=objects[out_shape](),
+                                   trainables_from=trainables_from))
+
+    stems_start, stems_len, pool_op, logits_op, aux_tower_descs = arch['model'].tolist()
+    return ModelDesc(conf_model_desc=configs[body['conf_model_desc']],
+                     model_stems=get_ops(stems_start, stems_len),
+                     pool_op=get_op(pool_op), cell_descs=cell_descs,
+                     aux_tower_descs=objects[aux_tower_descs](), logits_op=get_op(logits_op))
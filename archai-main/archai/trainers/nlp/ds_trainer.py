@@ -70,6 +70,80 @@ class StatefulDistributedSampler(DistributedSampler):
         return iter(indices[((self.total_consumed_samples // self.num_replicas) % self.num_samples) :])
 
 
+def _to_device(batch: Any, device: torch.device) -> Any:
+    if isinstance(batch, torch.Tensor):
+        return batch.to(device, non_blocking=True)
+    if isinstance(batch, (list, tuple)):
+        return type(batch)(_to_device(b, device) for b in batch)
+    if isinstance(batch, dict):
+        return {k: _to_device(v, device) for k, v in batch.items()}
+
+    return batch
+
+
+def _record_stream(batch: Any, stream: torch.cuda.Stream) -> None:
+    if isinstance(batch, torch.Tensor):
+        batch.record_stream(stream)
+    elif isinstance(batch, (list, tuple)):
+        for b in batch:
+            _record_stream(b, stream)
+    elif isinstance(batch, dict):
+        for b in batch.values():
+            _record_stream(b, stream)
+
+
+def prefetch_to_device(data_iter: Iterator, device: Union[str, torch.device]) -> Iterator:
+    """Move the batches of an iterator to a device, copying the next batch while the current one is used.
+
+    On CUDA devices, the next batch is copied on a side stream, which overlaps the host-to-device
+    copy with the computation of the current batch (copies are only asynchronous for pinned
+    memory, e.g., `pin_memory=True` in the data loader). On other devices, batches are moved
+    when they are requested.
+
+    Args:
+        data_iter: Iterator of batches (tensors or lists, tuples and dictionaries of tensors).
+        device: Device to move the batches to.
+
+    Yields:
+        Batches on the device.
+
+    """
+
+    device = torch.device(device)
+    if device.type != "cuda":
+        for batch in data_iter:
+            yield _to_device(batch, device)
+        return
+
+    stream = torch.cuda.Stream(device=device)
+
+    def _fetch() -> Tuple[Any, Optional[torch.cuda.Event]]:
+        try:
+            batch = next(data_iter)
+        except StopIteration:
+            return None, None
+
+        with torch.cuda.stream(stream):
+            batch = _to_device(batch, device)
+            event = torch.cuda.Event()
+            event.record(stream)
+
+        return batch, event
+
+    data_iter = iter(data_iter)
+    batch, event = _fetch()
+    while event is not None:
+        current_stream = torch.cuda.current_stream(device)
+        current_stream.wait_event(event)
+        _record_stream(batch, current_stream)
+
+        # Prefetches the following batch before handing the current one over
+        next_batch, next_event = _fetch()
+        yield batch
+
+        batch, event = next_batch, next_event
+
+
 class DsTrainer(TrainerBase):
     """DeepSpeed trainer."""
 
@@ -182,6 +256,8 @@ class DsTrainer(TrainerBase):
     def train_batch_without_pipe_parallel(self, data_iter: Optional[Iterator] = None) -> torch.Tensor:
         """Train a batch without pipeline parallelism.
 
+        The loss is accumulated on the device, so the step does not synchronize with it.
+
         Args:
             data_iter: Data iterator.
 
@@ -191,7 +267,7 @@ class DsTrainer(TrainerBase):
         """
 
         gradient_accumulation_steps = self.engine.gradient_accumulation_steps()
-        total_loss = 0.0
+        total_loss = torch.zeros((), device=self.engine.device)
 
         for _ in range(gradient_accumulation_steps):
             input_ids, _ = next(data_iter)
@@ -203,7 +279,7 @@ class DsTrainer(TrainerBase):
             self.engine.backward(loss)
             self.engine.step()
 
-            total_loss += loss
+            total_loss += loss.detach()
 
         return total_loss / gradient_accumulation_steps
 
@@ -220,7 +296,7 @@ class DsTrainer(TrainerBase):
 
         with torch.no_grad():
             gradient_accumulation_steps = self.engine.gradient_accumulation_steps()
-            total_loss = 0.0
+            total_loss = torch.zeros((), device=self.engine.device)
 
             for _ in range(gradient_accumulation_steps):
                 input_ids, _ = next(data_iter)
@@ -276,6 +352,13 @@ class DsTrainer(TrainerBase):
             total_consumed_samples=total_consumed_samples,
         )
         train_iterator = iter(RepeatingLoader(train_dataloader))
+        if self.args.pipe_parallel_size == 0:
+            train_iterator = prefetch_to_device(train_iterator, self.engine.device)
+
+        # Losses are accumulated on the device and only reduced at the logging interval,
+        # since moving them to the host synchronizes with the device
+        log_loss = torch.zeros((), device=self.engine.device)
+        log_n_steps, log_time = 0, 0.0
         train_time = time.time()
 
         for step in range(global_step, self.args.max_steps):
@@ -286,33 +369,42 @@ class DsTrainer(TrainerBase):
             else:
                 loss = self.train_batch_without_pipe_parallel(data_iter=train_iterator)
 
-            step_time = time.time() - step_time
+            log_loss += loss.detach().mean()
+            log_n_steps += 1
 
-            if self.engine.global_rank == 0:
-                float_loss = loss.mean().item()
-                samples_per_second = self.engine.train_batch_size() / step_time
-                learning_rate = self.engine.get_lr()[0]
+            do_periodic_logging = (step + 1) % self.args.logging_steps == 0 or step + 1 == self.args.max_steps
+            if do_periodic_logging:
+                float_loss = (log_loss / log_n_steps).item()
+                log_time += time.time() - step_time
 
-                metrics = {
-                    "train/step": step + 1,
-                    "train/loss": float_loss,
-                    "train/ppl": math.exp(float_loss),
-                    "train/learning_rate": learning_rate,
-                    "train/samples_per_second": samples_per_second,
-                    "train/step_runtime": step_time,
-                }
+                if self.engine.global_rank == 0:
+                    step_runtime = log_time / log_n_steps
+                    samples_per_second = self.engine.train_batch_size() / step_runtime
+                    learning_rate = self.engine.get_lr()[0]
 
-                log_history.append(metrics)
-                mlflow.log_metrics(metrics, step=step + 1)
+                    metrics = {
+                        "train/step": step + 1,
+                        "train/loss": float_loss,
+                        "train/ppl": math.exp(float_loss),
+                        "train/learning_rate": learning_rate,
+                        "train/samples_per_second": samples_per_second,
+                        "train/step_runtime": step_runtime,
+                    }
+
+                    log_history.append(metrics)
+                    mlflow.log_metrics(metrics, step=step + 1)
 
-                do_periodic_logging = (step + 1) % self.args.logging_steps == 0
-                if do_periodic_logging:
                     logger.info(
                         f"Step: {step + 1} | LR: {learning_rate} | "
                         + f"Loss: {float_loss:.3f} | Samples/s: {samples_per_second:.3f} | "
                         + f"PPL: {math.exp(float_loss):.3f}"
                     )
 
+                log_loss.zero_()
+                log_n_steps, log_time = 0, 0.0
+            else:
+                log_time += time.time() - step_time
+
             do_periodic_eval = (step + 1) % self.args.eval_steps == 0
             if do_periodic_eval and self.args.do_eval:
                 assert self.eval_dataset, "`eval_dataset` must be supplied if `args.do_eval` is True."
@@ -368,18 +460,20 @@ class DsTrainer(TrainerBase):
 
         eval_dataloader = self._get_dataloader(eval_dataset, shuffle=False)
         eval_iterator = iter(RepeatingLoader(eval_dataloader))
+        if self.args.pipe_parallel_size == 0:
+            eval_iterator = prefetch_to_device(eval_iterator, self.engine.device)
 
         n_eval_steps = self.args.eval_max_steps or len(eval_dataloader)
-        eval_loss, eval_time = 0.0, time.time()
+        eval_loss, eval_time = torch.zeros((), device=self.engine.device), time.time()
 
         for _ in range(n_eval_steps):
             if self.args.pipe_parallel_size > 0:
                 loss = self.engine.eval_batch(data_iter=eval_iterator)
             else:
                 loss = self.eval_batch_without_pipe_parallel(data_iter=eval_iterator)
-            eval_loss += loss.mean().item()
+            eval_loss += loss.detach().mean()
 
-        eval_loss /= n_eval_steps
+        eval_loss = eval_loss.item() / n_eval_steps
 
         eval_time = time.time() - eval_time
         eval_samples_per_second = (n_eval_steps * self.engine.train_batch_size()) / eval_time
@@ -88,7 +88,8 @@ class DsTrainingArguments:
         deepspeed.runtime.utils.set_random_seed(self.seed)
 
         self.local_rank = int(self.local_rank)
-        torch.cuda.set_device(self.local_rank)
+        if torch.cuda.is_available():
+            torch.cuda.set_device(self.local_rank)
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert attributes into a dictionary representation.
@@ -278,7 +278,7 @@ class NvidiaTrainer(TrainerBase):
             prepare_with_qat(self.model, onnx_compatible=True)
 
         if self.args.mixed_qat:
-            self.model = MixedQAT(self.model)
+            self.model = MixedQAT(self.model, qat_interval=self.args.mixed_qat_interval)
 
     def _setup_distributed_training(self) -> None:
         self.dist_model = self.model
@@ -113,6 +113,7 @@ class NvidiaTrainingArguments:
         lr_scheduler_decay_rate: Scheduler decay rate.
         qat: Whether QAT should be used during training.
         mixed_qat: Whether MixedQAT should be used during training.
+        mixed_qat_interval: Number of training forward passes between each QAT-based loss of MixedQAT.
 
     """
 
@@ -196,6 +197,10 @@ class NvidiaTrainingArguments:
 
     mixed_qat: bool = field(default=False, metadata={"help": "Whether MixedQAT should be used during training."})
 
+    mixed_qat_interval: int = field(
+        default=1, metadata={"help": "Number of training forward passes between each QAT-based loss of MixedQAT."}
+    )
+
     @property
     def device(self) -> torch.device:
         """Return a PyTorch device instance."""
@@ -0,0 +1,268 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import collections
+import os
+import queue
+import traceback
+from abc import abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import torch
+import torch.multiprocessing as mp
+
+from archai.common.ordered_dict_logger import OrderedDictLogger
+
+logger = OrderedDictLogger(source=__name__)
+
+# Seconds between liveness checks while waiting on a queue
+_POLL_TIMEOUT = 1.0
+
+
+class CandidateTrainer:
+    """Abstract class for the training loop of a single candidate.
+
+    Instances are created inside the worker process of `ParallelCandidateTrainer`, which
+    feeds them the batches of a shared data stream.
+
+    """
+
+    @abstractmethod
+    def train_step(self, batch: Any) -> None:
+        """Perform a training step.
+
+        Args:
+            batch: Training batch.
+
+        """
+
+        pass
+
+    @abstractmethod
+    def eval_step(self, batch: Any) -> None:
+        """Accumulate the validation metric of a batch.
+
+        Args:
+            batch: Validation batch.
+
+        """
+
+        pass
+
+    @abstractmethod
+    def end_epoch(self, epoch: int) -> float:
+        """Finish an epoch, e.g., step learning rate schedulers and save checkpoints.
+
+        Args:
+            epoch: Epoch index.
+
+        Returns:
+            Validation metric accumulated since the previous epoch.
+
+        """
+
+        pass
+
+
+def _share_memory(batch: Any) -> Any:
+    if isinstance(batch, torch.Tensor):
+        return batch.share_memory_()
+    if isinstance(batch, (list, tuple)):
+        return type(batch)(_share_memory(b) for b in batch)
+    if isinstance(batch, dict):
+        return {k: _share_memory(v) for k, v in batch.items()}
+
+    return batch
+
+
+def _candidate_worker(
+    name: str,
+    candidate_fn: Callable[[], CandidateTrainer],
+    num_threads: int,
+    batch_queue: mp.Queue,
+    result_queue: mp.Queue,
+) -> None:
+    try:
+        # Thread pools are process-wide, thus each candidate owns its budget
+        torch.set_num_threads(num_threads)
+        candidate = candidate_fn()
+
+        while True:
+            message = batch_queue.get()
+            if message is None:
+                break
+
+            command, payload = message
+            if command == "train":
+                candidate.train_step(payload)
+            elif command == "eval":
+                with torch.no_grad():
+                    candidate.eval_step(payload)
+            elif command == "end_epoch":
+                result_queue.put((name, "metric", (payload, candidate.end_epoch(payload))))
+
+            del message, payload
+
+        result_queue.put((name, "done", None))
+
+    except Exception:
+        result_queue.put((name, "error", traceback.format_exc()))
+
+
+class ParallelCandidateTrainer:
+    """Train several candidates concurrently on a single data stream.
+
+    Each batch is loaded (and decoded) once by the main process, moved to shared memory
+    and fed to every candidate, which runs in its own process with its own number of
+    intra-op threads. This avoids both re-decoding the dataset per candidate and the
+    contention of candidates competing for the same thread pool.
+
+    """
+
+    def __init__(
+        self,
+        candidate_fns: Dict[str, Callable[[], CandidateTrainer]],
+        num_threads_per_candidate: Optional[int] = None,
+        max_queued_batches: Optional[int] = 4,
+        start_method: Optional[str] = "spawn",
+    ) -> None:
+        """Initialize the trainer.
+
+        Args:
+            candidate_fns: Mapping between candidate names and picklable functions that
+                create their `CandidateTrainer`.
+            num_threads_per_candidate: Number of threads used by each candidate. If `None`,
+                the available CPUs are evenly split between candidates.
+            max_queued_batches: Maximum number of batches waiting to be consumed by a
+                candidate, which bounds the shared memory used by the data stream.
+            start_method: Start method of the worker processes.
+
+        """
+
+        assert len(candidate_fns) > 0, "`candidate_fns` must not be empty."
+        assert max_queued_batches > 0, "`max_queued_batches` must be greater than 0."
+
+        self.candidate_fns = candidate_fns
+        self.num_threads_per_candidate = num_threads_per_candidate or max(
+            1, (os.cpu_count() or 1) // len(candidate_fns)
+        )
+        self.max_queued_batches = max_queued_batches
+        self.start_method = start_method
+
+    def _check_result(self, result: Any) -> None:
+        name, status, payload = result
+        if status == "error":
+            raise RuntimeError(f"Candidate `{name}` failed:\n{payload}")
+        if status == "done":
+            self._finished_workers.add(name)
+
+    def _check_workers(self, workers: Dict[str, mp.Process], result_queue: mp.Queue) -> None:
+        # Liveness is checked before draining the queue, so the results sent by
+        # workers that have already exited are always received
+        exited_workers = {name: worker for name, worker in workers.items() if not worker.is_alive()}
+
+        try:
+            while True:
+                result = result_queue.get_nowait()
+                self._check_result(result)
+
+                # Results are kept until they are requested by `_get_result`
+                self._pending_results.append(result)
+        except queue.Empty:
+            pass
+
+        for name, worker in exited_workers.items():
+            if name not in self._finished_workers:
+                raise RuntimeError(f"Candidate `{name}` exited unexpectedly with code {worker.exitcode}.")
+
+    def _broadcast(
+        self, message: Any, batch_queues: Dict[str, mp.Queue], workers: Dict[str, mp.Process], result_queue: mp.Queue
+    ) -> None:
+        for batch_queue in batch_queues.values():
+            while True:
+                try:
+                    batch_queue.put(message, timeout=_POLL_TIMEOUT)
+                    break
+                except queue.Full:
+                    self._check_workers(workers, result_queue)
+
+    def _get_result(self, workers: Dict[str, mp.Process], result_queue: mp.Queue) -> Any:
+        while True:
+            if self._pending_results:
+                return self._pending_results.popleft()
+
+            try:
+                result = result_queue.get(timeout=_POLL_TIMEOUT)
+                self._check_result(result)
+                return result
+            except queue.Empty:
+                self._check_workers(workers, result_queue)
+
+    def fit(
+        self, train_dataloader: Iterable, val_dataloader: Optional[Iterable] = None, epochs: Optional[int] = 1
+    ) -> Dict[str, List[float]]:
+        """Train and validate all candidates.
+
+        Args:
+            train_dataloader: Training data stream.
+            val_dataloader: Validation data stream.
+            epochs: Number of training epochs.
+
+        Returns:
+            Mapping between candidate names and their validation metric per epoch.
+
+        """
+
+        # Results received while checking the workers and workers that finished successfully
+        self._pending_results = collections.deque()
+        self._finished_workers = set()
+
+        ctx = mp.get_context(self.start_method)
+        result_queue = ctx.Queue()
+        batch_queues = {name: ctx.Queue(self.max_queued_batches) for name in self.candidate_fns}
+
+        workers = {}
+        for name, candidate_fn in self.candidate_fns.items():
+            workers[name] = ctx.Process(
+                target=_candidate_worker,
+                args=(name, candidate_fn, self.num_threads_per_candidate, batch_queues[name], result_queue),
+                daemon=True,
+            )
+            workers[name].start()
+
+        logger.info(
+            f"Training {len(workers)} candidates with {self.num_threads_per_candidate} threads per candidate."
+        )
+
+        metrics = {name: [] for name in self.candidate_fns}
+        succeeded = False
+        try:
+            for epoch in range(epochs):
+                for batch in train_dataloader:
+                    self._broadcast(("train", _share_memory(batch)), batch_queues, workers, result_queue)
+
+                if val_dataloader is not None:
+                    for batch in val_dataloader:
+                        self._broadcast(("eval", _share_memory(batch)), batch_queues, workers, result_queue)
+
+                self._broadcast(("end_epoch", epoch), batch_queues, workers, result_queue)
+                for _ in workers:
+                    name, _, (_, metric) = self._get_result(workers, result_queue)
+                    metrics[name].append(metric)
+
+                logger.info(f"Epoch {epoch}: {metrics}")
+
+            self._broadcast(None, batch_queues, workers, result_queue)
+            for _ in workers:
+                self._get_result(workers, result_queue)
+
+            succeeded = True
+
+        finally:
+            for worker in workers.values():
+                # Remaining workers are blocked waiting for batches if any candidate failed
+                worker.join(timeout=_POLL_TIMEOUT if succeeded else 0)
+                if worker.is_alive():
+                    worker.terminate()
+
+        return metrics
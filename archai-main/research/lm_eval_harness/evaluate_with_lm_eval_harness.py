@@ -61,6 +61,22 @@ def parse_args():
         help="Limit the number of samples.",
     )
 
+    parser.add_argument(
+        "-bs",
+        "--batch_size",
+        type=int,
+        default=1,
+        help="Maximum number of requests per batch.",
+    )
+
+    parser.add_argument(
+        "-mbt",
+        "--max_batch_tokens",
+        type=int,
+        default=None,
+        help="Maximum number of (context and generated) tokens per generation batch.",
+    )
+
     parser.add_argument(
         "-nc",
         "--no_cache",
@@ -110,7 +126,7 @@ if __name__ == "__main__":
 
     model = AutoModelForCausalLM.from_pretrained(args.pre_trained_model_path)
     tokenizer = AutoTokenizer.from_pretrained(args.hub_tokenizer_path)
-    hf_model = HFEvalModel(model, tokenizer)
+    hf_model = HFEvalModel(model, tokenizer, batch_size=args.batch_size, max_batch_tokens=args.max_batch_tokens)
 
     outputs = evaluate_wrapper(
         hf_model,
@@ -1,7 +1,8 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
-from typing import List, Optional
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 
 import torch
 from lm_eval.base import BaseLM
@@ -21,6 +22,8 @@ class HFEvalModel(BaseLM):
         tokenizer: PreTrainedTokenizer,
         force_attention_mask: Optional[bool] = False,
         max_generated_tokens: Optional[int] = 256,
+        batch_size: Optional[int] = 1,
+        max_batch_tokens: Optional[int] = None,
     ) -> None:
         super().__init__()
 
@@ -34,6 +37,8 @@ class HFEvalModel(BaseLM):
 
         self.force_attention_mask = force_attention_mask
         self.max_generated_tokens = max_generated_tokens
+        self._batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
 
     @property
     def eot_token_id(self) -> int:
@@ -52,7 +57,7 @@ class HFEvalModel(BaseLM):
 
     @property
     def batch_size(self) -> int:
-        return 1
+        return self._batch_size
 
     @property
     def device(self) -> torch.device:
@@ -67,9 +72,12 @@ class HFEvalModel(BaseLM):
     def _model_call(self, inps: torch.Tensor) -> torch.Tensor:
         inps = inps.to(self.device)
 
+        # Loglikelihood batches are right-padded by `BaseLM`, which only reads the logits of
+        # non-padded tokens. Since padding comes after them, it is never attended by these
+        # (causal) logits, thus models requiring a mask receive a full one
         kwargs = {}
         if self.force_attention_mask:
-            kwargs["attention_mask"] = torch.zeros(inps.shape, dtype=torch.long, device=inps.device)
+            kwargs["attention_mask"] = torch.ones(inps.shape, dtype=torch.long, device=inps.device)
 
         with torch.no_grad():
             return self.model(inps, **kwargs)[0]
@@ -77,46 +85,114 @@ class HFEvalModel(BaseLM):
     def _model_generate(self, context: str, max_length: int, eos_token_id: int) -> str:
         return self.model.generate(context, max_length=max_length, eos_token_id=eos_token_id, do_sample=False)
 
-    def generate(self, requests: List[Request]) -> List[str]:
-        res = []
-        kwargs = {}
+    def _get_generation_batches(
+        self, requests: List[Request], encoded_contexts: List[List[int]]
+    ) -> List[List[int]]:
+        # Requests are grouped by their generation arguments and sorted by decreasing
+        # context length, so each batch has similar lengths (minimal padding)
+        groups = defaultdict(list)
+        for i, (_, stop_tokens, do_sample, temperature, top_p, max_new_tokens) in enumerate(requests):
+            groups[(tuple(stop_tokens or ()), do_sample, temperature, top_p, max_new_tokens)].append(i)
+
+        batches = []
+        for (_, _, _, _, max_new_tokens), indices in groups.items():
+            indices = sorted(indices, key=lambda i: len(encoded_contexts[i]), reverse=True)
+
+            batch = []
+            for i in indices:
+                # Since contexts are sorted, the first one of the batch is the longest
+                n_batch_tokens = (len(encoded_contexts[(batch or [i])[0]]) + max_new_tokens) * (len(batch) + 1)
+                is_full = len(batch) >= self.batch_size or (
+                    self.max_batch_tokens is not None and n_batch_tokens > self.max_batch_tokens
+                )
+
+                if batch and is_full:
+                    batches.append(batch)
+                    batch = []
+                batch.append(i)
+
+            if batch:
+                batches.append(batch)
+
+        return batches
+
+    def _encode_stop_tokens(self, stop_tokens: Tuple[str, ...]) -> torch.LongTensor:
+        return self.tokenizer(
+            list(stop_tokens),
+            padding="longest",
+            add_special_tokens=False,
+            return_attention_mask=False,
+            return_tensors="pt",
+        )["input_ids"].to(self.device)
 
-        for context, stop_tokens, do_sample, temperature, top_p, max_new_tokens in tqdm(requests):
-            if not context:
-                context = self.eos_token
-
-            # Encodes the context and defines number of tokens to be
-            # removed when generation ends (default = 1)
-            input_ids = self.tokenizer(context, return_tensors="pt")["input_ids"].to(self.device)
-            n_removal_tokens = 1
+    def generate(self, requests: List[Request]) -> List[str]:
+        res = [None] * len(requests)
+
+        encoded_contexts = [
+            self.tokenizer(context or self.tokenizer.eos_token)["input_ids"] for context, *_ in requests
+        ]
+        encoded_stop_tokens: Dict[Tuple[str, ...], torch.LongTensor] = {}
+
+        for batch in tqdm(self._get_generation_batches(requests, encoded_contexts)):
+            _, stop_tokens, do_sample, temperature, top_p, max_new_tokens = requests[batch[0]]
+
+            # Left-pads the contexts, so generated tokens are appended right after them
+            contexts = [encoded_contexts[i] for i in batch]
+            max_context_length = max(len(context) for context in contexts)
+            n_padding_tokens = [max_context_length - len(context) for context in contexts]
+
+            input_ids = torch.tensor(
+                [[self.eot_token_id] * n_pad + context for n_pad, context in zip(n_padding_tokens, contexts)],
+                dtype=torch.long,
+                device=self.device,
+            )
+            attention_mask = torch.tensor(
+                [[0] * n_pad + [1] * len(context) for n_pad, context in zip(n_padding_tokens, contexts)],
+                dtype=torch.long,
+                device=self.device,
+            )
+
+            kwargs = {}
+            stopping_criteria = None
 
             if stop_tokens:
-                # Encodes the stop-tokens and defines the number of tokens to be
-                # removed as largest stop-token
-                encoded_stop_tokens = self.tokenizer(
-                    stop_tokens,
-                    padding="longest",
-                    add_special_tokens=False,
-                    return_attention_mask=False,
-                    return_tensors="pt",
-                )["input_ids"].to(self.device)
-                n_removal_tokens = encoded_stop_tokens.shape[-1]
-
-                # Defines the stopping criteria
-                kwargs["stopping_criteria"] = StoppingCriteriaList([MultipleTokenStoppingCriteria(encoded_stop_tokens)])
-
-            # Generates the tokens and removes generated stop-tokens
-            generated_tokens = self.model.generate(
-                input_ids,
-                pad_token_id=self.eot_token_id,
-                do_sample=do_sample,
-                temperature=temperature,
-                top_p=top_p,
-                max_new_tokens=max_new_tokens,
-                **kwargs
-            ).squeeze(0)
-            generated_tokens = generated_tokens[:-n_removal_tokens]
-
-            res.append(self.tok_decode(generated_tokens))
+                # Stop-tokens are only encoded once for all requests that share them
+                stop_tokens = tuple(stop_tokens)
+                if stop_tokens not in encoded_stop_tokens:
+                    encoded_stop_tokens[stop_tokens] = self._encode_stop_tokens(stop_tokens)
+
+                # Defines the stopping criteria, which tracks each sequence of the batch
+                stopping_criteria = MultipleTokenStoppingCriteria(
+                    encoded_stop_tokens[stop_tokens],
+                    pad_token_id=self.tokenizer.pad_token_id,
+                    start_index=max_context_length,
+                )
+                kwargs["stopping_criteria"] = StoppingCriteriaList([stopping_criteria])
+
+            with torch.no_grad():
+                generated_tokens = self.model.generate(
+                    input_ids,
+                    attention_mask=attention_mask,
+                    pad_token_id=self.eot_token_id,
+                    do_sample=do_sample,
+                    temperature=temperature,
+                    top_p=top_p,
+                    max_new_tokens=max_new_tokens,
+                    use_cache=True,
+                    **kwargs
+                )
+
+            for j, i in enumerate(batch):
+                # Removes the padding, generated stop-tokens and end-of-text tokens
+                end = generated_tokens.shape[-1]
+                if stopping_criteria is not None and stopping_criteria.stop_indices is not None:
+                    stop_index = stopping_criteria.stop_indices[j].item()
+                    end = stop_index if stop_index >= 0 else end
+
+                eot_indices = (generated_tokens[j, max_context_length:end] == self.eot_token_id).nonzero()
+                if len(eot_indices) > 0:
+                    end = max_context_length + eot_indices[0].item()
+
+                res[i] = self.tok_decode(generated_tokens[j, n_padding_tokens[j] : end])
 
         return res
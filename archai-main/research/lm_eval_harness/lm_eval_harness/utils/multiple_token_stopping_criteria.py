@@ -1,19 +1,44 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
+from typing import Optional
+
 import torch
 from transformers.generation.stopping_criteria import StoppingCriteria
 
 
 class MultipleTokenStoppingCriteria(StoppingCriteria):
-    def __init__(self, stop_tokens: torch.LongTensor) -> None:
-        self.stop_tokens = stop_tokens
-        self.max_stop_tokens = stop_tokens.shape[-1]
+    def __init__(
+        self, stop_tokens: torch.LongTensor, pad_token_id: Optional[int] = None, start_index: Optional[int] = 0
+    ) -> None:
+        # Stop-tokens might have been padded to the longest one, thus padding
+        # is removed to allow matching stop-tokens with different lengths
+        self.stop_tokens = [
+            tokens[tokens != pad_token_id] if pad_token_id is not None else tokens for tokens in stop_tokens
+        ]
+
+        # Stop-tokens are only matched from `start_index` onwards, e.g., to ignore the
+        # stop-tokens that overlap with the context
+        self.start_index = start_index
+
+        # Position (in `input_ids`) where each sequence should be truncated, or -1
+        # if the sequence has not generated any stop-token yet
+        self.stop_indices = None
 
     def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> bool:
-        # Only gathers the maximum number of inputs compatible with stop tokens
-        # and checks whether generated inputs are equal to stop_tokens
-        generated_inputs = input_ids[0, -self.max_stop_tokens :]
-        equal_generated_inputs = torch.all(torch.eq(generated_inputs, self.stop_tokens), dim=1)
+        if self.stop_indices is None:
+            self.stop_indices = torch.full((input_ids.shape[0],), -1, dtype=torch.long, device=input_ids.device)
+
+        # Only gathers the maximum number of inputs compatible with each stop-token
+        # and checks whether generated inputs are equal to it
+        for tokens in self.stop_tokens:
+            n_tokens = tokens.shape[-1]
+            if input_ids.shape[-1] - n_tokens < self.start_index:
+                continue
+
+            equal_generated_inputs = torch.all(torch.eq(input_ids[:, -n_tokens:], tokens), dim=-1)
+            stopped = equal_generated_inputs & (self.stop_indices < 0)
+            self.stop_indices[stopped] = input_ids.shape[-1] - n_tokens
 
-        return torch.any(equal_generated_inputs)
+        # Generation only ends when every sequence has been stopped
+        return bool(torch.all(self.stop_indices >= 0))
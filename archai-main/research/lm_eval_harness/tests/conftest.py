@@ -0,0 +1,21 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import sys
+import types
+
+try:
+    import lm_eval  # noqa: F401
+except ImportError:
+    # `HFEvalModel` only uses `BaseLM` as its base class, thus a minimal module
+    # allows testing it when the harness is not installed
+    class BaseLM:
+        def __init__(self) -> None:
+            pass
+
+    lm_eval = types.ModuleType("lm_eval")
+    lm_eval.base = types.ModuleType("lm_eval.base")
+    lm_eval.base.BaseLM = BaseLM
+
+    sys.modules["lm_eval"] = lm_eval
+    sys.modules["lm_eval.base"] = lm_eval.base
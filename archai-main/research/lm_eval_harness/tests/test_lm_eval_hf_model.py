@@ -0,0 +1,107 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import pytest
+import torch
+from lm_eval_harness.lm_eval_hf_model import HFEvalModel
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+VOCAB = ["<|endoftext|>"] + [f"w{i}" for i in range(31)]
+
+
+@pytest.fixture
+def tokenizer():
+    tokenizer = Tokenizer(models.WordLevel({token: i for i, token in enumerate(VOCAB)}, unk_token="<|endoftext|>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, eos_token="<|endoftext|>")
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+
+    # Reserves an additional token for the padding token added by `HFEvalModel`, while
+    # a larger initialization range prevents the model from repeating the same token
+    config = GPT2Config(
+        vocab_size=len(VOCAB) + 1, n_positions=64, n_embd=32, n_layer=2, n_head=2, initializer_range=0.5
+    )
+
+    return GPT2LMHeadModel(config).eval()
+
+
+def _generate(model, tokenizer, requests, **kwargs):
+    return HFEvalModel(model, tokenizer, max_generated_tokens=8, **kwargs).generate(requests)
+
+
+@pytest.mark.parametrize("force_attention_mask", [False, True])
+def test_hf_eval_model_model_call(model, tokenizer, force_attention_mask):
+    eval_model = HFEvalModel(model, tokenizer, force_attention_mask=force_attention_mask)
+    inputs = [torch.tensor([1, 2, 3, 4, 5]), torch.tensor([6, 7, 8])]
+
+    # Assert that logits of right-padded (with 0, as `BaseLM`) batches match the unpadded ones
+    batch_inputs = torch.nn.utils.rnn.pad_sequence(inputs, batch_first=True, padding_value=0)
+    batch_logits = eval_model._model_call(batch_inputs)
+
+    for i, x in enumerate(inputs):
+        logits = eval_model._model_call(x[None])
+        assert torch.allclose(batch_logits[i, : len(x)], logits[0], atol=1e-5)
+
+
+def test_hf_eval_model_generation_batches(model, tokenizer):
+    requests = [
+        ("w1 w2", ["w3"], False, 1.0, 1.0, 4),
+        ("w1 w2 w3 w4", ["w3"], False, 1.0, 1.0, 4),
+        ("w1", ["w5"], False, 1.0, 1.0, 4),
+        ("w1 w2 w3", ["w3"], False, 1.0, 1.0, 4),
+    ]
+    eval_model = HFEvalModel(model, tokenizer, batch_size=2)
+    encoded_contexts = [tokenizer(context)["input_ids"] for context, *_ in requests]
+
+    # Assert that requests are grouped by their generation arguments and sorted by decreasing length
+    assert eval_model._get_generation_batches(requests, encoded_contexts) == [[1, 3], [0], [2]]
+
+    # Assert that batches are limited by the maximum number of tokens
+    eval_model.max_batch_tokens = 15
+    assert eval_model._get_generation_batches(requests, encoded_contexts) == [[1], [3, 0], [2]]
+
+
+def test_hf_eval_model_generate_left_padding(model, tokenizer):
+    requests = [
+        ("w1 w2", None, False, 1.0, 1.0, 6),
+        ("w4 w5 w6 w7 w8", None, False, 1.0, 1.0, 6),
+        ("w9", None, False, 1.0, 1.0, 6),
+    ]
+
+    # Assert that left-padded batches generate the same tokens as unpadded requests
+    outputs = _generate(model, tokenizer, requests, batch_size=1)
+    batch_outputs = _generate(model, tokenizer, requests, batch_size=3)
+    assert batch_outputs == outputs
+
+    for (context, *_), output in zip(requests, batch_outputs):
+        assert output.startswith(context)
+        assert "[PAD]" not in output
+
+
+def test_hf_eval_model_generate_stop_tokens(model, tokenizer):
+    requests = [
+        ("w1 w2", None, False, 1.0, 1.0, 6),
+        ("w4 w5 w6 w7 w8", None, False, 1.0, 1.0, 6),
+    ]
+    outputs = _generate(model, tokenizer, requests, batch_size=1)
+    generated_words = [output.split()[len(context.split()) :] for (context, *_), output in zip(requests, outputs)]
+
+    # Stop-tokens with different lengths, where each one is generated by a different request
+    stop_tokens = [generated_words[0][1], " ".join(generated_words[1][3:5])]
+
+    stop_requests = [(context, stop_tokens, *args) for context, _, *args in requests]
+    stop_outputs = _generate(model, tokenizer, stop_requests, batch_size=1)
+    batch_stop_outputs = _generate(model, tokenizer, stop_requests, batch_size=2)
+
+    # Assert that each sequence is stopped (and truncated) on its own
+    assert batch_stop_outputs == stop_outputs
+    for (context, *_), output, stop_output in zip(requests, outputs, stop_outputs):
+        assert len(context) <= len(stop_output) < len(output)
+        assert output.startswith(stop_output)
+        assert all(stop_token not in stop_output[len(context) :] for stop_token in stop_tokens)
@@ -0,0 +1,56 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import torch
+from lm_eval_harness.utils.multiple_token_stopping_criteria import (
+    MultipleTokenStoppingCriteria,
+)
+
+PAD_TOKEN_ID = 0
+
+
+def test_multiple_token_stopping_criteria():
+    # Stop-tokens with different lengths are right-padded to the longest one
+    stop_tokens = torch.tensor([[7, 8], [9, PAD_TOKEN_ID]])
+    criteria = MultipleTokenStoppingCriteria(stop_tokens, pad_token_id=PAD_TOKEN_ID)
+    assert [tokens.tolist() for tokens in criteria.stop_tokens] == [[7, 8], [9]]
+
+    # Assert that generation continues while no sequence has stopped
+    input_ids = torch.tensor([[1, 2, 3], [1, 2, 4]])
+    assert not criteria(input_ids, None)
+    assert criteria.stop_indices.tolist() == [-1, -1]
+
+    # Assert that the first sequence stops with the single-token stop-token
+    input_ids = torch.cat([input_ids, torch.tensor([[9], [7]])], dim=-1)
+    assert not criteria(input_ids, None)
+    assert criteria.stop_indices.tolist() == [3, -1]
+
+    # Assert that the second sequence stops with the multiple-token stop-token,
+    # while the first sequence keeps its stop index
+    input_ids = torch.cat([input_ids, torch.tensor([[9], [8]])], dim=-1)
+    assert criteria(input_ids, None)
+    assert criteria.stop_indices.tolist() == [3, 3]
+
+
+def test_multiple_token_stopping_criteria_padding_is_not_matched():
+    # Assert that padding of stop-tokens is not matched against generated tokens
+    stop_tokens = torch.tensor([[9, PAD_TOKEN_ID]])
+    criteria = MultipleTokenStoppingCriteria(stop_tokens, pad_token_id=PAD_TOKEN_ID)
+
+    assert criteria(torch.tensor([[1, 9]]), None)
+    assert criteria.stop_indices.tolist() == [1]
+
+    criteria = MultipleTokenStoppingCriteria(stop_tokens, pad_token_id=PAD_TOKEN_ID)
+    assert not criteria(torch.tensor([[9, PAD_TOKEN_ID]]), None)
+
+
+def test_multiple_token_stopping_criteria_start_index():
+    stop_tokens = torch.tensor([[7, 8]])
+    criteria = MultipleTokenStoppingCriteria(stop_tokens, pad_token_id=PAD_TOKEN_ID, start_index=2)
+
+    # Assert that stop-tokens overlapping with the first `start_index` inputs are ignored
+    assert not criteria(torch.tensor([[1, 7, 8]]), None)
+    assert criteria.stop_indices.tolist() == [-1]
+
+    assert criteria(torch.tensor([[1, 7, 8, 7, 8]]), None)
+    assert criteria.stop_indices.tolist() == [3]
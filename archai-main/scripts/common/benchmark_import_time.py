@@ -0,0 +1,73 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = [
+    "archai.discrete_search.api",
+    "archai.discrete_search.algos",
+    "archai.discrete_search.evaluators",
+    "archai.discrete_search.search_spaces.config",
+    "archai.discrete_search.search_spaces.cv",
+    "archai.discrete_search.search_spaces.nlp",
+    "archai.common.store",
+    "archai.trainers.nlp.hf_trainer",
+]
+
+HEAVY_MODULES = [
+    "azure",
+    "deepspeed",
+    "matplotlib",
+    "onnxruntime",
+    "pandas",
+    "ray",
+    "tensorwatch",
+    "torch",
+    "transformers",
+]
+
+# Measures the import in a fresh interpreter, so no module is cached
+_IMPORT_CODE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"time": elapsed, "heavy": sorted(m for m in {heavy} if m in sys.modules)}}))
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks the cold import latency of archai entry points.")
+
+    parser.add_argument("-m", "--modules", type=str, nargs="+", default=ENTRY_POINTS, help="Modules to be imported.")
+
+    parser.add_argument("-n", "--n_runs", type=int, default=5, help="Number of imports per module.")
+
+    args = parser.parse_args()
+
+    return args
+
+
+def _time_import(module: str) -> dict:
+    code = _IMPORT_CODE.format(module=module, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    for module in args.modules:
+        try:
+            results = [_time_import(module) for _ in range(args.n_runs)]
+        except subprocess.CalledProcessError:
+            print(f"{module}: import failed")
+            continue
+
+        median = statistics.median(r["time"] for r in results)
+        print(f"{module}: {median * 1e3:.0f}ms (heavy: {', '.join(results[-1]['heavy']) or '-'})")
@@ -0,0 +1,58 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import argparse
+import os
+import tempfile
+import time
+
+from archai.common.ordered_dict_logger import OrderedDictLogger
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks the per-log cost of OrderedDictLogger saves.")
+
+    parser.add_argument("-n", "--n_logs", type=int, default=100000, help="Number of logged entries.")
+
+    parser.add_argument("-w", "--window", type=int, default=10000, help="Number of logs per reported measurement.")
+
+    parser.add_argument("-d", "--delay", type=float, default=0.05, help="Delay between log saves (in seconds).")
+
+    parser.add_argument("--skip_yaml", action="store_true", help="Only benchmarks the journal backend.")
+
+    args = parser.parse_args()
+
+    return args
+
+
+def _time_logs(logger: OrderedDictLogger, n_logs: int, window: int) -> None:
+    # Silences the console/file handlers, since only saves are being measured
+    logger.logger.disabled = True
+
+    start = time.perf_counter()
+    for i in range(n_logs):
+        with logger.pushd("step", i):
+            logger.info({"loss": 1.0 / (i + 1), "lr": 1e-3})
+
+        if (i + 1) % window == 0:
+            elapsed = time.perf_counter() - start
+            print(f"  {i + 1} entries: {elapsed / window * 1e6:.2f}us/log")
+            start = time.perf_counter()
+
+    start = time.perf_counter()
+    logger.close()
+    print(f"  close: {(time.perf_counter() - start) * 1e3:.2f}ms")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backends = {"journal": True} if args.skip_yaml else {"yaml": False, "journal": True}
+
+        for name, use_journal in backends.items():
+            print(f"{name}:")
+            logger = OrderedDictLogger(
+                file_path=os.path.join(tmp_dir, f"{name}.yaml"), delay=args.delay, use_journal=use_journal
+            )
+            _time_logs(logger, args.n_logs, args.window)
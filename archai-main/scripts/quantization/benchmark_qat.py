@@ -0,0 +1,105 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import argparse
+import copy
+import statistics
+import time
+
+import torch
+from transformers import GPT2Config, GPT2LMHeadModel
+
+from archai.quantization.mixed_qat import MixedQAT
+from archai.quantization.qat import prepare_with_qat
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks the step-time overhead of QAT over float training.")
+
+    parser.add_argument("-vs", "--vocab_size", type=int, default=10000, help="Size of the vocabulary.")
+
+    parser.add_argument("-nl", "--n_layer", type=int, default=4, help="Number of layers.")
+
+    parser.add_argument("-ne", "--n_embd", type=int, default=256, help="Embedding dimension.")
+
+    parser.add_argument("-nh", "--n_head", type=int, default=4, help="Number of attention heads.")
+
+    parser.add_argument("-bs", "--batch_size", type=int, default=8, help="Batch size.")
+
+    parser.add_argument("-sl", "--seq_len", type=int, default=128, help="Sequence length.")
+
+    parser.add_argument("-ns", "--n_steps", type=int, default=20, help="Number of timed training steps.")
+
+    parser.add_argument("-nw", "--n_warmups", type=int, default=3, help="Number of warmup training steps.")
+
+    parser.add_argument("-d", "--device", type=str, default="cpu", help="Device used to train the models.")
+
+    parser.add_argument(
+        "-mi", "--mixed_qat_interval", type=int, default=4, help="Interval between QAT-based losses of MixedQAT."
+    )
+
+    parser.add_argument("--onnx_compatible", action="store_true", help="Uses ONNX-compatible fake quantization.")
+
+    args = parser.parse_args()
+
+    return args
+
+
+def _time_steps(model: torch.nn.Module, inputs: torch.Tensor, n_warmups: int, n_steps: int, train: bool) -> float:
+    optimizer = torch.optim.AdamW(model.parameters(), lr=1e-4)
+    model.train(train)
+
+    timings = []
+    for step in range(n_warmups + n_steps):
+        if inputs.is_cuda:
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+
+        if train:
+            loss = model(input_ids=inputs, labels=inputs)[0]
+            loss.backward()
+            optimizer.step()
+            optimizer.zero_grad(set_to_none=True)
+        else:
+            with torch.no_grad():
+                model(input_ids=inputs, labels=inputs)
+
+        if inputs.is_cuda:
+            torch.cuda.synchronize()
+        if step >= n_warmups:
+            timings.append(time.perf_counter() - start)
+
+    return statistics.mean(timings)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    torch.manual_seed(0)
+
+    config = GPT2Config(
+        vocab_size=args.vocab_size, n_layer=args.n_layer, n_embd=args.n_embd, n_head=args.n_head, n_positions=args.seq_len
+    )
+    model = GPT2LMHeadModel(config)
+    inputs = torch.randint(0, config.vocab_size, (args.batch_size, args.seq_len), device=args.device)
+
+    models = {
+        "float": copy.deepcopy(model),
+        "qat": prepare_with_qat(copy.deepcopy(model), onnx_compatible=args.onnx_compatible),
+        "mixed_qat": MixedQAT(copy.deepcopy(model)),
+        "mixed_qat_shared_trunk": MixedQAT(copy.deepcopy(model), shared_trunk=True),
+        f"mixed_qat_interval_{args.mixed_qat_interval}": MixedQAT(
+            copy.deepcopy(model), qat_interval=args.mixed_qat_interval
+        ),
+    }
+
+    for train in [True, False]:
+        step_times = {}
+        for name, bench_model in models.items():
+            bench_model.to(args.device)
+            step_times[name] = _time_steps(bench_model, inputs, args.n_warmups, args.n_steps, train)
+
+        print("Training:" if train else "Evaluation:")
+        for name, step_time in step_times.items():
+            overhead = (step_time / step_times["float"] - 1.0) * 100
+            print(f"  {name}: {step_time * 1e3:.2f}ms/step ({overhead:+.1f}% over float)")
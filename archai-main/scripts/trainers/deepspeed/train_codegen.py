@@ -94,8 +94,8 @@ if __name__ == "__main__":
         dataset_config_name=args.dataset_config_name,
         tokenizer=tokenizer,
     )
-    train_dataset = dataset_provider.get_train_dataset(seq_len=2048)
-    eval_dataset = dataset_provider.get_val_dataset(seq_len=2048)
+    train_dataset = dataset_provider.get_train_dataset(seq_len=2048, packed=True)
+    eval_dataset = dataset_provider.get_val_dataset(seq_len=2048, packed=True)
 
     config = CodeGenFlashConfig(
         vocab_size=50304,
@@ -11,8 +11,8 @@ from transformers import (
 )
 
 from archai.datasets.nlp.fast_hf_dataset_provider import (
-    FastDataCollatorForLanguageModeling,
     FastHfDatasetProvider,
+    PackedDataCollatorForLanguageModeling,
 )
 from archai.trainers.nlp.hf_trainer import HfTrainer
 
@@ -55,7 +55,7 @@ if __name__ == "__main__":
     args = parse_args()
 
     tokenizer = AutoTokenizer.from_pretrained("Salesforce/codegen-350M-mono")
-    collator = FastDataCollatorForLanguageModeling(tokenizer=tokenizer, mlm=False)
+    collator = PackedDataCollatorForLanguageModeling()
 
     dataset_provider = FastHfDatasetProvider.from_hub(
         args.dataset_name,
@@ -63,8 +63,8 @@ if __name__ == "__main__":
         tokenizer=tokenizer,
     )
 
-    train_dataset = dataset_provider.get_train_dataset(seq_len=2048)
-    eval_dataset = dataset_provider.get_val_dataset(seq_len=2048)
+    train_dataset = dataset_provider.get_train_dataset(seq_len=2048, packed=True)
+    eval_dataset = dataset_provider.get_val_dataset(seq_len=2048, packed=True)
 
     config = CodeGenConfig(
         vocab_size=50304,
@@ -6,8 +6,8 @@ import argparse
 from transformers import AutoTokenizer, OPTConfig, OPTForCausalLM, TrainingArguments
 
 from archai.datasets.nlp.fast_hf_dataset_provider import (
-    FastDataCollatorForLanguageModeling,
     FastHfDatasetProvider,
+    PackedDataCollatorForLanguageModeling,
 )
 from archai.trainers.nlp.hf_trainer import HfTrainer
 
@@ -48,7 +48,7 @@ if __name__ == "__main__":
     args = parse_args()
 
     tokenizer = AutoTokenizer.from_pretrained("facebook/opt-350m")
-    collator = FastDataCollatorForLanguageModeling(tokenizer=tokenizer, mlm=False)
+    collator = PackedDataCollatorForLanguageModeling()
 
     dataset_provider = FastHfDatasetProvider.from_hub(
         args.dataset_name,
@@ -56,8 +56,8 @@ if __name__ == "__main__":
         tokenizer=tokenizer,
     )
 
-    train_dataset = dataset_provider.get_train_dataset(seq_len=2048)
-    eval_dataset = dataset_provider.get_val_dataset(seq_len=2048)
+    train_dataset = dataset_provider.get_train_dataset(seq_len=2048, packed=True)
+    eval_dataset = dataset_provider.get_val_dataset(seq_len=2048, packed=True)
 
     config = OPTConfig(
         n_positions=2048,
@@ -17,7 +17,7 @@ CONNECTION_STRING = ''
 def get_all_usage_entities(store, name_filter=None):
     """ Get all usage entities with optional device name filter """
 
-    table_client = store._get_table_client()
+    table_client = store.backend._get_table_client()
 
     entities = []
     query = "PartitionKey eq 'main'"
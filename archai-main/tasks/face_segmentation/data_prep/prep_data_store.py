@@ -11,6 +11,9 @@ def main():
     print("Starting prep_data_store...")
     parser = argparse.ArgumentParser()
     parser.add_argument("--path", type=str, help="root folder to place the downloaded dataset.")
+    parser.add_argument("--shards_path", type=str, default=None,
+                        help="optional folder to place the preprocessed (resized) dataset shards.")
+    parser.add_argument("--num_workers", type=int, default=1, help="number of processes used to write the shards.")
     args = parser.parse_args()
 
     path = args.path
@@ -20,8 +23,9 @@ def main():
     if not path or not os.path.exists(path):
         raise ValueError(f'Missing path: {path}')
 
-    provider = FaceSyntheticsDatasetProvider(dataset_dir=path)
-    # now force the full download to happen to that root folder.
+    provider = FaceSyntheticsDatasetProvider(dataset_dir=path, shards_dir=args.shards_path,
+                                             num_workers=args.num_workers)
+    # now force the full download (and preprocessing, if shards_path is given) to happen to that root folder.
     provider.get_train_dataset()
     provider.get_val_dataset()
     provider.get_test_dataset()
@@ -51,6 +51,8 @@ def filter_extra_args(extra_args: List[str], prefix: str) -> List[str]:
 def main():
     parser = ArgumentParser()
     parser.add_argument('--dataset_dir', type=Path, help='Face Synthetics dataset directory.')
+    parser.add_argument('--shards_dir', type=Path, help='Directory of the preprocessed dataset shards (optional).',
+                        default=None)
     parser.add_argument('--output_dir', type=Path, help='Output directory.', default='output')
     parser.add_argument('--search_config', type=Path, help='Search config file.', default=confs_path / 'cpu_search.yaml')
     parser.add_argument('--serial_training', help='Search config file.', action='store_true')
@@ -152,7 +154,7 @@ def main():
             raise ValueError('--dataset_dir must be specified if target is not aml')
 
         # Dataset provider
-        dataset_provider = FaceSyntheticsDatasetProvider(args.dataset_dir)
+        dataset_provider = FaceSyntheticsDatasetProvider(args.dataset_dir, shards_dir=args.shards_dir)
 
         partial_tr_obj = PartialTrainingValIOU(
             dataset_provider,
@@ -32,6 +32,8 @@ def main():
     parser = ArgumentParser()
     parser.add_argument('arch', type=Path)
     parser.add_argument('--dataset_dir', type=Path, help='Face Synthetics dataset directory.', required=True)
+    parser.add_argument('--shards_dir', type=Path, help='Directory of the preprocessed dataset shards (optional).',
+                        default=None)
     parser.add_argument('--output_dir', type=Path, help='Output directory.', required=True)
     parser.add_argument('--lr', type=float, default=2e-4)
     parser.add_argument('--batch_size', type=int, default=16)
@@ -81,7 +83,7 @@ def main():
         model = StackedHourglass(arch_config, num_classes=18)
 
         pl_model = SegmentationTrainingLoop(model, lr=args.lr)
-        dataset_prov = FaceSyntheticsDatasetProvider(args.dataset_dir)
+        dataset_prov = FaceSyntheticsDatasetProvider(args.dataset_dir, shards_dir=args.shards_dir, num_workers=8)
 
         tr_dl = torch.utils.data.DataLoader(
             dataset_prov.get_train_dataset(), batch_size=args.batch_size, num_workers=8,
@@ -0,0 +1,85 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+import argparse
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+import torch
+
+from archai.datasets.cv.face_synthetics import FaceSyntheticsDatasetProvider
+from archai.trainers.parallel_candidate_trainer import ParallelCandidateTrainer
+from training.candidate_trainer import SegmentationCandidateTrainer
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fully trains the final pareto curve models concurrently on the local machine."
+    )
+    parser.add_argument('--search_state', type=Path, help='Search state file (search_state_XX.csv).', required=True)
+    parser.add_argument('--pareto_dir', type=Path, help='Directory of the pareto architecture files '
+                        '(pareto_models_iter_XX).', required=True)
+    parser.add_argument('--dataset_dir', type=Path, help='Face Synthetics dataset directory.', required=True)
+    parser.add_argument('--shards_dir', type=Path, help='Directory of the preprocessed dataset shards (optional).',
+                        default=None)
+    parser.add_argument('--output_dir', type=Path, help='Output directory.', default='output')
+    parser.add_argument('--lr', type=float, default=2e-4)
+    parser.add_argument('--batch_size', type=int, default=16)
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--num_workers', type=int, help='Number of data loading workers.', default=8)
+    parser.add_argument('--device', type=str, default='cpu')
+    parser.add_argument('--max_parallel_candidates', type=int, help='Maximum number of models trained concurrently.',
+                        default=4)
+    parser.add_argument('--num_threads_per_candidate', type=int, help='Number of threads of each model '
+                        '(default: CPUs are evenly split between models).', default=None)
+    parser.add_argument('--metric_key', type=str, help='Column that receives the validation IOU.',
+                        default='Full Training Val. IOU')
+    args = parser.parse_args()
+
+    state_df = pd.read_csv(args.search_state)
+    archids = [
+        archid for archid in state_df.loc[state_df['is_pareto'], 'archid']
+        if (args.pareto_dir / f'{archid}.json').is_file()
+    ]
+    print(f'Models to be trained: {archids}')
+
+    dataset_prov = FaceSyntheticsDatasetProvider(args.dataset_dir, shards_dir=args.shards_dir,
+                                                 num_workers=args.num_workers)
+
+    # Batches are decoded once and shared by all models that are trained concurrently
+    tr_dl = torch.utils.data.DataLoader(
+        dataset_prov.get_train_dataset(), batch_size=args.batch_size, num_workers=args.num_workers,
+        shuffle=True
+    )
+    val_dl = torch.utils.data.DataLoader(
+        dataset_prov.get_val_dataset(), batch_size=args.batch_size, num_workers=args.num_workers
+    )
+
+    val_ious = {}
+    for i in range(0, len(archids), args.max_parallel_candidates):
+        group = archids[i:i + args.max_parallel_candidates]
+        print(f'Training models: {group}')
+
+        candidate_fns = {
+            archid: partial(
+                SegmentationCandidateTrainer, str(args.pareto_dir / f'{archid}.json'),
+                lr=args.lr, device=args.device, output_dir=str(args.output_dir)
+            )
+            for archid in group
+        }
+        trainer = ParallelCandidateTrainer(candidate_fns, num_threads_per_candidate=args.num_threads_per_candidate)
+        results = trainer.fit(tr_dl, val_dl, epochs=args.epochs)
+
+        val_ious.update({archid: ious[-1] for archid, ious in results.items()})
+
+    # Writes the results back in the search state format
+    state_df[args.metric_key] = state_df['archid'].map(val_ious)
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    output_file = args.output_dir / f'{args.search_state.stem}_full_training.csv'
+    state_df.to_csv(output_file, index=False)
+    print(f'Saved results to {output_file}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+from pathlib import Path
+from typing import Optional
+
+import torch
+
+from archai.discrete_search.search_spaces.config import ArchConfig
+from archai.trainers.parallel_candidate_trainer import CandidateTrainer
+from search_space.hgnet import StackedHourglass
+from .pl_trainer import SegmentationTrainingLoop
+
+
+class SegmentationCandidateTrainer(CandidateTrainer):
+    """Trains a single architecture file, fed with batches by `ParallelCandidateTrainer`."""
+
+    def __init__(self, arch_path: str, num_classes: int = 18, lr: float = 2e-4,
+                 device: str = 'cpu', output_dir: Optional[str] = None):
+        arch_config = ArchConfig.from_file(arch_path)
+        model = StackedHourglass(arch_config, num_classes=num_classes)
+
+        self.device = torch.device(device)
+        self.training_loop = SegmentationTrainingLoop(model, lr=lr).to(self.device)
+        self.optimizer = self.training_loop.configure_optimizers()[0]
+
+        self.output_dir = Path(output_dir) / Path(arch_path).stem if output_dir else None
+        if self.output_dir:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self._reset_iou()
+
+    def _reset_iou(self):
+        self.iou_sum, self.num_samples = 0.0, 0
+
+    def _to_device(self, batch):
+        return {k: v.to(self.device) for k, v in batch.items()}
+
+    def train_step(self, batch):
+        self.training_loop.train()
+
+        results = self.training_loop.shared_step(self._to_device(batch), stage='train')
+
+        self.optimizer.zero_grad()
+        results['train_loss'].backward()
+        self.optimizer.step()
+
+    def eval_step(self, batch):
+        self.training_loop.eval()
+
+        results = self.training_loop.shared_step(self._to_device(batch), stage='validation')
+
+        # Weighted by batch size, as the mIOU logged by the Lightning trainer
+        batch_size = batch['image'].shape[0]
+        self.iou_sum += float(results['validation_mIOU']) * batch_size
+        self.num_samples += batch_size
+
+    def end_epoch(self, epoch):
+        val_iou = self.iou_sum / max(self.num_samples, 1)
+        self._reset_iou()
+
+        if self.output_dir:
+            torch.save(
+                {'model': self.training_loop.model.state_dict(), 'epoch': epoch},
+                self.output_dir / 'model.pt'
+            )
+
+        return val_iou
@@ -3,6 +3,7 @@
 
 import glob
 import os
+from functools import partial
 
 import numpy as np
 import torch
@@ -10,10 +11,25 @@ from PIL import Image
 from torch.utils.data import Dataset
 
 from archai.common.utils import download_and_extract_zip
+from archai.datasets.cv.shard_cache_utils import ShardDataset, is_valid_shards_dir, write_shards
 
 import transforms
 
 
+def _load_sample(png_file):
+    image = Image.open(png_file)
+    label_file = png_file.replace(".png", "_ldmks.txt")
+    label = np.loadtxt(label_file, dtype=np.single)
+    assert label.size > 0, "Can't find data in landmarks file: f{label_file}"
+
+    return transforms.Sample(image=image, landmarks=label)
+
+
+def _load_cropped_sample(png_file, crop_size):
+    sample = transforms.ExtractRegionOfInterest(roi_size=crop_size)(_load_sample(png_file))
+    return {"image": sample.image, "landmarks": sample.landmarks.astype(np.single)}
+
+
 class FaceLandmarkDataset(Dataset):
     """Dataset class for Microsoft Face Synthetics dataset.
 
@@ -46,6 +62,7 @@ class FaceLandmarkDataset(Dataset):
 
         if limit is not None:
             self.png_files = self.png_files[:limit]
+        self.crop_size = crop_size
         self.transform = transforms.FaceLandmarkTransform(crop_size=crop_size)
         self._num_landmarks = None
 
@@ -62,13 +79,7 @@ class FaceLandmarkDataset(Dataset):
         Returns:
             tuple: A tuple containing the transformed image and landmarks of the sample.
         """
-        png_file = self.png_files[index]
-        image = Image.open(png_file)
-        label_file = png_file.replace(".png", "_ldmks.txt")
-        label = np.loadtxt(label_file, dtype=np.single)
-        assert label.size > 0, "Can't find data in landmarks file: f{label_file}"
-
-        sample = transforms.Sample(image=image, landmarks=label)
+        sample = _load_sample(self.png_files[index])
         assert sample is not None
         sample_transformed = self.transform(sample)
         assert sample_transformed is not None
@@ -87,3 +98,77 @@ class FaceLandmarkDataset(Dataset):
             _, label = self.__getitem__(0)
             self._num_landmarks = torch.numel(label)
         return self._num_landmarks
+
+    def to_shards(self, shards_dir, shard_size=10000, num_workers=1):
+        """
+        Crops the images and landmarks once and stores them into memory-mapped shards,
+        which are re-used if they were already written with the same settings.
+
+        Args:
+            shards_dir (str): Path to the directory of the shards.
+            shard_size (int, optional): Maximum number of samples per shard. Defaults to 10000.
+            num_workers (int, optional): Number of processes used to decode the images. Defaults to 1.
+
+        Returns:
+            FaceLandmarkShardDataset: Dataset that reads from the shards.
+        """
+        attributes = {
+            "num_samples": len(self.png_files),
+            "first_file": os.path.basename(self.png_files[0]),
+            "crop_size": self.crop_size,
+        }
+
+        if not is_valid_shards_dir(shards_dir, attributes):
+            write_shards(
+                partial(_load_cropped_sample, crop_size=self.crop_size),
+                self.png_files,
+                shards_dir,
+                shard_size=shard_size,
+                num_workers=num_workers,
+                attributes=attributes,
+            )
+
+        return FaceLandmarkShardDataset(shards_dir)
+
+
+class FaceLandmarkShardDataset(ShardDataset):
+    """Dataset class for Microsoft Face Synthetics dataset that was cropped ahead of time
+    (see `FaceLandmarkDataset.to_shards()`), thus only the remaining transforms are applied.
+
+    Args:
+        shards_dir (str): Path to the directory of the shards.
+    """
+
+    def __init__(self, shards_dir):
+        super().__init__(shards_dir)
+
+        self.crop_size = self.metadata["attributes"]["crop_size"]
+        self.postprocess = transforms.FaceLandmarkTransform(crop_size=self.crop_size).postprocess
+
+    def __getitem__(self, index):
+        """
+        Returns the image and landmarks of the sample at the given index.
+
+        Args:
+            index (int): Index of the sample to retrieve.
+
+        Returns:
+            tuple: A tuple containing the transformed image and landmarks of the sample.
+        """
+        sample = super().__getitem__(index)
+
+        # `Sample` copies the (read-only) image out of the shard
+        sample = transforms.Sample(image=sample["image"], landmarks=np.array(sample["landmarks"]))
+        sample_transformed = self.postprocess(sample)
+
+        return sample_transformed.image, sample_transformed.landmarks
+
+    @property
+    def num_landmarks(self):
+        """
+        Returns the number of landmarks in each sample.
+
+        Returns:
+            int: The number of landmarks in each sample.
+        """
+        return int(np.prod(self.metadata["fields"]["landmarks"]["shape"]))
@@ -20,9 +20,11 @@ from torchvision.transforms.functional import InterpolationMode
 from torchvision.models.quantization.mobilenetv2 import _replace_relu
 from torchinfo import summary
 
-from dataset import FaceLandmarkDataset
+from dataset import FaceLandmarkDataset, FaceLandmarkShardDataset
 from search_space import create_model_from_search_results
 
+from archai.trainers.parallel_candidate_trainer import CandidateTrainer
+
 
 def average_error(target, output):
     errors = target - output  # shape (B, K, 2)
@@ -131,6 +133,13 @@ def load_data(traindir, args):
     st = time.time()
     assert val_crop_size == train_crop_size
     dataset = FaceLandmarkDataset(traindir, limit=args.max_num_images, crop_size=train_crop_size)
+    if args.shards_path:
+        # Only the main process writes the shards, which are then read by every process
+        if utils.is_main_process():
+            dataset.to_shards(args.shards_path, num_workers=max(args.workers, 1))
+        if utils.is_dist_avail_and_initialized():
+            torch.distributed.barrier()
+        dataset = FaceLandmarkShardDataset(args.shards_path)
     print("Took", time.time() - st)
 
     validation_dataset_size = int(len(dataset) * 0.1)
@@ -165,59 +174,25 @@ def setup_qat(model: nn.Module) -> None:
     torch.ao.quantization.prepare_qat(model.train(), inplace=True)
 
 
-def train(args, model: nn.Module = None):
-    if args.output_dir:
-        utils.mkdir(args.output_dir)
-
-    utils.init_distributed_mode(args)
-    print(args)
+def create_model(args, num_classes: int) -> nn.Module:
+    if args.search_result_archid:
+        model = create_model_from_search_results(
+            args.search_result_archid,
+            args.search_result_csv,
+            num_classes=num_classes,
+            qat=args.qat,
+            qat_skip_layers=args.qat_skip_layers)
 
-    device = torch.device(args.device)
-
-    if args.use_deterministic_algorithms:
-        torch.backends.cudnn.benchmark = False
-        torch.use_deterministic_algorithms(True)
+        if (args.qat):
+            print('Preparing for QAT')
+            setup_qat(model)
     else:
-        torch.backends.cudnn.benchmark = True
-
-    dataset, dataset_test, train_sampler, test_sampler = load_data(args.data_path, args)
+        model = torchvision.models.__dict__[args.model](weights=args.weights, num_classes=num_classes)
 
-    num_classes = dataset.dataset.num_landmarks
-    data_loader = torch.utils.data.DataLoader(
-        dataset,
-        batch_size=args.batch_size,
-        sampler=train_sampler,
-        num_workers=args.workers,
-        pin_memory=True,
-    )
-    data_loader_test = torch.utils.data.DataLoader(
-        dataset_test, batch_size=args.batch_size, sampler=test_sampler, num_workers=args.workers, pin_memory=True
-    )
+    return model
 
-    print("Creating model")
-    if model is None:
-        if args.search_result_archid:
-            model = create_model_from_search_results(
-                args.search_result_archid,
-                args.search_result_csv,
-                num_classes=num_classes,
-                qat=args.qat,
-                qat_skip_layers=args.qat_skip_layers)
-
-            if (args.qat):
-                print('Preparing for QAT')
-                setup_qat(model)
-        else:
-            model = torchvision.models.__dict__[args.model](weights=args.weights, num_classes=num_classes)
-    model.to(device)
-
-    if args.distributed and args.sync_bn:
-        model = torch.nn.SyncBatchNorm.convert_sync_batchnorm(model)
-
-    print(summary(model, input_size=(1, 3, 192, 192)))
-
-    criterion = nn.MSELoss()
 
+def create_optimizer(args, model: nn.Module) -> torch.optim.Optimizer:
     if args.norm_weight_decay is None:
         parameters = model.parameters()
     else:
@@ -243,8 +218,10 @@ def train(args, model: nn.Module = None):
     else:
         raise RuntimeError(f"Invalid optimizer {args.opt}. Only SGD, RMSprop and AdamW are supported.")
 
-    scaler = torch.cuda.amp.GradScaler() if args.amp else None
+    return optimizer
 
+
+def create_lr_scheduler(args, optimizer: torch.optim.Optimizer):
     args.lr_scheduler = args.lr_scheduler.lower()
     if args.lr_scheduler == "steplr":
         main_lr_scheduler = torch.optim.lr_scheduler.StepLR(optimizer, step_size=args.lr_step_size, gamma=args.lr_gamma)
@@ -279,6 +256,56 @@ def train(args, model: nn.Module = None):
     else:
         lr_scheduler = main_lr_scheduler
 
+    return lr_scheduler
+
+
+def train(args, model: nn.Module = None):
+    if args.output_dir:
+        utils.mkdir(args.output_dir)
+
+    utils.init_distributed_mode(args)
+    print(args)
+
+    device = torch.device(args.device)
+
+    if args.use_deterministic_algorithms:
+        torch.backends.cudnn.benchmark = False
+        torch.use_deterministic_algorithms(True)
+    else:
+        torch.backends.cudnn.benchmark = True
+
+    dataset, dataset_test, train_sampler, test_sampler = load_data(args.data_path, args)
+
+    num_classes = dataset.dataset.num_landmarks
+    data_loader = torch.utils.data.DataLoader(
+        dataset,
+        batch_size=args.batch_size,
+        sampler=train_sampler,
+        num_workers=args.workers,
+        pin_memory=True,
+    )
+    data_loader_test = torch.utils.data.DataLoader(
+        dataset_test, batch_size=args.batch_size, sampler=test_sampler, num_workers=args.workers, pin_memory=True
+    )
+
+    print("Creating model")
+    if model is None:
+        model = create_model(args, num_classes)
+    model.to(device)
+
+    if args.distributed and args.sync_bn:
+        model = torch.nn.SyncBatchNorm.convert_sync_batchnorm(model)
+
+    print(summary(model, input_size=(1, 3, 192, 192)))
+
+    criterion = nn.MSELoss()
+
+    optimizer = create_optimizer(args, model)
+
+    scaler = torch.cuda.amp.GradScaler() if args.amp else None
+
+    lr_scheduler = create_lr_scheduler(args, optimizer)
+
     model_without_ddp = model
     if args.distributed:
         model = torch.nn.parallel.DistributedDataParallel(model, device_ids=[args.gpu])
@@ -357,6 +384,80 @@ def train(args, model: nn.Module = None):
     return val_error
 
 
+class LandmarkCandidateTrainer(CandidateTrainer):
+    """Trains a single search result, fed with batches by `ParallelCandidateTrainer`."""
+
+    def __init__(self, args, archid: str, num_classes: int):
+        self.args = copy.deepcopy(args)
+        self.args.search_result_archid = archid
+        self.device = torch.device(args.device)
+
+        self.model = create_model(self.args, num_classes).to(self.device)
+        self.criterion = nn.MSELoss()
+        self.optimizer = create_optimizer(self.args, self.model)
+        self.lr_scheduler = create_lr_scheduler(self.args, self.optimizer)
+
+        self.output_dir = os.path.join(args.output_dir, archid) if args.output_dir else None
+        if self.output_dir:
+            utils.mkdir(self.output_dir)
+
+        self._reset_error()
+
+    def _reset_error(self):
+        self.error_sum, self.num_samples = 0.0, 0
+
+    def train_step(self, batch):
+        self.model.train()
+
+        image, target = batch[0].to(self.device), batch[1].to(self.device)
+        target = torch.squeeze(target)
+
+        output = torch.reshape(self.model(image), target.shape)
+        loss = self.criterion(output, target)
+
+        self.optimizer.zero_grad()
+        loss.backward()
+        if self.args.clip_grad_norm is not None:
+            nn.utils.clip_grad_norm_(self.model.parameters(), self.args.clip_grad_norm)
+        self.optimizer.step()
+
+    def eval_step(self, batch):
+        self.model.eval()
+
+        image, target = batch[0].to(self.device), batch[1].to(self.device)
+        output = torch.reshape(self.model(image), target.shape)
+
+        batch_size = image.shape[0]
+        self.error_sum += average_error(target, output).item() * batch_size
+        self.num_samples += batch_size
+
+    def end_epoch(self, epoch):
+        self.lr_scheduler.step()
+
+        val_error = self.error_sum / max(self.num_samples, 1)
+        print(f"Test: {self.args.search_result_archid} Epoch: [{epoch}] Error {val_error:.4f}")
+        self._reset_error()
+
+        if self.output_dir:
+            model_to_save = self.model
+            if self.args.qat:
+                model_to_save = copy.deepcopy(self.model)
+                model_to_save.eval()
+                model_to_save.to(torch.device("cpu"))
+                torch.ao.quantization.convert(model_to_save, inplace=True)
+
+            checkpoint = {
+                "model": model_to_save.state_dict(),
+                "optimizer": self.optimizer.state_dict(),
+                "lr_scheduler": self.lr_scheduler.state_dict(),
+                "epoch": epoch,
+                "args": self.args,
+            }
+            torch.save(checkpoint, os.path.join(self.output_dir, "checkpoint.pth"))
+
+        return val_error
+
+
 def get_args_parser(add_help=True):
     import argparse
 
@@ -370,6 +471,13 @@ def get_args_parser(add_help=True):
         type=int,
         help="limit to number of images to use in dataset",
     )
+    parser.add_argument(
+        "--shards_path",
+        "--shards-path",
+        default=None,
+        type=str,
+        help="path to the cropped dataset shards, which are written on the first run",
+    )
     parser.add_argument(
         "--search_result_archid", "--search-result-archid", default=None, type=str, help="nas search arch id to use"
     )
@@ -1,48 +1,66 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
+import argparse
 import csv
 import subprocess
+from functools import partial
+
+import torch
 
 """Train the models that are in the pareto front"""
 
-# Please change the following variables to your own path
-data_dir = "face_synthetics/dataset_100000"
-output_dir = "./output"
-csv_file = "search_results.csv"
-
-# Read the search results and pick the models in the pareto front
-pareto_archids = []
-search_results = []
-with open(csv_file, "r") as csvfile:
-    reader = csv.DictReader(csvfile)
-    for row in reader:
-        search_results.append(row)
-        if row["is_pareto"] == "True":
-            pareto_archids.append(row["archid"])
-print(f"Models to be trained: {pareto_archids}")
-
-# Train the models with subprocess call
-training_accuracy = {}
-num_epochs = 100
-for arch_id in pareto_archids:
-    print(f"Training model with arch_id: {arch_id}")
-    cmd = [
-        "torchrun",
-        "--nproc_per_node=4",
-        "train.py",
+
+def get_args_parser():
+    parser = argparse.ArgumentParser(description="Trains the models in the pareto front of a search")
+
+    # Please change the following defaults to your own path
+    parser.add_argument("--data_path", default="face_synthetics/dataset_100000", type=str, help="dataset path")
+    parser.add_argument("--output_dir", default="./output", type=str, help="path to save outputs")
+    parser.add_argument("--csv_file", default="search_results.csv", type=str, help="search results")
+    parser.add_argument(
+        "--output_csv",
+        default="search_results_with_full_validation_error.csv",
+        type=str,
+        help="search results merged with the full training validation error",
+    )
+    parser.add_argument("--epochs", default=100, type=int, help="number of training epochs")
+    parser.add_argument("--device", default="cuda", type=str, help="device (Use cuda or cpu Default: cuda)")
+    parser.add_argument("--nproc_per_node", default=4, type=int, help="number of processes per model (torchrun)")
+
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="trains the models concurrently in a single job, sharing the same data stream",
+    )
+    parser.add_argument(
+        "--max_parallel_candidates", default=4, type=int, help="maximum number of models trained concurrently"
+    )
+    parser.add_argument(
+        "--num_threads_per_candidate",
+        default=None,
+        type=int,
+        help="number of threads of each model (default: CPUs are evenly split between models)",
+    )
+    parser.add_argument("--workers", default=16, type=int, help="number of data loading workers (parallel mode)")
+
+    return parser
+
+
+def get_train_args(args, csv_file):
+    return [
         "--data-path",
-        data_dir,
+        args.data_path,
         "--output_dir",
-        output_dir,
-        "--search_result_archid",
-        arch_id,
+        args.output_dir,
         "--search_result_csv",
         csv_file,
+        "--device",
+        args.device,
         "--train-crop-size",
         "128",
         "--epochs",
-        str(num_epochs),
+        str(args.epochs),
         "--batch-size",
         "32",
         "--lr",
@@ -55,43 +73,113 @@ for arch_id in pareto_archids:
         "100",
         "--lr-gamma",
         "0.5",
-        "-wd",
+        "--wd",
         "0.00001",
     ]
 
-    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, universal_newlines=True)
-
-    val_errors = []
-    while True:
-        output = process.stdout.readline()
-        if output == "" and process.poll() is not None:
-            break
-        if output:
-            print(output.strip())
-            if output.startswith("Test:"):
-                if "Error" in output:
-                    error_str = output.split()[-1]
-                    val_error = float(error_str)
-                    val_errors.append(val_error)
-
-    result = process.poll()
-    assert val_errors and len(val_errors) != 0  # should have at least one error
-    training_accuracy[arch_id] = val_errors[-1]
-
-# Merge training accuracy to search_results
-merged_data = []
-for row in search_results:
-    arch_id = row["archid"]
-    if arch_id in training_accuracy:
-        row["Full_Training_Validation_Error"] = training_accuracy[arch_id]
+
+def train_sequential(args, archids):
+    """Trains each model in its own torchrun job"""
+    training_accuracy = {}
+    for arch_id in archids:
+        print(f"Training model with arch_id: {arch_id}")
+        cmd = [
+            "torchrun",
+            f"--nproc_per_node={args.nproc_per_node}",
+            "train.py",
+            "--search_result_archid",
+            arch_id,
+        ] + get_train_args(args, args.csv_file)
+
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, universal_newlines=True)
+
+        val_errors = []
+        while True:
+            output = process.stdout.readline()
+            if output == "" and process.poll() is not None:
+                break
+            if output:
+                print(output.strip())
+                if output.startswith("Test:"):
+                    if "Error" in output:
+                        error_str = output.split()[-1]
+                        val_error = float(error_str)
+                        val_errors.append(val_error)
+
+        assert val_errors and len(val_errors) != 0  # should have at least one error
+        training_accuracy[arch_id] = val_errors[-1]
+
+    return training_accuracy
+
+
+def train_parallel(args, archids):
+    """Trains groups of models concurrently, decoding each batch once for the whole group"""
+    from archai.trainers.parallel_candidate_trainer import ParallelCandidateTrainer
+    from train import LandmarkCandidateTrainer, get_args_parser as get_train_args_parser, load_data
+
+    train_args = get_train_args(args, args.csv_file) + ["--workers", str(args.workers)]
+    train_args = get_train_args_parser().parse_args(train_args)
+    train_args.distributed = False
+
+    dataset, dataset_test, train_sampler, test_sampler = load_data(train_args.data_path, train_args)
+    num_classes = dataset.dataset.num_landmarks
+    data_loader = torch.utils.data.DataLoader(
+        dataset, batch_size=train_args.batch_size, sampler=train_sampler, num_workers=train_args.workers
+    )
+    data_loader_test = torch.utils.data.DataLoader(
+        dataset_test, batch_size=train_args.batch_size, sampler=test_sampler, num_workers=train_args.workers
+    )
+
+    training_accuracy = {}
+    for i in range(0, len(archids), args.max_parallel_candidates):
+        group = archids[i : i + args.max_parallel_candidates]
+        print(f"Training models with arch_ids: {group}")
+
+        candidate_fns = {
+            arch_id: partial(LandmarkCandidateTrainer, train_args, arch_id, num_classes) for arch_id in group
+        }
+        trainer = ParallelCandidateTrainer(candidate_fns, num_threads_per_candidate=args.num_threads_per_candidate)
+        val_errors = trainer.fit(data_loader, data_loader_test, epochs=train_args.epochs)
+
+        training_accuracy.update({arch_id: errors[-1] for arch_id, errors in val_errors.items()})
+
+    return training_accuracy
+
+
+def merge_training_accuracy(search_results, training_accuracy, output_csv):
+    """Writes the search results with an extra column holding the full training validation error"""
+    merged_data = []
+    for row in search_results:
+        row = dict(row)
+        row["Full_Training_Validation_Error"] = training_accuracy.get(row["archid"], "")
+        merged_data.append(row)
+
+    fieldnames = merged_data[0].keys()
+    with open(output_csv, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in merged_data:
+            writer.writerow(row)
+
+
+if __name__ == "__main__":
+    args = get_args_parser().parse_args()
+
+    # Read the search results and pick the models in the pareto front
+    pareto_archids = []
+    search_results = []
+    with open(args.csv_file, "r") as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            search_results.append(row)
+            if row["is_pareto"] == "True":
+                pareto_archids.append(row["archid"])
+    print(f"Models to be trained: {pareto_archids}")
+
+    if args.parallel:
+        training_accuracy = train_parallel(args, pareto_archids)
     else:
-        row["Full_training_Validation_Error"] = ""
-    merged_data.append(row)
-
-# Write to csv
-fieldnames = search_results[0].keys()
-with open("search_results_with_full_validation_error.csv", "w", newline="") as csvfile:
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-    writer.writeheader()
-    for row in merged_data:
-        writer.writerow(row)
+        training_accuracy = train_sequential(args, pareto_archids)
+
+    # Merge training accuracy to search_results
+    merge_training_accuracy(search_results, training_accuracy, args.output_csv)
@@ -123,15 +123,19 @@ class SampleToTensor:
 
 
 class FaceLandmarkTransform:
-    """Transforms a sample of an image and its landmarks."""
+    """Transforms a sample of an image and its landmarks.
+
+    The deterministic `preprocess` (cropping) can be applied once ahead of time,
+    while `postprocess` is applied every time a sample is loaded.
+    """
 
     def __init__(
         self,
         crop_size,
     ):
-        self.transform = Compose(
-            [ExtractRegionOfInterest(roi_size=crop_size), SampleToTensor(), NormalizeCoordinates()]
-        )
+        self.preprocess = ExtractRegionOfInterest(roi_size=crop_size)
+        self.postprocess = Compose([SampleToTensor(), NormalizeCoordinates()])
+        self.transform = Compose([self.preprocess, self.postprocess])
 
     def __call__(self, sample: Sample):
         return self.transform(sample)
@@ -0,0 +1,51 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import threading
+import time
+
+from archai.common.completion_tracker import CompletionTracker
+from archai.common.store import ArchaiStore
+from archai.common.store_backend import LocalStoreBackend
+
+
+def _complete_jobs(store, names, delay):
+    for name in names:
+        time.sleep(delay)
+        e = store.get_status(name)
+        e["status"] = "complete"
+        e["accuracy"] = float(name.split("_")[-1])
+        store.merge_status_entity(e)
+
+
+def test_completion_tracker(tmp_path):
+    store = ArchaiStore(backend=LocalStoreBackend(str(tmp_path)))
+    names = [f"job_{i}" for i in range(5)]
+
+    tracker = CompletionTracker(store, names, min_poll_interval=0.01, max_poll_interval=0.05)
+    assert tracker.poll() == {}
+    assert tracker.poll_interval == 0.02
+
+    # Jobs are completed by another thread, in reverse order
+    worker = threading.Thread(target=_complete_jobs, args=(store, names[::-1], 0.05))
+    worker.start()
+    results = list(tracker.as_completed(timeout=5.0))
+    worker.join()
+
+    assert [name for name, _ in results] == names[::-1]
+    assert all(e["accuracy"] == float(name.split("_")[-1]) for name, e in results)
+    assert tracker.pending == []
+    assert sorted(tracker.completed.keys()) == names
+
+
+def test_completion_tracker_timeout(tmp_path):
+    store = ArchaiStore(backend=LocalStoreBackend(str(tmp_path)))
+    store.update_status("job_0", "complete")
+    store.update_status("job_1", "running")
+
+    tracker = CompletionTracker(store, ["job_0", "job_1"], min_poll_interval=0.01, max_poll_interval=0.02)
+    results = list(tracker.as_completed(timeout=0.1))
+
+    assert [name for name, _ in results] == ["job_0"]
+    assert tracker.pending == ["job_1"]
+    assert tracker.last_statuses["job_1"]["status"] == "running"
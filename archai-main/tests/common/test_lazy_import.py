@@ -0,0 +1,50 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import subprocess
+import sys
+import types
+
+import pytest
+
+from archai.common.lazy_import import LazyModule, lazy_exports, lazy_import
+
+
+def test_lazy_import():
+    # Modules that have already been imported are returned directly
+    assert lazy_import("sys") is sys
+
+    module = LazyModule("json")
+    assert module.__dict__["_module"] is None
+    assert module.loads("[1]") == [1]
+    assert "loads" in dir(module)
+
+
+def test_lazy_exports():
+    module = types.ModuleType("lazy_package")
+    module.__getattr__, module.__dir__ = lazy_exports("lazy_package", {"OrderedDict": "collections"})
+    sys.modules["lazy_package"] = module
+
+    try:
+        from lazy_package import OrderedDict
+
+        assert OrderedDict.__module__ == "collections"
+        assert "OrderedDict" in vars(module)
+        assert "OrderedDict" in module.__dir__()
+
+        with pytest.raises(AttributeError):
+            module.__getattr__("Missing")
+    finally:
+        del sys.modules["lazy_package"]
+
+
+def test_lazy_entry_points():
+    code = (
+        "import sys\n"
+        "import archai.discrete_search.api, archai.discrete_search.evaluators\n"
+        "import archai.discrete_search.search_spaces.cv, archai.discrete_search.search_spaces.nlp\n"
+        "print(sorted(m for m in ['matplotlib', 'onnxruntime', 'pandas', 'ray', 'transformers'] if m in sys.modules))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+    assert output.strip().splitlines()[-1] == "[]"
@@ -32,3 +32,34 @@ def test_ordered_dict_logger():
     assert logger.root_node["test_key"] == "test_value"
     if os.path.exists("log.yaml"):
         os.remove("log.yaml")
+
+
+def test_ordered_dict_logger_journal(tmp_path):
+    file_path = str(tmp_path / "log.yaml")
+    logger = OrderedDictLogger(file_path=file_path, delay=0.0, use_journal=True)
+    assert logger.journal_file_path == str(tmp_path / "log.jsonl")
+
+    logger.info({"test_key": "test_value"})
+    with logger.pushd("epoch", 1):
+        logger.info({"loss": 0.5})
+    logger.warn("test_warning")
+    logger.info({"test_key": "new_test_value"})
+
+    # Assert that saves only append the updates to the journal
+    with open(logger.journal_file_path, "r") as f:
+        assert len(f.readlines()) == 4
+    assert not os.path.exists(file_path)
+
+    # Assert that the journal reconstructs the log
+    journal_logger = OrderedDictLogger(delay=0.0)
+    journal_logger.load(logger.journal_file_path)
+    assert journal_logger.root_node == logger.root_node
+    assert journal_logger.root_node["test_key"] == "new_test_value"
+    assert journal_logger.root_node["epoch"]["1"]["loss"] == 0.5
+    assert journal_logger.root_node["warnings"]["3"] == "test_warning"
+
+    # Assert that closing the logger compacts the journal into a YAML file
+    logger.close()
+    yaml_logger = OrderedDictLogger(delay=0.0)
+    yaml_logger.load(file_path)
+    assert yaml_logger.root_node == logger.root_node
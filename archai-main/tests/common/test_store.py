@@ -3,6 +3,7 @@ import numpy as np
 import tempfile
 import uuid
 from archai.common.store import ArchaiStore
+from archai.common.store_backend import AzureStoreBackend, LocalStoreBackend
 
 CONNECTION_NAME = 'MODEL_STORAGE_CONNECTION_STRING'
 
@@ -15,6 +16,84 @@ def test_store():
 
     storage_account_name, storage_account_key = ArchaiStore.parse_connection_string(con_str)
     store = ArchaiStore(storage_account_name, storage_account_key, table_name='unittest')
+    _test_store(store)
+
+
+def test_local_store(tmp_path):
+    store = ArchaiStore(backend=LocalStoreBackend(str(tmp_path), table_name='unittest'))
+    _test_store(store)
+
+    # bulk operations
+    names = [f'model_{i}' for i in range(20)]
+    store.update_status_entities([{'PartitionKey': 'main', 'RowKey': n, 'name': n, 'status': 'new'} for n in names])
+    store.merge_status_entities([{'PartitionKey': 'main', 'RowKey': n, 'params': i} for i, n in enumerate(names)])
+    entities = store.get_existing_statuses(names[::2] + ['missing'])
+    assert sorted(entities.keys()) == sorted(names[::2])
+    assert all(e['status'] == 'new' and e['params'] == names.index(n) for n, e in entities.items())
+
+    files = []
+    for i in range(4):
+        files += [os.path.join(tmp_path, f'file_{i}.txt')]
+        with open(files[-1], 'w') as f:
+            f.write(str(i))
+    store.upload_blobs('model_0', files)
+    assert store.list_blobs('model_0/') == [f'model_0/file_{i}.txt' for i in range(4)]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        downloaded = store.download('model_0', tmpdir, 'file_[12]')
+        assert sorted(os.path.basename(f) for f in downloaded) == ['file_1.txt', 'file_2.txt']
+
+    store.delete_blobs('model_0', 'file_0.txt')
+    assert len(store.list_blobs('model_0/')) == 3
+
+
+class _FakeTableClient:
+    """In-memory table client following the Azure Tables insert and update semantics."""
+
+    def __init__(self):
+        self.entities = {}
+
+    def get_entity(self, partition_key, row_key):
+        from azure.core.exceptions import ResourceNotFoundError
+
+        if (partition_key, row_key) not in self.entities:
+            raise ResourceNotFoundError('Not Found')
+        return dict(self.entities[(partition_key, row_key)])
+
+    def update_entity(self, entity, mode):
+        from azure.core.exceptions import ResourceNotFoundError
+
+        if (entity['PartitionKey'], entity['RowKey']) not in self.entities:
+            raise ResourceNotFoundError('Not Found')
+        self.upsert_entity(entity, mode)
+
+    def upsert_entity(self, entity, mode):
+        from azure.data.tables import UpdateMode
+
+        keys = (entity['PartitionKey'], entity['RowKey'])
+        stored = self.entities.get(keys, {}) if mode == UpdateMode.MERGE else {}
+        self.entities[keys] = {**stored, **entity}
+
+    def submit_transaction(self, operations):
+        for _, entity, kwargs in operations:
+            self.upsert_entity(entity, **kwargs)
+
+
+def test_azure_store_merge_missing_entities():
+    backend = AzureStoreBackend('account', 'key')
+    backend.table_client = _FakeTableClient()
+    store = ArchaiStore(backend=backend)
+
+    # Assert that merging creates missing entities, whether one or several are merged
+    store.merge_status_entity({'PartitionKey': 'main', 'RowKey': 'model_0', 'params': 0})
+    store.merge_status_entities([{'PartitionKey': 'main', 'RowKey': f'model_{i}', 'params': i} for i in range(1, 3)])
+    assert all(store.get_existing_status(f'model_{i}')['params'] == i for i in range(3))
+
+    store.merge_status_entity({'PartitionKey': 'main', 'RowKey': 'model_0', 'status': 'new'})
+    assert store.get_existing_status('model_0')['params'] == 0
+
+
+def _test_store(store):
     name = str(uuid.uuid4())
     try:
         entities = store.get_all_status_entities()
@@ -0,0 +1,58 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import pickle
+
+import numpy as np
+import pytest
+
+from archai.datasets.cv.shard_cache_utils import (
+    ShardDataset,
+    is_valid_shards_dir,
+    write_shards,
+)
+
+
+def _load_item(idx):
+    return {
+        "image": np.full((4, 4, 3), idx, dtype=np.uint8),
+        "label": np.array([idx, -idx], dtype=np.float32),
+    }
+
+
+def test_write_and_read_shards(tmp_path):
+    shards_dir = str(tmp_path / "shards")
+    attributes = {"img_size": (4, 4)}
+
+    assert not is_valid_shards_dir(shards_dir, attributes)
+    write_shards(_load_item, list(range(7)), shards_dir, shard_size=3, attributes=attributes)
+
+    assert is_valid_shards_dir(shards_dir, attributes)
+    assert not is_valid_shards_dir(shards_dir, {"img_size": (8, 8)})
+    assert len(list((tmp_path / "shards").glob("image_*.npy"))) == 3
+
+    dataset = ShardDataset(shards_dir)
+    assert len(dataset) == 7
+
+    for idx in range(7):
+        sample = dataset[idx]
+        assert sample["image"].shape == (4, 4, 3) and sample["image"].dtype == np.uint8
+        assert np.all(sample["image"] == idx)
+        assert np.array_equal(sample["label"], [idx, -idx])
+
+    assert np.all(dataset[-1]["image"] == 6)
+    with pytest.raises(IndexError):
+        dataset[7]
+
+    # Memory maps are not pickled (e.g., when sent to data loader workers)
+    unpickled_dataset = pickle.loads(pickle.dumps(dataset))
+    assert unpickled_dataset._shards == {}
+    assert np.all(unpickled_dataset[4]["image"] == 4)
+
+    dataset = ShardDataset(shards_dir, transform=lambda sample: sample["label"].sum())
+    assert dataset[3] == 0.0
+
+
+def test_shard_dataset_missing_shards(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ShardDataset(str(tmp_path))
@@ -0,0 +1,73 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import pytest
+
+lmdb = pytest.importorskip("lmdb")
+
+import cv2
+import msgpack
+import numpy as np
+import torch
+from torch.utils.data import DataLoader
+
+from archai.datasets.cv.tensorpack_lmdb_dataset_provider_utils import (
+    ConcatTensorpackLmdbDataset,
+    TensorpackLmdbDataset,
+)
+
+
+def _write_lmdb(file_path, n_samples, offset=0):
+    db = lmdb.open(str(file_path), subdir=False, map_size=1 << 26)
+
+    with db.begin(write=True) as txn:
+        for i in range(n_samples):
+            img = np.full((8, 8, 3), offset + i, dtype=np.uint8)
+            mask = np.full((8, 8), (offset + i) % 5, dtype=np.uint8)
+            sample = {
+                "img": cv2.imencode(".png", img)[1].tobytes(),
+                "seg": {b"data": cv2.imencode(".png", mask)[1].tobytes()},
+            }
+            txn.put(f"{i:08d}".encode(), msgpack.dumps(sample))
+
+    db.close()
+
+    return str(file_path)
+
+
+def _assert_sample(sample, value):
+    assert sample["image"].shape == (3, 8, 8)
+    assert torch.allclose(sample["image"], torch.full((3, 8, 8), value / 255.0))
+    assert torch.equal(sample["mask"], torch.full((8, 8), value % 5, dtype=torch.long))
+
+
+def test_tensorpack_lmdb_dataset(tmp_path):
+    lmdb_file_path = _write_lmdb(tmp_path / "train.lmdb", 10)
+    dataset = TensorpackLmdbDataset(lmdb_file_path, "img", mask_key="seg")
+    assert len(dataset) == 10
+
+    # Datasets that read the same file share the environment
+    assert TensorpackLmdbDataset(lmdb_file_path, "img", zeroes_mask=True)[3]["mask"].sum() == 0
+
+    indices = [7, 2, 9, 2, 0]
+    for idx, sample in zip(indices, dataset.__getitems__(indices)):
+        _assert_sample(sample, idx)
+        _assert_sample(dataset[idx], idx)
+
+    # Workers re-open their own handles
+    data_loader = DataLoader(dataset, batch_size=4, num_workers=2)
+    images = torch.cat([batch["image"][:, 0, 0, 0] for batch in data_loader])
+    assert torch.allclose(images * 255.0, torch.arange(10, dtype=torch.float))
+
+
+def test_concat_tensorpack_lmdb_dataset(tmp_path):
+    dataset = ConcatTensorpackLmdbDataset(
+        [
+            TensorpackLmdbDataset(_write_lmdb(tmp_path / "a.lmdb", 4), "img", mask_key="seg"),
+            TensorpackLmdbDataset(_write_lmdb(tmp_path / "b.lmdb", 6, offset=4), "img", mask_key="seg"),
+        ]
+    )
+
+    indices = [9, 0, 5, 3, 4, -1]
+    for idx, sample in zip(indices, dataset.__getitems__(indices)):
+        _assert_sample(sample, idx % len(dataset))
@@ -2,7 +2,16 @@
 # Licensed under the MIT license.
 
 import shutil
-from archai.datasets.nlp.fast_hf_dataset_provider import FastHfDatasetProvider
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader
+
+from archai.datasets.nlp.fast_hf_dataset_provider import (
+    FastHfDatasetProvider,
+    PackedDataCollatorForLanguageModeling,
+)
+from archai.datasets.nlp.fast_hf_dataset_provider_utils import PackedHfDataset
 
 TEST_CACHE_DIR='test_fast_hf_dataset_cache'
 
@@ -41,3 +50,27 @@ def test_fast_hf_dataset_provider_from_cache():
         assert len(test_dataset) == 169
 
     shutil.rmtree(TEST_CACHE_DIR)
+
+
+def test_packed_data_collator_for_language_modeling():
+    input_ids = np.arange(25, dtype=np.uint16)
+    dataset = PackedHfDataset(input_ids, seq_len=4, document_offsets=np.array([0, 2, 7, 9, 20]))
+
+    collator = PackedDataCollatorForLanguageModeling(use_document_position_ids=True, use_document_attention_mask=True)
+    batch = next(iter(DataLoader(dataset, batch_size=3, collate_fn=collator)))
+
+    # Batch is a view of the gathered samples instead of a copy
+    assert torch.equal(batch["input_ids"], torch.arange(12).view(3, 4))
+    assert batch["labels"] is batch["input_ids"]
+
+    # Positions restart at the beginning of each sample and document
+    assert torch.equal(batch["position_ids"], torch.tensor([[0, 1, 0, 1], [0, 1, 2, 0], [0, 0, 1, 2]]))
+
+    attention_mask = batch["attention_mask"]
+    assert attention_mask.shape == (3, 1, 4, 4)
+    assert torch.equal(attention_mask[0, 0, 3], torch.tensor([False, False, True, True]))
+    assert not torch.any(attention_mask.triu(diagonal=1))
+
+    collator = PackedDataCollatorForLanguageModeling(use_shifted_labels=True)
+    batch = collator([dataset[2], dataset[0]])
+    assert torch.equal(batch["labels"], torch.stack([dataset[2][1], dataset[0][1]]))
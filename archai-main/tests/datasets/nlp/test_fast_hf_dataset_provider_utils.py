@@ -0,0 +1,43 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import numpy as np
+import pytest
+import torch
+
+from archai.datasets.nlp.fast_hf_dataset_provider_utils import (
+    FastHfDataset,
+    PackedHfDataset,
+)
+
+
+def test_packed_hf_dataset():
+    input_ids = np.arange(23, dtype=np.uint16)
+    fast_dataset = FastHfDataset(input_ids, seq_len=5)
+    dataset = PackedHfDataset(input_ids, seq_len=5)
+
+    # Trailing inputs that do not fill a sequence are dropped
+    assert len(dataset) == len(fast_dataset) == 4
+
+    for idx in range(len(dataset)):
+        input_ids_sample, labels_sample = dataset[idx]
+        assert torch.equal(input_ids_sample, fast_dataset[idx][0])
+        assert torch.equal(labels_sample, fast_dataset[idx][1])
+
+    # Samples gathered at once share the same storage
+    samples = dataset.__getitems__([3, 0])
+    assert torch.equal(samples[0][0], torch.arange(15, 20))
+    assert samples[0][0].untyped_storage().data_ptr() == samples[1][1].untyped_storage().data_ptr()
+
+    with pytest.raises(IndexError):
+        dataset[4]
+
+
+def test_packed_hf_dataset_document_ids():
+    input_ids = np.arange(13, dtype=np.uint16)
+    dataset = PackedHfDataset(input_ids, seq_len=4, document_offsets=np.array([0, 3, 4, 9]))
+
+    # Document identifiers are relative to the first document of the sample
+    assert torch.equal(dataset[0][2], torch.tensor([0, 0, 0, 1]))
+    assert torch.equal(dataset[1][2], torch.tensor([0, 0, 0, 0]))
+    assert torch.equal(dataset[2][2], torch.tensor([0, 1, 1, 1]))
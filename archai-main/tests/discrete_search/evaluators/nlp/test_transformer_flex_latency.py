@@ -9,6 +9,7 @@ from archai.discrete_search.evaluators.nlp.transformer_flex_latency import (
 from archai.discrete_search.search_spaces.nlp.transformer_flex.search_space import (
     TransformerFlexSearchSpace,
 )
+from archai.onnx.artifact_cache import OnnxArtifactCache
 
 
 @pytest.fixture
@@ -23,3 +24,24 @@ def test_transformer_flex_onnx_latency(search_space):
     # Assert that the returned latency is valid
     latency = objective.evaluate(arch)
     assert latency > 0.0
+
+
+def test_transformer_flex_onnx_latency_artifact_cache(search_space, tmp_path):
+    arch = search_space.random_sample()
+    cache = OnnxArtifactCache(cache_dir=str(tmp_path))
+    objective = TransformerFlexOnnxLatency(search_space, artifact_cache=cache)
+
+    assert objective.evaluate(arch) > 0.0
+    assert cache.size_mb() > 0.0
+
+    # Cached models are re-used instead of being exported again
+    assert objective.evaluate(arch) > 0.0
+
+
+def test_transformer_flex_onnx_latency_int8(search_space, tmp_path):
+    arch = search_space.random_sample()
+    cache = OnnxArtifactCache(cache_dir=str(tmp_path))
+    objective = TransformerFlexOnnxLatency(search_space, precision="int8", artifact_cache=cache)
+
+    assert objective.evaluate(arch) > 0.0
+    assert TransformerFlexOnnxLatency(search_space, precision="int8").evaluate(arch) > 0.0
@@ -9,6 +9,7 @@ from archai.discrete_search.evaluators.nlp.transformer_flex_memory import (
 from archai.discrete_search.search_spaces.nlp.transformer_flex.search_space import (
     TransformerFlexSearchSpace,
 )
+from archai.onnx.artifact_cache import OnnxArtifactCache
 
 
 @pytest.fixture
@@ -23,3 +24,27 @@ def test_transformer_flex_onnx_memory(search_space):
     # Assert that the returned memory is valid
     memory = objective.evaluate(arch)
     assert memory > 0.0
+
+
+def test_transformer_flex_onnx_memory_int8(search_space, tmp_path):
+    arch = search_space.random_sample()
+    memory = TransformerFlexOnnxMemory(search_space).evaluate(arch)
+
+    # Assert that the quantized model is smaller than the full-precision one
+    int8_memory = TransformerFlexOnnxMemory(search_space, precision="int8").evaluate(arch)
+    assert 0.0 < int8_memory < memory
+
+    # Assert that cached quantized models match the non-cached ones
+    cache = OnnxArtifactCache(cache_dir=str(tmp_path))
+    objective = TransformerFlexOnnxMemory(search_space, precision="int8", artifact_cache=cache)
+    assert objective.evaluate(arch) == pytest.approx(int8_memory, rel=0.05)
+    assert objective.evaluate(arch) == pytest.approx(int8_memory, rel=0.05)
+
+
+def test_transformer_flex_onnx_memory_invalid_precision(search_space):
+    with pytest.raises(AssertionError):
+        TransformerFlexOnnxMemory(search_space, precision="int4")
+
+    # Float16 conversion is only applied by the transformer optimizer
+    with pytest.raises(AssertionError):
+        TransformerFlexOnnxMemory(search_space, precision="fp16", only_ort=True)
@@ -5,6 +5,7 @@ import pytest
 import torch
 
 from archai.discrete_search.evaluators.pt_profiler import (
+    TorchCompiledLatency,
     TorchFlops,
     TorchLatency,
     TorchMacs,
@@ -68,6 +69,39 @@ def test_torch_latency(models, sample_input):
     assert all(lt > 0 for lt in latency2)
 
 
+def test_torch_compiled_latency(models, sample_input, tmp_path):
+    torch_latency = TorchCompiledLatency(
+        forward_args=sample_input, min_warmups=1, max_warmups=4, num_samples=5, cache_dir=str(tmp_path)
+    )
+    latency = [torch_latency.evaluate(model) for model in models]
+    assert all(lt > 0 for lt in latency)
+
+    stats = torch_latency.latency_stats[models[0].archid]
+    assert stats["ci_lower"] <= stats["mean"] <= stats["ci_upper"]
+    assert stats["num_samples"] + stats["num_trimmed"] == 5
+
+    # Compiled archs are re-used from the in-memory and on-disk caches
+    assert len(list(tmp_path.iterdir())) == len(set(m.archid for m in models))
+    compiled = torch_latency.compiled_cache[models[0].archid]
+    torch_latency.evaluate(models[0])
+    assert torch_latency.compiled_cache[models[0].archid] is compiled
+
+    # Assert that archs compiled with different input shapes are not re-used from disk
+    models[0].arch.train()
+    torch_latency2 = TorchCompiledLatency(
+        forward_args=torch.zeros(1, 1, 64, dtype=torch.long),
+        min_warmups=1,
+        max_warmups=2,
+        num_samples=2,
+        cache_dir=str(tmp_path),
+    )
+    torch_latency2.evaluate(models[0])
+    assert len(list(tmp_path.iterdir())) == len(set(m.archid for m in models)) + 1
+
+    # Assert that the training mode of the arch is restored
+    assert models[0].arch.training
+
+
 def test_torch_peak_cuda_memory(models, sample_input):
     if torch.cuda.is_available():
         torch_peak_memory = TorchPeakCudaMemory(forward_args=sample_input)
@@ -79,3 +113,19 @@ def test_torch_peak_cpu_memory(models, sample_input):
     torch_peak_memory = TorchPeakCpuMemory(forward_args=sample_input)
     peak_memory = [torch_peak_memory.evaluate(model) for model in models]
     assert all(m > 0 for m in peak_memory)
+
+
+def test_torch_evaluators_restore_device(models, sample_input):
+    if torch.cuda.is_available():
+        model = models[0]
+        model.arch.to("cuda")
+
+        # Assert that archs are moved back to their original device
+        TorchPeakCpuMemory(forward_args=sample_input).evaluate(model)
+        assert next(model.arch.parameters()).is_cuda
+
+        torch_latency = TorchCompiledLatency(
+            forward_args=sample_input, min_warmups=1, max_warmups=2, num_samples=2, use_cuda=True
+        )
+        torch_latency.evaluate(model)
+        assert next(model.arch.parameters()).is_cuda
@@ -0,0 +1,105 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import math
+
+import pytest
+import torch
+
+from archai.discrete_search.api.archai_model import ArchaiModel
+from archai.discrete_search.evaluators.functional import EvaluationFunction
+from archai.discrete_search.evaluators.zero_cost import (
+    GradNorm,
+    JacobianCovariance,
+    Snip,
+    SynFlow,
+    SyntheticPerplexity,
+    ZeroCostInputCache,
+    evaluate_rank_correlation,
+)
+
+
+def _cnn(width):
+    return torch.nn.Sequential(
+        torch.nn.Conv2d(3, width, 3, padding=1),
+        torch.nn.BatchNorm2d(width),
+        torch.nn.ReLU(),
+        torch.nn.AdaptiveAvgPool2d(1),
+        torch.nn.Flatten(),
+        torch.nn.Linear(width, 10),
+    )
+
+
+class _TinyLM(torch.nn.Module):
+    def __init__(self, vocab_size=32, d_model=16):
+        super().__init__()
+
+        self.embedding = torch.nn.Embedding(vocab_size, d_model)
+        self.rnn = torch.nn.GRU(d_model, d_model, batch_first=True)
+        self.head = torch.nn.Linear(d_model, vocab_size)
+
+    def forward(self, x):
+        return self.head(self.rnn(self.embedding(x))[0])
+
+
+@pytest.fixture
+def image_cache():
+    torch.manual_seed(0)
+    return ZeroCostInputCache(torch.rand(8, 3, 8, 8), torch.randint(0, 10, (8,)))
+
+
+@pytest.fixture
+def models():
+    torch.manual_seed(0)
+    return [ArchaiModel(arch=_cnn(w), archid=str(w)) for w in [2, 4, 8, 16]]
+
+
+@pytest.mark.parametrize("proxy_cls", [GradNorm, Snip, SynFlow, JacobianCovariance])
+def test_zero_cost_proxies(proxy_cls, image_cache, models):
+    proxy = proxy_cls(image_cache)
+
+    for model in models:
+        state_dict = {k: v.clone() for k, v in model.arch.state_dict().items()}
+        score = proxy.evaluate(model)
+
+        assert math.isfinite(score)
+        assert all(torch.equal(state_dict[k], v) for k, v in model.arch.state_dict().items())
+        assert all(p.grad is None for p in model.arch.parameters())
+
+
+def test_synthetic_perplexity():
+    cache = ZeroCostInputCache.from_synthetic_text(vocab_size=32, seq_len=16, batch_size=4)
+    assert torch.equal(cache.inputs[:, :8], cache.inputs[:, 8:])
+
+    model = ArchaiModel(arch=_TinyLM(), archid="lm")
+    state_dict = {k: v.clone() for k, v in model.arch.state_dict().items()}
+
+    score = SyntheticPerplexity(cache, n_steps=2).evaluate(model)
+    assert score < 0
+    assert all(torch.equal(state_dict[k], v) for k, v in model.arch.state_dict().items())
+
+    assert math.isfinite(GradNorm(cache).evaluate(model))
+
+
+def test_evaluate_rank_correlation(image_cache, models):
+    reference = EvaluationFunction(lambda model, budget: sum(p.numel() for p in model.arch.parameters()))
+    results = evaluate_rank_correlation(SynFlow(image_cache), reference, models)
+
+    assert -1.0 <= results["spearman"] <= 1.0
+    assert -1.0 <= results["kendall"] <= 1.0
+    assert len(results["proxy_results"]) == len(models)
+
+
+@pytest.mark.parametrize("proxy_cls", [GradNorm, Snip, SynFlow, JacobianCovariance])
+def test_zero_cost_proxy_without_parameters(proxy_cls, image_cache):
+    proxy = proxy_cls(image_cache)
+
+    # Parameter-free and frozen models, which do not have any gradient
+    for arch in [torch.nn.Flatten(), _cnn(4).requires_grad_(False)]:
+        score = proxy.evaluate(ArchaiModel(arch=arch, archid=""))
+
+        # Assert that models are scored, where the Jacobians of `JacobianCovariance` are
+        # computed with respect to the inputs, while other proxies have no connection to score
+        assert math.isfinite(score)
+        if proxy_cls is not JacobianCovariance:
+            assert score == 0.0
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from random import Random
 from archai.discrete_search.search_spaces.config import (
@@ -142,3 +143,58 @@ def test_ss_archid(rng, tree_c2):
         archids.add(config.archid)
 
     assert len(archids) == 3 # Will fail with probability approx 1/2^100
+
+
+def test_compiled_tree(rng, tree_c1):
+    tree = ArchParamTree(tree_c1)
+    compiled = tree.compile()
+    assert compiled.param_names == tree.get_param_name_list()
+
+    np_rng = np.random.default_rng(1)
+    indices = compiled.sample(100, np_rng)
+    assert indices.shape == (100, compiled.num_params)
+    assert (indices < compiled.num_choices).all()
+
+    features = compiled.encode(indices)
+    for row, row_features in zip(indices[:10], features[:10]):
+        config = compiled.decode(row)
+        assert config.pick('param1') == config.pick('sub1').pick('sub2').pick('param1_clone')
+        assert list(row_features) == tree.encode_config(config, track_unused_params=False)
+        assert (compiled.to_indices(config) == row).all()
+
+    mutated = compiled.mutate(indices, 1.0, np_rng)
+    assert (mutated < compiled.num_choices).all()
+    assert (compiled.mutate(indices, 0.0, np_rng) == indices).all()
+
+    assert compiled.encode(indices, 'ordinal').shape == indices.shape
+    assert (compiled.encode(indices, 'one_hot').sum(axis=1) == compiled.num_params).all()
+
+
+def test_compiled_tree_mutable_constants(rng):
+    tree = ArchParamTree({
+        'param': DiscreteChoice([1, 2]),
+        'constant_list': [1, 2],
+    })
+
+    # Assert that mutable constants are not shared between configs
+    config = tree.sample_config(rng)
+    config.pick('constant_list').append(3)
+
+    compiled = tree.compile()
+    assert compiled.template['constant_list'] == [1, 2]
+    assert tree.sample_config(rng).pick('constant_list') == [1, 2]
+
+    config = compiled.decode(np.zeros(1, dtype=np.int64))
+    assert config.pick('constant_list') is not compiled.template['constant_list']
+
+
+def test_ss_batch(tree_c2):
+    ss = ConfigSearchSpace(lambda c: None, ArchParamTree(tree_c2), seed=1, track_unused_params=False)
+
+    indices = ss.mutate_batch(ss.random_sample_batch(50))
+    assert ss.encode_batch(indices).shape == (50, 2)
+
+    m = ss.materialize(indices[0])
+    assert m.archid == ss.arch_param_tree.compile().hash(indices[:1])[0]
+    assert (ss.get_indices(m) == indices[0]).all()
+    assert list(ss.encode(m)) == list(ss.encode_batch(indices[:1])[0])
@@ -0,0 +1,99 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import copy
+from random import Random
+
+import pytest
+import torch
+
+from archai.discrete_search.search_spaces.cv.segmentation_dag.graph_analysis import (
+    analyze_graph,
+)
+from archai.discrete_search.search_spaces.cv.segmentation_dag.model import (
+    SegmentationDagModel,
+)
+from archai.discrete_search.search_spaces.cv.segmentation_dag.search_space import (
+    SegmentationDagSearchSpace,
+)
+
+
+def _perturb(graph, rng):
+    graph = copy.deepcopy(graph)
+    node = graph[rng.randint(1, len(graph) - 1)]
+    perturbation = rng.randint(0, 4)
+
+    if perturbation == 0:
+        node["inputs"] = [rng.choice(graph)["name"]]
+    elif perturbation == 1:
+        node["inputs"].append(rng.choice(graph)["name"])
+    elif perturbation == 2:
+        node["scale"] = rng.choice([1, 2, 4, 8, 16])
+    elif perturbation == 3:
+        graph[0]["scale"] = 2
+    else:
+        node["inputs"] = []
+
+    return graph
+
+
+@pytest.mark.parametrize("img_size", [(64, 64), (96, 64)])
+def test_analyze_graph(img_size):
+    search_space = SegmentationDagSearchSpace(nb_classes=5, img_size=img_size, max_layers=8, seed=1)
+    rng = Random(1)
+
+    for _ in range(5):
+        arch = search_space.random_sample()
+        graph = list(arch.arch.graph.values())
+        ch_map = {k: arch.arch.channels_per_scale[k] for k in ["base_channels", "delta_channels", "mult_delta"]}
+        post_upsample_layers = arch.arch.post_upsample_layers
+
+        for g in [graph] + [_perturb(graph, rng) for _ in range(3)]:
+            try:
+                model = SegmentationDagModel(
+                    g, ch_map, post_upsample_layers, img_size=img_size, nb_classes=search_space.nb_classes
+                )
+                is_valid, madds = search_space.is_valid_model(model)
+            except Exception:
+                is_valid, madds = False, None
+
+            assert search_space.is_valid_graph(g, ch_map, post_upsample_layers) == (is_valid, madds)
+
+        assert arch.metadata["macs"] == search_space.is_valid_model(arch.arch)[1]
+
+
+def test_analyze_graph_invalid():
+    ch_map = {"base_channels": 16, "delta_channels": 8}
+    graph = [
+        {"name": "input", "inputs": None, "op": "conv3x3", "scale": 1},
+        {"name": "layer_0", "inputs": ["input"], "op": "conv3x3", "scale": 2},
+        {"name": "output", "inputs": ["layer_0"], "op": None, "scale": 4},
+    ]
+    assert analyze_graph(graph, ch_map, img_size=(64, 64)) > 0
+
+    unused_graph = copy.deepcopy(graph)
+    unused_graph[-1]["inputs"] = ["input"]
+    with pytest.raises(ValueError, match="Unused nodes"):
+        analyze_graph(unused_graph, ch_map, img_size=(64, 64))
+
+    unordered_graph = copy.deepcopy([graph[0], graph[2], graph[1]])
+    with pytest.raises(ValueError, match="topological order"):
+        analyze_graph(unordered_graph, ch_map, img_size=(64, 64))
+
+    with pytest.raises(ValueError, match="Classifier"):
+        analyze_graph(graph, ch_map, post_upsample_layers=0, img_size=(64, 64))
+
+
+def test_execution_plan():
+    search_space = SegmentationDagSearchSpace(nb_classes=5, img_size=(64, 32), max_layers=8, seed=2)
+    x = torch.randn(2, 3, 32, 64)
+
+    for _ in range(3):
+        model = search_space.random_sample().arch.eval()
+
+        with torch.no_grad():
+            expected = model.validate_forward(x)
+
+            assert torch.equal(model(x), expected)
+            assert torch.equal(torch.jit.script(model)(x), expected)
+            assert torch.equal(torch.jit.trace(model, x)(x), expected)
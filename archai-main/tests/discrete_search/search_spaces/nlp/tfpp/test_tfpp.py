@@ -10,6 +10,7 @@ from transformers import PretrainedConfig, CodeGenConfig
 from archai.discrete_search.api import ArchaiModel
 from archai.discrete_search.search_spaces.config import ArchConfig, ConfigSearchSpace
 from archai.discrete_search.search_spaces.nlp import TfppSearchSpace
+from archai.discrete_search.search_spaces.nlp.tfpp.ops.local_attention import LocalAttention
 
 N_POSITIONS = 2048
 
@@ -46,3 +47,59 @@ def test_tfpp_sample_gpt2():
     for _ in range(5):
         model = search_space.random_sample()
         check_fwd_pass(model)
+
+
+@pytest.mark.parametrize('backbone', ['codegen', 'gpt2'])
+@pytest.mark.parametrize('op_subset', [['mha'], ['sep_conv1d'], ['sgconv'], ['local_attn']])
+@pytest.mark.parametrize('prefill_len, seq_len', [(1, 16), (6, 20), (8, 24), (1, 24)])
+def test_tfpp_incremental_decoding(backbone, op_subset, prefill_len, seq_len):
+    search_space = TfppSearchSpace(
+        backbone, embed_dims=64, inner_dims=128, total_layers=[2], total_heads=[4],
+        local_attn_window_sizes=8, sgconv_kernel_sizes=4, sconv1d_kernel_sizes=3,
+        op_subset=op_subset, mixed_ops=False, homogeneous=True, seed=1,
+        n_positions=64, vocab_size=100, rotary_dim=8
+    )
+
+    model = search_space.random_sample().arch.eval()
+    x = torch.randint(high=100, size=(2, seq_len))
+
+    with torch.no_grad():
+        logits = model(x).logits
+
+        # Prefills the cache and decodes the remaining tokens one at a time, where sequence
+        # lengths include multiples of the local attention window size
+        outputs = model(x[:, :prefill_len], use_cache=True)
+        inc_logits = [outputs.logits]
+
+        for i in range(prefill_len, x.shape[1]):
+            outputs = model(x[:, i:i+1], past_key_values=outputs.past_key_values, use_cache=True)
+            inc_logits.append(outputs.logits)
+
+    assert torch.allclose(logits, torch.cat(inc_logits, dim=1), atol=1e-5)
+
+
+def dense_local_attention(q, k, v, window_size):
+    # Dense (reference) causal local attention with exact window sizes
+    n = q.shape[-2]
+    q_t, k_t = torch.arange(n).unsqueeze(-1), torch.arange(n).unsqueeze(0)
+    q_w, k_w = q_t // window_size, k_t // window_size
+
+    mask = (k_t <= q_t) & (q_t <= k_t + window_size) & (k_w >= q_w - 1)
+
+    sim = (q @ k.transpose(-1, -2)) * q.shape[-1] ** -0.5
+    sim = sim.masked_fill(~mask, -torch.finfo(sim.dtype).max)
+
+    return sim.softmax(dim=-1) @ v
+
+
+@pytest.mark.parametrize('seq_len', [16, 13])
+def test_local_attention_look_around_pad(seq_len):
+    torch.manual_seed(0)
+
+    window_size = 8
+    attn = LocalAttention(window_size, causal=True, autopad=True, exact_windowsize=True)
+    q, k, v = torch.randn(3, 2, 4, seq_len, 16).unbind(0)
+
+    # Assert that the look-around padding of the first window is masked, regardless
+    # of whether the sequence needs to be padded
+    assert torch.allclose(attn(q, k, v), dense_local_attention(q, k, v, window_size), atol=1e-5)
@@ -39,3 +39,92 @@ def test_mem_transformer_lm_head_model_forward_pass(config):
     input_tensor = torch.randint(0, config.vocab_size, (1, 32))
     output = model(input_tensor)
     assert output.prediction_scores.shape == (1, 32, config.vocab_size)
+
+
+@pytest.mark.parametrize("div_val", [1, 2])
+def test_projected_adaptive_log_softmax(div_val):
+    torch.manual_seed(0)
+
+    crit = ProjectedAdaptiveLogSoftmax(128, 32, 48, [16, 48, 96], [False] * 4, div_val=div_val)
+    for p in crit.parameters():
+        torch.nn.init.normal_(p)
+
+    inputs = torch.randn(2, 17, 48)
+    labels = torch.randint(0, 128, (2, 17))
+
+    # Assert that the full-vocabulary log-probabilities are normalized
+    log_probs = crit(inputs)
+    assert torch.allclose(log_probs.exp().sum(-1), torch.ones(2 * 17), atol=1e-4)
+
+    # Assert that the loss matches the log-probabilities of the (shifted) labels
+    expected_nll = -log_probs.view(2, 17, -1)[:, :-1].gather(2, labels[:, 1:, None]).view(-1)
+    assert torch.allclose(crit(inputs, labels), expected_nll, atol=1e-4)
+
+    # Assert that the loss is sorted by cluster when `keep_order` is disabled
+    crit.keep_order = False
+    cluster_ids = torch.bucketize(labels[:, 1:].reshape(-1), torch.tensor([16, 48, 96]), right=True)
+    order = torch.argsort(cluster_ids, stable=True)
+    assert torch.allclose(crit(inputs, labels), expected_nll[order], atol=1e-4)
+
+
+def _per_cluster_nll(crit, inputs, labels):
+    # Reference (previous) implementation, which computes the loss of each cluster
+    # with a separate mask, where ignored labels do not belong to any cluster
+    inputs = inputs[..., :-1, :].reshape(-1, inputs.size(-1))
+    labels = labels[..., 1:].reshape(-1)
+
+    weights, biases = crit._get_cluster_params()
+    head_logits = crit._compute_logits(inputs, weights[0], biases[0], crit._get_shared_proj(0))
+    head_probs = torch.nn.functional.log_softmax(head_logits, dim=1)
+
+    output = torch.zeros_like(labels, dtype=inputs.dtype)
+    offset = 0
+    for i in range(len(crit.cutoffs)):
+        cutoff_start, cutoff_end = crit.cutoffs_ends[i], crit.cutoffs_ends[i + 1]
+        indexes_i = ((labels >= cutoff_start) & (labels < cutoff_end)).nonzero().squeeze(1)
+        if indexes_i.numel() == 0:
+            continue
+
+        target_i = labels.index_select(0, indexes_i) - cutoff_start
+        head_probs_i = head_probs.index_select(0, indexes_i)
+
+        if i == 0:
+            probs_i = head_probs_i.gather(1, target_i[:, None]).squeeze(1)
+        else:
+            inputs_i = inputs.index_select(0, indexes_i)
+            tail_logits_i = crit._compute_logits(inputs_i, weights[i], biases[i], crit._get_shared_proj(i))
+            tail_probs_i = torch.nn.functional.log_softmax(tail_logits_i, dim=1)
+            probs_i = head_probs_i[:, crit.cutoffs[0] + i - 1] + tail_probs_i.gather(1, target_i[:, None]).squeeze(1)
+
+        if crit.keep_order:
+            output = output.index_copy(0, indexes_i, -probs_i)
+        else:
+            output = torch.cat([output[:offset], -probs_i, output[offset + probs_i.size(0) :]])
+        offset += probs_i.size(0)
+
+    return output
+
+
+@pytest.mark.parametrize("keep_order", [True, False])
+@pytest.mark.parametrize("div_val", [1, 2])
+def test_projected_adaptive_log_softmax_ignored_labels(div_val, keep_order):
+    torch.manual_seed(0)
+
+    crit = ProjectedAdaptiveLogSoftmax(128, 32, 48, [16, 48, 96], [False] * 4, div_val=div_val, keep_order=keep_order)
+    for p in crit.parameters():
+        torch.nn.init.normal_(p)
+
+    inputs = torch.randn(2, 33, 48, requires_grad=True)
+    labels = torch.randint(0, 128, (2, 33))
+    labels[0, 10:20] = -100
+    labels[1, -5:] = -100
+
+    # Assert that outputs and gradients match the per-cluster implementation, where ignored labels have no loss
+    nll = crit(inputs, labels)
+    expected_nll = _per_cluster_nll(crit, inputs, labels)
+    assert torch.allclose(nll, expected_nll, atol=1e-4)
+    assert (nll == 0).sum() == (labels[:, 1:] < 0).sum()
+
+    grads = torch.autograd.grad(nll.sum(), [inputs] + list(crit.parameters()))
+    expected_grads = torch.autograd.grad(expected_nll.sum(), [inputs] + list(crit.parameters()))
+    assert all(torch.allclose(g, e, atol=1e-4) for g, e in zip(grads, expected_grads))
@@ -0,0 +1,96 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import torch
+from transformers import CodeGenConfig, CodeGenForCausalLM
+
+from archai.discrete_search.utils.weight_inheritance import (
+    ARCH_FUSED_PARAMS,
+    inherit_weights,
+)
+
+
+def _mlp(hidden_dims):
+    layers = []
+    in_dim = 4
+
+    for dim in hidden_dims:
+        layers.append(torch.nn.Linear(in_dim, dim))
+        in_dim = dim
+
+    return torch.nn.Sequential(*layers)
+
+
+def test_inherit_weights_same_shape():
+    parent, child = _mlp([8, 8]), _mlp([8, 8])
+
+    inherited = inherit_weights(parent, child)
+    assert len(inherited) == 4
+
+    x = torch.rand(2, 4)
+    assert torch.equal(parent(x), child(x))
+
+
+def test_inherit_weights_width():
+    parent, child = _mlp([8]), _mlp([6])
+    inherit_weights(parent, child)
+    assert torch.equal(child[0].weight, parent[0].weight[:6])
+
+    parent, child = _mlp([6]), _mlp([8])
+    init_weight = child[0].weight.detach().clone()
+    inherit_weights(parent, child)
+    assert torch.equal(child[0].weight[:6], parent[0].weight)
+    assert torch.equal(child[0].weight[6:], init_weight[6:])
+
+
+def test_inherit_weights_depth():
+    parent, child = _mlp([8, 8]), _mlp([8, 8, 8, 8])
+
+    inherited = inherit_weights(parent, child, depth_mapping="last")
+    assert inherited["3.weight"] == "1.weight"
+    assert torch.equal(child[3].weight, parent[1].weight)
+
+    inherited = inherit_weights(parent, child, depth_mapping="cycle")
+    assert inherited["2.weight"] == "0.weight"
+    assert inherited["3.weight"] == "1.weight"
+
+
+class _Attention(torch.nn.Module):
+    def __init__(self, hidden_size):
+        super().__init__()
+        self.qkv_proj = torch.nn.Linear(4, 3 * hidden_size)
+
+
+def test_inherit_weights_fused():
+    parent, child = _Attention(8), _Attention(6)
+    inherit_weights(parent, child)
+
+    # Assert that the query, key and value blocks are inherited separately
+    for parent_block, child_block in zip(parent.qkv_proj.weight.chunk(3), child.qkv_proj.weight.chunk(3)):
+        assert torch.equal(child_block, parent_block[:6])
+    for parent_block, child_block in zip(parent.qkv_proj.bias.chunk(3), child.qkv_proj.bias.chunk(3)):
+        assert torch.equal(child_block, parent_block[:6])
+
+    # Assert that fused tensors can be inherited as a whole
+    child = _Attention(6)
+    inherit_weights(parent, child, fused_params={})
+    assert torch.equal(child.qkv_proj.weight, parent.qkv_proj.weight[:18])
+
+
+def _codegen_qkv(model, mp_num=4):
+    # Splits the fused projection of the first layer as CodeGen does, i.e.,
+    # `mp_num` groups of [query, value, key] blocks
+    weight = model.transformer.h[0].attn.qkv_proj.weight
+    query, value, key = weight.reshape(mp_num, 3, -1, weight.shape[-1]).unbind(1)
+
+    return query, key, value
+
+
+def test_inherit_weights_codegen_width():
+    parent = CodeGenForCausalLM(CodeGenConfig(vocab_size=64, n_embd=128, n_head=8, n_layer=1, rotary_dim=8))
+    child = CodeGenForCausalLM(CodeGenConfig(vocab_size=64, n_embd=64, n_head=4, n_layer=1, rotary_dim=8))
+    inherit_weights(parent, child, fused_params=ARCH_FUSED_PARAMS["codegen"])
+
+    # Assert that the query, key and value of each group are inherited separately
+    for parent_proj, child_proj in zip(_codegen_qkv(parent), _codegen_qkv(child)):
+        assert torch.equal(child_proj, parent_proj[:, :16, :64])
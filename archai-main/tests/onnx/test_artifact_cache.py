@@ -0,0 +1,76 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import os
+
+import torch
+
+from archai.discrete_search.api.archai_model import ArchaiModel
+from archai.discrete_search.evaluators.onnx_model import AvgOnnxLatency
+from archai.onnx.artifact_cache import OnnxArtifactCache
+
+
+def _create_file(size):
+    def _create_fn(tmp_dir):
+        file_path = os.path.join(tmp_dir, "model.onnx")
+        with open(file_path, "wb") as f:
+            f.write(b"0" * size)
+
+        return file_path
+
+    return _create_fn
+
+
+def test_onnx_artifact_cache(tmp_path):
+    cache = OnnxArtifactCache(cache_dir=str(tmp_path), max_size_mb=None)
+
+    key = OnnxArtifactCache.get_key("arch", opset=11)
+    assert key == OnnxArtifactCache.get_key("arch", opset=11)
+    assert key != OnnxArtifactCache.get_key("arch", opset=13)
+    assert cache.get(key) is None
+
+    calls = []
+
+    def _create_fn(tmp_dir):
+        calls.append(tmp_dir)
+        return _create_file(16)(tmp_dir)
+
+    path = cache.get_or_create(key, "raw", _create_fn)
+    assert os.path.exists(path)
+    assert cache.get_or_create(key, "raw", _create_fn) == path
+    assert len(calls) == 1
+
+    cache.get_or_create(key, "opt", _create_fn)
+    assert len(calls) == 2
+    assert cache.get(key, "opt") is not None
+
+    cache.clear()
+    assert cache.get(key) is None
+
+
+def test_onnx_artifact_cache_eviction(tmp_path):
+    cache = OnnxArtifactCache(cache_dir=str(tmp_path), max_size_mb=1.5)
+    size = 1024**2
+
+    cache.get_or_create("a", "raw", _create_file(size))
+    os.utime(os.path.join(cache.cache_dir, "a"), (0, 0))
+    cache.get_or_create("b", "raw", _create_file(size))
+
+    # Least recently used entry is evicted
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert cache.size_mb() <= 1.5
+
+
+def test_avg_onnx_latency_artifact_cache(tmp_path, monkeypatch):
+    cache = OnnxArtifactCache(cache_dir=str(tmp_path))
+    evaluator = AvgOnnxLatency(input_shape=(1, 8), artifact_cache=cache)
+    arch = ArchaiModel(torch.nn.Linear(8, 4), archid="linear")
+
+    assert evaluator.evaluate(arch) > 0.0
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("Model should not be exported again.")
+
+    monkeypatch.setattr(torch.onnx, "export", _fail)
+    assert evaluator.evaluate(arch) > 0.0
@@ -3,10 +3,13 @@
 
 import os
 
+from onnx import ModelProto
+from onnxruntime import InferenceSession
 from transformers import GPT2Config, GPT2LMHeadModel
 
 from archai.onnx.config_utils.onnx_config_base import OnnxConfig
-from archai.onnx.export import export_to_onnx
+from archai.onnx.export import export_to_onnx, export_to_onnx_model
+from archai.onnx.onnx_loader import load_from_onnx
 
 
 def test_export_to_onnx():
@@ -26,3 +29,16 @@ def test_export_to_onnx():
     assert isinstance(onnx_config, OnnxConfig)
 
     os.remove(onnx_model_path)
+
+
+def test_export_to_onnx_model():
+    model = GPT2LMHeadModel(config=GPT2Config(vocab_size=1, n_layer=1))
+
+    # Assert that the model is exported without writing any files
+    onnx_model, onnx_config = export_to_onnx_model(model)
+    assert isinstance(onnx_model, ModelProto)
+    assert isinstance(onnx_config, OnnxConfig)
+    assert not os.path.exists("tmp")
+
+    session = load_from_onnx(onnx_model)
+    assert isinstance(session, InferenceSession)
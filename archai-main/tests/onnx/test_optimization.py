@@ -3,11 +3,12 @@
 
 import os
 
+from onnx import ModelProto
 from transformers import GPT2Config, GPT2LMHeadModel
 
 from archai.common.file_utils import create_file_name_identifier
-from archai.onnx.export import export_to_onnx
-from archai.onnx.optimization import optimize_onnx
+from archai.onnx.export import export_to_onnx, export_to_onnx_model
+from archai.onnx.optimization import optimize_onnx, optimize_onnx_model
 
 
 def test_optimize_onnx():
@@ -31,3 +32,13 @@ def test_optimize_onnx():
 
     os.remove(onnx_model_path)
     os.remove(ort_model_path)
+
+
+def test_optimize_onnx_model():
+    model = GPT2LMHeadModel(config=GPT2Config(vocab_size=1, n_layer=1))
+    onnx_model, onnx_config = export_to_onnx_model(model)
+
+    # Assert that an in-memory model is returned when `optimize_onnx_model` is called
+    ort_model = optimize_onnx_model(onnx_model, onnx_config)
+    assert isinstance(ort_model, ModelProto)
+    assert any(opset.domain == "com.microsoft" for opset in ort_model.opset_import)
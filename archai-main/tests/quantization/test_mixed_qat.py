@@ -48,3 +48,39 @@ def test_mixed_qat_forward(base_model):
         outputs.loss * mixed_qat.regular_weight + qat_outputs.loss * mixed_qat.qat_weight
         == mixed_qat(input_ids=x, labels=x)[0]
     )
+
+
+def test_mixed_qat_shared_trunk(base_model):
+    x = torch.randint(0, 100, (2, 16))
+
+    mixed_qat = MixedQAT(base_model, shared_trunk=True)
+    separate_mixed_qat = MixedQAT(base_model)
+
+    # Assert that the single forward pass matches the separate forward passes
+    outputs = mixed_qat(input_ids=x, labels=x)
+    loss = outputs[0]
+    loss.backward()
+    grads = [param.grad.clone() for param in base_model.parameters()]
+    base_model.zero_grad(set_to_none=True)
+
+    separate_outputs = separate_mixed_qat(input_ids=x, labels=x)
+    separate_loss = separate_outputs[0]
+    separate_loss.backward()
+    assert torch.allclose(loss, separate_loss, atol=1e-5)
+    assert len(outputs) == len(separate_outputs)
+    assert torch.allclose(outputs[1], separate_outputs[1], atol=1e-5)
+    assert len(outputs[2]) == len(separate_outputs[2])
+    assert all(torch.allclose(g, p.grad, atol=1e-5) for g, p in zip(grads, base_model.parameters()))
+
+
+def test_mixed_qat_interval(base_model):
+    with pytest.raises(ValueError):
+        MixedQAT(base_model, qat_interval=0)
+
+    mixed_qat = MixedQAT(base_model, qat_interval=2)
+    x = torch.zeros((1, 16), dtype=torch.long)
+
+    # Assert that the QAT-based loss is only used every `qat_interval` steps
+    outputs = mixed_qat.model(input_ids=x, labels=x)
+    assert mixed_qat(input_ids=x, labels=x)[0] != outputs.loss
+    assert mixed_qat(input_ids=x, labels=x)[0] == outputs.loss
@@ -9,6 +9,7 @@ from archai.quantization.modules import (
     FakeDynamicQuantConv1d,
     FakeDynamicQuantLinear,
     FakeQuantEmbedding,
+    mixed_batch_forward,
 )
 
 
@@ -164,3 +165,22 @@ def test_fake_dynamic_quant_conv1d_to_float(fake_dynamic_quant_conv1d):
     assert float_mod.kernel_size == fake_dynamic_quant_conv1d.kernel_size
     assert torch.equal(float_mod.weight, fake_dynamic_quant_conv1d.weight_fake_quant(fake_dynamic_quant_conv1d.weight))
     assert torch.equal(float_mod.bias, fake_dynamic_quant_conv1d.bias)
+
+
+def test_mixed_batch_forward():
+    x = torch.rand(4, 6, 3)
+
+    # Assert that the batch is split on `batch_dim`
+    y = mixed_batch_forward(x, lambda t: t, lambda t: -t, batch_size=2)
+    assert torch.equal(y, torch.cat([x[:2], -x[2:]]))
+
+    y = mixed_batch_forward(x, lambda t: t, lambda t: -t, batch_size=3, batch_dim=1)
+    assert torch.equal(y, torch.cat([x[:, :3], -x[:, 3:]], dim=1))
+
+    # Assert that inputs broadcasted over the batch are shared by both branches
+    y = mixed_batch_forward(x[:, :1], lambda t: t, lambda t: -t, batch_size=3, batch_dim=1)
+    assert y.shape == (4, 6, 3)
+
+    # Assert that a ValueError is raised if the batch does not follow the expected layout
+    with pytest.raises(ValueError):
+        mixed_batch_forward(x, lambda t: t, lambda t: -t, batch_size=3)
@@ -3,19 +3,44 @@
 
 import os
 
+import onnx
 import pytest
 import torch
+from overrides import overrides
 from transformers import GPT2Config, GPT2LMHeadModel
 
+from archai.api.dataset_provider import DatasetProvider
 from archai.common.file_utils import create_file_name_identifier
 from archai.onnx.export import export_to_onnx
 from archai.onnx.optimization import optimize_onnx
 from archai.quantization.ptq import (
+    DatasetProviderDataReader,
     dynamic_quantization_onnx,
     dynamic_quantization_torch,
+    evaluate_static_quantization,
+    static_quantization_onnx,
 )
 
 
+class DummyDatasetProvider(DatasetProvider):
+    def __init__(self):
+        super().__init__()
+
+        self.dataset = torch.utils.data.TensorDataset(torch.randn(16, 3, 8, 8), torch.randint(0, 4, (16,)))
+
+    @overrides
+    def get_train_dataset(self):
+        return self.dataset
+
+    @overrides
+    def get_val_dataset(self):
+        return self.dataset
+
+    @overrides
+    def get_test_dataset(self):
+        return self.dataset
+
+
 @pytest.fixture
 def onnx_model_path():
     model = GPT2LMHeadModel(config=GPT2Config(vocab_size=1, n_layer=1))
@@ -61,10 +86,46 @@ def test_dynamic_quantization_onnx(onnx_model_path):
 
 def test_dynamic_quantization_torch(model):
     # Assert that the quantized model has the expected properties
+    # and the number of threads is not changed
+    num_threads = torch.get_num_threads()
     model_qnt = dynamic_quantization_torch(model)
+    assert torch.get_num_threads() == num_threads
     assert isinstance(model_qnt, torch.nn.Module)
     assert isinstance(model_qnt.fc1, torch.nn.quantized.Linear)
     assert isinstance(model_qnt.fc2, torch.nn.quantized.Linear)
     assert isinstance(model_qnt.word_emb, torch.nn.quantized.Embedding)
     assert isinstance(model_qnt.transformer["wpe"], torch.nn.quantized.Embedding)
     assert isinstance(model_qnt.transformer["wte"], torch.nn.quantized.Embedding)
+
+
+def test_static_quantization_onnx(tmp_path):
+    model = torch.nn.Sequential(
+        torch.nn.Conv2d(3, 8, 3), torch.nn.ReLU(), torch.nn.Flatten(), torch.nn.Linear(8 * 6 * 6, 4)
+    ).eval()
+    onnx_model_path = str(tmp_path / "model.onnx")
+    torch.onnx.export(model, torch.randn(1, 3, 8, 8), onnx_model_path, input_names=["x"], dynamic_axes={"x": {0: "b"}})
+
+    data_reader = DatasetProviderDataReader(DummyDatasetProvider(), ["x"], num_samples=8, batch_size=4)
+    cache_dir = tmp_path / "cache"
+
+    # Assert that the model is quantized with QDQ nodes and calibration statistics are cached
+    qnt_model_path = static_quantization_onnx(onnx_model_path, data_reader, cache_dir=str(cache_dir))
+    assert qnt_model_path == create_file_name_identifier(onnx_model_path, "-static-int8")
+    assert "QuantizeLinear" in {node.op_type for node in onnx.load(qnt_model_path).graph.node}
+    assert len(list(cache_dir.iterdir())) == 1
+
+    # Assert that cached statistics are re-used
+    data_reader.rewind()
+    static_quantization_onnx(onnx_model_path, data_reader, calibrate_method="minmax", cache_dir=str(cache_dir))
+    assert len(list(cache_dir.iterdir())) == 1
+
+    # Assert that a different dataset with the same split and size is calibrated again
+    other_data_reader = DatasetProviderDataReader(DummyDatasetProvider(), ["x"], num_samples=8, batch_size=4)
+    assert other_data_reader.cache_key != data_reader.cache_key
+    static_quantization_onnx(onnx_model_path, other_data_reader, cache_dir=str(cache_dir))
+    assert len(list(cache_dir.iterdir())) == 2
+
+    results = evaluate_static_quantization(onnx_model_path, qnt_model_path, data_reader)
+    assert results["latency_qnt"] > 0
+    assert 0.0 <= results["accuracy_qnt"] <= 1.0
+    assert results["accuracy_delta"] == results["accuracy_qnt"] - results["accuracy_float"]
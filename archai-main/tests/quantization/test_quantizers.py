@@ -73,3 +73,41 @@ def test_fake_dynamic_quant():
             x, fake_quant._scale, fake_quant._zero_pointer, fake_quant.qmin, fake_quant.qmax
         ),
     )
+
+
+def test_fake_dynamic_quant_cache_outputs():
+    weight = torch.nn.Parameter(torch.randn(8, 4))
+    optimizer = torch.optim.SGD([weight], lr=0.1)
+
+    fake_quant = FakeDynamicQuant(dtype=torch.qint8, reduce_range=False, cache_outputs=True)
+    ref_fake_quant = FakeDynamicQuant(dtype=torch.qint8, reduce_range=False)
+
+    # Assert that cached outputs and gradients match the non-cached ones
+    y = fake_quant(weight)
+    y.sum().backward()
+    grad = weight.grad.clone()
+    weight.grad = None
+
+    y_ref = ref_fake_quant(weight)
+    y_ref.sum().backward()
+    assert torch.equal(y, y_ref)
+    assert torch.equal(grad, weight.grad)
+
+    # Assert that the cache is re-used until the weight is updated by the optimizer
+    cache = fake_quant._cache
+    fake_quant(weight)
+    assert fake_quant._cache is cache
+
+    optimizer.step()
+    assert torch.equal(fake_quant(weight), ref_fake_quant(weight))
+    assert fake_quant._cache is not cache
+
+    # Assert that the cache is invalidated when the data of the weight is replaced
+    cache = fake_quant._cache
+    weight.data = torch.randn(8, 4)
+    assert torch.equal(fake_quant(weight), ref_fake_quant(weight))
+    assert fake_quant._cache is not cache
+
+    # Assert that the cache is cleared when the module is converted
+    fake_quant.to(torch.float32)
+    assert fake_quant._cache is None
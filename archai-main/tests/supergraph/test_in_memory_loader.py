@@ -0,0 +1,97 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import numpy as np
+import pytest
+import torch
+from torch.utils.data import ConcatDataset
+from torchvision.transforms import transforms
+
+from archai.datasets.cv.transforms.custom_cutout import CustomCutout
+from archai.supergraph.datasets.distributed_stratified_sampler import (
+    DistributedStratifiedSampler,
+)
+from archai.supergraph.datasets.in_memory_loader import (
+    BatchTransform,
+    InMemoryDataLoader,
+    TensorImageDataset,
+)
+
+
+class _CifarLikeDataset:
+    def __init__(self, n: int = 40):
+        rng = np.random.RandomState(0)
+        self.data = rng.randint(0, 256, size=(n, 8, 8, 3), dtype=np.uint8)
+        self.targets = [i % 4 for i in range(n)]
+        self.transform = None
+
+    def __len__(self):
+        return len(self.data)
+
+
+def test_tensor_image_dataset():
+    dataset = _CifarLikeDataset()
+    tensor_dataset = TensorImageDataset.from_dataset(dataset)
+    assert tensor_dataset.data.shape == (40, 3, 8, 8)
+    assert tensor_dataset.data.dtype == torch.uint8
+    assert tensor_dataset.targets == dataset.targets
+    assert torch.equal(tensor_dataset.data[5], torch.from_numpy(dataset.data[5]).permute(2, 0, 1))
+
+    concat_dataset = TensorImageDataset.from_dataset(ConcatDataset([tensor_dataset, tensor_dataset]))
+    assert len(concat_dataset) == 80
+
+
+def test_batch_transform():
+    mean, std = [0.5, 0.4, 0.3], [0.2, 0.2, 0.2]
+    compose = transforms.Compose([transforms.ToTensor(), transforms.Normalize(mean, std)])
+    batch_transform = BatchTransform.from_compose(compose)
+
+    dataset = _CifarLikeDataset()
+    x = TensorImageDataset.from_dataset(dataset).data[:4]
+    expected = torch.stack([compose(img) for img in dataset.data[:4]])
+    assert torch.allclose(batch_transform(x), expected, atol=1e-5)
+
+    train_compose = transforms.Compose(
+        [
+            transforms.RandomCrop(8, padding=2),
+            transforms.RandomHorizontalFlip(),
+            transforms.RandomAffine(degrees=15, translate=(0.1, 0.1), scale=(0.9, 1.1), shear=0.1),
+            transforms.ToTensor(),
+            transforms.Normalize(mean, std),
+            CustomCutout(4),
+        ]
+    )
+    assert BatchTransform.from_compose(train_compose)(x).shape == (4, 3, 8, 8)
+
+    with pytest.raises(ValueError):
+        BatchTransform.from_compose(transforms.Compose([transforms.ColorJitter(0.1)]))
+
+
+def test_in_memory_data_loader():
+    dataset = TensorImageDataset.from_dataset(_CifarLikeDataset())
+    sampler = DistributedStratifiedSampler(dataset, world_size=1, rank=0, shuffle=True, val_ratio=0.0)
+    loader = InMemoryDataLoader(dataset, batch_size=16, sampler=sampler)
+    assert len(loader) == 3
+
+    seen = []
+    for x, y in loader:
+        assert x.dtype == torch.float32
+        assert x.shape[1:] == (3, 8, 8)
+        seen.extend(y.tolist())
+    assert sorted(seen) == sorted(dataset.targets)
+
+    loader = InMemoryDataLoader(dataset, batch_size=16, sampler=sampler, drop_last=True)
+    assert len(loader) == 2
+    assert len(list(loader)) == 2
+
+
+def test_batch_transform_asymmetric_padding():
+    dataset = _CifarLikeDataset()
+    x = TensorImageDataset.from_dataset(dataset).data[:4]
+
+    # Crops with the padded (height, width) are deterministic, so only the padded sides are compared
+    for padding, size in [((1, 2, 3, 4), (14, 12)), ((1, 3), (14, 10))]:
+        compose = transforms.Compose([transforms.ToTensor(), transforms.RandomCrop(size, padding=padding)])
+
+        expected = torch.stack([compose(img) for img in dataset.data[:4]])
+        assert torch.equal(BatchTransform.from_compose(compose)(x), expected)
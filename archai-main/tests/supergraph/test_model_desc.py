@@ -0,0 +1,76 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import os
+import tempfile
+
+import torch
+import yaml
+
+from archai.common.config import Config
+from archai.supergraph.algos.darts.darts_model_desc_builder import (
+    DartsModelDescBuilder,
+)
+from archai.supergraph.nas.model_desc import LazyTrainables, ModelDesc
+
+
+def _build_model_desc():
+    conf = Config(config_filepath="confs/algos/darts.yaml")
+    return DartsModelDescBuilder().build(conf["nas"]["search"]["model_desc"])
+
+
+def test_model_desc_binary_round_trip():
+    model_desc = _build_model_desc()
+
+    data = model_desc.to_bytes()
+    decoded = ModelDesc.from_bytes(data)
+
+    assert decoded.to_bytes() == data
+    assert decoded.content_hash() == model_desc.content_hash()
+    assert len(data) < len(yaml.dump(model_desc))
+
+
+def test_model_desc_clone():
+    model_desc = _build_model_desc()
+    op_desc = model_desc.cell_descs()[0].nodes()[0].edges[0].op_desc
+    op_desc.trainables = {"name": op_desc.name, "sd": {"w": torch.ones(2)}}
+
+    cloned = model_desc.clone()
+    cloned_op_desc = cloned.cell_descs()[0].nodes()[0].edges[0].op_desc
+
+    assert cloned.content_hash() == model_desc.content_hash()
+    assert cloned_op_desc is not op_desc
+    assert cloned_op_desc.trainables is op_desc.trainables
+    assert cloned.conf_model_desc is not model_desc.conf_model_desc
+    assert cloned.cell_descs()[0].conf_cell is not model_desc.cell_descs()[0].conf_cell
+
+    # Assert that modifying the config of a clone does not modify the source
+    cloned.conf_model_desc["max_final_edges"] = model_desc.conf_model_desc["max_final_edges"] + 1
+    assert cloned.conf_model_desc["max_final_edges"] != model_desc.conf_model_desc["max_final_edges"]
+
+    assert op_desc.clone(clone_trainables=False).trainables is None
+
+    cloned.cell_descs()[0].nodes()[0].edges.pop()
+    assert cloned.content_hash() != model_desc.content_hash()
+
+
+def test_model_desc_save_load_binary():
+    model_desc = _build_model_desc()
+    op_desc = model_desc.cell_descs()[0].nodes()[0].edges[0].op_desc
+    op_desc.trainables = {"name": op_desc.name, "sd": {"w": torch.ones(2)}}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "model_desc.bin")
+        model_desc.save(filename, save_trainables=True, binary=True)
+
+        loaded = ModelDesc.load(filename, load_trainables=True)
+        loaded_op_desc = loaded.cell_descs()[0].nodes()[0].edges[0].op_desc
+        assert isinstance(loaded_op_desc._trainables, LazyTrainables)
+        assert torch.equal(loaded_op_desc.trainables["sd"]["w"], torch.ones(2))
+        assert loaded.content_hash() == model_desc.content_hash()
+
+        # YAML descs are still supported
+        yaml_filename = os.path.join(tmp_dir, "model_desc.yaml")
+        model_desc.save(yaml_filename, save_trainables=True)
+        loaded = ModelDesc.load(yaml_filename, load_trainables=True)
+        assert torch.equal(loaded.cell_descs()[0].nodes()[0].edges[0].op_desc.trainables["sd"]["w"], torch.ones(2))
@@ -6,8 +6,13 @@ import pytest
 if os.name == "nt":
     pytest.skip(allow_module_level=True)
 
+import torch
 from torch.utils.data import Dataset
-from archai.trainers.nlp.ds_trainer import StatefulDistributedSampler
+from archai.trainers.nlp.ds_trainer import (
+    DsTrainer,
+    StatefulDistributedSampler,
+    prefetch_to_device,
+)
 
 
 class DummyDataset(Dataset):
@@ -33,3 +38,61 @@ def test_stateful_distributed_sampler():
     sampler = StatefulDistributedSampler(dataset, num_replicas=2, rank=0, shuffle=False, total_consumed_samples=80)
     expected_indices = [i for i in range(80, 100, 2)]
     assert list(iter(sampler)) == expected_indices
+
+
+def test_prefetch_to_device():
+    batches = [(torch.arange(4), {"labels": torch.ones(2)}) for _ in range(3)]
+
+    # Assert that all batches are moved to the device and their structure is kept
+    prefetched_batches = list(prefetch_to_device(iter(batches), "cpu"))
+    assert len(prefetched_batches) == 3
+    for batch, prefetched_batch in zip(batches, prefetched_batches):
+        assert isinstance(prefetched_batch, tuple)
+        assert torch.equal(prefetched_batch[0], batch[0])
+        assert torch.equal(prefetched_batch[1]["labels"], batch[1]["labels"])
+
+    # Assert that batches are prefetched on CUDA devices
+    if torch.cuda.is_available():
+        prefetched_batches = list(prefetch_to_device(iter(batches), "cuda"))
+        assert len(prefetched_batches) == 3
+        assert all(b[0].is_cuda and b[1]["labels"].is_cuda for b in prefetched_batches)
+
+
+class DummyEngine:
+    def __init__(self, model, gradient_accumulation_steps):
+        self.model = model
+        self.device = torch.device("cpu")
+        self.optimizer = torch.optim.SGD(model.parameters(), lr=0.1)
+        self._gradient_accumulation_steps = gradient_accumulation_steps
+
+    def __call__(self, input_ids, labels=None):
+        return (self.model(input_ids.float()).squeeze(-1) - labels.float()) ** 2,
+
+    def gradient_accumulation_steps(self):
+        return self._gradient_accumulation_steps
+
+    def backward(self, loss):
+        loss.backward()
+
+    def step(self):
+        self.optimizer.step()
+        self.optimizer.zero_grad()
+
+
+def test_ds_trainer_train_batch_without_pipe_parallel():
+    torch.manual_seed(0)
+
+    trainer = DsTrainer.__new__(DsTrainer)
+    trainer.engine = DummyEngine(torch.nn.Linear(1, 1), gradient_accumulation_steps=4)
+
+    batches = [(torch.full((2, 1), float(i)), None) for i in range(4)]
+    loss = trainer.train_batch_without_pipe_parallel(data_iter=prefetch_to_device(iter(batches), "cpu"))
+
+    # Assert that the loss is averaged on the device and detached from the graph
+    assert isinstance(loss, torch.Tensor)
+    assert loss.device == trainer.engine.device
+    assert not loss.requires_grad
+
+    eval_loss = trainer.eval_batch_without_pipe_parallel(data_iter=iter(batches))
+    assert isinstance(eval_loss, torch.Tensor)
+    assert eval_loss.item() < loss.item()
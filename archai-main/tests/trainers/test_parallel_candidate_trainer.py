@@ -0,0 +1,110 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import time
+from functools import partial
+
+import pytest
+import torch
+from torch.utils.data import DataLoader, TensorDataset
+
+from archai.trainers import parallel_candidate_trainer
+from archai.trainers.parallel_candidate_trainer import (
+    CandidateTrainer,
+    ParallelCandidateTrainer,
+)
+
+
+class LinearCandidateTrainer(CandidateTrainer):
+    def __init__(self, lr, fail=False, step_time=0.0):
+        torch.manual_seed(0)
+
+        self.model = torch.nn.Linear(4, 1)
+        self.optimizer = torch.optim.SGD(self.model.parameters(), lr=lr)
+        self.fail = fail
+        self.step_time = step_time
+        self.losses = []
+
+    def train_step(self, batch):
+        if self.fail:
+            raise ValueError("Failed candidate.")
+
+        time.sleep(self.step_time)
+
+        x, y = batch
+        loss = torch.nn.functional.mse_loss(self.model(x), y)
+
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+
+    def eval_step(self, batch):
+        time.sleep(self.step_time)
+
+        x, y = batch
+        self.losses.append(torch.nn.functional.mse_loss(self.model(x), y).item())
+
+    def end_epoch(self, epoch):
+        loss = sum(self.losses) / len(self.losses)
+        self.losses = []
+
+        return loss
+
+
+def _get_dataloader():
+    x = torch.randn(64, 4, generator=torch.Generator().manual_seed(1))
+    y = x.sum(dim=-1, keepdim=True)
+
+    return DataLoader(TensorDataset(x, y), batch_size=8)
+
+
+def test_parallel_candidate_trainer():
+    trainer = ParallelCandidateTrainer(
+        {"slow": partial(LinearCandidateTrainer, 1e-3), "fast": partial(LinearCandidateTrainer, 5e-2)},
+        max_queued_batches=2,
+    )
+    assert trainer.num_threads_per_candidate >= 1
+
+    dataloader = _get_dataloader()
+    metrics = trainer.fit(dataloader, dataloader, epochs=3)
+
+    assert set(metrics.keys()) == {"slow", "fast"}
+    assert all(len(m) == 3 for m in metrics.values())
+    assert metrics["fast"][-1] < metrics["fast"][0]
+    assert metrics["fast"][-1] < metrics["slow"][-1]
+
+    # Results match a sequential training of the same candidate
+    candidate = LinearCandidateTrainer(5e-2)
+    for epoch in range(3):
+        for batch in dataloader:
+            candidate.train_step(batch)
+        with torch.no_grad():
+            for batch in dataloader:
+                candidate.eval_step(batch)
+        assert candidate.end_epoch(epoch) == pytest.approx(metrics["fast"][epoch], rel=1e-5)
+
+
+def test_parallel_candidate_trainer_slow_candidate(monkeypatch):
+    monkeypatch.setattr(parallel_candidate_trainer, "_POLL_TIMEOUT", 0.1)
+
+    # The slow candidate takes longer than the polling timeout, so results of the fast
+    # candidate are received while waiting to broadcast the end of epoch to the slow one
+    trainer = ParallelCandidateTrainer(
+        {"fast": partial(LinearCandidateTrainer, 1e-3), "slow": partial(LinearCandidateTrainer, 1e-3, step_time=0.2)},
+        max_queued_batches=1,
+    )
+
+    dataloader = _get_dataloader()
+    metrics = trainer.fit(dataloader, dataloader, epochs=2)
+
+    assert all(len(m) == 2 for m in metrics.values())
+    assert metrics["fast"] == pytest.approx(metrics["slow"])
+
+
+def test_parallel_candidate_trainer_failure():
+    trainer = ParallelCandidateTrainer(
+        {"ok": partial(LinearCandidateTrainer, 1e-3), "failed": partial(LinearCandidateTrainer, 1e-3, fail=True)}
+    )
+
+    with pytest.raises(RuntimeError, match="failed"):
+        trainer.fit(_get_dataloader(), epochs=1)